@@ -5,7 +5,7 @@ from django.utils import timezone
 from django.db.models import Sum
 from decimal import Decimal
 import json
-from core.models import OdemeDagitim
+from core.models import OdemeDagitim, DovizKuru, MaliyetDonemOzeti, TedarikciBakiye, OdemeTalimati, OdemeTalimatiSatiri, BankaEkstresi, BankaHareketi, FinansKpiOzeti, DonemKapanisi
 
 from .models import (
     Kategori, IsKalemi, Tedarikci, Teklif, SatinAlma, GiderKategorisi, Harcama, Odeme, 
@@ -34,10 +34,10 @@ class IsKalemiAdmin(admin.ModelAdmin):
 
 @admin.register(Tedarikci)
 class TedarikciAdmin(admin.ModelAdmin):
-    list_display = ('firma_unvani', 'yetkili_kisi', 'telefon', 'is_active')
+    list_display = ('firma_unvani', 'vergi_no', 'yetkili_kisi', 'telefon', 'odeme_vadesi_gun', 'is_active')
     list_filter = ('is_active',)
     search_fields = ('firma_unvani', 'yetkili_kisi', 'telefon')
-    search_fields = ('firma_unvani',)
+    search_fields = ('firma_unvani', 'vergi_no')
 
 # --- DEPO VE MALZEME YÖNETİMİ ---
 
@@ -180,4 +180,61 @@ class HakedisAdmin(admin.ModelAdmin):
 @admin.register(OdemeDagitim)
 class OdemeDagitimAdmin(admin.ModelAdmin):
     list_display = ("id", "odeme", "fatura", "tutar", "tarih")
-    search_fields = ("odeme__tedarikci__firma_unvani", "fatura__fatura_no")
\ No newline at end of file
+    search_fields = ("odeme__tedarikci__firma_unvani", "fatura__fatura_no")
+
+@admin.register(DovizKuru)
+class DovizKuruAdmin(admin.ModelAdmin):
+    list_display = ("tarih", "para_birimi", "kur", "kaynak")
+    list_filter = ("para_birimi",)
+    date_hierarchy = "tarih"
+
+@admin.register(MaliyetDonemOzeti)
+class MaliyetDonemOzetiAdmin(admin.ModelAdmin):
+    list_display = ("ay", "kalem_tipi", "kayit_sayisi", "tutar_try", "tutar_usd", "tutar_eur", "tutar_gbp", "kursuz_kayit", "guncellendi")
+    list_filter = ("kalem_tipi",)
+    date_hierarchy = "ay"
+
+@admin.register(TedarikciBakiye)
+class TedarikciBakiyeAdmin(admin.ModelAdmin):
+    list_display = ("tedarikci", "fatura_kalan", "hakedis_kalan", "kalan_borc", "avans_bakiye", "cari_bakiye", "guncellendi")
+    search_fields = ("tedarikci__firma_unvani",)
+    ordering = ("-kalan_borc",)
+
+class OdemeTalimatiSatiriInline(admin.TabularInline):
+    model = OdemeTalimatiSatiri
+    extra = 0
+    raw_id_fields = ("tedarikci", "odeme")
+
+@admin.register(OdemeTalimati)
+class OdemeTalimatiAdmin(admin.ModelAdmin):
+    list_display = ("id", "tarih", "kesim_tarihi", "durum", "olusturan", "islendi_at")
+    list_filter = ("durum",)
+    inlines = [OdemeTalimatiSatiriInline]
+
+@admin.register(BankaEkstresi)
+class BankaEkstresiAdmin(admin.ModelAdmin):
+    list_display = ("id", "dosya_adi", "bicim", "banka_adi", "satir_sayisi", "eslesen_sayisi", "created_at")
+    list_filter = ("bicim",)
+
+@admin.register(BankaHareketi)
+class BankaHareketiAdmin(admin.ModelAdmin):
+    list_display = ("tarih", "yon", "tutar", "referans", "odeme", "ekstre")
+    list_filter = ("yon",)
+    search_fields = ("referans", "aciklama")
+    raw_id_fields = ("odeme", "ekstre")
+
+@admin.register(FinansKpiOzeti)
+class FinansKpiOzetiAdmin(admin.ModelAdmin):
+    list_display = ("tarih", "yatirim_maliyeti", "acik_fatura", "acik_hakedis", "piyasa_borc", "verilen_avans", "cek_riski")
+    date_hierarchy = "tarih"
+
+@admin.register(DonemKapanisi)
+class DonemKapanisiAdmin(admin.ModelAdmin):
+    # Kapanış / geri açma dönem kapanışı ekranından yapılır; özetler değişmez
+    list_display = ("ay", "baslangic", "bitis", "kapatan", "created_at")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,6 +1,7 @@
 # core/forms/tanimlar.py
 from django import forms
 from core.models import Kategori, Depo, Tedarikci, Malzeme, IsKalemi
+from core.utils import iban_normalize
 
 # ========================================================
 # KATEGORİ VE TANIMLAMA FORMLARI
@@ -32,14 +33,23 @@ class DepoForm(forms.ModelForm):
 class TedarikciForm(forms.ModelForm):
     class Meta:
         model = Tedarikci
-        fields = ['firma_unvani', 'yetkili_kisi', 'telefon', 'adres']
+        fields = ['firma_unvani', 'vergi_no', 'yetkili_kisi', 'telefon', 'odeme_vadesi_gun', 'iban', 'adres']
         widgets = {
             'firma_unvani': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Örn: İnşaat Ltd. Şti.', 'aria-label': 'Firma Unvanı'}),
+            'vergi_no': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'VKN (10) / TCKN (11)', 'inputmode': 'numeric', 'aria-label': 'Vergi No'}),
             'yetkili_kisi': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ad Soyad', 'aria-label': 'Yetkili Kişi'}),
             'telefon': forms.TextInput(attrs={'class': 'form-control', 'placeholder': '05XX XXX XX XX', 'aria-label': 'Telefon'}),
+            'odeme_vadesi_gun': forms.NumberInput(attrs={'class': 'form-control', 'min': 0, 'placeholder': 'Örn: 30', 'aria-label': 'Ödeme Vadesi (Gün)'}),
+            'iban': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'TR00 0000 0000 0000 0000 0000 00', 'aria-label': 'IBAN'}),
             'adres': forms.Textarea(attrs={'class': 'form-control', 'rows': 3, 'aria-label': 'Adres'}),
         }
 
+    def clean_iban(self):
+        return iban_normalize(self.cleaned_data.get('iban'))
+
+    def clean_vergi_no(self):
+        return "".join(str(self.cleaned_data.get('vergi_no') or "").split())
+
 class MalzemeForm(forms.ModelForm):
     class Meta:
         model = Malzeme
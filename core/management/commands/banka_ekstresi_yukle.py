@@ -0,0 +1,31 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.banka_ekstresi import BICIMLER, TARIH_PENCERESI, BankStatementService
+
+
+class Command(BaseCommand):
+    help = "Banka ekstresini (CSV / MT940) içe aktarır ve çıkış hareketlerini kayıtlı ödemelerle eşleştirir."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dosya", help="Ekstre dosyasının yolu")
+        parser.add_argument("--bicim", choices=BICIMLER, default=None, help="Varsayılan: dosya uzantısından")
+        parser.add_argument("--banka", default="", help="Banka adı (farklı bankanın ödemeleri aday olmaz)")
+        parser.add_argument("--pencere", type=int, default=TARIH_PENCERESI, help="Tarih toleransı (± gün)")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["dosya"], "rb") as f:
+                ekstre = BankStatementService.ice_aktar(
+                    f, options["dosya"].replace("\\", "/").rsplit("/", 1)[-1],
+                    bicim=options["bicim"], banka_adi=options["banka"], pencere=options["pencere"],
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+        except ValidationError as e:
+            raise CommandError(" ".join(e.messages))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Ekstre #{ekstre.id}: {ekstre.satir_sayisi} hareket, {ekstre.eslesen_sayisi} eşleşen, "
+            f"{ekstre.satir_sayisi - ekstre.eslesen_sayisi} inceleme bekliyor."
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.services.cari_bakiye import BalanceService
+
+
+class Command(BaseCommand):
+    help = "Tedarikçi cari bakiye defterini faturalar, hakedişler ve ödemelerden baştan oluşturur."
+
+    def handle(self, *args, **options):
+        adet = BalanceService.tumunu_yeniden_olustur()
+        self.stdout.write(self.style.SUCCESS(f"✅ {adet} tedarikçi bakiyesi yazıldı."))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+import zipfile
+
+from core.models import TedarikciBakiye
+from core.services import ekstre_export
+
+
+class Command(BaseCommand):
+    help = (
+        "Bakiyesi sıfır olmayan tüm tedarikçilerin cari ekstrelerini tek zip dosyasına yazar. "
+        "Her ekstre zip içine parça parça akar; tüm veri belleğe alınmaz."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("cikti", help="Yazılacak zip dosyası (ör. ekstreler_2024.zip)")
+        parser.add_argument("--bicim", choices=sorted(ekstre_export.BICIMLER), default="pdf")
+        parser.add_argument("--d1", default="", help="Başlangıç tarihi (YYYY-MM-DD), devir satırı üretir.")
+        parser.add_argument("--d2", default="", help="Bitiş tarihi (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        try:
+            d1 = parse_date(options["d1"]) if options["d1"] else None
+            d2 = parse_date(options["d2"]) if options["d2"] else None
+        except ValueError as e:
+            raise CommandError(f"Geçersiz tarih: {e}")
+        bicim = options["bicim"]
+
+        bakiyeler = (
+            TedarikciBakiye.objects.exclude(cari_bakiye=0)
+            .select_related("tedarikci")
+            .order_by("tedarikci__firma_unvani")
+        )
+
+        adet = 0
+        with zipfile.ZipFile(options["cikti"], "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for b in bakiyeler.iterator(chunk_size=200):
+                ad = ekstre_export.dosya_adi(b.tedarikci, bicim, d1, d2)
+                with zf.open(ad, "w", force_zip64=True) as f:
+                    for parca in ekstre_export.parcalar(bicim, b.tedarikci, d1, d2):
+                        f.write(parca)
+                adet += 1
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {adet} tedarikçi ekstresi yazıldı: {options['cikti']}"))
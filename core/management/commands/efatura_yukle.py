@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Depo
+from core.services.efatura import EInvoiceImportService
+
+
+class Command(BaseCommand):
+    help = "UBL-TR e-Fatura XML'lerini (dosya, .zip veya klasör) alış faturası olarak içe aktarır."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kaynak", help=".xml / .zip dosyası veya klasör yolu")
+        parser.add_argument("--depo", type=int, default=None, help="Giriş deposu id (varsayılan: sanal depo)")
+        parser.add_argument("--tedarikci-acma", action="store_true", help="Bulunamayan tedarikçinin faturası hatalı sayılır")
+        parser.add_argument("--malzeme-acma", action="store_true", help="Bulunamayan malzemenin faturası hatalı sayılır")
+
+    def handle(self, *args, **options):
+        depo = None
+        if options["depo"]:
+            depo = Depo.objects.filter(pk=options["depo"]).first()
+            if depo is None:
+                raise CommandError("Depo bulunamadı.")
+        try:
+            rapor = EInvoiceImportService.ice_aktar(
+                options["kaynak"], depo=depo,
+                tedarikci_ac=not options["tedarikci_acma"], malzeme_ac=not options["malzeme_acma"],
+            )
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for mesaj in rapor.mesajlar:
+            self.stdout.write(f"  - {mesaj}")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {rapor.okunan} fatura okundu: {rapor.eklenen} eklendi ({rapor.kalem} kalem), "
+            f"{rapor.mukerrer} mükerrer, {rapor.atlanan} atlandı, {rapor.hatali} hatalı. "
+            f"Yeni tedarikçi: {rapor.yeni_tedarikci}, yeni malzeme: {rapor.yeni_malzeme}."
+        ))
@@ -0,0 +1,28 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core.services.kpi_ozeti import KpiSnapshotService
+
+
+class Command(BaseCommand):
+    help = "Finans panelinin ana göstergelerini günlük KPI özet tablosuna yazar (gece cron ile çalıştırın)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tarih", default=None, help="Özet tarihi YYYY-MM-DD (sadece bugün kabul edilir; varsayılan: bugün)")
+
+    def handle(self, *args, **options):
+        tarih = None
+        if options["tarih"]:
+            tarih = parse_date(options["tarih"])
+            if tarih is None:
+                raise CommandError("Geçersiz tarih (YYYY-MM-DD).")
+
+        try:
+            ozet = KpiSnapshotService.kaydet(tarih)
+        except ValidationError as e:
+            raise CommandError(" ".join(e.messages))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {ozet.tarih} KPI özeti yazıldı: yatırım {ozet.yatirim_maliyeti:,.2f} TL, "
+            f"piyasa borcu {ozet.piyasa_borc:,.2f} TL, çek riski {ozet.cek_riski:,.2f} TL."
+        ))
@@ -0,0 +1,94 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.services import tcmb_client
+from core.services.exchange_rates import STORED_CURRENCIES, _store_rates, get_rates_bulk
+from core.services.rate_providers import TCMBHTTPProvider, get_provider
+
+
+class Command(BaseCommand):
+    help = (
+        "Kur çözümleme gecikmesini katman bazında ölçer: "
+        "cache (today.xml taze kopya), veritabanı (DovizKuru) ve ağ/sağlayıcı (aktif RATE_PROVIDER)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tarih-sayisi", type=int, default=5, help="Ölçülecek geçmiş iş günü sayısı.")
+        parser.add_argument("--tekrar", type=int, default=20, help="Cache ve DB katmanı için tekrar sayısı.")
+
+    def handle(self, *args, **options):
+        provider = get_provider()
+        tarihler = _son_is_gunleri(options["tarih_sayisi"])
+        tekrar = max(1, options["tekrar"])
+
+        self.stdout.write(f"Sağlayıcı: {provider.__class__.__name__} | tarih: {len(tarihler)} | tekrar: {tekrar}")
+
+        # 1) Ağ / sağlayıcı katmanı: her tarih için doğrudan sağlayıcı (DB ve cache atlanır)
+        ag = []
+        hatalar = 0
+        for dt in tarihler:
+            t0 = time.perf_counter()
+            try:
+                fetched = provider.rates(dt)
+            except Exception as e:
+                hatalar += 1
+                self.stdout.write(self.style.WARNING(f"  {dt}: {e}"))
+                continue
+            ag.append((time.perf_counter() - t0) * 1000)
+            if provider.persistent:
+                _store_rates(dt, {pb: k for pb, k in fetched.rates.items() if pb in STORED_CURRENCIES}, fetched.source)
+        self._yaz("Ağ/Sağlayıcı", ag, hatalar)
+
+        # 2) Veritabanı katmanı: yerel kur deposundan toplu okuma (tüm dövizler x tüm tarihler)
+        if provider.persistent:
+            db = []
+            for _ in range(tekrar):
+                t0 = time.perf_counter()
+                get_rates_bulk(STORED_CURRENCIES, tarihler)
+                db.append((time.perf_counter() - t0) * 1000)
+            self._yaz("Veritabanı", db)
+        else:
+            self.stdout.write("Veritabanı   : atlandı (sağlayıcı kalıcı değil, DovizKuru'ya yazılmıyor)")
+
+        # 3) Cache katmanı: today.xml'in taze kopyası (sadece TCMB HTTP sağlayıcısında)
+        if isinstance(provider, TCMBHTTPProvider):
+            try:
+                provider.rates(None)  # ısıt
+                cache_ms = []
+                onceki = tcmb_client.metrics()["cache_hits"]
+                for _ in range(tekrar):
+                    t0 = time.perf_counter()
+                    provider.rates(None)
+                    cache_ms.append((time.perf_counter() - t0) * 1000)
+                isabet = tcmb_client.metrics()["cache_hits"] - onceki
+                self._yaz(f"Cache ({isabet}/{tekrar} isabet)", cache_ms)
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f"Cache        : ölçülemedi ({e})"))
+        else:
+            self.stdout.write("Cache        : atlandı (sadece TCMB HTTP sağlayıcısında var)")
+
+    def _yaz(self, etiket, olcumler, hatalar=0):
+        if not olcumler:
+            self.stdout.write(self.style.WARNING(f"{etiket:<13}: ölçüm yok (hata: {hatalar})"))
+            return
+        s = sorted(olcumler)
+        p95 = s[min(len(s) - 1, int(round(0.95 * (len(s) - 1))))]
+        self.stdout.write(
+            f"{etiket:<13}: n={len(s)} min={s[0]:.2f}ms p50={statistics.median(s):.2f}ms "
+            f"p95={p95:.2f}ms max={s[-1]:.2f}ms" + (f" hata={hatalar}" if hatalar else "")
+        )
+
+
+def _son_is_gunleri(adet):
+    """Bugünden geriye hafta içi günler (TCMB hafta sonu kur yayınlamaz)."""
+    out = []
+    dt = timezone.localdate() - timedelta(days=1)
+    while len(out) < adet:
+        if dt.weekday() < 5:
+            out.append(dt)
+        dt -= timedelta(days=1)
+    return out
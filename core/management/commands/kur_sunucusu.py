@@ -0,0 +1,91 @@
+import random
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.services.rate_providers import FixedRateProvider, build_tcmb_xml
+
+
+class Command(BaseCommand):
+    help = (
+        "TCMB yerine geçen yerel kur sunucusu (test / yük testi). "
+        "/kurlar/today.xml ve /kurlar/YYYYMM/DDMMYYYY.xml adreslerinden hazır XML döner. "
+        "Kullanım: DJANGO_TCMB_BASE_URL=http://127.0.0.1:8765/kurlar"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--dizin",
+            default="",
+            help="TCMB yapısında XML dizini. Dosya varsa aynen döner, yoksa sabit tablodan XML üretilir.",
+        )
+        parser.add_argument("--gecikme-ms", type=int, default=0, help="Her cevaba eklenecek gecikme (ms).")
+        parser.add_argument("--hata-orani", type=float, default=0.0, help="0-1 arası: bu oranda 503 döner.")
+
+    def handle(self, *args, **options):
+        dizin = Path(options["dizin"]) if options["dizin"] else None
+        gecikme = options["gecikme_ms"] / 1000.0
+        hata_orani = options["hata_orani"]
+        sabit = FixedRateProvider(getattr(settings, "RATE_FIXED_TABLE", {}))
+        stdout = self.stdout
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if gecikme:
+                    time.sleep(gecikme)
+                if hata_orani and random.random() < hata_orani:
+                    self.send_error(503, "Simüle edilmiş hata")
+                    return
+
+                yol = self.path.split("?", 1)[0]
+                if not yol.startswith("/kurlar/") or ".." in yol:
+                    self.send_error(404)
+                    return
+                goreli = yol[len("/kurlar/"):]
+
+                if dizin is not None and (dizin / goreli).is_file():
+                    body = (dizin / goreli).read_bytes()
+                else:
+                    if goreli == "today.xml":
+                        dt, anahtar = timezone.localdate(), None
+                    else:
+                        dt = anahtar = _tarih_coz(goreli)
+                    if dt is None:
+                        self.send_error(404)
+                        return
+                    body = build_tcmb_xml(dt, sabit.rates(anahtar).rates)
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/xml; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *log_args):
+                stdout.write(fmt % log_args)
+
+        server = ThreadingHTTPServer((options["host"], options["port"]), Handler)
+        self.stdout.write(self.style.SUCCESS(
+            f"Kur sunucusu: http://{options['host']}:{options['port']}/kurlar/ (durdurmak için Ctrl+C)"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+def _tarih_coz(goreli: str):
+    """'202401/05012024.xml' -> 2024-01-05, tanınmazsa None."""
+    try:
+        return datetime.strptime(goreli.rsplit("/", 1)[-1], "%d%m%Y.xml").date()
+    except ValueError:
+        return None
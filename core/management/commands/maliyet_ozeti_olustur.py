@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import DovizKuru, Fatura, Hakedis, Harcama, Odeme
+from core.services.exchange_rates import STORED_CURRENCIES, get_rates_bulk
+from core.services.revaluation import RevaluationService
+
+
+class Command(BaseCommand):
+    help = "Maliyet dönem özetini (işlem tarihi kuruyla USD/EUR/GBP) baştan oluşturur."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kurlari-tamamla",
+            action="store_true",
+            help="Önce işlem tarihlerinden yerel kur tablosunda olmayanları TCMB'den çek (default: HAYIR).",
+        )
+
+    def handle(self, *args, **options):
+        if options["kurlari_tamamla"]:
+            self._kurlari_tamamla()
+
+        adet = RevaluationService.ozet_yenile()
+        toplam = RevaluationService.maliyet_toplami() or {}
+        self.stdout.write(self.style.SUCCESS(f"✅ {adet} özet satırı yazıldı."))
+        if toplam.get("kursuz_kayit"):
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ {toplam['kursuz_kayit']} kaydın tarihinde (veya öncesinde) kur yok; döviz toplamına girmedi. "
+                f"--kurlari-tamamla ile tekrar deneyin."
+            ))
+
+    def _kurlari_tamamla(self):
+        bugun = timezone.localdate()
+
+        tarihler = set()
+        for model in (Fatura, Hakedis, Odeme, Harcama):
+            tarihler.update(model.objects.filter(tarih__lt=bugun).values_list("tarih", flat=True).distinct())
+
+        # TCMB hafta sonu kur yayımlamaz (404); özet zaten o tarihten önceki son kuru kullanır
+        tarihler = {t for t in tarihler if t.weekday() < 5}
+
+        mevcut = set(DovizKuru.objects.values_list("tarih", flat=True).distinct())
+        eksik = sorted(tarihler - mevcut)
+        if not eksik:
+            self.stdout.write("Yerel kur tablosu tam, TCMB'ye gidilmedi.")
+            return
+
+        self.stdout.write(f"{len(eksik)} tarih için kur çekiliyor...")
+        sonuc = get_rates_bulk(STORED_CURRENCIES, eksik)
+        basarisiz = sorted({dt for (_pb, dt), r in sonuc.items() if not r.ok})
+        if basarisiz:
+            self.stdout.write(self.style.WARNING(
+                f"Kuru alınamayan tarih sayısı: {len(basarisiz)} "
+                f"(resmi tatillerde TCMB kur yayımlamaz; bu tarihlerde önceki günün kuru kullanılır)"
+            ))
@@ -0,0 +1,30 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.payables import STRATEJILER, AllocationService
+
+
+class Command(BaseCommand):
+    help = "Dağıtılmamış ödemeleri (avans) açık faturalara otomatik dağıtır (FIFO veya önce tam tutar)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tedarikci", type=int, default=None, help="Sadece bu tedarikçi (varsayılan: tümü)")
+        parser.add_argument("--strateji", choices=STRATEJILER, default="fifo")
+        parser.add_argument("--deneme", action="store_true", help="Yazmadan sadece eşleşmeleri listele")
+
+    def handle(self, *args, **options):
+        try:
+            if options["deneme"]:
+                eslesmeler = AllocationService.planla(options["tedarikci"], options["strateji"])
+            else:
+                eslesmeler = AllocationService.otomatik_dagit(options["tedarikci"], options["strateji"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for e in eslesmeler:
+            self.stdout.write(f"Ödeme #{e.odeme_id} → Fatura #{e.fatura_id}: {e.tutar:,.2f} TL")
+
+        toplam = sum((e.tutar for e in eslesmeler), Decimal("0.00"))
+        etiket = "önerildi" if options["deneme"] else "yazıldı"
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(eslesmeler)} dağıtım {etiket} (toplam {toplam:,.2f} TL)."))
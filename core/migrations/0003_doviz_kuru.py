@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_odeme_is_cek_odendi'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DovizKuru',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('para_birimi', models.CharField(choices=[('TRY', 'Türk Lirası (₺)'), ('USD', 'Amerikan Doları ($)'), ('EUR', 'Euro (€)'), ('GBP', 'İngiliz Sterlini (£)')], max_length=3, verbose_name='Para Birimi')),
+                ('tarih', models.DateField(verbose_name='Kur Tarihi')),
+                ('kur', models.DecimalField(decimal_places=4, max_digits=12, verbose_name='Kur (TL)')),
+                ('kaynak', models.CharField(blank=True, default='', max_length=50, verbose_name='Kur Kaynağı')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Döviz Kuru',
+                'verbose_name_plural': 'Döviz Kurları',
+                'ordering': ['-tarih', 'para_birimi'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dovizkuru',
+            constraint=models.UniqueConstraint(fields=('para_birimi', 'tarih'), name='uniq_doviz_kuru_pb_tarih'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_doviz_kuru'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaliyetDonemOzeti',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ay', models.DateField(verbose_name="Dönem (Ayın 1'i)")),
+                ('kalem_tipi', models.CharField(choices=[('fatura', 'Alış Faturası'), ('hakedis', 'Hakediş'), ('odeme', 'Ödeme'), ('gider', 'Gider')], max_length=10, verbose_name='Kalem Tipi')),
+                ('kayit_sayisi', models.PositiveIntegerField(default=0, verbose_name='Kayıt Sayısı')),
+                ('kursuz_kayit', models.PositiveIntegerField(default=0, verbose_name='Kuru Bulunamayan Kayıt')),
+                ('tutar_try', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Toplam (TL)')),
+                ('tutar_usd', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Toplam (USD)')),
+                ('tutar_eur', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Toplam (EUR)')),
+                ('tutar_gbp', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Toplam (GBP)')),
+                ('guncellendi', models.DateTimeField(auto_now=True, verbose_name='Son Hesaplama')),
+            ],
+            options={
+                'verbose_name': 'Maliyet Dönem Özeti',
+                'verbose_name_plural': 'Maliyet Dönem Özetleri',
+                'ordering': ['-ay', 'kalem_tipi'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='maliyetdonemozeti',
+            constraint=models.UniqueConstraint(fields=('ay', 'kalem_tipi'), name='uniq_maliyet_ozet_ay_tip'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def defteri_doldur(apps, schema_editor):
+    from core.services.cari_bakiye import bakiye_hesapla
+
+    Tedarikci = apps.get_model('core', 'Tedarikci')
+    TedarikciBakiye = apps.get_model('core', 'TedarikciBakiye')
+    hesap = bakiye_hesapla(
+        None,
+        Fatura=apps.get_model('core', 'Fatura'),
+        Hakedis=apps.get_model('core', 'Hakedis'),
+        Odeme=apps.get_model('core', 'Odeme'),
+        OdemeDagitim=apps.get_model('core', 'OdemeDagitim'),
+    )
+    TedarikciBakiye.objects.bulk_create(
+        [TedarikciBakiye(tedarikci_id=i, **hesap.get(i, {})) for i in Tedarikci.objects.values_list('id', flat=True)],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_maliyet_donem_ozeti'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TedarikciBakiye',
+            fields=[
+                ('tedarikci', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cari_bakiye', serialize=False, to='core.tedarikci', verbose_name='Tedarikçi')),
+                ('fatura_toplam', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Fatura Toplamı')),
+                ('fatura_odenen', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Faturalara Ödenen')),
+                ('fatura_kalan', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Fatura Kalan')),
+                ('hakedis_toplam', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Hakediş Toplamı (Brüt+KDV)')),
+                ('hakedis_net', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Hakediş Net Ödenecek')),
+                ('hakedis_odenen', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Hakedişlere Ödenen')),
+                ('hakedis_kalan', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Hakediş Kalan')),
+                ('odeme_toplam', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Ödeme Toplamı')),
+                ('dagitilan_toplam', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Faturaya Dağıtılan')),
+                ('avans_bakiye', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Eşleşmemiş Avans')),
+                ('cari_bakiye', models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=18, verbose_name='Cari Bakiye')),
+                ('kalan_borc', models.DecimalField(db_index=True, decimal_places=2, default=0, max_digits=18, verbose_name='Kalan Borç')),
+                ('guncellendi', models.DateTimeField(auto_now=True, verbose_name='Son Hesaplama')),
+            ],
+            options={
+                'verbose_name': 'Tedarikçi Cari Bakiye',
+                'verbose_name_plural': 'Tedarikçi Cari Bakiyeleri',
+            },
+        ),
+        migrations.RunPython(defteri_doldur, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_tedarikci_bakiye'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tedarikci',
+            name='odeme_vadesi_gun',
+            field=models.PositiveIntegerField(default=0, verbose_name='Ödeme Vadesi (Gün)'),
+        ),
+    ]
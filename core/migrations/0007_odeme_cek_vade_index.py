@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_tedarikci_odeme_vadesi'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='odeme',
+            index=models.Index(fields=['odeme_turu', 'is_cek_odendi', 'vade_tarihi'], name='odeme_cek_vade_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:37
+
+import core.utils
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_odeme_cek_vade_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tedarikci',
+            name='iban',
+            field=models.CharField(blank=True, max_length=34, validators=[core.utils.iban_dogrula], verbose_name='IBAN'),
+        ),
+        migrations.CreateModel(
+            name='OdemeTalimati',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tarih', models.DateField(default=django.utils.timezone.now, verbose_name='Ödeme Tarihi')),
+                ('kesim_tarihi', models.DateField(verbose_name='Vade Kesim Tarihi')),
+                ('durum', models.CharField(choices=[('taslak', 'Taslak'), ('islendi', 'İşlendi')], db_index=True, default='taslak', max_length=10, verbose_name='Durum')),
+                ('aciklama', models.CharField(blank=True, max_length=200, verbose_name='Açıklama')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('islendi_at', models.DateTimeField(blank=True, null=True, verbose_name='İşlenme Zamanı')),
+                ('olusturan', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Oluşturan')),
+            ],
+            options={
+                'verbose_name': 'Ödeme Talimatı',
+                'verbose_name_plural': 'Ödeme Talimatları',
+                'ordering': ['-tarih', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OdemeTalimatiSatiri',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('onerilen_tutar', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Önerilen (TL)')),
+                ('tutar', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Ödenecek (TL)')),
+                ('iban', models.CharField(blank=True, max_length=34, verbose_name='IBAN')),
+                ('odeme', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='talimat_satiri', to='core.odeme', verbose_name='Oluşan Ödeme')),
+                ('talimat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='satirlar', to='core.odemetalimati', verbose_name='Talimat')),
+                ('tedarikci', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.tedarikci', verbose_name='Tedarikçi')),
+            ],
+            options={
+                'verbose_name': 'Ödeme Talimatı Satırı',
+                'verbose_name_plural': 'Ödeme Talimatı Satırları',
+                'ordering': ['tedarikci__firma_unvani', 'id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='odemetalimatisatiri',
+            constraint=models.UniqueConstraint(fields=('talimat', 'tedarikci'), name='uniq_talimat_tedarikci'),
+        ),
+    ]
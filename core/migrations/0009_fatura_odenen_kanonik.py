@@ -0,0 +1,44 @@
+# Generated by Django 5.0.6 on 2026-10-19 09:30
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def odenen_yeniden_yaz(apps, schema_editor):
+    """
+    Eski döviz faturalarında 'orijinal para' olarak yazılmış odenen_tutar'ı kanonik TL tanımına çeker:
+    OdemeDagitim toplamı + dağıtımı olmayan eski tip Odeme.fatura ödemeleri.
+    İfade burada tarihsel modellerle sabitlenmiştir (servis kodu değişse de migration değişmez).
+    """
+    Fatura = apps.get_model('core', 'Fatura')
+    Odeme = apps.get_model('core', 'Odeme')
+    OdemeDagitim = apps.get_model('core', 'OdemeDagitim')
+
+    ondalik = models.DecimalField(max_digits=18, decimal_places=2)
+    sifir = models.Value(Decimal('0.00'), output_field=ondalik)
+
+    def toplam(qs):
+        return Coalesce(
+            models.Subquery(
+                qs.values('fatura').annotate(s=models.Sum('tutar')).values('s')[:1], output_field=ondalik
+            ),
+            sifir,
+        )
+
+    Fatura.objects.update(odenen_tutar=(
+        toplam(OdemeDagitim.objects.filter(fatura=models.OuterRef('pk')))
+        + toplam(Odeme.objects.filter(fatura=models.OuterRef('pk'), dagitimlar__isnull=True))
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_odeme_talimati'),
+    ]
+
+    operations = [
+        migrations.RunPython(odenen_yeniden_yaz, migrations.RunPython.noop),
+    ]
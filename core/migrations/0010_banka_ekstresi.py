@@ -0,0 +1,52 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_fatura_odenen_kanonik'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankaEkstresi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dosya_adi', models.CharField(max_length=255, verbose_name='Dosya')),
+                ('bicim', models.CharField(choices=[('csv', 'CSV'), ('mt940', 'MT940')], default='csv', max_length=10, verbose_name='Biçim')),
+                ('banka_adi', models.CharField(blank=True, max_length=100, verbose_name='Banka Adı')),
+                ('satir_sayisi', models.PositiveIntegerField(default=0, verbose_name='Satır')),
+                ('eslesen_sayisi', models.PositiveIntegerField(default=0, verbose_name='Eşleşen')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('yukleyen', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Yükleyen')),
+            ],
+            options={
+                'verbose_name': 'Banka Ekstresi',
+                'verbose_name_plural': 'Banka Ekstreleri',
+                'ordering': ['-created_at', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BankaHareketi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tarih', models.DateField(verbose_name='İşlem Tarihi')),
+                ('yon', models.CharField(choices=[('borc', 'Çıkış (Borç)'), ('alacak', 'Giriş (Alacak)')], default='borc', max_length=10, verbose_name='Yön')),
+                ('tutar', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Tutar')),
+                ('referans', models.CharField(blank=True, max_length=100, verbose_name='Referans / Dekont No')),
+                ('aciklama', models.CharField(blank=True, max_length=500, verbose_name='Açıklama')),
+                ('ekstre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hareketler', to='core.bankaekstresi', verbose_name='Ekstre')),
+                ('odeme', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='banka_hareketi', to='core.odeme', verbose_name='Eşleşen Ödeme')),
+            ],
+            options={
+                'verbose_name': 'Banka Hareketi',
+                'verbose_name_plural': 'Banka Hareketleri',
+                'ordering': ['tarih', 'id'],
+            },
+        ),
+    ]
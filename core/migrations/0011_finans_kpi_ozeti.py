@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_banka_ekstresi'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinansKpiOzeti',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tarih', models.DateField(unique=True, verbose_name='Tarih')),
+                ('yatirim_maliyeti', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Toplam Yatırım Maliyeti')),
+                ('fatura_toplam', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Fatura Toplamı')),
+                ('hakedis_toplam', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Hakediş Toplamı')),
+                ('gider_toplam', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Gider Toplamı')),
+                ('acik_fatura', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Ödenmemiş Fatura')),
+                ('acik_hakedis', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Ödenmemiş Hakediş')),
+                ('piyasa_borc', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Piyasa Borcu')),
+                ('verilen_avans', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Verilen Avans')),
+                ('cek_riski', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Ödenmemiş Çek Toplamı')),
+                ('yaklasan_cek', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='30 Gün İçindeki Çekler')),
+                ('gider_kategorileri', models.JSONField(blank=True, default=dict, verbose_name='Kategori Bazında Giderler')),
+                ('olusturuldu', models.DateTimeField(auto_now=True, verbose_name='Hesaplanma Zamanı')),
+            ],
+            options={
+                'verbose_name': 'Finans KPI Özeti',
+                'verbose_name_plural': 'Finans KPI Özetleri',
+                'ordering': ['-tarih'],
+            },
+        ),
+    ]
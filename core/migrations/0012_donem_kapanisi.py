@@ -0,0 +1,91 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_finans_kpi_ozeti'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonemKapanisi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ay', models.DateField(unique=True, verbose_name="Kapanan Ay (Ayın 1'i)")),
+                ('baslangic', models.DateField(blank=True, null=True, verbose_name='Dönem Başı (boş: ilk kayıt)')),
+                ('bitis', models.DateField(unique=True, verbose_name='Dönem Sonu')),
+                ('aciklama', models.CharField(blank=True, max_length=200, verbose_name='Açıklama')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Kapanış Zamanı')),
+                ('kapatan', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Kapatan')),
+            ],
+            options={
+                'verbose_name': 'Dönem Kapanışı',
+                'verbose_name_plural': 'Dönem Kapanışları',
+                'ordering': ['-bitis'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DonemGiderOzeti',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kayit_sayisi', models.PositiveIntegerField(default=0, verbose_name='Kayıt Sayısı')),
+                ('tutar_tl', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Toplam (TL)')),
+                ('kategori', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.giderkategorisi', verbose_name='Gider Türü')),
+                ('donem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gider_ozetleri', to='core.donemkapanisi', verbose_name='Dönem')),
+            ],
+            options={
+                'verbose_name': 'Dönem Gider Özeti',
+                'verbose_name_plural': 'Dönem Gider Özetleri',
+            },
+        ),
+        migrations.CreateModel(
+            name='DonemCariOzeti',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fatura_toplam', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Fatura Toplamı')),
+                ('hakedis_toplam', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Hakediş Toplamı (Brüt+KDV)')),
+                ('hakedis_net', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Hakediş Net Ödenecek')),
+                ('odeme_toplam', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Ödeme Toplamı')),
+                ('tedarikci', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.tedarikci', verbose_name='Tedarikçi')),
+                ('donem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cari_ozetleri', to='core.donemkapanisi', verbose_name='Dönem')),
+            ],
+            options={
+                'verbose_name': 'Dönem Cari Özeti',
+                'verbose_name_plural': 'Dönem Cari Özetleri',
+            },
+        ),
+        migrations.CreateModel(
+            name='DonemStokOzeti',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('giris', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Giriş')),
+                ('cikis', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Çıkış')),
+                ('iade', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='İade')),
+                ('depo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.depo', verbose_name='Depo')),
+                ('donem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stok_ozetleri', to='core.donemkapanisi', verbose_name='Dönem')),
+                ('malzeme', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.malzeme', verbose_name='Malzeme')),
+            ],
+            options={
+                'verbose_name': 'Dönem Stok Özeti',
+                'verbose_name_plural': 'Dönem Stok Özetleri',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='donemgiderozeti',
+            constraint=models.UniqueConstraint(fields=('donem', 'kategori'), name='uniq_donem_gider'),
+        ),
+        migrations.AddConstraint(
+            model_name='donemcariozeti',
+            constraint=models.UniqueConstraint(fields=('donem', 'tedarikci'), name='uniq_donem_cari'),
+        ),
+        migrations.AddConstraint(
+            model_name='donemstokozeti',
+            constraint=models.UniqueConstraint(fields=('donem', 'malzeme', 'depo'), name='uniq_donem_stok'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.6 on 2026-10-19 00:57
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+
+
+def doviz_bilgisini_doldur(apps, schema_editor):
+    """Mevcut faturalara para birimi / kilit kur / orijinal toplamı siparişin teklifinden yazar (tek okuma, toplu yazım)."""
+    Fatura = apps.get_model('core', 'Fatura')
+    satirlar = Fatura.objects.values_list(
+        'id', 'genel_toplam',
+        'satinalma__teklif__para_birimi', 'satinalma__teklif__locked_rate', 'satinalma__teklif__kur_degeri',
+    ).order_by('id')
+
+    parti = []
+    for fid, genel, pb, locked_rate, kur in satirlar.iterator(chunk_size=2000):
+        pb = (pb or 'TRY').upper().strip()
+        if pb == 'TL':
+            pb = 'TRY'
+        kur = Decimal(str(locked_rate or kur or 1)) if pb != 'TRY' else Decimal('1')
+        if kur <= 0:
+            kur = Decimal('1')
+        genel = Decimal(str(genel or 0))
+        orj = genel if pb == 'TRY' else (genel / kur).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        parti.append(Fatura(id=fid, para_birimi=pb, kur_degeri=kur.quantize(Decimal('0.000001')), orj_genel_toplam=orj))
+        if len(parti) >= 500:
+            Fatura.objects.bulk_update(parti, ['para_birimi', 'kur_degeri', 'orj_genel_toplam'])
+            parti = []
+    if parti:
+        Fatura.objects.bulk_update(parti, ['para_birimi', 'kur_degeri', 'orj_genel_toplam'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_donem_kapanisi'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fatura',
+            name='kur_degeri',
+            field=models.DecimalField(decimal_places=6, default=1, max_digits=12, verbose_name='Kilit Kur'),
+        ),
+        migrations.AddField(
+            model_name='fatura',
+            name='orj_genel_toplam',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Genel Toplam (Orijinal Para Birimi)'),
+        ),
+        migrations.AddField(
+            model_name='fatura',
+            name='para_birimi',
+            field=models.CharField(choices=[('TRY', 'Türk Lirası (₺)'), ('USD', 'Amerikan Doları ($)'), ('EUR', 'Euro (€)'), ('GBP', 'İngiliz Sterlini (£)')], default='TRY', max_length=3, verbose_name='Kaynak Para Birimi'),
+        ),
+        migrations.RunPython(doviz_bilgisini_doldur, migrations.RunPython.noop),
+    ]
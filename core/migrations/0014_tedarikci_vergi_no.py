@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-19 01:02
+
+import core.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_fatura_doviz_bilgisi'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tedarikci',
+            name='vergi_no',
+            field=models.CharField(blank=True, db_index=True, max_length=11, validators=[core.utils.vergi_no_dogrula], verbose_name='Vergi No (VKN/TCKN)'),
+        ),
+    ]
@@ -6,7 +6,7 @@ from django.core.exceptions import ValidationError
 from django.db import transaction
 
 
-from core.utils import to_decimal
+from core.utils import to_decimal, iban_dogrula, vergi_no_dogrula
 
 # ==========================================
 # SABİTLER (GLOBAL)
@@ -72,6 +72,12 @@ class Tedarikci(models.Model):
     yetkili_kisi = models.CharField(max_length=100, blank=True, verbose_name="Yetkili Kişi")
     telefon = models.CharField(max_length=20, blank=True)
     adres = models.TextField(blank=True)
+    # Fatura tarihinden itibaren ödeme vadesi (nakit akış projeksiyonu kullanır)
+    odeme_vadesi_gun = models.PositiveIntegerField(default=0, verbose_name="Ödeme Vadesi (Gün)")
+    # Toplu ödeme talimatı (banka dosyası) için
+    iban = models.CharField(max_length=34, blank=True, validators=[iban_dogrula], verbose_name="IBAN")
+    # e-Fatura içe aktarımı tedarikçiyi önce VKN/TCKN ile eşleştirir
+    vergi_no = models.CharField(max_length=11, blank=True, db_index=True, validators=[vergi_no_dogrula], verbose_name="Vergi No (VKN/TCKN)")
     is_active = models.BooleanField(default=True, db_index=True, verbose_name='Aktif mi?')
 
     def __str__(self):
@@ -673,8 +679,32 @@ class Fatura(models.Model):
     kdv_toplam = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="KDV Toplam")
     genel_toplam = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Genel Toplam (KDV Dahil)")
 
+    # Döviz bilgisi (bilgi amaçlı; tutarlar TL'dir). Oluşturulurken siparişin teklifinden bir kez kopyalanır:
+    # ekranlar teklif zincirine gitmeden bu kolonları okur.
+    para_birimi = models.CharField(max_length=3, choices=PARA_BIRIMI_CHOICES, default='TRY', verbose_name="Kaynak Para Birimi")
+    kur_degeri = models.DecimalField(max_digits=12, decimal_places=6, default=1, verbose_name="Kilit Kur")
+    orj_genel_toplam = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Genel Toplam (Orijinal Para Birimi)")
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def teklif_dovizini_al(self, teklif):
+        """Para birimi ve kilit kuru tekliften kopyalar (kilit kur yoksa teklif kuru)."""
+        pb = (getattr(teklif, "para_birimi", None) or "TRY").upper().strip()
+        if pb == "TL":
+            pb = "TRY"
+        kur = to_decimal(teklif.locked_rate or teklif.kur_degeri or 1, precision=6) if pb != "TRY" else Decimal("1")
+        self.para_birimi = pb
+        self.kur_degeri = kur if kur > 0 else Decimal("1")
+        self._doviz_atandi = True
+
+    def orj_toplam_hesapla(self):
+        genel = to_decimal(self.genel_toplam)
+        kur = to_decimal(self.kur_degeri, precision=6)
+        if self.para_birimi == "TRY" or kur <= 0:
+            self.orj_genel_toplam = genel
+        else:
+            self.orj_genel_toplam = (genel / kur).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
     def recalc_totals(self):
         sums = self.kalemler.aggregate(
             ara=Sum("satir_ara_toplam"),
@@ -684,6 +714,18 @@ class Fatura(models.Model):
         self.ara_toplam = sums["ara"] or Decimal("0.00")
         self.kdv_toplam = sums["kdv"] or Decimal("0.00")
         self.genel_toplam = sums["genel"] or Decimal("0.00")
+        self.orj_toplam_hesapla()
+
+    def save(self, *args, **kwargs):
+        # Yeni sipariş faturası: döviz bilgisi (InvoiceService atamadıysa) teklif üzerinden tek sorguyla
+        if self._state.adding and self.satinalma_id and not getattr(self, "_doviz_atandi", False):
+            teklif = Teklif.objects.filter(satinalma_donusumu=self.satinalma_id).only(
+                "para_birimi", "locked_rate", "kur_degeri"
+            ).first()
+            if teklif is not None:
+                self.teklif_dovizini_al(teklif)
+        self.orj_toplam_hesapla()
+        super().save(*args, **kwargs)
 
     def __str__(self):
         try:
@@ -790,7 +832,7 @@ class FaturaKalem(models.Model):
 
         # Kalem kaydı sonrası fatura toplamları güncel kalsın
         self.fatura.recalc_totals()
-        self.fatura.save(update_fields=["ara_toplam", "kdv_toplam", "genel_toplam"])
+        self.fatura.save(update_fields=["ara_toplam", "kdv_toplam", "genel_toplam", "orj_genel_toplam"])
 
     def __str__(self):
         return f"{self.malzeme} x {self.miktar}"
@@ -849,6 +891,10 @@ class Odeme(models.Model):
         verbose_name = "7. Ödeme & Çek Çıkışı"
         verbose_name_plural = "7. Ödeme & Çek Çıkışı"
         ordering = ['-tarih']
+        indexes = [
+            # Çek takibi / vade takvimi: odeme_turu='cek' AND is_cek_odendi=? AND vade_tarihi aralığı
+            models.Index(fields=['odeme_turu', 'is_cek_odendi', 'vade_tarihi'], name='odeme_cek_vade_idx'),
+        ]
 # ==========================================
 # 12.B ÖDEME DAĞITIM (MAHSUP / ALLOCATION)
 # ==========================================
@@ -893,18 +939,10 @@ class OdemeDagitim(models.Model):
                 raise ValidationError("Ödeme ile Fatura farklı tedarikçilere ait olamaz!")
 
     def save(self, *args, **kwargs):
+        # Faturanın odenen_tutar'ı commit sonrası toplu yenilenir (signals -> payables.fatura_kirlendi)
         self.full_clean()
         super().save(*args, **kwargs)
 
-        # Dağıtım değişince faturanın ödenenini güncelle (geri uyumlu)
-        # Not: Bu mekanizma, ileride servis katmanına taşınabilir.
-        try:
-            toplam = self.fatura.dagitimlar.aggregate(t=Sum("tutar"))["t"] or Decimal("0")
-            self.fatura.odenen_tutar = to_decimal(toplam)
-            self.fatura.save(update_fields=["odenen_tutar"])
-        except Exception:
-            pass
-
     def __str__(self):
         return f"Dağıtım: {self.odeme_id} → Fatura {self.fatura_id} ({self.tutar} TL)"
 
@@ -917,4 +955,380 @@ class OdemeDagitim(models.Model):
                 fields=["odeme", "fatura", "tarih"],
                 name="uniq_odeme_fatura_tarih"
             )
-        ]
\ No newline at end of file
+        ]
+
+# ==========================================
+# 13. DÖVİZ KURLARI (YEREL KUR DEPOSU)
+# ==========================================
+
+class DovizKuru(models.Model):
+    """
+    TCMB'den çekilen günlük kurların yerel kopyası.
+    - Geçmiş tarihli kurlar değişmez: bir kez yazılır, sonra hep buradan okunur.
+    - 1 para_birimi = kur TL
+    """
+    para_birimi = models.CharField(max_length=3, choices=PARA_BIRIMI_CHOICES, verbose_name="Para Birimi")
+    tarih = models.DateField(verbose_name="Kur Tarihi")
+    kur = models.DecimalField(max_digits=12, decimal_places=4, verbose_name="Kur (TL)")
+    kaynak = models.CharField(max_length=50, blank=True, default="", verbose_name="Kur Kaynağı")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.tarih} {self.para_birimi} = {self.kur} TL"
+
+    class Meta:
+        verbose_name = "Döviz Kuru"
+        verbose_name_plural = "Döviz Kurları"
+        ordering = ["-tarih", "para_birimi"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["para_birimi", "tarih"],
+                name="uniq_doviz_kuru_pb_tarih",
+            )
+        ]
+
+# ==========================================
+# 14. MALİYET DÖNEM ÖZETİ (İŞLEM TARİHİ KURUYLA)
+# ==========================================
+
+class MaliyetDonemOzeti(models.Model):
+    """
+    Fatura / hakediş / ödeme / gider tutarlarının AY bazında, her kaydın kendi
+    işlem tarihindeki kurla çevrilmiş toplamları (önceden hesaplanmış).
+    - Kaynak: RevaluationService (DovizKuru ile SQL join, satır satır kur sorgusu yok)
+    - Dashboard bu tabloyu tek sorguda okur.
+    """
+    KALEM_TIPLERI = [
+        ("fatura", "Alış Faturası"),
+        ("hakedis", "Hakediş"),
+        ("odeme", "Ödeme"),
+        ("gider", "Gider"),
+    ]
+
+    ay = models.DateField(verbose_name="Dönem (Ayın 1'i)")
+    kalem_tipi = models.CharField(max_length=10, choices=KALEM_TIPLERI, verbose_name="Kalem Tipi")
+
+    kayit_sayisi = models.PositiveIntegerField(default=0, verbose_name="Kayıt Sayısı")
+    kursuz_kayit = models.PositiveIntegerField(default=0, verbose_name="Kuru Bulunamayan Kayıt")
+
+    tutar_try = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Toplam (TL)")
+    tutar_usd = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Toplam (USD)")
+    tutar_eur = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Toplam (EUR)")
+    tutar_gbp = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Toplam (GBP)")
+
+    guncellendi = models.DateTimeField(auto_now=True, verbose_name="Son Hesaplama")
+
+    def __str__(self):
+        return f"{self.ay:%Y-%m} {self.get_kalem_tipi_display()}: {self.tutar_try} TL"
+
+    class Meta:
+        verbose_name = "Maliyet Dönem Özeti"
+        verbose_name_plural = "Maliyet Dönem Özetleri"
+        ordering = ["-ay", "kalem_tipi"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ay", "kalem_tipi"],
+                name="uniq_maliyet_ozet_ay_tip",
+            )
+        ]
+
+# ==========================================
+# 15. TEDARİKÇİ CARİ BAKİYE (MATERYALİZE)
+# ==========================================
+
+class TedarikciBakiye(models.Model):
+    """
+    Tedarikçi başına hazır cari bakiye (tek satır).
+    - Fatura / Hakediş / Ödeme / Dağıtım yazıldığında AYNI transaction içinde yeniden hesaplanır
+      (core.services.cari_bakiye.BalanceService, sinyaller üzerinden).
+    - Ekranlar bakiyeyi tekrar hesaplamaz, bu tablodan okur.
+    - Tutarsızlık şüphesinde: python manage.py cari_bakiye_olustur
+    """
+    tedarikci = models.OneToOneField(
+        Tedarikci, on_delete=models.CASCADE, primary_key=True, related_name="cari_bakiye", verbose_name="Tedarikçi"
+    )
+
+    fatura_toplam = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Fatura Toplamı")
+    fatura_odenen = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Faturalara Ödenen")
+    fatura_kalan = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Fatura Kalan")
+
+    hakedis_toplam = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Hakediş Toplamı (Brüt+KDV)")
+    hakedis_net = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Hakediş Net Ödenecek")
+    hakedis_odenen = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Hakedişlere Ödenen")
+    hakedis_kalan = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Hakediş Kalan")
+
+    odeme_toplam = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Ödeme Toplamı")
+    dagitilan_toplam = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Faturaya Dağıtılan")
+    avans_bakiye = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Eşleşmemiş Avans")
+
+    # (Fatura + Hakediş) - Ödeme  -> pozitif: borç, negatif: avans
+    cari_bakiye = models.DecimalField(max_digits=18, decimal_places=2, default=0, db_index=True, verbose_name="Cari Bakiye")
+    # Fatura kalan + Hakediş kalan (ödeme ekranlarının "kalan borç" tanımı)
+    kalan_borc = models.DecimalField(max_digits=18, decimal_places=2, default=0, db_index=True, verbose_name="Kalan Borç")
+
+    guncellendi = models.DateTimeField(auto_now=True, verbose_name="Son Hesaplama")
+
+    def __str__(self):
+        return f"{self.tedarikci} - {self.cari_bakiye} TL"
+
+    class Meta:
+        verbose_name = "Tedarikçi Cari Bakiye"
+        verbose_name_plural = "Tedarikçi Cari Bakiyeleri"
+
+
+# ==========================================
+# 16. ÖDEME TALİMATI (TOPLU ÖDEME ÇALIŞTIRMASI)
+# ==========================================
+
+class OdemeTalimati(models.Model):
+    """
+    Haftalık toplu ödeme: tedarikçi başına önerilen tutar (açık kalemlerden) -> finans düzeltir ->
+    tek transaction'da tüm ödemeler + dağıtımlar yazılır -> banka toplu EFT dosyası.
+    (core.services.odeme_talimati.PaymentRunService)
+    """
+    DURUMLAR = [
+        ('taslak', 'Taslak'),
+        ('islendi', 'İşlendi'),
+    ]
+
+    tarih = models.DateField(default=timezone.now, verbose_name="Ödeme Tarihi")
+    kesim_tarihi = models.DateField(verbose_name="Vade Kesim Tarihi")
+    durum = models.CharField(max_length=10, choices=DURUMLAR, default='taslak', db_index=True, verbose_name="Durum")
+    aciklama = models.CharField(max_length=200, blank=True, verbose_name="Açıklama")
+
+    olusturan = models.ForeignKey(
+        'auth.User', on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Oluşturan"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    islendi_at = models.DateTimeField(null=True, blank=True, verbose_name="İşlenme Zamanı")
+
+    def __str__(self):
+        return f"Ödeme Talimatı #{self.id} ({self.tarih})"
+
+    class Meta:
+        verbose_name = "Ödeme Talimatı"
+        verbose_name_plural = "Ödeme Talimatları"
+        ordering = ['-tarih', '-id']
+
+
+class OdemeTalimatiSatiri(models.Model):
+    talimat = models.ForeignKey(OdemeTalimati, on_delete=models.CASCADE, related_name='satirlar', verbose_name="Talimat")
+    tedarikci = models.ForeignKey(Tedarikci, on_delete=models.PROTECT, related_name='+', verbose_name="Tedarikçi")
+
+    onerilen_tutar = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Önerilen (TL)")
+    tutar = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Ödenecek (TL)")
+    # Talimat anındaki IBAN (banka dosyası sonradan da aynı çıksın)
+    iban = models.CharField(max_length=34, blank=True, verbose_name="IBAN")
+
+    odeme = models.OneToOneField(
+        'Odeme', on_delete=models.SET_NULL, null=True, blank=True, related_name='talimat_satiri', verbose_name="Oluşan Ödeme"
+    )
+
+    def __str__(self):
+        return f"{self.tedarikci} - {self.tutar} TL"
+
+    class Meta:
+        verbose_name = "Ödeme Talimatı Satırı"
+        verbose_name_plural = "Ödeme Talimatı Satırları"
+        ordering = ['tedarikci__firma_unvani', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['talimat', 'tedarikci'], name='uniq_talimat_tedarikci'),
+        ]
+
+
+# ==========================================
+# 17. BANKA EKSTRESİ (MUTABAKAT)
+# ==========================================
+
+class BankaEkstresi(models.Model):
+    """
+    Bankadan alınan hesap hareketleri dosyası (CSV / MT940).
+    Satırlar kayıtlı ödemelerle otomatik eşleştirilir; eşleşmeyenler incelemeye kalır.
+    (core.services.banka_ekstresi.BankStatementService)
+    """
+    BICIMLER = [
+        ('csv', 'CSV'),
+        ('mt940', 'MT940'),
+    ]
+
+    dosya_adi = models.CharField(max_length=255, verbose_name="Dosya")
+    bicim = models.CharField(max_length=10, choices=BICIMLER, default='csv', verbose_name="Biçim")
+    banka_adi = models.CharField(max_length=100, blank=True, verbose_name="Banka Adı")
+
+    satir_sayisi = models.PositiveIntegerField(default=0, verbose_name="Satır")
+    eslesen_sayisi = models.PositiveIntegerField(default=0, verbose_name="Eşleşen")
+
+    yukleyen = models.ForeignKey(
+        'auth.User', on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Yükleyen"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.dosya_adi} ({self.get_bicim_display()})"
+
+    class Meta:
+        verbose_name = "Banka Ekstresi"
+        verbose_name_plural = "Banka Ekstreleri"
+        ordering = ['-created_at', '-id']
+
+
+class BankaHareketi(models.Model):
+    YONLER = [
+        ('borc', 'Çıkış (Borç)'),
+        ('alacak', 'Giriş (Alacak)'),
+    ]
+
+    ekstre = models.ForeignKey(BankaEkstresi, on_delete=models.CASCADE, related_name='hareketler', verbose_name="Ekstre")
+    tarih = models.DateField(verbose_name="İşlem Tarihi")
+    yon = models.CharField(max_length=10, choices=YONLER, default='borc', verbose_name="Yön")
+    tutar = models.DecimalField(max_digits=15, decimal_places=2, verbose_name="Tutar")
+    referans = models.CharField(max_length=100, blank=True, verbose_name="Referans / Dekont No")
+    aciklama = models.CharField(max_length=500, blank=True, verbose_name="Açıklama")
+
+    odeme = models.OneToOneField(
+        'Odeme', on_delete=models.SET_NULL, null=True, blank=True, related_name='banka_hareketi', verbose_name="Eşleşen Ödeme"
+    )
+
+    def __str__(self):
+        return f"{self.tarih} {self.get_yon_display()} {self.tutar}"
+
+    class Meta:
+        verbose_name = "Banka Hareketi"
+        verbose_name_plural = "Banka Hareketleri"
+        ordering = ['tarih', 'id']
+
+
+# ==========================================
+# 18. FİNANS KPI GÜNLÜK ÖZETİ (TREND)
+# ==========================================
+
+class FinansKpiOzeti(models.Model):
+    """
+    Finans ekranlarındaki ana göstergelerin gün sonu fotoğrafı (gün başına tek satır).
+    - Gece çalışan iş yazar: python manage.py kpi_ozeti_al
+    - Trend grafikleri tek indeksli tarih aralığı sorgusudur; "X tarihinde ekran ne gösteriyordu?"
+      sorusu bu tablodan cevaplanır. (core.services.kpi_ozeti.KpiSnapshotService)
+    """
+    tarih = models.DateField(unique=True, verbose_name="Tarih")
+
+    yatirim_maliyeti = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Toplam Yatırım Maliyeti")
+    fatura_toplam = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Fatura Toplamı")
+    hakedis_toplam = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Hakediş Toplamı")
+    gider_toplam = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Gider Toplamı")
+
+    acik_fatura = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Ödenmemiş Fatura")
+    acik_hakedis = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Ödenmemiş Hakediş")
+    piyasa_borc = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Piyasa Borcu")
+    verilen_avans = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Verilen Avans")
+
+    cek_riski = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Ödenmemiş Çek Toplamı")
+    yaklasan_cek = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="30 Gün İçindeki Çekler")
+
+    # {"Kategori adı": "tutar"} (TL, işlem kuruyla)
+    gider_kategorileri = models.JSONField(default=dict, blank=True, verbose_name="Kategori Bazında Giderler")
+
+    olusturuldu = models.DateTimeField(auto_now=True, verbose_name="Hesaplanma Zamanı")
+
+    def __str__(self):
+        return f"KPI {self.tarih}"
+
+    class Meta:
+        verbose_name = "Finans KPI Özeti"
+        verbose_name_plural = "Finans KPI Özetleri"
+        ordering = ['-tarih']
+
+
+# ==========================================
+# 19. DÖNEM KAPANIŞI (KİLİT + DEĞİŞMEZ DÖNEM ÖZETLERİ)
+# ==========================================
+
+class DonemKapanisi(models.Model):
+    """
+    Kapatılan muhasebe dönemi. Dönem, önceki kapanışın bitişinden sonraki günden
+    bu kaydın bitiş gününe (ay sonu) kadardır; ilk kapanış tüm geçmişi kapsar.
+    - Kapalı döneme tarihli fatura / hakediş / ödeme / gider / depo hareketi eklenemez,
+      değiştirilemez, silinemez (core.signals -> donem_kapanisi.kilit_kontrol).
+    - Dönem özetleri (cari / gider / stok) kapanışta bir kez yazılır, sonra değişmez;
+      ekstre ve raporlar bunları açılış bakiyesi olarak okur, sadece açık dönemi toplar.
+    - Sadece son kapanış geri açılabilir (özetleri silinir).
+    (core.services.donem_kapanisi.PeriodCloseService)
+    """
+    ay = models.DateField(unique=True, verbose_name="Kapanan Ay (Ayın 1'i)")
+    baslangic = models.DateField(null=True, blank=True, verbose_name="Dönem Başı (boş: ilk kayıt)")
+    bitis = models.DateField(unique=True, verbose_name="Dönem Sonu")
+
+    kapatan = models.ForeignKey(
+        'auth.User', on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Kapatan"
+    )
+    aciklama = models.CharField(max_length=200, blank=True, verbose_name="Açıklama")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Kapanış Zamanı")
+
+    def __str__(self):
+        return f"Dönem {self.ay:%Y-%m}"
+
+    class Meta:
+        verbose_name = "Dönem Kapanışı"
+        verbose_name_plural = "Dönem Kapanışları"
+        ordering = ['-bitis']
+
+
+class DonemCariOzeti(models.Model):
+    """Dönem içindeki tedarikçi hareket toplamları (TL). borç = fatura + hakediş net, alacak = ödeme."""
+    donem = models.ForeignKey(DonemKapanisi, on_delete=models.CASCADE, related_name='cari_ozetleri', verbose_name="Dönem")
+    tedarikci = models.ForeignKey(Tedarikci, on_delete=models.CASCADE, related_name='+', verbose_name="Tedarikçi")
+
+    fatura_toplam = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Fatura Toplamı")
+    hakedis_toplam = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Hakediş Toplamı (Brüt+KDV)")
+    hakedis_net = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Hakediş Net Ödenecek")
+    odeme_toplam = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Ödeme Toplamı")
+
+    def __str__(self):
+        return f"{self.donem} - {self.tedarikci}"
+
+    class Meta:
+        verbose_name = "Dönem Cari Özeti"
+        verbose_name_plural = "Dönem Cari Özetleri"
+        constraints = [
+            models.UniqueConstraint(fields=["donem", "tedarikci"], name="uniq_donem_cari"),
+        ]
+
+
+class DonemGiderOzeti(models.Model):
+    """Dönem içindeki gider toplamı, kategori bazında (TL, işlem kuruyla)."""
+    donem = models.ForeignKey(DonemKapanisi, on_delete=models.CASCADE, related_name='gider_ozetleri', verbose_name="Dönem")
+    kategori = models.ForeignKey(GiderKategorisi, on_delete=models.CASCADE, related_name='+', verbose_name="Gider Türü")
+
+    kayit_sayisi = models.PositiveIntegerField(default=0, verbose_name="Kayıt Sayısı")
+    tutar_tl = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Toplam (TL)")
+
+    def __str__(self):
+        return f"{self.donem} - {self.kategori}: {self.tutar_tl} TL"
+
+    class Meta:
+        verbose_name = "Dönem Gider Özeti"
+        verbose_name_plural = "Dönem Gider Özetleri"
+        constraints = [
+            models.UniqueConstraint(fields=["donem", "kategori"], name="uniq_donem_gider"),
+        ]
+
+
+class DonemStokOzeti(models.Model):
+    """Dönem içindeki depo hareketleri, malzeme x depo bazında (miktar)."""
+    donem = models.ForeignKey(DonemKapanisi, on_delete=models.CASCADE, related_name='stok_ozetleri', verbose_name="Dönem")
+    malzeme = models.ForeignKey(Malzeme, on_delete=models.CASCADE, related_name='+', verbose_name="Malzeme")
+    depo = models.ForeignKey(Depo, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Depo")
+
+    giris = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Giriş")
+    cikis = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Çıkış")
+    iade = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="İade")
+
+    def __str__(self):
+        return f"{self.donem} - {self.malzeme} @ {self.depo}"
+
+    class Meta:
+        verbose_name = "Dönem Stok Özeti"
+        verbose_name_plural = "Dönem Stok Özetleri"
+        constraints = [
+            models.UniqueConstraint(fields=["donem", "malzeme", "depo"], name="uniq_donem_stok"),
+        ]
@@ -13,6 +13,18 @@ __all__ = [
     "StockService",
     "PaymentService",
     "InvoiceService",
+    "RevaluationService",
+    "BalanceService",
+    "StatementService",
+    "AgingService",
+    "CashFlowService",
+    "ChequeService",
+    "AllocationService",
+    "PaymentRunService",
+    "BankStatementService",
+    "KpiSnapshotService",
+    "PeriodCloseService",
+    "EInvoiceImportService",
 ]
 
 def __getattr__(name: str) -> Any:
@@ -25,4 +37,40 @@ def __getattr__(name: str) -> Any:
     if name == "InvoiceService":
         from .finans_invoices import InvoiceService
         return InvoiceService
+    if name == "RevaluationService":
+        from .revaluation import RevaluationService
+        return RevaluationService
+    if name == "BalanceService":
+        from .cari_bakiye import BalanceService
+        return BalanceService
+    if name == "StatementService":
+        from .cari_ekstre import StatementService
+        return StatementService
+    if name == "AgingService":
+        from .yaslandirma import AgingService
+        return AgingService
+    if name == "CashFlowService":
+        from .nakit_akis import CashFlowService
+        return CashFlowService
+    if name == "ChequeService":
+        from .cekler import ChequeService
+        return ChequeService
+    if name == "AllocationService":
+        from .payables import AllocationService
+        return AllocationService
+    if name == "PaymentRunService":
+        from .odeme_talimati import PaymentRunService
+        return PaymentRunService
+    if name == "BankStatementService":
+        from .banka_ekstresi import BankStatementService
+        return BankStatementService
+    if name == "KpiSnapshotService":
+        from .kpi_ozeti import KpiSnapshotService
+        return KpiSnapshotService
+    if name == "PeriodCloseService":
+        from .donem_kapanisi import PeriodCloseService
+        return PeriodCloseService
+    if name == "EInvoiceImportService":
+        from .efatura import EInvoiceImportService
+        return EInvoiceImportService
     raise AttributeError(f"module 'core.services' has no attribute '{name}'")
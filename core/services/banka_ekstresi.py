@@ -0,0 +1,332 @@
+# core/services/banka_ekstresi.py
+"""
+BANKA EKSTRESİ İÇE AKTARMA VE ÖDEME EŞLEŞTİRME
+
+- Dosya akış olarak okunur (CSV veya MT940), satırlar tek tek ayrıştırılır.
+  Tutarlar ödeme ekranıyla aynı kurala göre çevrilir (utils.clean_currency_input: '1.250,50' / '1250.50').
+- Eşleştirme tek geçişte yapılır: aday ödemeler (ekstre tarih aralığı ± pencere) tek sorguyla gelir,
+  iki hash indeksi kurulur:
+      (tutar[kuruş], referans)  -> Odeme.cek_no (dekont / çek no) açıklamada veya referansta geçiyorsa
+      (tutar[kuruş], tarih)     -> tarih ±pencere gün içinde, en yakın günden başlayarak
+  Her satır O(pencere) sözlük araması ile eşleşir; bir ödeme en fazla bir satıra bağlanır.
+- Sadece çıkış (borç) satırları ödemelerle eşleşir. Nakit ödemeler bankada görünmez, aday değildir;
+  çeklerde bankadan çıkış tarihi vade tarihidir.
+- Eşleşmeyen satırlar ekstrede kalır (inceleme ekranı / elle eşleştirme / yeniden eşleştir).
+"""
+from __future__ import annotations
+
+import csv
+import io
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import chain
+from typing import IO, Iterator
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Q
+
+from core.models import BankaEkstresi, BankaHareketi, Odeme
+from core.utils import clean_currency_input
+
+
+TARIH_PENCERESI = 3  # gün
+YAZIM_PARTISI = 1000
+BICIMLER = ("csv", "mt940")
+
+_TR = str.maketrans("ıİçÇğĞöÖşŞüÜ", "iicCgGoOsSuU")
+
+# CSV başlık eşanlamlıları (küçük harf, Türkçe karaktersiz)
+CSV_ALANLARI = {
+    "tarih": ("tarih", "islem tarihi", "valor", "date", "value date", "booking date"),
+    "tutar": ("tutar", "islem tutari", "amount"),
+    "borc": ("borc", "debit"),
+    "alacak": ("alacak", "credit"),
+    "referans": ("referans", "referans no", "dekont no", "dekont", "fis no", "reference", "ref"),
+    "aciklama": ("aciklama", "detay", "description", "narrative"),
+}
+TARIH_BICIMLERI = ("%d.%m.%Y", "%Y-%m-%d", "%d/%m/%Y", "%d.%m.%y", "%d-%m-%Y")
+
+_MT940_61 = re.compile(
+    r"^:61:(?P<tarih>\d{6})(?P<kayit>\d{4})?(?P<yon>R?[CD])[A-Z]?(?P<tutar>\d+,\d{0,2})"
+    r"[A-Z][A-Z0-9]{3}(?P<ref>[^/\s]*)(?://(?P<banka_ref>\S*))?"
+)
+_REF_TOKEN = re.compile(r"[A-Z0-9]{4,}")
+
+
+@dataclass
+class EkstreSatiri:
+    tarih: date
+    yon: str  # 'borc' | 'alacak'
+    tutar: Decimal
+    referans: str = ""
+    aciklama: str = ""
+
+
+def _norm(metin: str) -> str:
+    return " ".join(str(metin or "").translate(_TR).lower().split())
+
+
+def _ref_norm(metin: str) -> str:
+    return re.sub(r"[^A-Z0-9]", "", str(metin or "").translate(_TR).upper())
+
+
+def _ref_norm_metin(metin: str) -> str:
+    """Açıklamadaki kelimeleri ayrı tutarak büyük harf/ASCII (referans tarama için)."""
+    return re.sub(r"[^A-Z0-9]+", " ", str(metin or "").translate(_TR).upper())
+
+
+def _kurus(tutar: Decimal) -> int:
+    return int((abs(tutar) * 100).to_integral_value())
+
+
+def _tarih(metin: str) -> date | None:
+    metin = str(metin or "").strip().split(" ")[0]
+    for bicim in TARIH_BICIMLERI:
+        try:
+            return datetime.strptime(metin, bicim).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _metin_akisi(dosya: IO) -> io.TextIOBase:
+    """Yüklenen dosya (binary) veya metin akışı -> satır satır okunabilen metin akışı."""
+    if isinstance(dosya, io.TextIOBase):
+        return dosya
+    # Django UploadedFile -> alttaki ham dosya nesnesi (BytesIO / geçici dosya)
+    ham = getattr(dosya, "file", dosya)
+    return io.TextIOWrapper(ham, encoding="utf-8-sig", errors="replace", newline="")
+
+
+# ---------------------------------------------------------
+# Ayrıştırıcılar (generator: dosya belleğe bütün okunmaz)
+# ---------------------------------------------------------
+def csv_satirlari(dosya: IO) -> Iterator[EkstreSatiri]:
+    """
+    Başlıklı CSV (';' veya ','). Tek 'tutar' sütunu (eksi = çıkış) veya ayrı 'borç' / 'alacak' sütunları.
+    Tarihi okunamayan / tutarı sıfır satırlar atlanır.
+    """
+    metin = _metin_akisi(dosya)
+    ilk = metin.readline()
+    ayirac = ";" if ilk.count(";") >= ilk.count(",") else ","
+    okuyucu = csv.reader(chain([ilk], metin), delimiter=ayirac)
+
+    basliklar = [_norm(b) for b in next(okuyucu, [])]
+    sutun = {}
+    for alan, adlar in CSV_ALANLARI.items():
+        for i, b in enumerate(basliklar):
+            if b in adlar:
+                sutun[alan] = i
+                break
+    if "tarih" not in sutun or not ({"tutar", "borc", "alacak"} & sutun.keys()):
+        raise ValidationError("CSV başlıklarında tarih ve tutar (veya borç/alacak) sütunu bulunamadı.")
+
+    def hucre(satir, alan):
+        i = sutun.get(alan)
+        return satir[i].strip() if i is not None and i < len(satir) else ""
+
+    for satir in okuyucu:
+        tarih = _tarih(hucre(satir, "tarih"))
+        if tarih is None:
+            continue
+        if "tutar" in sutun:
+            tutar = clean_currency_input(hucre(satir, "tutar"))
+            yon = "borc" if tutar < 0 else "alacak"
+        else:
+            borc = abs(clean_currency_input(hucre(satir, "borc")))
+            tutar = borc or abs(clean_currency_input(hucre(satir, "alacak")))
+            yon = "borc" if borc else "alacak"
+        if not tutar:
+            continue
+        yield EkstreSatiri(
+            tarih=tarih, yon=yon, tutar=abs(tutar).quantize(Decimal("0.01")),
+            referans=hucre(satir, "referans")[:100], aciklama=hucre(satir, "aciklama")[:500],
+        )
+
+
+def mt940_satirlari(dosya: IO) -> Iterator[EkstreSatiri]:
+    """SWIFT MT940: her :61: hareket satırı bir kayıt; ardından gelen :86: (ve devam satırları) açıklamadır."""
+    bekleyen: EkstreSatiri | None = None
+    aciklama_modu = False
+
+    for ham in _metin_akisi(dosya):
+        satir = ham.rstrip("\r\n")
+        if satir.startswith(":61:"):
+            if bekleyen:
+                yield bekleyen
+            bekleyen, aciklama_modu = None, False
+            m = _MT940_61.match(satir)
+            if not m:
+                continue
+            t = m.group("tarih")
+            ref = m.group("ref") or ""
+            bekleyen = EkstreSatiri(
+                tarih=date(2000 + int(t[:2]), int(t[2:4]), int(t[4:6])),
+                yon="borc" if m.group("yon") in ("D", "RC") else "alacak",
+                tutar=clean_currency_input(m.group("tutar")).quantize(Decimal("0.01")),
+                referans=("" if ref.upper() == "NONREF" else ref)[:100],
+            )
+        elif satir.startswith(":86:") and bekleyen:
+            bekleyen.aciklama = satir[4:].strip()
+            aciklama_modu = True
+        elif satir.startswith(":") or satir.startswith("-"):
+            aciklama_modu = False
+        elif aciklama_modu and bekleyen:
+            bekleyen.aciklama = f"{bekleyen.aciklama} {satir.strip()}".strip()[:500]
+    if bekleyen:
+        yield bekleyen
+
+
+AYRISTIRICILAR = {"csv": csv_satirlari, "mt940": mt940_satirlari}
+
+
+def bicim_tahmin(dosya_adi: str) -> str:
+    ad = (dosya_adi or "").lower()
+    return "mt940" if ad.endswith((".sta", ".mt940", ".940", ".txt")) else "csv"
+
+
+# ---------------------------------------------------------
+# Eşleştirme
+# ---------------------------------------------------------
+def eslestir(satirlar: list[EkstreSatiri], banka_adi: str = "", pencere: int = TARIH_PENCERESI) -> list[int | None]:
+    """
+    Satır sırasıyla eşleşen Odeme id'leri (veya None). Tek aday sorgusu + iki hash indeksi.
+    Farklı bankaya ait (banka_adi dolu ve farklı) ödemeler aday değildir.
+    """
+    sonuc: list[int | None] = [None] * len(satirlar)
+    cikislar = [i for i, s in enumerate(satirlar) if s.yon == "borc"]
+    if not cikislar:
+        return sonuc
+
+    bas = min(satirlar[i].tarih for i in cikislar) - timedelta(days=pencere)
+    son = max(satirlar[i].tarih for i in cikislar) + timedelta(days=pencere)
+    banka = _norm(banka_adi)
+
+    adaylar = (
+        Odeme.objects.filter(para_birimi="TRY", banka_hareketi__isnull=True)
+        .exclude(odeme_turu="nakit")
+        .filter(Q(tarih__range=(bas, son)) | Q(odeme_turu="cek", vade_tarihi__range=(bas, son)))
+        .order_by("id")
+        .values_list("id", "tutar", "tarih", "vade_tarihi", "odeme_turu", "cek_no", "banka_adi")
+    )
+    tarih_indeksi: dict[tuple[int, date], list[tuple[int, date]]] = defaultdict(list)
+    ref_indeksi: dict[tuple[int, str], list[tuple[int, date]]] = defaultdict(list)
+    for odeme_id, tutar, tarih, vade, tur, cek_no, odeme_banka in adaylar:
+        if banka and odeme_banka and _norm(odeme_banka) != banka:
+            continue
+        gun = vade if tur == "cek" and vade else tarih
+        kurus = _kurus(tutar)
+        tarih_indeksi[(kurus, gun)].append((odeme_id, gun))
+        ref = _ref_norm(cek_no)
+        if len(ref) >= 4:
+            ref_indeksi[(kurus, ref)].append((odeme_id, gun))
+
+    kullanilan: set[int] = set()
+    # Tarih araması en yakın günden başlar: 0, -1, +1, -2, +2, ...
+    kaymalar = [0] + [k for d in range(1, pencere + 1) for k in (-d, d)]
+
+    def ilk_bos(aday_listesi, tarih):
+        for odeme_id, gun in aday_listesi or ():
+            if odeme_id not in kullanilan and abs((gun - tarih).days) <= pencere:
+                return odeme_id
+        return None
+
+    for i in cikislar:
+        s = satirlar[i]
+        kurus = _kurus(s.tutar)
+        bulunan = None
+
+        refler = [_ref_norm(s.referans)] + _REF_TOKEN.findall(_ref_norm_metin(s.aciklama))
+        for ref in refler:
+            if len(ref) >= 4:
+                bulunan = ilk_bos(ref_indeksi.get((kurus, ref)), s.tarih)
+                if bulunan:
+                    break
+
+        if bulunan is None:
+            for k in kaymalar:
+                bulunan = ilk_bos(tarih_indeksi.get((kurus, s.tarih + timedelta(days=k))), s.tarih)
+                if bulunan:
+                    break
+
+        if bulunan:
+            kullanilan.add(bulunan)
+            sonuc[i] = bulunan
+    return sonuc
+
+
+class BankStatementService:
+
+    @staticmethod
+    def ice_aktar(dosya: IO, dosya_adi: str, bicim: str | None = None, banka_adi: str = "",
+                  kullanici=None, pencere: int = TARIH_PENCERESI) -> BankaEkstresi:
+        """Dosyayı okur, ödemelerle eşleştirir, hareketleri toplu yazar (tek transaction)."""
+        bicim = bicim or bicim_tahmin(dosya_adi)
+        if bicim not in AYRISTIRICILAR:
+            raise ValidationError(f"Desteklenmeyen ekstre biçimi: {bicim}")
+
+        satirlar = list(AYRISTIRICILAR[bicim](dosya))
+        if not satirlar:
+            raise ValidationError("Dosyada okunabilir hareket satırı bulunamadı.")
+
+        with transaction.atomic():
+            eslesmeler = eslestir(satirlar, banka_adi, pencere)
+            ekstre = BankaEkstresi.objects.create(
+                dosya_adi=dosya_adi[:255], bicim=bicim, banka_adi=banka_adi[:100],
+                satir_sayisi=len(satirlar), eslesen_sayisi=sum(1 for e in eslesmeler if e),
+                yukleyen=kullanici if getattr(kullanici, "is_authenticated", False) else None,
+            )
+            BankaHareketi.objects.bulk_create(
+                (
+                    BankaHareketi(
+                        ekstre=ekstre, tarih=s.tarih, yon=s.yon, tutar=s.tutar,
+                        referans=s.referans, aciklama=s.aciklama, odeme_id=odeme_id,
+                    )
+                    for s, odeme_id in zip(satirlar, eslesmeler)
+                ),
+                batch_size=YAZIM_PARTISI,
+            )
+        return ekstre
+
+    @staticmethod
+    def yeniden_eslestir(ekstre: BankaEkstresi, pencere: int = TARIH_PENCERESI) -> int:
+        """Eşleşmemiş satırları (sonradan girilen ödemelerle) tekrar eşleştirir; yeni eşleşme sayısı döner."""
+        with transaction.atomic():
+            bekleyenler = list(ekstre.hareketler.filter(odeme__isnull=True, yon="borc"))
+            eslesmeler = eslestir(
+                [EkstreSatiri(h.tarih, h.yon, h.tutar, h.referans, h.aciklama) for h in bekleyenler],
+                ekstre.banka_adi, pencere,
+            )
+            degisen = []
+            for h, odeme_id in zip(bekleyenler, eslesmeler):
+                if odeme_id:
+                    h.odeme_id = odeme_id
+                    degisen.append(h)
+            if degisen:
+                BankaHareketi.objects.bulk_update(degisen, ["odeme"], batch_size=YAZIM_PARTISI)
+                BankStatementService._sayac_yenile(ekstre)
+        return len(degisen)
+
+    @staticmethod
+    def elle_eslestir(hareket: BankaHareketi, odeme_id: int | None) -> None:
+        """İnceleme ekranı: satırı bir ödemeye bağlar (None: bağlantıyı kaldırır)."""
+        if odeme_id:
+            odeme = Odeme.objects.filter(pk=odeme_id).first()
+            if odeme is None:
+                raise ValidationError("Ödeme bulunamadı.")
+            if BankaHareketi.objects.filter(odeme_id=odeme_id).exclude(pk=hareket.pk).exists():
+                raise ValidationError("Bu ödeme başka bir banka hareketiyle eşleşmiş.")
+        with transaction.atomic():
+            hareket.odeme_id = odeme_id or None
+            hareket.save(update_fields=["odeme"])
+            BankStatementService._sayac_yenile(hareket.ekstre)
+
+    @staticmethod
+    def _sayac_yenile(ekstre: BankaEkstresi) -> None:
+        ozet = ekstre.hareketler.aggregate(satir=Count("id"), eslesen=Count("odeme"))
+        BankaEkstresi.objects.filter(pk=ekstre.pk).update(satir_sayisi=ozet["satir"], eslesen_sayisi=ozet["eslesen"])
+        ekstre.satir_sayisi, ekstre.eslesen_sayisi = ozet["satir"], ozet["eslesen"]
@@ -0,0 +1,181 @@
+# core/services/cari_bakiye.py
+"""
+TEDARİKÇİ CARİ BAKİYE DEFTERİ
+
+Tanımlar (ekranların bugüne kadar kullandığı hesaplarla birebir):
+- fatura_odenen : fatura başına (OdemeDagitim toplamı + dağıtımı olmayan eski tip Odeme.fatura ödemeleri)
+- fatura_kalan  : fatura başına max(genel_toplam - ödenen, 0) toplamı
+- hakedis_*     : sadece onaylı hakedişler; kalan = max(net - fiili_odenen, 0)
+- avans_bakiye  : max(ödemeler - faturalara ödenen - hakedişlere ödenen, 0)
+- cari_bakiye   : (fatura + hakediş brüt) - ödemeler   (finans özeti / mutabakat)
+- kalan_borc    : fatura_kalan + hakedis_kalan        (ödeme merkezi / AJAX)
+
+Hesap set bazlıdır: tedarikçi sayısından bağımsız olarak sabit sayıda GROUP BY sorgusu.
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from core.models import Fatura, Hakedis, Odeme, OdemeDagitim, Tedarikci, TedarikciBakiye
+
+
+Q2 = Decimal("0.01")
+_DEC = DecimalField(max_digits=18, decimal_places=2)
+_SIFIR = Value(Decimal("0.00"), output_field=_DEC)
+
+ALANLAR = (
+    "fatura_toplam", "fatura_odenen", "fatura_kalan",
+    "hakedis_toplam", "hakedis_net", "hakedis_odenen", "hakedis_kalan",
+    "odeme_toplam", "dagitilan_toplam", "avans_bakiye",
+    "cari_bakiye", "kalan_borc",
+)
+
+
+def _q2(x) -> Decimal:
+    return Decimal(str(x or 0)).quantize(Q2)
+
+
+def _toplam_subquery(qs, alan: str, grup: str) -> Coalesce:
+    return Coalesce(
+        Subquery(qs.values(grup).annotate(s=Sum(alan)).values("s")[:1], output_field=_DEC),
+        _SIFIR,
+    )
+
+
+def fatura_odenen_ifadesi(*, Odeme=Odeme, OdemeDagitim=OdemeDagitim):
+    """
+    Faturanın ödenen tutarının TEK (kanonik) tanımı, TL:
+    OdemeDagitim toplamı + dağıtımı olmayan eski tip Odeme.fatura ödemeleri.
+    Fatura sorgusunda annotate/update ile kullanılır (OuterRef("pk") = fatura).
+    """
+    return (
+        _toplam_subquery(OdemeDagitim.objects.filter(fatura=OuterRef("pk")), "tutar", "fatura")
+        + _toplam_subquery(Odeme.objects.filter(fatura=OuterRef("pk"), dagitimlar__isnull=True), "tutar", "fatura")
+    )
+
+
+def bakiye_hesapla(ted_ids: Iterable[int] | None = None, *, Fatura=Fatura, Hakedis=Hakedis,
+                   Odeme=Odeme, OdemeDagitim=OdemeDagitim) -> dict[int, dict[str, Decimal]]:
+    """
+    {tedarikci_id: {alan: tutar}} döner. ted_ids=None: tüm tedarikçiler.
+    Model sınıfları parametre: migration içinde tarihsel modellerle de çalışsın diye.
+    """
+    ted_ids = None if ted_ids is None else list(set(ted_ids))
+    sonuc: dict[int, dict[str, Decimal]] = {}
+
+    def satir(ted_id):
+        return sonuc.setdefault(ted_id, {a: Decimal("0.00") for a in ALANLAR})
+
+    # 1) Faturalar: fatura başına ödenen (subquery) -> tedarikçi bazında toplam
+    fat_qs = Fatura.objects.all()
+    if ted_ids is not None:
+        fat_qs = fat_qs.filter(tedarikci_id__in=ted_ids)
+    fat_qs = fat_qs.annotate(_odenen=fatura_odenen_ifadesi(Odeme=Odeme, OdemeDagitim=OdemeDagitim))
+    for r in fat_qs.values("tedarikci_id").annotate(
+        toplam=Sum("genel_toplam"),
+        odenen=Sum("_odenen"),
+        kalan=Sum(Greatest(F("genel_toplam") - F("_odenen"), _SIFIR)),
+    ):
+        s = satir(r["tedarikci_id"])
+        s["fatura_toplam"], s["fatura_odenen"], s["fatura_kalan"] = _q2(r["toplam"]), _q2(r["odenen"]), _q2(r["kalan"])
+
+    # 2) Onaylı hakedişler
+    hk_qs = Hakedis.objects.filter(onay_durumu=True)
+    if ted_ids is not None:
+        hk_qs = hk_qs.filter(satinalma__teklif__tedarikci_id__in=ted_ids)
+    for r in hk_qs.values(ted=F("satinalma__teklif__tedarikci_id")).annotate(
+        toplam=Sum(F("brut_tutar") + F("kdv_tutari")),
+        net=Sum("odenecek_net_tutar"),
+        odenen=Sum("fiili_odenen_tutar"),
+        kalan=Sum(Greatest(F("odenecek_net_tutar") - F("fiili_odenen_tutar"), _SIFIR)),
+    ):
+        s = satir(r["ted"])
+        s["hakedis_toplam"], s["hakedis_net"] = _q2(r["toplam"]), _q2(r["net"])
+        s["hakedis_odenen"], s["hakedis_kalan"] = _q2(r["odenen"]), _q2(r["kalan"])
+
+    # 3) Ödemeler ve dağıtımlar
+    od_qs = Odeme.objects.all()
+    dg_qs = OdemeDagitim.objects.all()
+    if ted_ids is not None:
+        od_qs = od_qs.filter(tedarikci_id__in=ted_ids)
+        dg_qs = dg_qs.filter(odeme__tedarikci_id__in=ted_ids)
+    for r in od_qs.values("tedarikci_id").annotate(t=Sum("tutar")):
+        satir(r["tedarikci_id"])["odeme_toplam"] = _q2(r["t"])
+    for r in dg_qs.values(ted=F("odeme__tedarikci_id")).annotate(t=Sum("tutar")):
+        satir(r["ted"])["dagitilan_toplam"] = _q2(r["t"])
+
+    # 4) Türetilmiş alanlar
+    for s in sonuc.values():
+        s["avans_bakiye"] = max(s["odeme_toplam"] - s["fatura_odenen"] - s["hakedis_odenen"], Decimal("0.00"))
+        s["cari_bakiye"] = s["fatura_toplam"] + s["hakedis_toplam"] - s["odeme_toplam"]
+        s["kalan_borc"] = s["fatura_kalan"] + s["hakedis_kalan"]
+
+    # Hiç hareketi kalmamış tedarikçiler de sıfırlansın
+    for ted_id in ted_ids or []:
+        satir(ted_id)
+
+    return sonuc
+
+
+class BalanceService:
+
+    @staticmethod
+    def tedarikci_yenile(*ted_ids, olustur: bool = True) -> None:
+        """
+        Verilen tedarikçilerin bakiye satırlarını, çağıranın transaction'ı içinde yeniden yazar.
+        Satır select_for_update ile kilitlenir: aynı tedarikçiye paralel yazımlar sıraya girer.
+        olustur=False: satırı olmayan tedarikçiye satır açılmaz (silme/cascade sırasında).
+        """
+        ids = sorted({int(t) for t in ted_ids if t})
+        if not ids:
+            return
+
+        with transaction.atomic():
+            mevcut = set(
+                TedarikciBakiye.objects.select_for_update().filter(tedarikci_id__in=ids)
+                .values_list("tedarikci_id", flat=True)
+            )
+            eksik = [i for i in ids if i not in mevcut]
+            if not olustur:
+                ids = sorted(mevcut)
+            elif eksik:
+                gecerli = Tedarikci.objects.filter(id__in=eksik).values_list("id", flat=True)
+                TedarikciBakiye.objects.bulk_create(
+                    [TedarikciBakiye(tedarikci_id=i) for i in gecerli], ignore_conflicts=True
+                )
+                ids = sorted(mevcut | set(gecerli))
+
+            if not ids:
+                return
+            hesap = bakiye_hesapla(ids)
+            # bulk_update auto_now çalıştırmaz: "Son Hesaplama" elle yazılır
+            simdi = timezone.now()
+            satirlar = [TedarikciBakiye(tedarikci_id=i, guncellendi=simdi, **hesap[i]) for i in ids]
+            TedarikciBakiye.objects.bulk_update(satirlar, fields=list(ALANLAR) + ["guncellendi"])
+
+    @staticmethod
+    @transaction.atomic
+    def tumunu_yeniden_olustur() -> int:
+        """Defteri kaynaklardan baştan kurar (rebuild komutu). Dönüş: satır sayısı."""
+        hesap = bakiye_hesapla(None)
+        TedarikciBakiye.objects.all().delete()
+        satirlar = [
+            TedarikciBakiye(tedarikci_id=ted_id, **hesap.get(ted_id, {}))
+            for ted_id in Tedarikci.objects.values_list("id", flat=True)
+        ]
+        TedarikciBakiye.objects.bulk_create(satirlar)
+        return len(satirlar)
+
+    @staticmethod
+    def bakiye(tedarikci_id) -> TedarikciBakiye:
+        """Tek tedarikçi bakiyesi (PK ile tek sorgu). Satır yoksa sıfır bakiye döner."""
+        return (
+            TedarikciBakiye.objects.filter(tedarikci_id=tedarikci_id).first()
+            or TedarikciBakiye(tedarikci_id=tedarikci_id)
+        )
@@ -0,0 +1,198 @@
+# core/services/cari_ekstre.py
+"""
+TEDARİKÇİ CARİ EKSTRESİ (tek SQL)
+
+Fatura (borç), onaylı hakediş (borç, net ödenecek) ve ödeme (alacak) hareketleri
+tek bir UNION ALL sorgusunda birleştirilir; yürüyen bakiye window function ile
+veritabanında hesaplanır.
+
+- Sıralama kararlıdır: tarih, tip (fatura < hakediş < ödeme), kayıt id.
+- Başlangıç tarihi verilirse ilk satır "Devir" (açılış bakiyesi) satırıdır;
+  yürüyen bakiye açılış bakiyesinin üzerine yürür. Aralık dışı satırlar çekilmez.
+- Açılış bakiyesi: başlangıçtan önce kapanmış dönemler DonemCariOzeti'nden, kalan kısım
+  (son kapanıştan başlangıca kadar) ham hareketlerden toplanır; kapalı dönem satırları taranmaz.
+- Tutarlar SQL içinde kuruş (tamsayı) olarak toplanır: SQLite'ta kayan nokta kayması olmaz.
+- Döviz bilgisi (pb / kilit kur): faturada kendi kolonlarından, hakedişte teklif JOIN'inden (N+1 yok).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+
+from core.models import DonemCariOzeti, DonemKapanisi, Fatura, Hakedis, Odeme, SatinAlma, Teklif
+
+
+Q2 = Decimal("0.01")
+
+ODEME_TURU_ADI = dict(Odeme.ODEME_TURLERI)
+
+
+@dataclass
+class Ekstre:
+    acilis_bakiye: Decimal = Decimal("0.00")
+    satirlar: list[dict] = field(default_factory=list)
+    son_bakiye: Decimal = Decimal("0.00")
+
+
+def _kurus(cents) -> Decimal:
+    return (Decimal(int(cents or 0)) / 100).quantize(Q2)
+
+
+def _sql() -> str:
+    qn = connection.ops.quote_name
+
+    def t(model):
+        return qn(model._meta.db_table)
+
+    def c(model, name):
+        return qn(model._meta.get_field(name).column)
+
+    teklif_kur = f"COALESCE(tk.{c(Teklif, 'locked_rate')}, tk.{c(Teklif, 'kur_degeri')})"
+
+    def acik(tarih):
+        # Kapalı dönem (kesim dahil) satırları devirde; sadece sonrası taranır
+        return f"((SELECT gun FROM kesim) IS NULL OR {tarih} > (SELECT gun FROM kesim))"
+
+    def kurus(alan):
+        return f"CAST(ROUND(dc.{c(DonemCariOzeti, alan)} * 100) AS BIGINT)"
+
+    return f"""
+        WITH kesim AS (
+            SELECT MAX(dk.{c(DonemKapanisi, 'bitis')}) AS gun
+            FROM {t(DonemKapanisi)} dk
+            WHERE %(d1)s IS NOT NULL AND dk.{c(DonemKapanisi, 'bitis')} < %(d1)s
+        ),
+        devir AS (
+            SELECT COALESCE(SUM({kurus('fatura_toplam')} + {kurus('hakedis_net')} - {kurus('odeme_toplam')}), 0) AS tutar
+            FROM {t(DonemCariOzeti)} dc
+            JOIN {t(DonemKapanisi)} dk ON dk.{c(DonemKapanisi, 'id')} = dc.{c(DonemCariOzeti, 'donem')}
+            WHERE dc.{c(DonemCariOzeti, 'tedarikci')} = %(ted)s AND dk.{c(DonemKapanisi, 'bitis')} <= (SELECT gun FROM kesim)
+        ),
+        hareket AS (
+            SELECT f.{c(Fatura, 'tarih')} AS tarih, 0 AS sira, f.{c(Fatura, 'id')} AS kayit_id,
+                   'fatura' AS tip, f.{c(Fatura, 'aciklama')} AS aciklama,
+                   CAST(ROUND(f.{c(Fatura, 'genel_toplam')} * 100) AS BIGINT) AS borc, 0 AS alacak,
+                   f.{c(Fatura, 'para_birimi')} AS pb, f.{c(Fatura, 'kur_degeri')} AS kur
+            FROM {t(Fatura)} f
+            WHERE f.{c(Fatura, 'tedarikci')} = %(ted)s AND {acik(f"f.{c(Fatura, 'tarih')}")}
+
+            UNION ALL
+
+            SELECT h.{c(Hakedis, 'tarih')}, 1, h.{c(Hakedis, 'id')},
+                   'hakedis', h.{c(Hakedis, 'aciklama')},
+                   CAST(ROUND(h.{c(Hakedis, 'odenecek_net_tutar')} * 100) AS BIGINT), 0,
+                   tk.{c(Teklif, 'para_birimi')}, {teklif_kur}
+            FROM {t(Hakedis)} h
+            JOIN {t(SatinAlma)} sa ON sa.{c(SatinAlma, 'id')} = h.{c(Hakedis, 'satinalma')}
+            JOIN {t(Teklif)} tk ON tk.{c(Teklif, 'id')} = sa.{c(SatinAlma, 'teklif')}
+            WHERE tk.{c(Teklif, 'tedarikci')} = %(ted)s AND h.{c(Hakedis, 'onay_durumu')} = %(onay)s
+              AND {acik(f"h.{c(Hakedis, 'tarih')}")}
+
+            UNION ALL
+
+            SELECT o.{c(Odeme, 'tarih')}, 2, o.{c(Odeme, 'id')},
+                   'odeme', o.{c(Odeme, 'odeme_turu')},
+                   0, CAST(ROUND(o.{c(Odeme, 'tutar')} * 100) AS BIGINT),
+                   NULL, NULL
+            FROM {t(Odeme)} o
+            WHERE o.{c(Odeme, 'tedarikci')} = %(ted)s AND {acik(f"o.{c(Odeme, 'tarih')}")}
+        ),
+        acilis AS (
+            SELECT (SELECT tutar FROM devir) + COALESCE(SUM(borc - alacak), 0) AS tutar
+            FROM hareket
+            WHERE %(d1)s IS NOT NULL AND tarih < %(d1)s
+        )
+        SELECT e.tarih, e.tip, e.aciklama, e.borc, e.alacak, e.pb, e.kur, e.bakiye
+        FROM (
+            SELECT %(d1)s AS tarih, -1 AS sira, 0 AS kayit_id, 'devir' AS tip, NULL AS aciklama,
+                   0 AS borc, 0 AS alacak, NULL AS pb, NULL AS kur,
+                   (SELECT tutar FROM acilis) AS bakiye
+            WHERE %(d1)s IS NOT NULL
+
+            UNION ALL
+
+            SELECT h.tarih, h.sira, h.kayit_id, h.tip, h.aciklama, h.borc, h.alacak, h.pb, h.kur,
+                   (SELECT tutar FROM acilis)
+                   + SUM(h.borc - h.alacak) OVER (
+                         ORDER BY h.tarih, h.sira, h.kayit_id
+                         ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                     )
+            FROM hareket h
+            WHERE (%(d1)s IS NULL OR h.tarih >= %(d1)s)
+              AND (%(d2)s IS NULL OR h.tarih <= %(d2)s)
+        ) e
+        ORDER BY e.tarih, e.sira, e.kayit_id
+    """
+
+
+def _orj_bilgi(tl: Decimal, pb, kur) -> str:
+    """Dövizli teklife bağlı kalemlerde TL'den geriye 'orj' bilgisi (bilgi amaçlı)."""
+    pb = (pb or "TRY").upper().strip()
+    if pb in ("TL", "TRY"):
+        return ""
+    try:
+        kur = Decimal(str(kur or 0))
+    except Exception:
+        return ""
+    if kur <= 0:
+        return ""
+    orj = (tl / kur).quantize(Q2)
+    return f"Orj: {orj:,.2f} {pb} | Kur: {kur.normalize()}"
+
+
+def _tarih(v) -> date:
+    return v if isinstance(v, date) else date.fromisoformat(str(v)[:10])
+
+
+def _satir(tarih, tip, aciklama, borc, alacak, pb, kur, bakiye) -> dict:
+    borc, alacak = _kurus(borc), _kurus(alacak)
+    orj = ""
+    if tip == "devir":
+        metin = "Devir (Açılış Bakiyesi)"
+    elif tip == "fatura":
+        metin, orj = f"Fatura: {aciklama or ''}".strip(), _orj_bilgi(borc, pb, kur)
+    elif tip == "hakedis":
+        metin, orj = f"Hakediş: {aciklama or ''}".strip(), _orj_bilgi(borc, pb, kur)
+    else:
+        metin = f"Ödeme: {ODEME_TURU_ADI.get(aciklama, aciklama)}"
+    return {
+        "tarih": _tarih(tarih),
+        "aciklama": metin + (
+            f"<br><span class='badge bg-light text-dark border'>{orj}</span>" if orj else ""
+        ),
+        "aciklama_duz": f"{metin} ({orj})" if orj else metin,
+        "borc": borc,
+        "alacak": alacak,
+        "bakiye": _kurus(bakiye),
+        "tip": tip,
+    }
+
+
+class StatementService:
+
+    @staticmethod
+    def satirlar(tedarikci_id: int, d1: date | None = None, d2: date | None = None, parti: int = 1000):
+        """
+        Ekstre satırlarını sırayla üretir (generator). Cursor'dan parti parti okunur:
+        yıllarca hareketi olan tedarikçide de bellek kullanımı sabit kalır (dışa aktarım).
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(_sql(), {"ted": tedarikci_id, "onay": True, "d1": d1, "d2": d2})
+            while True:
+                rows = cursor.fetchmany(parti)
+                if not rows:
+                    break
+                for row in rows:
+                    yield _satir(*row)
+
+    @staticmethod
+    def cari_ekstre(tedarikci_id: int, d1: date | None = None, d2: date | None = None) -> Ekstre:
+        """Tek sorgu: (varsa) devir satırı + aralıktaki hareketler, yürüyen bakiyeyle."""
+        ekstre = Ekstre(satirlar=list(StatementService.satirlar(tedarikci_id, d1, d2)))
+        if ekstre.satirlar and ekstre.satirlar[0]["tip"] == "devir":
+            ekstre.acilis_bakiye = ekstre.satirlar[0]["bakiye"]
+        ekstre.son_bakiye = ekstre.satirlar[-1]["bakiye"] if ekstre.satirlar else Decimal("0.00")
+        return ekstre
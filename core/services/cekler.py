@@ -0,0 +1,88 @@
+# core/services/cekler.py
+"""
+ÇEK TAKİBİ (küme bazlı)
+
+- Kategori (gecikmiş / yaklaşan / ileri tarihli / ödenmiş) tek Case/When ifadesiyle
+  veritabanında belirlenir; kova toplamları ve adetleri tek GROUP BY sorgusuyla gelir.
+- Vade takvimi: ödenmemiş çeklerin gün / hafta bazında toplamları.
+- Sorgular (odeme_turu, is_cek_odendi, vade_tarihi) indeksini kullanır.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Case, CharField, Count, Sum, Value, When
+from django.db.models.functions import TruncDay, TruncWeek
+from django.utils import timezone
+
+from core.models import Odeme
+
+
+KATEGORILER = ("gecikmis", "yaklasan", "ileri", "odendi")
+YAKLASAN_GUN = 30
+
+
+def kategori_ifadesi(bugun: date) -> Case:
+    return Case(
+        When(is_cek_odendi=True, then=Value("odendi")),
+        When(vade_tarihi__lt=bugun, then=Value("gecikmis")),
+        When(vade_tarihi__lte=bugun + timedelta(days=YAKLASAN_GUN), then=Value("yaklasan")),
+        default=Value("ileri"),
+        output_field=CharField(),
+    )
+
+
+class ChequeService:
+
+    @staticmethod
+    def cekler(bugun: date | None = None):
+        """Tüm çekler, `kategori` anotasyonuyla (tek sorgu)."""
+        bugun = bugun or timezone.localdate()
+        return (
+            Odeme.objects
+            .filter(odeme_turu="cek")
+            .annotate(kategori=kategori_ifadesi(bugun))
+            .select_related("tedarikci")
+            .order_by("vade_tarihi", "id")
+        )
+
+    @staticmethod
+    def ozet(bugun: date | None = None) -> dict:
+        """Kova başına {toplam, adet} + toplam_risk (ödenmemişler), tek GROUP BY sorgusu."""
+        bugun = bugun or timezone.localdate()
+        satirlar = (
+            Odeme.objects
+            .filter(odeme_turu="cek")
+            .annotate(kategori=kategori_ifadesi(bugun))
+            .order_by()
+            .values("kategori")
+            .annotate(toplam=Sum("tutar"), adet=Count("id"))
+        )
+        ozet = {k: {"toplam": Decimal("0.00"), "adet": 0} for k in KATEGORILER}
+        for r in satirlar:
+            ozet[r["kategori"]] = {"toplam": r["toplam"] or Decimal("0.00"), "adet": r["adet"]}
+        ozet["toplam_risk"] = sum((ozet[k]["toplam"] for k in KATEGORILER if k != "odendi"), Decimal("0.00"))
+        return ozet
+
+    @staticmethod
+    def takvim(d1: date | None = None, d2: date | None = None, gruplama: str = "gun") -> list[dict]:
+        """Ödenmemiş çeklerin vade takvimi: gün veya hafta (Pazartesi başlangıçlı) toplamları."""
+        qs = Odeme.objects.filter(odeme_turu="cek", is_cek_odendi=False, vade_tarihi__isnull=False)
+        if d1:
+            qs = qs.filter(vade_tarihi__gte=d1)
+        if d2:
+            qs = qs.filter(vade_tarihi__lte=d2)
+
+        kesim = TruncWeek("vade_tarihi") if gruplama == "hafta" else TruncDay("vade_tarihi")
+        satirlar = (
+            qs.order_by()
+            .annotate(donem=kesim)
+            .values("donem")
+            .annotate(toplam=Sum("tutar"), adet=Count("id"))
+            .order_by("donem")
+        )
+        return [
+            {"tarih": r["donem"], "toplam": r["toplam"] or Decimal("0.00"), "adet": r["adet"]}
+            for r in satirlar
+        ]
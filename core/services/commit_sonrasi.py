@@ -0,0 +1,48 @@
+# core/services/commit_sonrasi.py
+"""
+COMMIT SONRASI TOPLU İŞ (transaction başına küme)
+
+Sinyaller aynı transaction'da onlarca kez "şu kayıt kirlendi" der; iş commit olunca bir kez yapılır.
+Küme modül düzeyinde TEK değildir: bağlantıya (thread'e) ve o anki transaction'a aittir.
+- Her transaction ilk işaretlemede kendi kümesini açar; on_commit kapanışları sadece o kümeyi işler
+  (başka thread'in henüz commit olmamış işaretlerine dokunmaz).
+- Transaction geri alınırsa Django kapanışları düşürür; küme sahipsiz kalır ve bir sonraki
+  işaretleme yeni küme açar (eski işaretler sızmaz).
+- Transaction dışında (autocommit) iş hemen yapılır.
+"""
+from __future__ import annotations
+
+from typing import Callable, Hashable, Iterable
+
+from django.db import transaction
+
+
+def _bekliyor(baglanti, kume: set) -> bool:
+    return any(getattr(func, "kume", None) is kume for _, func, _ in baglanti.run_on_commit)
+
+
+def commit_sonrasi_topla(anahtar: str, ogeler: Iterable[Hashable], isle: Callable[[set], None]) -> None:
+    """ogeler'i bu transaction'ın `anahtar` kümesine ekler; küme commit sonrası isle(küme) ile bir kez işlenir."""
+    ogeler = set(ogeler)
+    if not ogeler:
+        return
+    baglanti = transaction.get_connection()
+    bekleyenler = baglanti.__dict__.setdefault("_commit_sonrasi", {})
+
+    kume = bekleyenler.get(anahtar)
+    if kume is None or not _bekliyor(baglanti, kume):
+        kume = bekleyenler[anahtar] = set()
+    kume.update(ogeler)
+
+    # Her işaretleme kendi kapanışını kaydeder (işaretin yapıldığı savepoint'e bağlı);
+    # hepsi aynı kümeyi paylaşır: ilk çalışan kümeyi boşaltır, sonrakiler boş geçer.
+    def kapanis():
+        if bekleyenler.get(anahtar) is kume:
+            del bekleyenler[anahtar]
+        if kume:
+            islenecek = set(kume)
+            kume.clear()
+            isle(islenecek)
+
+    kapanis.kume = kume
+    transaction.on_commit(kapanis)
@@ -0,0 +1,79 @@
+# core/services/dashboard_cache.py
+"""
+EKRAN CACHE'İ (veri sürümü anahtarlı)
+
+Hesaplanan ekran context'i "<ekran>:v<sürüm>:<gün>" anahtarıyla cache'lenir.
+Finans verisi değişince (Fatura, FaturaKalem, Odeme, OdemeDagitim, Hakedis, Tedarikci
+post_save/post_delete) sürüm commit sonrası artırılır; eski anahtarlar bir daha okunmaz
+ve TTL ile kendiliğinden düşer. Silme/tarama yok: locmem ve file backend'de aynı çalışır.
+
+- Sürüm commit SONRASI artar: commit öncesi artsaydı paralel bir istek eski veriyi
+  yeni sürümle cache'e yazabilirdi.
+- Sürüm anahtarı cache'ten düşerse milisaniye zaman damgasıyla yeniden başlar:
+  eski sürüm numaraları tekrar kullanılmaz.
+- İsabet/ıska sayaçları cache'te tutulur (file backend'de tüm worker'lar ortak).
+"""
+from __future__ import annotations
+
+import time
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+KEY_PREFIX = "ekran_cache"
+SURUM_KEY = f"{KEY_PREFIX}:surum"
+
+
+def _incr(key: str, delta: int = 1) -> None:
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.set(key, delta, None)
+
+
+def surum() -> int:
+    v = cache.get(SURUM_KEY)
+    if v is None:
+        cache.add(SURUM_KEY, int(time.time() * 1000), None)
+        v = cache.get(SURUM_KEY)
+    return int(v)
+
+
+def surum_artir() -> None:
+    """Veri değişti: tüm ekran cache'lerini geçersiz kıl (commit sonrası)."""
+    def _artir():
+        surum()  # anahtar yoksa önce oluştur
+        _incr(SURUM_KEY)
+    transaction.on_commit(_artir)
+
+
+def getir(ekran: str, gun, hesapla: Callable[[], dict]) -> dict:
+    """Ekran context'ini cache'ten döndürür; yoksa hesaplayıp yazar."""
+    key = f"{KEY_PREFIX}:{ekran}:v{surum()}:{gun.isoformat()}"
+    veri = cache.get(key)
+    if veri is not None:
+        _incr(f"{KEY_PREFIX}:m:{ekran}:hit")
+        return veri
+
+    _incr(f"{KEY_PREFIX}:m:{ekran}:miss")
+    veri = hesapla()
+    cache.set(key, veri, int(getattr(settings, "DASHBOARD_CACHE_TTL", 900)))
+    return veri
+
+
+def metrics(ekran: str) -> dict:
+    hit = cache.get(f"{KEY_PREFIX}:m:{ekran}:hit") or 0
+    miss = cache.get(f"{KEY_PREFIX}:m:{ekran}:miss") or 0
+    return {
+        "hit": hit,
+        "miss": miss,
+        "hit_ratio": round(hit / (hit + miss), 3) if (hit + miss) else None,
+        "surum": surum(),
+    }
+
+
+def reset(ekran: str) -> None:
+    cache.delete_many([f"{KEY_PREFIX}:m:{ekran}:hit", f"{KEY_PREFIX}:m:{ekran}:miss"])
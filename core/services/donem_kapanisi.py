@@ -0,0 +1,255 @@
+# core/services/donem_kapanisi.py
+"""
+DÖNEM KAPANIŞI
+
+Kapanan ay kilitlenir ve o döneme ait hareketler bir kez özetlenir (DonemCariOzeti,
+DonemGiderOzeti, DonemStokOzeti). Kapalı dönem bir daha değişmediği için raporlar
+açılış bakiyesini bu özetlerden alır ve ham tablolarda sadece açık dönemi toplar:
+sorgu maliyeti toplam geçmişle değil, son dönemin hareketiyle büyür.
+
+- Dönemler ardışıktır: yeni kapanış bir önceki kapanışın bitişinden sonraki günden başlar
+  (ilk kapanış tüm geçmişi kapsar). Arada atlanan aylar aynı döneme katlanır.
+- Kilit: kapalı döneme tarihli kayıt eklenemez, silinemez; özete giren alanları
+  değiştirilemez (fatura ödenen tutarı, hakediş fiili ödenen gibi alanlar serbesttir).
+  Tek kapı signals.py (pre_save / pre_delete); bulk_create yollarında acik_donem_kontrol çağrılır.
+- Sadece son dönem geri açılabilir; özetleri silinir (özet satırları güncellenmez).
+"""
+from __future__ import annotations
+
+import datetime
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.models import (
+    DepoHareket, DonemCariOzeti, DonemGiderOzeti, DonemKapanisi, DonemStokOzeti,
+    Fatura, Hakedis, Harcama, Odeme,
+)
+from core.services.revaluation import _ay_basi, _ay_sonu
+
+
+Q2 = Decimal("0.01")
+SIFIR = Decimal("0.00")
+_DEC = DecimalField(max_digits=20, decimal_places=2)
+
+# Özete giren alanlar: kapalı dönemdeki kayıtta bunlar değişemez
+KILITLI_ALANLAR = {
+    Fatura: ("tarih", "tedarikci", "genel_toplam"),
+    Hakedis: ("tarih", "satinalma", "onay_durumu", "brut_tutar", "kdv_tutari", "odenecek_net_tutar"),
+    Odeme: ("tarih", "tedarikci", "tutar"),
+    Harcama: ("tarih", "kategori", "tutar", "kur_degeri"),
+    DepoHareket: ("tarih", "malzeme", "depo", "islem_turu", "miktar"),
+}
+
+
+def _gun(dt) -> datetime.date | None:
+    if isinstance(dt, datetime.datetime):
+        return timezone.localtime(dt).date() if timezone.is_aware(dt) else dt.date()
+    return dt
+
+
+def kapanis_siniri() -> datetime.date | None:
+    """Son kapalı günün tarihi (kapanış yoksa None). Bu tarih ve öncesi kilitlidir."""
+    return DonemKapanisi.objects.aggregate(s=Max("bitis"))["s"]
+
+
+def _kilit_hatasi(sinir: datetime.date, ne: str) -> ValidationError:
+    return ValidationError(f"{sinir:%d.%m.%Y} ve öncesi kapalı dönemdir; {ne} yapılamaz.")
+
+
+def acik_donem_kontrol(*tarihler) -> None:
+    """Toplu yazım yolları için: tarihlerden biri kapalı dönemdeyse ValidationError."""
+    sinir = kapanis_siniri()
+    if sinir is None:
+        return
+    for dt in tarihler:
+        dt = _gun(dt)
+        if dt is not None and dt <= sinir:
+            raise _kilit_hatasi(sinir, "kayıt")
+
+
+def kilit_kontrol(sender, instance, silme: bool = False) -> None:
+    """
+    Kapalı dönem kilidi (signals.py: pre_save / pre_delete).
+    Kapanış yoksa tek hafif sorgu; eski değerler sadece kapanış varken okunur.
+    """
+    sinir = kapanis_siniri()
+    if sinir is None:
+        return
+
+    ad = sender._meta.verbose_name
+    yeni_tarih = _gun(instance.tarih)
+    yeni_kapali = yeni_tarih is not None and yeni_tarih <= sinir
+    if instance._state.adding:
+        if yeni_kapali:
+            raise _kilit_hatasi(sinir, f"{ad} kaydı")
+        return
+
+    alanlar = [sender._meta.get_field(a) for a in KILITLI_ALANLAR[sender]]
+    eski = sender.objects.filter(pk=instance.pk).values(*[f.name for f in alanlar]).first()
+    if not eski:
+        return
+    eski_kapali = eski["tarih"] is not None and eski["tarih"] <= sinir
+    if silme:
+        if eski_kapali:
+            raise _kilit_hatasi(sinir, f"{ad} silme")
+        return
+    if yeni_kapali and not eski_kapali:
+        raise _kilit_hatasi(sinir, f"{ad} kaydının kapalı döneme taşınması")
+    if eski_kapali:
+        for f in alanlar:
+            if f.to_python(getattr(instance, f.attname)) != eski[f.name]:
+                raise _kilit_hatasi(sinir, f"{ad} değişikliği ({f.verbose_name})")
+
+
+def _aralik(baslangic: datetime.date | None, bitis: datetime.date, alan: str = "tarih") -> Q:
+    q = Q(**{f"{alan}__lte": bitis})
+    if baslangic is not None:
+        q &= Q(**{f"{alan}__gte": baslangic})
+    return q
+
+
+def _acik(sinir: datetime.date | None, alan: str = "tarih") -> Q:
+    """Açık dönem filtresi (kapanış yoksa tüm kayıtlar)."""
+    return Q(**{f"{alan}__gt": sinir}) if sinir is not None else Q()
+
+
+_GIDER_TL = ExpressionWrapper(F("tutar") * F("kur_degeri"), output_field=_DEC)
+
+
+def _stok_toplamlari(qs):
+    return qs.values("malzeme_id", "depo_id").annotate(
+        g=Coalesce(Sum("miktar", filter=Q(islem_turu="giris")), SIFIR, output_field=_DEC),
+        c=Coalesce(Sum("miktar", filter=Q(islem_turu="cikis")), SIFIR, output_field=_DEC),
+        i=Coalesce(Sum("miktar", filter=Q(islem_turu="iade")), SIFIR, output_field=_DEC),
+    )
+
+
+class PeriodCloseService:
+
+    @staticmethod
+    @transaction.atomic
+    def kapat(ay: datetime.date, kullanici=None, aciklama: str = "") -> DonemKapanisi:
+        """Ayı (ve önceki açık ayları) kapatır; dönem özetleri GROUP BY sorgularıyla bir kez yazılır."""
+        ay = _ay_basi(ay)
+        bitis = _ay_sonu(ay)
+        if bitis >= timezone.localdate():
+            raise ValidationError("Ay bitmeden dönem kapatılamaz.")
+
+        son = DonemKapanisi.objects.select_for_update().order_by("-bitis").first()
+        if son and bitis <= son.bitis:
+            raise ValidationError(f"{ay:%m.%Y} zaten kapalı (son kapanış: {son.ay:%m.%Y}).")
+
+        baslangic = son.bitis + datetime.timedelta(days=1) if son else None
+        donem = DonemKapanisi.objects.create(
+            ay=ay, baslangic=baslangic, bitis=bitis, kapatan=kullanici, aciklama=aciklama
+        )
+        aralik = _aralik(baslangic, bitis)
+
+        # --- Cari: tedarikçi bazında ---
+        cari: dict[int, dict] = {}
+
+        def ekle(ted_id, **tutarlar):
+            satir = cari.setdefault(ted_id, {})
+            for k, v in tutarlar.items():
+                satir[k] = satir.get(k, SIFIR) + (v or SIFIR)
+
+        for r in Fatura.objects.filter(aralik).values("tedarikci_id").annotate(t=Sum("genel_toplam")):
+            ekle(r["tedarikci_id"], fatura_toplam=r["t"])
+        for r in (
+            Hakedis.objects.filter(aralik, onay_durumu=True)
+            .values("satinalma__teklif__tedarikci_id")
+            .annotate(t=Sum(F("brut_tutar") + F("kdv_tutari")), net=Sum("odenecek_net_tutar"))
+        ):
+            ekle(r["satinalma__teklif__tedarikci_id"], hakedis_toplam=r["t"], hakedis_net=r["net"])
+        for r in Odeme.objects.filter(aralik).values("tedarikci_id").annotate(t=Sum("tutar")):
+            ekle(r["tedarikci_id"], odeme_toplam=r["t"])
+
+        DonemCariOzeti.objects.bulk_create([
+            DonemCariOzeti(donem=donem, tedarikci_id=ted_id, **{k: v.quantize(Q2) for k, v in t.items()})
+            for ted_id, t in cari.items() if ted_id is not None
+        ])
+
+        # --- Gider: kategori bazında ---
+        DonemGiderOzeti.objects.bulk_create([
+            DonemGiderOzeti(donem=donem, kategori_id=r["kategori_id"], kayit_sayisi=r["n"], tutar_tl=r["t"].quantize(Q2))
+            for r in Harcama.objects.filter(aralik).values("kategori_id").annotate(n=Count("id"), t=Sum(_GIDER_TL))
+        ])
+
+        # --- Stok: malzeme x depo bazında ---
+        DonemStokOzeti.objects.bulk_create([
+            DonemStokOzeti(donem=donem, malzeme_id=r["malzeme_id"], depo_id=r["depo_id"], giris=r["g"], cikis=r["c"], iade=r["i"])
+            for r in _stok_toplamlari(DepoHareket.objects.filter(aralik))
+        ])
+        return donem
+
+    @staticmethod
+    @transaction.atomic
+    def geri_ac() -> DonemKapanisi:
+        """Son kapanışı geri açar (özetleri cascade ile silinir)."""
+        son = DonemKapanisi.objects.select_for_update().order_by("-bitis").first()
+        if son is None:
+            raise ValidationError("Kapalı dönem yok.")
+        son.delete()
+        return son
+
+    # -----------------------------------------------------
+    # Okuma: kapalı dönem özeti + açık dönem hareketi
+    # -----------------------------------------------------
+    @staticmethod
+    def maliyet_toplamlari() -> dict[str, Decimal]:
+        """Tüm zamanlar fatura (KDV dahil) / onaylı hakediş (brüt+KDV) / gider (TL) toplamı."""
+        sinir = kapanis_siniri()
+        kapali = DonemCariOzeti.objects.aggregate(
+            fatura=Coalesce(Sum("fatura_toplam"), SIFIR), hakedis=Coalesce(Sum("hakedis_toplam"), SIFIR),
+        ) if sinir else {"fatura": SIFIR, "hakedis": SIFIR}
+        kapali_gider = (
+            DonemGiderOzeti.objects.aggregate(t=Coalesce(Sum("tutar_tl"), SIFIR))["t"] if sinir else SIFIR
+        )
+
+        acik = _acik(sinir)
+        fatura = Fatura.objects.filter(acik).aggregate(t=Coalesce(Sum("genel_toplam"), SIFIR))["t"]
+        hakedis = Hakedis.objects.filter(acik, onay_durumu=True).aggregate(
+            t=Coalesce(Sum(F("brut_tutar") + F("kdv_tutari")), SIFIR)
+        )["t"]
+        gider = Harcama.objects.filter(acik).aggregate(t=Coalesce(Sum(_GIDER_TL), SIFIR, output_field=_DEC))["t"]
+        return {
+            "fatura": kapali["fatura"] + fatura,
+            "hakedis": kapali["hakedis"] + hakedis,
+            "gider": (kapali_gider + gider).quantize(Q2),
+        }
+
+    @staticmethod
+    def gider_kategorileri() -> dict[str, Decimal]:
+        """{kategori adı: TL toplam}, büyükten küçüğe."""
+        sinir = kapanis_siniri()
+        toplam: dict[str, Decimal] = {}
+        if sinir:
+            for r in DonemGiderOzeti.objects.values("kategori__isim").annotate(t=Sum("tutar_tl")):
+                toplam[r["kategori__isim"]] = toplam.get(r["kategori__isim"], SIFIR) + r["t"]
+        for r in Harcama.objects.filter(_acik(sinir)).values("kategori__isim").annotate(t=Sum(_GIDER_TL)):
+            toplam[r["kategori__isim"]] = toplam.get(r["kategori__isim"], SIFIR) + r["t"]
+        return {k: v.quantize(Q2) for k, v in sorted(toplam.items(), key=lambda kv: (-kv[1], kv[0]))}
+
+    @staticmethod
+    def stok_bakiyeleri(**filtre) -> dict[tuple[int, int | None], Decimal]:
+        """
+        {(malzeme_id, depo_id): giriş - çıkış - iade}. filtre DepoHareket alan adlarıyla verilir
+        (ör. depo__is_kullanim_yeri=False); aynı filtre dönem özetlerine de uygulanır.
+        """
+        sinir = kapanis_siniri()
+        bakiye: dict[tuple[int, int | None], Decimal] = {}
+        if sinir:
+            for r in DonemStokOzeti.objects.filter(**filtre).values("malzeme_id", "depo_id").annotate(
+                g=Sum("giris"), c=Sum("cikis"), i=Sum("iade")
+            ):
+                k = (r["malzeme_id"], r["depo_id"])
+                bakiye[k] = bakiye.get(k, SIFIR) + r["g"] - r["c"] - r["i"]
+        for r in _stok_toplamlari(DepoHareket.objects.filter(_acik(sinir), **filtre)):
+            k = (r["malzeme_id"], r["depo_id"])
+            bakiye[k] = bakiye.get(k, SIFIR) + r["g"] - r["c"] - r["i"]
+        return bakiye
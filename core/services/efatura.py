@@ -0,0 +1,415 @@
+# core/services/efatura.py
+"""
+E-FATURA (UBL-TR XML) İÇE AKTARMA
+
+- Kaynak: tek .xml dosyası, .zip arşivi (içindeki .xml'ler) veya klasör (içindeki .xml / .zip'ler).
+  Zip üyeleri diske açılmadan akış olarak okunur.
+- XML iterparse ile okunur (sabit bellek): her InvoiceLine okununca ağaçtan atılır,
+  her Invoice bitince tek bir EFatura nesnesi üretilir ve eleman temizlenir.
+  Birden çok faturayı saran zarflar (GİB paketleri vb.) da aynı akışla okunur.
+- Eşleştirme bellekte, önceden tek sorguyla kurulan sözlüklerle yapılır (fatura başına arama sorgusu yok):
+      tedarikçi: VKN/TCKN -> id, yoksa normalize ünvan -> id (bulunamazsa açılır)
+      malzeme:   normalize ad -> id (bulunamazsa açılır)
+- Faturalar partiler halinde (FATURA_PARTISI) tek transaction'da, her biri kendi savepoint'inde yazılır:
+  başlık + InvoiceService.kalemleri_yaz (kalemler ve depo girişleri toplu). Aynı tedarikçi / fatura no /
+  tarih tekrar gelirse uniq_fatura_tedarikci_no_tarih kısıtı yakalanır ve fatura "mükerrer" sayılır;
+  diğerleri etkilenmez.
+- Yazım sinyalsizdir (bulk_create): cari defter, maliyet dönem özeti ve ekran cache'i fatura başına değil,
+  parti sonunda bir kez yenilenir.
+- Dövizli faturada tutarlar PricingExchangeRate kuruyla TL'ye çevrilir; para birimi / kur faturaya yazılır.
+- İade faturaları (InvoiceTypeCode=IADE) alış faturası değildir, atlanır.
+"""
+from __future__ import annotations
+
+import os
+import zipfile
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from itertools import islice
+from typing import IO, Iterator
+from xml.etree.ElementTree import ParseError, iterparse
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from core.models import KDV_ORANLARI, PARA_BIRIMI_CHOICES, Depo, Fatura, FaturaKalem, Malzeme, Tedarikci
+from core.services import dashboard_cache
+from core.services.cari_bakiye import BalanceService
+from core.services.finans_invoices import InvoiceService
+from core.services.revaluation import ay_kirlendi
+
+
+Q2 = Decimal("0.01")
+Q4 = Decimal("0.0001")
+FATURA_PARTISI = 200  # tek transaction'da yazılan fatura sayısı
+
+GECERLI_KDV = {oran for oran, _ in KDV_ORANLARI if oran >= 0}
+GECERLI_PB = {kod for kod, _ in PARA_BIRIMI_CHOICES}
+
+# UN/ECE Rec.20 birim kodu -> Malzeme.birim (bilinmeyen: adet)
+BIRIM_KODLARI = {
+    "C62": "adet", "NIU": "adet", "H87": "adet", "PA": "adet", "BX": "adet",
+    "KGM": "kg", "TNE": "ton", "MTR": "mt", "MTK": "m2", "MTQ": "m3",
+}
+
+_TR = str.maketrans("ıİçÇğĞöÖşŞüÜ", "iicCgGoOsSuU")
+
+
+@dataclass
+class EFaturaKalemi:
+    ad: str = ""
+    miktar: Decimal = Decimal("0")
+    birim_kodu: str = ""
+    fiyat: Decimal = Decimal("0")
+    tutar: Decimal | None = None  # LineExtensionAmount (iskonto sonrası satır matrahı)
+    kdv_orani: Decimal = Decimal("0")
+
+
+@dataclass
+class EFatura:
+    kaynak: str
+    fatura_no: str = ""
+    ettn: str = ""
+    tarih: date | None = None
+    tip: str = ""
+    para_birimi: str = "TRY"
+    kur: Decimal = Decimal("1")
+    vergi_no: str = ""
+    unvan: str = ""
+    kisi: str = ""  # şahıs satıcı (TCKN): Person adı, ünvan yoksa kullanılır
+    odenecek: Decimal | None = None
+    kalemler: list[EFaturaKalemi] = field(default_factory=list)
+
+
+@dataclass
+class AktarimRaporu:
+    eklenen: int = 0
+    mukerrer: int = 0
+    atlanan: int = 0
+    hatali: int = 0
+    kalem: int = 0
+    yeni_tedarikci: int = 0
+    yeni_malzeme: int = 0
+    mesajlar: list[str] = field(default_factory=list)
+
+    @property
+    def okunan(self) -> int:
+        return self.eklenen + self.mukerrer + self.atlanan + self.hatali
+
+
+def _norm(metin: str) -> str:
+    return " ".join(str(metin or "").translate(_TR).lower().split())
+
+
+def _yerel(etiket: str) -> str:
+    """'{urn:...CommonBasicComponents-2}ID' -> 'ID'"""
+    return etiket.rsplit("}", 1)[-1]
+
+
+def _sayi(metin) -> Decimal:
+    try:
+        return Decimal(str(metin or "0").strip() or "0")
+    except InvalidOperation:
+        return Decimal("0")
+
+
+# ---------------------------------------------------------
+# Ayrıştırıcı (generator: dosya belleğe bütün okunmaz)
+# ---------------------------------------------------------
+def xml_faturalari(akis: IO, kaynak: str = "") -> Iterator[EFatura]:
+    """
+    UBL-TR akışındaki Invoice elemanlarını sırayla üretir. Alanlar Invoice'a göre yoldan okunur
+    (ad alanı önekinden bağımsız); müşteri (AccountingCustomerParty) bilgileri yok sayılır.
+    """
+    yol: list[str] = []
+    ebeveyn: list = []
+    fatura: EFatura | None = None
+    kalem: EFaturaKalemi | None = None
+    bas = 0
+    oran, vergi_kodu = None, ""
+
+    for olay, elem in iterparse(akis, events=("start", "end")):
+        ad = _yerel(elem.tag)
+        if olay == "start":
+            yol.append(ad)
+            ebeveyn.append(elem)
+            if ad == "Invoice" and fatura is None:
+                fatura, bas = EFatura(kaynak=kaynak), len(yol)
+            elif fatura is not None and ad == "InvoiceLine" and len(yol) == bas + 1:
+                kalem = EFaturaKalemi()
+            continue
+
+        ic = tuple(yol[bas:]) if fatura is not None else ()
+        metin = (elem.text or "").strip()
+        yol.pop()
+        ebeveyn.pop()
+
+        if fatura is None:
+            continue
+
+        if not ic:  # Invoice kapandı
+            fatura.unvan = fatura.unvan or fatura.kisi
+            yield fatura
+            fatura, kalem = None, None
+            if ebeveyn:
+                ebeveyn[-1].remove(elem)
+        elif ic[0] == "InvoiceLine" and kalem is not None:
+            if ic == ("InvoiceLine",):
+                fatura.kalemler.append(kalem)
+                kalem = None
+                ebeveyn[-1].remove(elem)  # okunan satır ağaçta tutulmaz
+            elif ic == ("InvoiceLine", "InvoicedQuantity"):
+                kalem.miktar, kalem.birim_kodu = _sayi(metin), elem.get("unitCode", "")
+            elif ic == ("InvoiceLine", "LineExtensionAmount"):
+                kalem.tutar = _sayi(metin)
+            elif ic == ("InvoiceLine", "Item", "Name"):
+                kalem.ad = metin
+            elif ic == ("InvoiceLine", "Price", "PriceAmount"):
+                kalem.fiyat = _sayi(metin)
+            elif ic == ("InvoiceLine", "TaxTotal", "TaxSubtotal", "Percent"):
+                oran = _sayi(metin)
+            elif ic == ("InvoiceLine", "TaxTotal", "TaxSubtotal", "TaxCategory", "TaxScheme", "TaxTypeCode"):
+                vergi_kodu = metin
+            elif ic == ("InvoiceLine", "TaxTotal", "TaxSubtotal"):
+                # Satırda ÖTV vb. başka vergiler de olabilir: KDV vergi kodu 0015
+                if oran is not None and vergi_kodu in ("", "0015"):
+                    kalem.kdv_orani = oran
+                oran, vergi_kodu = None, ""
+        elif ic == ("ID",):
+            fatura.fatura_no = metin
+        elif ic == ("UUID",):
+            fatura.ettn = metin
+        elif ic == ("IssueDate",):
+            try:
+                fatura.tarih = date.fromisoformat(metin[:10])
+            except ValueError:
+                fatura.tarih = None
+        elif ic == ("InvoiceTypeCode",):
+            fatura.tip = metin.upper()
+        elif ic == ("DocumentCurrencyCode",):
+            fatura.para_birimi = (metin or "TRY").upper()
+        elif ic == ("PricingExchangeRate", "CalculationRate"):
+            fatura.kur = _sayi(metin)
+        elif ic == ("LegalMonetaryTotal", "PayableAmount"):
+            fatura.odenecek = _sayi(metin)
+        elif ic[:2] == ("AccountingSupplierParty", "Party"):
+            parti = ic[2:]
+            if parti == ("PartyIdentification", "ID") and elem.get("schemeID", "").upper() in ("VKN", "TCKN"):
+                fatura.vergi_no = metin
+            elif parti == ("PartyName", "Name"):
+                fatura.unvan = metin
+            elif parti in (("Person", "FirstName"), ("Person", "FamilyName")):
+                fatura.kisi = f"{fatura.kisi} {metin}".strip()
+        # Okunan eleman boşaltılır: gömülü ekler (base64 XSLT / PDF) bellekte birikmez
+        elem.clear()
+
+
+def kaynak_akislari(kaynak) -> Iterator[tuple[str, IO]]:
+    """
+    (ad, binary akış) çiftleri. kaynak: dosya yolu / klasör yolu veya yüklenen dosya nesnesi (.name ile).
+    Akışlar tüketildikten sonra kapatılır.
+    """
+    if isinstance(kaynak, (str, os.PathLike)):
+        yol = os.fspath(kaynak)
+        if os.path.isdir(yol):
+            for ad in sorted(os.listdir(yol)):
+                if ad.lower().endswith((".xml", ".zip")):
+                    yield from kaynak_akislari(os.path.join(yol, ad))
+            return
+        ad = os.path.basename(yol)
+        if ad.lower().endswith(".zip"):
+            with zipfile.ZipFile(yol) as arsiv:
+                yield from _zip_akislari(arsiv, ad)
+        else:
+            with open(yol, "rb") as f:
+                yield ad, f
+        return
+
+    ad = os.path.basename(getattr(kaynak, "name", "") or "efatura.xml")
+    if ad.lower().endswith(".zip"):
+        with zipfile.ZipFile(getattr(kaynak, "file", kaynak)) as arsiv:
+            yield from _zip_akislari(arsiv, ad)
+    else:
+        yield ad, getattr(kaynak, "file", kaynak)
+
+
+def _zip_akislari(arsiv: zipfile.ZipFile, zip_adi: str) -> Iterator[tuple[str, IO]]:
+    for uye in arsiv.infolist():
+        if not uye.is_dir() and uye.filename.lower().endswith(".xml"):
+            with arsiv.open(uye) as f:
+                yield f"{zip_adi}/{uye.filename}", f
+
+
+# ---------------------------------------------------------
+# Yazım
+# ---------------------------------------------------------
+class _Eslestirici:
+    """Tedarikçi / malzeme arama sözlükleri (tek sorguyla kurulur, yeni açılanlarla güncellenir)."""
+
+    def __init__(self, rapor: AktarimRaporu, tedarikci_ac: bool, malzeme_ac: bool):
+        self.rapor = rapor
+        self.tedarikci_ac = tedarikci_ac
+        self.malzeme_ac = malzeme_ac
+        self.vkn: dict[str, int] = {}
+        self.unvan: dict[str, int] = {}
+        self.vkn_bos: set[int] = set()
+        for tid, unvan, vergi_no in Tedarikci.objects.values_list("id", "firma_unvani", "vergi_no"):
+            if vergi_no:
+                self.vkn.setdefault(vergi_no, tid)
+            else:
+                self.vkn_bos.add(tid)
+            self.unvan.setdefault(_norm(unvan), tid)
+        self.malzeme: dict[str, int] = {}
+        for mid, isim in Malzeme.objects.values_list("id", "isim"):
+            self.malzeme.setdefault(_norm(isim), mid)
+
+    def tedarikci_id(self, ef: EFatura) -> int:
+        if ef.vergi_no and ef.vergi_no in self.vkn:
+            return self.vkn[ef.vergi_no]
+        anahtar = _norm(ef.unvan)
+        tid = self.unvan.get(anahtar) if anahtar else None
+        if tid is not None:
+            # Ünvanla bulunan ve vergi no'su boş tedarikçiye VKN yazılır: sonraki eşleşme VKN'den
+            if ef.vergi_no and tid in self.vkn_bos:
+                Tedarikci.objects.filter(pk=tid).update(vergi_no=ef.vergi_no)
+                self.vkn_bos.discard(tid)
+                self.vkn[ef.vergi_no] = tid
+            return tid
+        if not self.tedarikci_ac:
+            raise ValidationError(f"Tedarikçi bulunamadı: {ef.unvan or '-'} (VKN/TCKN: {ef.vergi_no or '-'})")
+        if not anahtar:
+            raise ValidationError("Faturada satıcı ünvanı yok.")
+        tedarikci = Tedarikci.objects.create(firma_unvani=ef.unvan[:200], vergi_no=ef.vergi_no)
+        self.rapor.yeni_tedarikci += 1
+        self.unvan[anahtar] = tedarikci.id
+        if ef.vergi_no:
+            self.vkn[ef.vergi_no] = tedarikci.id
+        return tedarikci.id
+
+    def malzeme_id(self, k: EFaturaKalemi, kdv: int) -> int:
+        anahtar = _norm(k.ad)
+        if not anahtar:
+            raise ValidationError("Fatura satırında ürün adı yok.")
+        if anahtar in self.malzeme:
+            return self.malzeme[anahtar]
+        if not self.malzeme_ac:
+            raise ValidationError(f"Malzeme bulunamadı: {k.ad}")
+        malzeme = Malzeme.objects.create(
+            isim=k.ad[:200], birim=BIRIM_KODLARI.get(k.birim_kodu.upper(), "adet"), kdv_orani=kdv,
+        )
+        self.rapor.yeni_malzeme += 1
+        self.malzeme[anahtar] = malzeme.id
+        return malzeme.id
+
+
+def _kdv(oran: Decimal) -> int:
+    kdv = int(oran.to_integral_value(rounding=ROUND_HALF_UP))
+    if kdv not in GECERLI_KDV:
+        raise ValidationError(f"Desteklenmeyen KDV oranı: %{oran}")
+    return kdv
+
+
+class EInvoiceImportService:
+
+    @staticmethod
+    def ice_aktar(kaynak, depo: Depo | None = None, tedarikci_ac: bool = True,
+                  malzeme_ac: bool = True) -> AktarimRaporu:
+        """
+        Kaynaktaki tüm faturaları okur ve yazar; her fatura bağımsızdır (biri hatalıysa diğerleri yazılır).
+        depo verilmezse stok girişi sanal depoya yapılır.
+        """
+        rapor = AktarimRaporu()
+        hedef_depo = depo or Depo.objects.filter(is_sanal=True).first()
+        eslestirici = _Eslestirici(rapor, tedarikci_ac, malzeme_ac)
+
+        faturalar = EInvoiceImportService._faturalar(kaynak, rapor)
+        while parti := list(islice(faturalar, FATURA_PARTISI)):
+            EInvoiceImportService._parti_yaz(parti, hedef_depo, eslestirici, rapor)
+        return rapor
+
+    @staticmethod
+    def _faturalar(kaynak, rapor: AktarimRaporu) -> Iterator[EFatura]:
+        for ad, akis in kaynak_akislari(kaynak):
+            try:
+                yield from xml_faturalari(akis, ad)
+            except ParseError as e:
+                rapor.hatali += 1
+                rapor.mesajlar.append(f"{ad}: XML okunamadı ({e}).")
+
+    @staticmethod
+    def _parti_yaz(parti: list[EFatura], depo: Depo | None, eslestirici: _Eslestirici, rapor: AktarimRaporu) -> None:
+        """
+        Parti tek transaction, her fatura kendi savepoint'inde. Başlık / kalem / stok girişi sinyalsiz
+        yazılır; cari defter, maliyet ayı ve ekran cache'i parti sonunda bir kez yenilenir.
+        """
+        with transaction.atomic():
+            yazilan = [f for f in (EInvoiceImportService._yaz(ef, depo, eslestirici, rapor) for ef in parti) if f]
+            if yazilan:
+                BalanceService.tedarikci_yenile(*{f.tedarikci_id for f in yazilan})
+                ay_kirlendi(*{f.tarih for f in yazilan})
+                dashboard_cache.surum_artir()
+
+    @staticmethod
+    def _yaz(ef: EFatura, depo: Depo | None, eslestirici: _Eslestirici, rapor: AktarimRaporu) -> Fatura | None:
+        etiket = f"{ef.kaynak} #{ef.fatura_no or '?'}"
+        if ef.tip == "IADE":
+            rapor.atlanan += 1
+            rapor.mesajlar.append(f"{etiket}: iade faturası atlandı.")
+            return None
+        try:
+            if not ef.fatura_no or ef.tarih is None:
+                raise ValidationError("Fatura no veya tarih okunamadı.")
+            if not ef.kalemler:
+                raise ValidationError("Faturada satır yok.")
+            pb = "TRY" if ef.para_birimi in ("TRY", "TL") else ef.para_birimi
+            if pb not in GECERLI_PB:
+                raise ValidationError(f"Desteklenmeyen para birimi: {ef.para_birimi}")
+            kur = ef.kur if pb != "TRY" else Decimal("1")
+            if kur <= 0:
+                raise ValidationError(f"{pb} faturasında kur (PricingExchangeRate) yok.")
+
+            # Satırlar bellekte hazırlanır; açılan tedarikçi / malzeme faturanın savepoint'i dışında kalır
+            # (fatura geri alınsa da sözlükteki id geçerli kalır)
+            kdvler = [_kdv(k.kdv_orani) for k in ef.kalemler]
+            tedarikci_id = eslestirici.tedarikci_id(ef)
+            kalemler = []
+            for k, kdv in zip(ef.kalemler, kdvler):
+                # İskontolu satırda birim fiyat satır matrahından türetilir (toplam XML ile aynı kalır)
+                fiyat = k.fiyat
+                if k.tutar is not None and k.miktar > 0 and (k.miktar * k.fiyat).quantize(Q2) != k.tutar.quantize(Q2):
+                    fiyat = k.tutar / k.miktar
+                kalemler.append(FaturaKalem(
+                    malzeme_id=eslestirici.malzeme_id(k, kdv), miktar=k.miktar,
+                    fiyat=(fiyat * kur).quantize(Q4, rounding=ROUND_HALF_UP),
+                    kdv_oran=kdv, kdv_dahil_mi=False, aciklama=k.ad[:255],
+                ))
+
+            with transaction.atomic():
+                fatura = Fatura(
+                    tedarikci_id=tedarikci_id, fatura_no=ef.fatura_no[:50], tarih=ef.tarih,
+                    para_birimi=pb, kur_degeri=kur.quantize(Decimal("0.000001")),
+                    aciklama=f"e-Fatura (ETTN: {ef.ettn})" if ef.ettn else "e-Fatura",
+                )
+                # Sinyalsiz başlık: dönem kilidi kalemleri_yaz'da, türetilmiş veriler parti sonunda
+                Fatura.objects.bulk_create([fatura])
+                InvoiceService.kalemleri_yaz(
+                    fatura, kalemler, hedef_depo=depo, hareket_aciklamasi=f"e-Fatura #{fatura.fatura_no}", toplu=True,
+                )
+        except IntegrityError:
+            rapor.mukerrer += 1
+            rapor.mesajlar.append(f"{etiket}: daha önce aktarılmış (aynı tedarikçi / no / tarih).")
+            return None
+        except ValidationError as e:
+            rapor.hatali += 1
+            rapor.mesajlar.append(f"{etiket}: {' '.join(e.messages)}")
+            return None
+
+        rapor.eklenen += 1
+        rapor.kalem += len(kalemler)
+        if ef.odenecek is not None and pb == "TRY" and abs(fatura.genel_toplam - ef.odenecek) > Q2 * len(kalemler):
+            # Tevkifat / yuvarlama farkı: kayıt yazılır, kontrol için bildirilir
+            rapor.mesajlar.append(
+                f"{etiket}: hesaplanan toplam {fatura.genel_toplam:,.2f}, XML ödenecek {ef.odenecek:,.2f}."
+            )
+        return fatura
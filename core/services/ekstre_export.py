@@ -0,0 +1,361 @@
+# core/services/ekstre_export.py
+"""
+CARİ EKSTRE DIŞA AKTARIM (CSV / XLSX / PDF)
+
+Her biçim bir generator'dır: satırlar StatementService.satirlar()'dan parti parti gelir,
+çıktı parça parça (bytes) üretilir. Böylece:
+- HTTP'de StreamingHttpResponse ile yıllarca hareketi olan ekstre sabit bellekle akar,
+- toplu arşivde (zip) her dosya zip içine yine parça parça yazılır.
+
+Harici kütüphane gerekmez:
+- XLSX: zipfile üzerine minimal SpreadsheetML (inline string, sayı ve tarih hücreleri).
+- PDF : Helvetica ile metin tabanlı, sayfa sayfa (RAPOR_SATIR_SAYISI satırlık partiler) yazılır.
+"""
+from __future__ import annotations
+
+import csv
+import zipfile
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, Iterator
+from xml.sax.saxutils import escape
+
+from django.utils.html import strip_tags
+
+from core.services.cari_ekstre import StatementService
+
+
+BICIMLER = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "pdf": ("application/pdf", "pdf"),
+}
+BASLIKLAR = ("Tarih", "Açıklama", "Borç", "Alacak", "Bakiye")
+
+# Bu kadar satır birikince bir parça (chunk) gönderilir
+PARCA_SATIR = 500
+# PDF: sayfa başına satır
+RAPOR_SATIR_SAYISI = 48
+
+
+def _aciklama(h: dict) -> str:
+    return h.get("aciklama_duz") or strip_tags(h["aciklama"])
+
+
+def _tr_tutar(d: Decimal) -> str:
+    return f"{d:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def dosya_adi(tedarikci, bicim: str, d1: date | None = None, d2: date | None = None) -> str:
+    donem = f"_{d1 or 'baslangic'}_{d2 or 'bugun'}" if (d1 or d2) else ""
+    return f"cari_ekstre_{tedarikci.id:04d}{donem}.{BICIMLER[bicim][1]}"
+
+
+def parcalar(bicim: str, tedarikci, d1: date | None = None, d2: date | None = None) -> Iterator[bytes]:
+    """Seçilen biçimde ekstre dosyasını parça parça üretir."""
+    satirlar = StatementService.satirlar(tedarikci.id, d1, d2)
+    if bicim == "csv":
+        return csv_parcalari(satirlar)
+    if bicim == "xlsx":
+        return xlsx_parcalari(satirlar, sayfa_adi="Ekstre")
+    if bicim == "pdf":
+        return pdf_parcalari(satirlar, baslik=f"CARİ HESAP EKSTRESİ - {tedarikci.firma_unvani}", d1=d1, d2=d2)
+    raise ValueError(f"Desteklenmeyen biçim: {bicim}")
+
+
+# ---------------------------------------------------------
+# CSV (Excel TR uyumu: UTF-8 BOM + ';' ayraç)
+# ---------------------------------------------------------
+class _Satir:
+    """csv.writer için: write() aldığını geri döndürür."""
+
+    def write(self, value):
+        return value
+
+
+def tablo_csv_parcalari(basliklar: Iterable[str], satirlar: Iterable[Iterable]) -> Iterator[bytes]:
+    """Genel amaçlı akışlı CSV: başlık + satırlar (diğer raporlar da kullanır)."""
+    writer = csv.writer(_Satir(), delimiter=";")
+    yield "\ufeff".encode("utf-8") + writer.writerow(basliklar).encode("utf-8")
+
+    tampon = []
+    for satir in satirlar:
+        tampon.append(writer.writerow(satir))
+        if len(tampon) >= PARCA_SATIR:
+            yield "".join(tampon).encode("utf-8")
+            tampon = []
+    if tampon:
+        yield "".join(tampon).encode("utf-8")
+
+
+def csv_parcalari(satirlar: Iterable[dict]) -> Iterator[bytes]:
+    return tablo_csv_parcalari(BASLIKLAR, (
+        (h["tarih"].strftime("%d.%m.%Y"), _aciklama(h), h["borc"], h["alacak"], h["bakiye"])
+        for h in satirlar
+    ))
+
+
+# ---------------------------------------------------------
+# XLSX (akışlı zip: seek gerektirmez)
+# ---------------------------------------------------------
+class _Kova:
+    """Yazılanı biriktiren, seek edilemeyen çıktı: zipfile data descriptor ile yazar."""
+
+    def __init__(self):
+        self._parcalar = []
+        self._konum = 0
+
+    def write(self, b):
+        self._parcalar.append(bytes(b))
+        self._konum += len(b)
+        return len(b)
+
+    def tell(self):
+        return self._konum
+
+    def flush(self):
+        pass
+
+    def bosalt(self) -> bytes:
+        out = b"".join(self._parcalar)
+        self._parcalar = []
+        return out
+
+
+_XLSX_SABIT = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # Stil 0: varsayılan, 1: tarih (numFmt 14), 2: tutar (#,##0.00), 3: kalın başlık
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+        '<borders count="1"><border/></borders>'
+        '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+        '<cellXfs count="4"><xf/>'
+        '<xf numFmtId="14" applyNumberFormat="1"/>'
+        '<xf numFmtId="4" applyNumberFormat="1"/>'
+        '<xf fontId="1" applyFont="1"/></cellXfs>'
+        '</styleSheet>'
+    ),
+}
+
+_EXCEL_EPOCH = date(1899, 12, 30)
+
+
+def _xlsx_satir(hucreler) -> str:
+    out = []
+    for deger in hucreler:
+        if isinstance(deger, date):
+            out.append(f'<c s="1"><v>{(deger - _EXCEL_EPOCH).days}</v></c>')
+        elif isinstance(deger, Decimal):
+            out.append(f'<c s="2"><v>{deger}</v></c>')
+        else:
+            out.append(f'<c t="inlineStr"><is><t>{escape(str(deger))}</t></is></c>')
+    return "<row>" + "".join(out) + "</row>"
+
+
+def xlsx_parcalari(satirlar: Iterable[dict], sayfa_adi: str = "Ekstre") -> Iterator[bytes]:
+    kova = _Kova()
+    with zipfile.ZipFile(kova, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for ad, icerik in _XLSX_SABIT.items():
+            zf.writestr(ad, icerik)
+        zf.writestr("xl/workbook.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(sayfa_adi[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'
+        ))
+        yield kova.bosalt()
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as f:
+            f.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<cols><col min="1" max="1" width="12" customWidth="1"/>'
+                '<col min="2" max="2" width="60" customWidth="1"/>'
+                '<col min="3" max="5" width="16" customWidth="1"/></cols>'
+                '<sheetData>'
+                + "<row>" + "".join(
+                    f'<c s="3" t="inlineStr"><is><t>{escape(b)}</t></is></c>' for b in BASLIKLAR
+                ) + "</row>"
+            ).encode("utf-8"))
+
+            tampon = []
+            for h in satirlar:
+                tampon.append(_xlsx_satir((h["tarih"], _aciklama(h), h["borc"], h["alacak"], h["bakiye"])))
+                if len(tampon) >= PARCA_SATIR:
+                    f.write("".join(tampon).encode("utf-8"))
+                    tampon = []
+                    yield kova.bosalt()
+            if tampon:
+                f.write("".join(tampon).encode("utf-8"))
+            f.write(b"</sheetData></worksheet>")
+    yield kova.bosalt()
+
+
+# ---------------------------------------------------------
+# PDF (metin tabanlı, sayfa sayfa)
+# ---------------------------------------------------------
+# Standart Helvetica'da olan ama WinAnsi'de olmayan Türkçe harfler için /Differences
+_TR_KODLAR = {"Ğ": 0x80, "ğ": 0x81, "İ": 0x82, "ı": 0x83, "Ş": 0x84, "ş": 0x85}
+_TR_GLIFLER = "/Gbreve /gbreve /Idotaccent /dotlessi /Scedilla /scedilla"
+
+_SAYFA_G, _SAYFA_Y = 595, 842  # A4 (pt)
+_YAZI = 8
+
+
+def _pdf_metin(s: str) -> bytes:
+    out = bytearray()
+    for ch in s:
+        if ch in _TR_KODLAR:
+            out.append(_TR_KODLAR[ch])
+            continue
+        if ch == "₺":
+            out += b"TL"
+            continue
+        try:
+            b = ch.encode("cp1252")
+        except UnicodeEncodeError:
+            b = b"?"
+        if b and 0x80 <= b[0] <= 0x85:  # bu kodlar Türkçe harflere ayrıldı
+            b = b"?"
+        if b in (b"(", b")", b"\\"):
+            out += b"\\"
+        out += b
+    return b"(" + bytes(out) + b")"
+
+
+def _genislik(s: str) -> float:
+    # Helvetica: rakamlar 556, nokta/virgül 278, eksi 333 (1/1000 em); tutar sütunları için yeterli
+    w = sum(556 if c.isdigit() else 278 if c in ".,: " else 333 if c == "-" else 600 for c in s)
+    return w * _YAZI / 1000
+
+
+def _kisalt(s: str, n: int) -> str:
+    return s if len(s) <= n else s[: n - 3] + "..."
+
+
+def pdf_parcalari(satirlar: Iterable[dict], baslik: str, d1: date | None = None,
+                  d2: date | None = None) -> Iterator[bytes]:
+    """Her RAPOR_SATIR_SAYISI satırda bir sayfa yazılır; bellekte yalnızca nesne konumları tutulur."""
+    konumlar: dict[int, int] = {}
+    yazilan = 0
+    sayfa_nesneleri: list[int] = []
+    sonraki_no = 4  # 1: katalog, 2: sayfa ağacı, 3: font
+
+    def nesne(no: int, govde: bytes) -> bytes:
+        nonlocal yazilan
+        konumlar[no] = yazilan
+        veri = f"{no} 0 obj\n".encode() + govde + b"\nendobj\n"
+        yazilan += len(veri)
+        return veri
+
+    ust = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    yazilan = len(ust)
+    yield ust
+    yield nesne(3, (
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+        b"/Encoding << /Type /Encoding /BaseEncoding /WinAnsiEncoding /Differences [128 "
+        + _TR_GLIFLER.encode() + b"] >> >>"
+    ))
+
+    donem = f"Dönem: {d1.strftime('%d.%m.%Y') if d1 else 'Başlangıç'} - {d2.strftime('%d.%m.%Y') if d2 else 'Bugün'}"
+    kolonlar = ((40, "Tarih"), (95, "Açıklama"))
+    sag_kolonlar = ((420, "Borç"), (490, "Alacak"), (555, "Bakiye"))
+
+    def sayfa(parti: list[dict], sayfa_no: int, son: bool) -> Iterator[bytes]:
+        nonlocal sonraki_no
+        akis = [b"BT /F1 11 Tf 40 805 Td " + _pdf_metin(baslik) + b" Tj ET"]
+        akis.append(b"BT /F1 8 Tf 40 790 Td " + _pdf_metin(donem) + b" Tj ET")
+        akis.append(f"BT /F1 8 Tf 520 790 Td ".encode() + _pdf_metin(f"Sayfa {sayfa_no}") + b" Tj ET")
+
+        y = 765
+        for x, ad in kolonlar:
+            akis.append(f"BT /F1 {_YAZI} Tf {x} {y} Td ".encode() + _pdf_metin(ad) + b" Tj ET")
+        for x, ad in sag_kolonlar:
+            akis.append(f"BT /F1 {_YAZI} Tf {x - _genislik(ad):.1f} {y} Td ".encode() + _pdf_metin(ad) + b" Tj ET")
+        akis.append(f"40 {y - 4} m 555 {y - 4} l S".encode())
+
+        for h in parti:
+            y -= 14
+            akis.append(f"BT /F1 {_YAZI} Tf 40 {y} Td ".encode() + _pdf_metin(h["tarih"].strftime("%d.%m.%Y")) + b" Tj ET")
+            akis.append(f"BT /F1 {_YAZI} Tf 95 {y} Td ".encode() + _pdf_metin(_kisalt(_aciklama(h), 62)) + b" Tj ET")
+            for (x, _), deger in zip(sag_kolonlar, (h["borc"], h["alacak"], h["bakiye"])):
+                metin = _tr_tutar(deger) if (deger or x == 555) else "-"
+                akis.append(f"BT /F1 {_YAZI} Tf {x - _genislik(metin):.1f} {y} Td ".encode() + _pdf_metin(metin) + b" Tj ET")
+
+        if son:
+            son_bakiye = parti[-1]["bakiye"] if parti else Decimal("0.00")
+            metin = f"GENEL BAKİYE (TL): {_tr_tutar(son_bakiye)}"
+            akis.append(f"{40} {y - 8} m 555 {y - 8} l S".encode())
+            akis.append(f"BT /F1 10 Tf {555 - _genislik(metin) * 10 / _YAZI:.1f} {y - 24} Td ".encode()
+                        + _pdf_metin(metin) + b" Tj ET")
+
+        icerik = b"\n".join(akis)
+        icerik_no, sayfa_nesne_no = sonraki_no, sonraki_no + 1
+        sonraki_no += 2
+        yield nesne(icerik_no, f"<< /Length {len(icerik)} >>\nstream\n".encode() + icerik + b"\nendstream")
+        yield nesne(sayfa_nesne_no, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_SAYFA_G} {_SAYFA_Y}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {icerik_no} 0 R >>"
+        ).encode())
+        sayfa_nesneleri.append(sayfa_nesne_no)
+
+    parti: list[dict] = []
+    onceki = None
+    for h in satirlar:
+        if onceki is not None:
+            parti.append(onceki)
+            if len(parti) >= RAPOR_SATIR_SAYISI:
+                yield from sayfa(parti, len(sayfa_nesneleri) + 1, son=False)
+                parti = []
+        onceki = h
+    if onceki is not None:
+        parti.append(onceki)
+    yield from sayfa(parti, len(sayfa_nesneleri) + 1, son=True)
+
+    kids = " ".join(f"{n} 0 R" for n in sayfa_nesneleri)
+    yield nesne(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(sayfa_nesneleri)} >>".encode())
+    yield nesne(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+    xref_konum = yazilan
+    toplam = sonraki_no
+    xref = [f"xref\n0 {toplam}\n".encode(), b"0000000000 65535 f \n"]
+    for no in range(1, toplam):
+        xref.append(f"{konumlar[no]:010d} 00000 n \n".encode())
+    xref.append(f"trailer\n<< /Size {toplam} /Root 1 0 R >>\nstartxref\n{xref_konum}\n%%EOF\n".encode())
+    yield b"".join(xref)
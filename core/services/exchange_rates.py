@@ -3,8 +3,12 @@ from __future__ import annotations
 from dataclasses import dataclass
 from decimal import Decimal
 from datetime import date, datetime
-import urllib.request
-import xml.etree.ElementTree as ET
+from typing import Iterable
+
+from django.utils import timezone
+
+from core.models import DovizKuru, PARA_BIRIMI_CHOICES
+from core.services.rate_providers import get_provider
 
 
 @dataclass
@@ -15,48 +19,8 @@ class RateResult:
     message: str | None = None
 
 
-# ✅ tcmb1 hostname mismatch yaşattığı için www kullanıyoruz
-TCMB_TODAY_XML = "https://www.tcmb.gov.tr/kurlar/today.xml"
-TCMB_DATE_XML_FMT = "https://www.tcmb.gov.tr/kurlar/{yyyymm}/{ddmmyyyy}.xml"
-
-
-def _d(s: str) -> Decimal:
-    s = (s or "").strip().replace(",", ".")
-    return Decimal(s)
-
-
-def _fetch_xml(url: str) -> bytes:
-    with urllib.request.urlopen(url, timeout=10) as resp:
-        return resp.read()
-
-
-def _parse_try_per_currency_from_xml(xml_data: bytes, currency: str) -> RateResult:
-    currency = (currency or "").upper().strip()
-    if not currency:
-        return RateResult(ok=False, message="Para birimi boş")
-
-    if currency == "TRY":
-        return RateResult(ok=True, rate=Decimal("1.0000"), source="local")
-
-    root = ET.fromstring(xml_data)
-
-    for cur in root.findall("Currency"):
-        code = (cur.attrib.get("CurrencyCode") or "").upper().strip()
-        if code != currency:
-            continue
-
-        # Öncelik: ForexSelling, boşsa BanknoteSelling
-        fs = (cur.findtext("ForexSelling") or "").strip()
-        bs = (cur.findtext("BanknoteSelling") or "").strip()
-        val = fs or bs
-
-        if not val:
-            return RateResult(ok=False, message=f"TCMB içinde kur boş: {currency}")
-
-        rate = _d(val).quantize(Decimal("0.0001"))
-        return RateResult(ok=True, rate=rate, source="TCMB")
-
-    return RateResult(ok=False, message=f"TCMB içinde bulunamadı: {currency}")
+# Yerel kur deposunda tutulan dövizler (TRY hariç)
+STORED_CURRENCIES = tuple(code for code, _label in PARA_BIRIMI_CHOICES if code != "TRY")
 
 
 def _as_date(d: str | date | None) -> date | None:
@@ -74,34 +38,105 @@ def _as_date(d: str | date | None) -> date | None:
         return None
 
 
+def is_historical(dt: date | None) -> bool:
+    """Bugünden önceki tarihler geçmiştir: TCMB o günün kurunu bir daha değiştirmez."""
+    return dt is not None and dt < timezone.localdate()
+
+
+def _store_rates(dt: date, rates: dict[str, Decimal], source: str) -> None:
+    """Geçmiş tarihli kurları yerel depoya yazar (varsa dokunmaz)."""
+    if not is_historical(dt) or not rates:
+        return
+    DovizKuru.objects.bulk_create(
+        [DovizKuru(para_birimi=pb, tarih=dt, kur=kur, kaynak=source) for pb, kur in rates.items()],
+        ignore_conflicts=True,
+    )
+
+
+def get_rates_bulk(currencies: Iterable[str], dates: Iterable[date | None]) -> dict[tuple[str, date | None], RateResult]:
+    """
+    Çoklu döviz + çoklu tarih için kurları tek seferde çözer.
+
+    - Geçmiş tarihler önce yerel depodan TEK sorgu ile okunur.
+    - Depoda olmayan her tarih için TCMB'den tek XML çekilir (tüm dövizler aynı XML'de),
+      sonuç depoya yazılır; bir daha ağa çıkılmaz.
+    - None / bugün: today.xml (depoya yazılmaz; gün içinde değişebilir).
+
+    Dönüş: {(pb, tarih): RateResult}
+    """
+    pbs = list(dict.fromkeys((c or "").upper().strip() for c in currencies))
+    dts = list(dict.fromkeys(dates))
+    results: dict[tuple[str, date | None], RateResult] = {}
+
+    for pb in pbs:
+        if pb == "TRY":
+            for dt in dts:
+                results[(pb, dt)] = RateResult(ok=True, rate=Decimal("1.0000"), source="local")
+        elif pb not in STORED_CURRENCIES:
+            for dt in dts:
+                results[(pb, dt)] = RateResult(ok=False, message=f"Desteklenmeyen para birimi: {pb or '-'}")
+
+    wanted = [pb for pb in pbs if pb in STORED_CURRENCIES]
+    if not wanted:
+        return results
+
+    # 1) Yerel depo (tek sorgu)
+    historical = [dt for dt in dts if is_historical(dt)]
+    if historical:
+        for pb, dt, kur, kaynak in DovizKuru.objects.filter(
+            para_birimi__in=wanted, tarih__in=historical
+        ).values_list("para_birimi", "tarih", "kur", "kaynak"):
+            results[(pb, dt)] = RateResult(ok=True, rate=kur, source=kaynak or f"TCMB {dt.isoformat()}")
+
+    # 2) Eksik kalan tarihler: tarih başına tek sağlayıcı çağrısı (tüm dövizler birlikte gelir)
+    provider = get_provider()
+    for dt in dts:
+        missing = [pb for pb in wanted if (pb, dt) not in results]
+        if not missing:
+            continue
+
+        try:
+            fetched = provider.rates(dt)
+        except Exception as e:
+            for pb in missing:
+                results[(pb, dt)] = RateResult(ok=False, message=str(e))
+            continue
+
+        # Depoya o günün bütün dövizlerini yaz: sonraki istekler ağa çıkmasın
+        if provider.persistent:
+            _store_rates(dt, {pb: kur for pb, kur in fetched.rates.items() if pb in STORED_CURRENCIES}, fetched.source)
+
+        for pb in missing:
+            if pb in fetched.rates:
+                results[(pb, dt)] = RateResult(ok=True, rate=fetched.rates[pb], source=fetched.source)
+            else:
+                results[(pb, dt)] = RateResult(ok=False, message=f"{provider.name} içinde bulunamadı: {pb}")
+
+    return results
+
+
 def get_try_per_currency(currency: str, for_date: str | date | None = None) -> RateResult:
     """
     1 CURRENCY = ? TRY
-    - for_date None ise today.xml
-    - for_date varsa o tarihin TCMB XML'i
+    - for_date None ise bugünün kuru (today.xml)
+    - for_date varsa önce yerel depo, yoksa aktif kur sağlayıcısı
     """
     currency = (currency or "").upper().strip()
+    if not currency:
+        return RateResult(ok=False, message="Para birimi boş")
     if currency == "TRY":
         return RateResult(ok=True, rate=Decimal("1.0000"), source="local")
 
     dt = _as_date(for_date)
+    if currency in STORED_CURRENCIES:
+        return get_rates_bulk([currency], [dt])[(currency, dt)]
 
+    # Depoda tutulmayan dövizler: doğrudan sağlayıcıdan
+    provider = get_provider()
     try:
-        if dt is None:
-            xml_data = _fetch_xml(TCMB_TODAY_XML)
-            res = _parse_try_per_currency_from_xml(xml_data, currency)
-            if res.ok:
-                res.source = "TCMB today.xml"
-            return res
-
-        yyyymm = dt.strftime("%Y%m")
-        ddmmyyyy = dt.strftime("%d%m%Y")
-        url = TCMB_DATE_XML_FMT.format(yyyymm=yyyymm, ddmmyyyy=ddmmyyyy)
-        xml_data = _fetch_xml(url)
-        res = _parse_try_per_currency_from_xml(xml_data, currency)
-        if res.ok:
-            res.source = f"TCMB {dt.isoformat()}"
-        return res
-
+        fetched = provider.rates(dt)
     except Exception as e:
         return RateResult(ok=False, message=str(e))
+    if currency not in fetched.rates:
+        return RateResult(ok=False, message=f"{provider.name} içinde bulunamadı: {currency}")
+    return RateResult(ok=True, rate=fetched.rates[currency], source=fetched.source)
@@ -5,8 +5,10 @@ from django.db import transaction
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
-from core.models import Depo, DepoHareket, FaturaKalem
+from core.models import Depo, DepoHareket, Fatura, FaturaKalem
 from core.utils import to_decimal
+from core.services import dashboard_cache
+from core.services.donem_kapanisi import acik_donem_kontrol
 from core.services.finans_payments import PaymentService
 
 
@@ -38,6 +40,63 @@ class InvoiceService:
         net = (ham_fiyat / katsayi).quantize(Q4, rounding=ROUND_HALF_UP)
         return net
 
+    @staticmethod
+    @transaction.atomic
+    def kalemleri_yaz(fatura, kalemler, hedef_depo=None, hareket_aciklamasi="", toplu=False):
+        """
+        Fatura kalemlerini toplu yazar (kalem sayısından bağımsız sabit sorgu):
+        - Satır doğrulama + KDV ayrıştırma bellekte (FaturaKalem.clean / recalc), kalemler tek bulk_create.
+        - hedef_depo verilirse stok girişleri tek bulk_create.
+        - Başlık toplamları bir kez hesaplanır, başlık bir kez kaydedilir.
+
+        bulk_create save()/sinyal çalıştırmaz: dönem kilidi ve ekran cache'i burada açıkça ele alınır;
+        cari defter ve maliyet ayı başlık kaydının sinyalleriyle yenilenir.
+        FaturaKalem.save tek satır düzeltmeleri (admin vb.) için aynen geçerlidir.
+
+        toplu=True (çok faturalı aktarım): başlık toplamları sinyalsiz update ile yazılır;
+        cari defter, maliyet ayı ve ekran cache'i çağıran tarafından parti sonunda bir kez yenilenir.
+        """
+        kalemler = list(kalemler)
+        if not kalemler:
+            return []
+
+        tarih = fatura.tarih or timezone.now().date()
+        acik_donem_kontrol(tarih)
+
+        for k in kalemler:
+            k.fatura = fatura
+            k._sync_legacy_fields()
+            # FK'ler formset / çağıran tarafından doğrulandı: satır başına varlık sorgusu yok
+            k.full_clean(exclude=["fatura", "malzeme"])
+            k.recalc()
+        kalemler = FaturaKalem.objects.bulk_create(kalemler)
+
+        if hedef_depo:
+            DepoHareket.objects.bulk_create([
+                DepoHareket(
+                    ref_type="FATURA_KALEM",
+                    ref_id=k.id,
+                    ref_direction="IN",
+                    malzeme_id=k.malzeme_id,
+                    depo=hedef_depo,
+                    tarih=tarih,
+                    islem_turu="giris",
+                    miktar=to_decimal(k.miktar),
+                    tedarikci_id=fatura.tedarikci_id,
+                    aciklama=hareket_aciklamasi,
+                )
+                for k in kalemler
+            ])
+
+        fatura.recalc_totals()
+        alanlar = ["ara_toplam", "kdv_toplam", "genel_toplam", "orj_genel_toplam"]
+        if toplu:
+            Fatura.objects.filter(pk=fatura.pk).update(**{a: getattr(fatura, a) for a in alanlar})
+            return kalemler
+        fatura.save(update_fields=alanlar)
+        dashboard_cache.surum_artir()
+        return kalemler
+
     @staticmethod
     @transaction.atomic
     def fatura_olustur_siparisten(fatura, siparis):
@@ -54,6 +113,7 @@ class InvoiceService:
         # 1) Fatura başlığı
         fatura.satinalma = siparis
         fatura.tedarikci = siparis.teklif.tedarikci
+        fatura.teklif_dovizini_al(siparis.teklif)  # para birimi / kilit kur faturaya bir kez yazılır
         fatura.save()
 
         teklif = siparis.teklif
@@ -96,34 +156,22 @@ class InvoiceService:
         else:
             birim_fiyat_tl = net_birim_orj.quantize(Q4, rounding=ROUND_HALF_UP)
 
-        # 5) Kalem oluştur
-        kalem = FaturaKalem.objects.create(
-            fatura=fatura,
-            malzeme=malzeme,
-            miktar=islem_miktari,
-            fiyat=birim_fiyat_tl,     # TL, KDV hariç matrah
-            kdv_oran=kdv_orani,
-            kdv_dahil_mi=False,       # fiyat artık net matrah olduğu için False
-            aciklama=f"Siparişten otomatik: {siparis.id}",
-        )
-
-        # 6) Stok hareketi (varsayılan: sanal depo girişi)
-        sanal_depo = Depo.objects.filter(is_sanal=True).first()
-        if sanal_depo:
-            DepoHareket.objects.create(
-                ref_type="FATURA_KALEM",
-                ref_id=kalem.id,
-                ref_direction="IN",
+        # 5) Kalem + stok hareketi (varsayılan: sanal depo girişi)
+        InvoiceService.kalemleri_yaz(
+            fatura,
+            [FaturaKalem(
                 malzeme=malzeme,
-                depo=sanal_depo,
-                tarih=fatura.tarih or timezone.now().date(),
-                islem_turu="giris",
                 miktar=islem_miktari,
-                tedarikci=fatura.tedarikci,
-                aciklama=f"Fatura #{fatura.fatura_no} (Oto. Sipariş Girişi)",
-            )
+                fiyat=birim_fiyat_tl,     # TL, KDV hariç matrah
+                kdv_oran=kdv_orani,
+                kdv_dahil_mi=False,       # fiyat artık net matrah olduğu için False
+                aciklama=f"Siparişten otomatik: {siparis.id}",
+            )],
+            hedef_depo=Depo.objects.filter(is_sanal=True).first(),
+            hareket_aciklamasi=f"Fatura #{fatura.fatura_no} (Oto. Sipariş Girişi)",
+        )
 
-        # 7) Siparişi güncelle (faturalanan miktar)
+        # 6) Siparişi güncelle (faturalanan miktar)
         siparis.faturalanan_miktar = to_decimal(getattr(siparis, "faturalanan_miktar", 0)) + to_decimal(islem_miktari)
         siparis.save(update_fields=["faturalanan_miktar"])
 
@@ -138,7 +186,7 @@ class InvoiceService:
         Stoklar seçilen depoya girer.
 
         Not:
-        - FaturaKalem.save zaten KDV ayrıştırma + satır toplamlarını hesaplar.
+        - Kalemler kalemleri_yaz ile toplu yazılır (satır başına başlık güncellemesi yok).
         - Bu servis sadece "doğru depoya doğru stok hareketi" ve validasyon sağlar.
         """
         fatura.save()
@@ -151,33 +199,19 @@ class InvoiceService:
         if not hedef_depo:
             hedef_depo = Depo.objects.filter(is_sanal=True).first()
 
-        gercek_kalem_sayisi = 0
-        for k in kalemler:
-            if not k.malzeme_id or not k.miktar or to_decimal(k.miktar) <= 0:
-                continue
-
-            k.fatura = fatura
-            k.save()
-            gercek_kalem_sayisi += 1
-
-            if hedef_depo:
-                DepoHareket.objects.create(
-                    ref_type="FATURA_KALEM",
-                    ref_id=k.id,
-                    ref_direction="IN",
-                    malzeme=k.malzeme,
-                    depo=hedef_depo,
-                    tarih=fatura.tarih or timezone.now().date(),
-                    islem_turu="giris",
-                    miktar=to_decimal(k.miktar),
-                    tedarikci=fatura.tedarikci,
-                    aciklama=f"Serbest Fatura #{fatura.fatura_no}",
-                )
-
-        # Silinenleri temizle
+        # Silinenler önce: başlık toplamı tek seferde doğru hesaplansın
         for obj in kalemler_formset.deleted_objects:
             obj.delete()
 
+        gecerli = [
+            k for k in kalemler
+            if k.malzeme_id and k.miktar and to_decimal(k.miktar) > 0
+        ]
+        InvoiceService.kalemleri_yaz(
+            fatura, gecerli, hedef_depo=hedef_depo, hareket_aciklamasi=f"Serbest Fatura #{fatura.fatura_no}"
+        )
+        gercek_kalem_sayisi = len(gecerli)
+
         if gercek_kalem_sayisi == 0:
             raise ValidationError("En az 1 geçerli satır girmelisiniz.")
 
@@ -4,6 +4,7 @@ from decimal import Decimal, ROUND_HALF_UP
 from typing import Tuple
 
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.db.models import Sum
 from django.utils import timezone
 
@@ -133,12 +134,13 @@ class PaymentService:
     # 3) Teklif -> Kur bulma
     # ---------------------------------------------------------------------
     @staticmethod
-    def _resolve_fx_rate_for_teklif(teklif, for_date=None) -> Tuple[str, Decimal, str]:
+    def _resolve_fx_rate_for_teklif(teklif, for_date=None, kurlar=None) -> Tuple[str, Decimal, str]:
         """
         Teklif için kullanılacak kuru belirler.
         Öncelik:
           1) teklif.kur_degeri (kullanıcı girmiş olabilir)
           2) tcmb_kur_getir() (today.xml; hafta sonu genelde son iş gününü döndürür)
+             kurlar verilmişse (toplu onay) tekrar çekilmez.
 
         Dönüş: (para_birimi, kur, kaynak)
         """
@@ -156,7 +158,8 @@ class PaymentService:
             return pb, kur.quantize(Q4, rounding=ROUND_HALF_UP), "Manual/Existing"
 
         # 2) TCMB today.xml (fallback)
-        kurlar = tcmb_kur_getir()
+        if kurlar is None:
+            kurlar = tcmb_kur_getir()
         kur2 = to_decimal(kurlar.get(pb, 0) or 0, precision=4)
         if kur2 and kur2 > 0:
             return pb, kur2.quantize(Q4, rounding=ROUND_HALF_UP), "TCMB"
@@ -169,29 +172,26 @@ class PaymentService:
     # 4) Onay anında TL Kilitleme (locked_* alanları)
     # ---------------------------------------------------------------------
     @staticmethod
-    def teklif_onayinda_tl_sabitle(teklif, approval_datetime=None, force: bool = False) -> Tuple[Decimal, Decimal, Decimal]:
-        """
-        Teklifi TL'ye SABİTLER (kilitler).
-        - Onay anında bir kere çalıştırılmalıdır.
-        - Teklif modelinde locked_* alanları varsa doldurur.
+    def _kilitli_tutarlar(teklif):
+        """locked_total_try doluysa (net, kdv, brüt) döner, değilse None."""
+        if not hasattr(teklif, "locked_total_try"):
+            return None
+        try:
+            existing = to_decimal(getattr(teklif, "locked_total_try", 0))
+            if existing and existing > 0:
+                net = to_decimal(getattr(teklif, "locked_subtotal_try", 0))
+                vat = to_decimal(getattr(teklif, "locked_vat_try", 0))
+                return q2(net), q2(vat), q2(existing)
+        except Exception:
+            pass
+        return None
 
-        Dönen: (net_try, vat_try, gross_try)
+    @staticmethod
+    def _tl_kilidi_uygula(teklif, approval_datetime, kurlar=None):
+        """
+        Kur + locked_* alanlarını teklif nesnesine YAZAR ama kaydetmez.
+        Dönüş: (update_fields, net_try, vat_try, gross_try)
         """
-        if approval_datetime is None:
-            approval_datetime = timezone.now()
-
-        # Zaten kilitliyse ve force değilse dokunma
-        if not force and hasattr(teklif, "locked_total_try"):
-            try:
-                existing = to_decimal(getattr(teklif, "locked_total_try", 0))
-                if existing and existing > 0:
-                    net = to_decimal(getattr(teklif, "locked_subtotal_try", 0))
-                    vat = to_decimal(getattr(teklif, "locked_vat_try", 0))
-                    gross = to_decimal(getattr(teklif, "locked_total_try", 0))
-                    return q2(net), q2(vat), q2(gross)
-            except Exception:
-                pass
-
         # Orijinal (teklif para birimi) tutarları
         miktar = to_decimal(getattr(teklif, "miktar", 0))
         birim_fiyat = to_decimal(getattr(teklif, "birim_fiyat", 0))
@@ -210,7 +210,7 @@ class PaymentService:
         )
 
         pb, kur, kaynak = PaymentService._resolve_fx_rate_for_teklif(
-            teklif, for_date=approval_datetime.date()
+            teklif, for_date=approval_datetime.date(), kurlar=kurlar
         )
 
         # TL'ye çevir (tek sefer)
@@ -229,7 +229,7 @@ class PaymentService:
             teklif.para_birimi = pb
             update_fields.append("para_birimi")
 
-        # locked_* alanları (senin models.py’de mevcut) :contentReference[oaicite:1]{index=1}
+        # locked_* alanları (senin models.py’de mevcut)
         if hasattr(teklif, "locked_at"):
             teklif.locked_at = approval_datetime
             update_fields.append("locked_at")
@@ -259,11 +259,135 @@ class PaymentService:
             teklif.locked_total_try = gross_try
             update_fields.append("locked_total_try")
 
+        return list(dict.fromkeys(update_fields)), net_try, vat_try, gross_try
+
+    @staticmethod
+    def teklif_onayinda_tl_sabitle(teklif, approval_datetime=None, force: bool = False) -> Tuple[Decimal, Decimal, Decimal]:
+        """
+        Teklifi TL'ye SABİTLER (kilitler).
+        - Onay anında bir kere çalıştırılmalıdır.
+        - Teklif modelinde locked_* alanları varsa doldurur.
+
+        Dönen: (net_try, vat_try, gross_try)
+        """
+        if approval_datetime is None:
+            approval_datetime = timezone.now()
+
+        # Zaten kilitliyse ve force değilse dokunma
+        if not force:
+            mevcut = PaymentService._kilitli_tutarlar(teklif)
+            if mevcut is not None:
+                return mevcut
+
+        update_fields, net_try, vat_try, gross_try = PaymentService._tl_kilidi_uygula(teklif, approval_datetime)
+
         if update_fields:
-            teklif.save(update_fields=list(dict.fromkeys(update_fields)))
+            teklif.save(update_fields=update_fields)
 
         return net_try, vat_try, gross_try
 
+    @staticmethod
+    def teklifleri_toplu_onayla(teklif_ids, approval_datetime=None) -> dict:
+        """
+        Birden fazla teklifi TEK transaction içinde onaylar (ay sonu icmal onayı).
+        - Kur en fazla bir kez çekilir (tcmb_kur_getir tüm dövizleri tek seferde döner);
+          kur_degeri dolu tekliflerde hiç çekilmez.
+        - locked_* alanları bellekte hesaplanır, teklifler tek bulk_update ile yazılır.
+        - Eksik SatinAlma kayıtları tek bulk_create ile açılır.
+        - Çift onay kuralı: bir talebe ait yalnızca BİR teklif onaylanabilir.
+
+        Dönüş: {"onaylanan": [id, ...], "atlanan": [(id, sebep), ...]}
+        """
+        from core.models import MalzemeTalep, SatinAlma, Teklif
+
+        if approval_datetime is None:
+            approval_datetime = timezone.now()
+
+        ids = []
+        for raw in teklif_ids:
+            try:
+                ids.append(int(raw))
+            except (TypeError, ValueError):
+                continue
+        ids = list(dict.fromkeys(ids))
+
+        onaylanan, atlanan = [], []
+        if not ids:
+            return {"onaylanan": onaylanan, "atlanan": atlanan}
+
+        with transaction.atomic():
+            teklifler = list(Teklif.objects.select_for_update().filter(id__in=ids).order_by("id"))
+            bulunan = {t.id for t in teklifler}
+            atlanan.extend((i, "Teklif bulunamadı") for i in ids if i not in bulunan)
+
+            # Çift onay kontrolü: seçim dışında zaten onaylı teklifi olan talepler (tek sorgu)
+            talep_ids = {t.talep_id for t in teklifler if t.talep_id}
+            onayli_talepler = set(
+                Teklif.objects.filter(talep_id__in=talep_ids, durum="onaylandi")
+                .exclude(id__in=ids)
+                .values_list("talep_id", flat=True)
+            )
+
+            # Kur sadece gerçekten gerekiyorsa ve bir kez çekilir
+            kur_gerekli = any(
+                (t.para_birimi or "TRY").upper() not in ("TRY", "TL")
+                and not (to_decimal(t.kur_degeri or 0, precision=4) > 0)
+                and PaymentService._kilitli_tutarlar(t) is None
+                for t in teklifler
+            )
+            kurlar = tcmb_kur_getir() if kur_gerekli else {}
+
+            guncellenecek, alanlar = [], {"durum"}
+            for teklif in teklifler:
+                if teklif.durum == "onaylandi":
+                    atlanan.append((teklif.id, "Zaten onaylı"))
+                    continue
+                if teklif.talep_id and teklif.talep_id in onayli_talepler:
+                    atlanan.append((teklif.id, "Bu talebe ait başka bir teklif zaten onaylanmış"))
+                    continue
+
+                if PaymentService._kilitli_tutarlar(teklif) is None:
+                    try:
+                        update_fields, *_ = PaymentService._tl_kilidi_uygula(teklif, approval_datetime, kurlar=kurlar)
+                    except ValidationError as e:
+                        atlanan.append((teklif.id, " ".join(e.messages)))
+                        continue
+                    alanlar.update(update_fields)
+
+                teklif.durum = "onaylandi"
+                guncellenecek.append(teklif)
+                if teklif.talep_id:
+                    onayli_talepler.add(teklif.talep_id)
+
+            if not guncellenecek:
+                return {"onaylanan": onaylanan, "atlanan": atlanan}
+
+            Teklif.objects.bulk_update(guncellenecek, fields=sorted(alanlar))
+
+            yeni_talep_ids = {t.talep_id for t in guncellenecek if t.talep_id}
+            if yeni_talep_ids:
+                MalzemeTalep.objects.filter(id__in=yeni_talep_ids).update(durum="onaylandi")
+
+            # Siparişleri oluştur (varsa dokunma)
+            mevcut_siparis = set(
+                SatinAlma.objects.filter(teklif_id__in=[t.id for t in guncellenecek])
+                .values_list("teklif_id", flat=True)
+            )
+            siparis_tarihi = timezone.localdate()
+            SatinAlma.objects.bulk_create([
+                SatinAlma(
+                    teklif=t,
+                    toplam_miktar=t.miktar,
+                    teslim_edilen=0,
+                    siparis_tarihi=siparis_tarihi,
+                )
+                for t in guncellenecek if t.id not in mevcut_siparis
+            ])
+
+            onaylanan = [t.id for t in guncellenecek]
+
+        return {"onaylanan": onaylanan, "atlanan": atlanan}
+
     @staticmethod
     def teklif_try_tutarlarini_getir(teklif) -> Tuple[Decimal, Decimal, Decimal]:
         """
@@ -0,0 +1,130 @@
+# core/services/kpi_ozeti.py
+"""
+FİNANS KPI GÜNLÜK ÖZETİ
+
+Finans paneli (finans_dashboard) ve ödeme merkezinin (odeme_dashboard) ana göstergeleri
+gün başına tek satır olarak FinansKpiOzeti tablosuna yazılır.
+
+- Hesaplar ekranlarla aynı fonksiyonlardan gelir (yatirim_maliyeti / cari_ayrisim burada tanımlı,
+  finans_dashboard da bunları kullanır); sabit sayıda aggregate sorgusu. Kapalı dönemler
+  dönem kapanışı özetinden okunur (core.services.donem_kapanisi).
+- Trend: tek indeksli tarih aralığı sorgusu (seri). Geçmiş gün: o güne kadarki son özet (tarihteki).
+- Özet o anki durumu yazar; geçmişe dönük yeniden hesap yapılmaz (kayıtlar sonradan düzeltilse bile
+  o gün ekranın ne gösterdiği korunur). Bu yüzden sadece BUGÜNÜN satırı yazılabilir: geçmiş bir tarihe
+  bugünün rakamlarını yazmak o günün gerçek özetini ezerdi.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.models import FinansKpiOzeti, Odeme, TedarikciBakiye
+from core.services.donem_kapanisi import PeriodCloseService
+
+
+SIFIR = Decimal("0.00")
+
+SERI_ALANLARI = (
+    "yatirim_maliyeti", "fatura_toplam", "hakedis_toplam", "gider_toplam",
+    "acik_fatura", "acik_hakedis", "piyasa_borc", "verilen_avans",
+    "cek_riski", "yaklasan_cek",
+)
+
+
+def yatirim_maliyeti() -> dict[str, Decimal]:
+    """
+    Toplam yatırım maliyeti (tüm zamanlar): fatura (KDV dahil) + onaylı hakediş (brüt+KDV) + gider (TL).
+    Kapalı dönemler dönem özetinden, açık dönem ham kayıtlardan toplanır.
+    """
+    maliyet = PeriodCloseService.maliyet_toplamlari()
+    return {**maliyet, "toplam": maliyet["fatura"] + maliyet["hakedis"] + maliyet["gider"]}
+
+
+def cari_ayrisim() -> tuple[Decimal, Decimal]:
+    """Aktif tedarikçilerde (piyasa borcu, verilen avans); cari bakiye defterinden tek sorgu."""
+    ayrisim = TedarikciBakiye.objects.filter(tedarikci__is_active=True).aggregate(
+        borc=Coalesce(Sum("cari_bakiye", filter=Q(cari_bakiye__gt=0)), SIFIR),
+        avans=Coalesce(Sum("cari_bakiye", filter=Q(cari_bakiye__lt=0)), SIFIR),
+    )
+    return ayrisim["borc"], abs(ayrisim["avans"])
+
+
+def gider_kategorileri() -> dict[str, Decimal]:
+    """{kategori adı: TL toplam}, büyükten küçüğe (kapalı dönem özeti + açık dönem GROUP BY)."""
+    return PeriodCloseService.gider_kategorileri()
+
+
+class KpiSnapshotService:
+
+    @staticmethod
+    def hesapla(bugun: date | None = None) -> dict:
+        """Günün göstergeleri (yazmadan)."""
+        bugun = bugun or timezone.localdate()
+        maliyet = yatirim_maliyeti()
+        piyasa_borc, verilen_avans = cari_ayrisim()
+
+        acik = TedarikciBakiye.objects.aggregate(
+            fatura=Coalesce(Sum("fatura_kalan", filter=Q(fatura_kalan__gt=0)), SIFIR),
+            hakedis=Coalesce(Sum("hakedis_kalan", filter=Q(hakedis_kalan__gt=0)), SIFIR),
+        )
+        cek = Odeme.objects.filter(odeme_turu="cek", is_cek_odendi=False).aggregate(
+            risk=Coalesce(Sum("tutar"), SIFIR),
+            yaklasan=Coalesce(
+                Sum("tutar", filter=Q(vade_tarihi__gte=bugun, vade_tarihi__lte=bugun + timedelta(days=30))), SIFIR
+            ),
+        )
+
+        return {
+            "yatirim_maliyeti": maliyet["toplam"],
+            "fatura_toplam": maliyet["fatura"],
+            "hakedis_toplam": maliyet["hakedis"],
+            "gider_toplam": maliyet["gider"],
+            "acik_fatura": acik["fatura"],
+            "acik_hakedis": acik["hakedis"],
+            "piyasa_borc": piyasa_borc,
+            "verilen_avans": verilen_avans,
+            "cek_riski": cek["risk"],
+            "yaklasan_cek": cek["yaklasan"],
+            "gider_kategorileri": {k: str(v) for k, v in gider_kategorileri().items()},
+        }
+
+    @staticmethod
+    def kaydet(tarih: date | None = None) -> FinansKpiOzeti:
+        """Günün özetini yazar; aynı gün tekrar çalışırsa satır güncellenir. Başka tarih kabul edilmez."""
+        bugun = timezone.localdate()
+        tarih = tarih or bugun
+        if tarih != bugun:
+            raise ValidationError(
+                f"KPI özeti sadece bugün ({bugun}) için yazılabilir; {tarih} özeti o günün anlık durumudur, "
+                f"sonradan yeniden hesaplanamaz."
+            )
+        ozet, _ = FinansKpiOzeti.objects.update_or_create(
+            tarih=tarih, defaults=KpiSnapshotService.hesapla(tarih)
+        )
+        return ozet
+
+    @staticmethod
+    def seri(bas: date, son: date, alanlar=SERI_ALANLARI) -> dict[str, list]:
+        """Trend dizileri: {"tarihler": [...], alan: [...]} (tek aralık sorgusu)."""
+        alanlar = [a for a in alanlar if a in SERI_ALANLARI]
+        satirlar = (
+            FinansKpiOzeti.objects.filter(tarih__range=(bas, son))
+            .order_by("tarih")
+            .values_list("tarih", *alanlar)
+        )
+        sonuc: dict[str, list] = {"tarihler": [], **{a: [] for a in alanlar}}
+        for tarih, *degerler in satirlar:
+            sonuc["tarihler"].append(tarih)
+            for a, v in zip(alanlar, degerler):
+                sonuc[a].append(v)
+        return sonuc
+
+    @staticmethod
+    def tarihteki(tarih: date) -> FinansKpiOzeti | None:
+        """Verilen tarihte (yoksa ondan önceki son gün) ekranın gösterdiği değerler."""
+        return FinansKpiOzeti.objects.filter(tarih__lte=tarih).order_by("-tarih").first()
@@ -0,0 +1,142 @@
+# core/services/nakit_akis.py
+"""
+NAKİT AKIŞ PROJEKSİYONU (ÇIKIŞLAR)
+
+Önümüzdeki N gün (90-180) için günlük / haftalık ödeme çıkışı tahmini:
+- Çek     : ödenmemiş çeklerin vade tarihi (Odeme.vade_tarihi, is_cek_odendi=False)
+- Fatura  : açık fatura kalanı, vade = fatura tarihi + tedarikçinin ödeme vadesi (gün)
+- Hakediş : onaylı, ödenmemiş hakediş kalanı, vade = hakediş tarihi
+
+Veri iki gruplanmış sorguyla gelir (çekler vade gününe, açık kalemler tip/tarih/vade
+gününe göre toplanır); kalemler tek geçişte gün indeksli dizilere yerleştirilir.
+Vadesi geçmiş tutarlar ayrı "gecikmiş" kovasında, ufuk dışındakiler "ufuk_disi"nda tutulur.
+Tutarlar kuruş (tamsayı) toplanır, sonuçta TL'ye (Decimal) çevrilir.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.models import Odeme, Tedarikci
+from core.services.yaslandirma import acik_kalemler_sql
+
+
+KALEMLER = ("cek", "fatura", "hakedis")
+
+
+def _tl(kurus: int) -> Decimal:
+    return (Decimal(kurus) / 100).quantize(Decimal("0.01"))
+
+
+def _tarih(v) -> date:
+    return v if isinstance(v, date) else date.fromisoformat(str(v)[:10])
+
+
+@dataclass
+class Projeksiyon:
+    bugun: date
+    gun: int
+    tarihler: list[date] = field(default_factory=list)
+    cek: list[Decimal] = field(default_factory=list)
+    fatura: list[Decimal] = field(default_factory=list)
+    hakedis: list[Decimal] = field(default_factory=list)
+    gecikmis: dict = field(default_factory=dict)
+    ufuk_disi: dict = field(default_factory=dict)
+
+    @property
+    def toplam(self) -> list[Decimal]:
+        return [c + f + h for c, f, h in zip(self.cek, self.fatura, self.hakedis)]
+
+    @property
+    def genel_toplam(self) -> Decimal:
+        return sum(self.toplam, Decimal("0.00"))
+
+    def gunluk(self) -> list[dict]:
+        """Çıkış olan günler (boş günler atlanır), kümülatif gecikmiş tutardan başlar."""
+        kumulatif = sum(self.gecikmis.values(), Decimal("0.00"))
+        out = []
+        for i, t in enumerate(self.toplam):
+            if not t:
+                continue
+            kumulatif += t
+            out.append({
+                "tarih": self.tarihler[i], "cek": self.cek[i], "fatura": self.fatura[i],
+                "hakedis": self.hakedis[i], "toplam": t, "kumulatif": kumulatif,
+            })
+        return out
+
+    def haftalik(self) -> list[dict]:
+        """7 günlük kovalar (1. hafta bugünden başlar)."""
+        out = []
+        for bas in range(0, self.gun, 7):
+            son = min(bas + 7, self.gun)
+            hafta = {k: sum(getattr(self, k)[bas:son], Decimal("0.00")) for k in KALEMLER}
+            hafta.update(
+                baslangic=self.tarihler[bas], bitis=self.tarihler[son - 1],
+                toplam=hafta["cek"] + hafta["fatura"] + hafta["hakedis"],
+            )
+            out.append(hafta)
+        return out
+
+
+class CashFlowService:
+
+    @staticmethod
+    def projeksiyon(bugun: date | None = None, gun: int = 90) -> Projeksiyon:
+        bugun = bugun or timezone.localdate()
+        gun = max(1, int(gun))
+        bitis = bugun + timedelta(days=gun - 1)
+
+        diziler = {k: [0] * gun for k in KALEMLER}
+        gecikmis = dict.fromkeys(KALEMLER, 0)
+        ufuk_disi = dict.fromkeys(KALEMLER, 0)
+
+        def yerlestir(kalem: str, vade: date, kurus: int) -> None:
+            if vade < bugun:
+                gecikmis[kalem] += kurus
+            elif vade > bitis:
+                ufuk_disi[kalem] += kurus
+            else:
+                diziler[kalem][(vade - bugun).days] += kurus
+
+        # 1) Çekler: vade gününe göre gruplanmış tek sorgu
+        cekler = (
+            Odeme.objects
+            .filter(odeme_turu="cek", is_cek_odendi=False, vade_tarihi__isnull=False)
+            .values("vade_tarihi")
+            .annotate(t=Sum("tutar"))
+        )
+        for r in cekler:
+            yerlestir("cek", r["vade_tarihi"], int(round((r["t"] or 0) * 100)))
+
+        # 2) Açık fatura + onaylı hakediş kalanları: tip / belge tarihi / tedarikçi vadesi gruplu
+        qn = connection.ops.quote_name
+        sql = f"""
+            WITH {acik_kalemler_sql()}
+            SELECT a.tip, a.tarih, t.{qn(Tedarikci._meta.get_field('odeme_vadesi_gun').column)}, SUM(a.kalan)
+            FROM acik a
+            JOIN {qn(Tedarikci._meta.db_table)} t ON t.{qn(Tedarikci._meta.pk.column)} = a.ted
+            WHERE a.kalan > 0
+            GROUP BY a.tip, a.tarih, t.{qn(Tedarikci._meta.get_field('odeme_vadesi_gun').column)}
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {"onay": True})
+            for tip, tarih, vade_gun, kurus in cursor.fetchall():
+                vade = _tarih(tarih)
+                if tip == "fatura":
+                    vade += timedelta(days=int(vade_gun or 0))
+                yerlestir(tip, vade, int(kurus or 0))
+
+        return Projeksiyon(
+            bugun=bugun,
+            gun=gun,
+            tarihler=[bugun + timedelta(days=i) for i in range(gun)],
+            gecikmis={k: _tl(v) for k, v in gecikmis.items()},
+            ufuk_disi={k: _tl(v) for k, v in ufuk_disi.items()},
+            **{k: [_tl(v) for v in dizi] for k, dizi in diziler.items()},
+        )
@@ -0,0 +1,299 @@
+# core/services/odeme_talimati.py
+"""
+ÖDEME TALİMATI (TOPLU TEDARİKÇİ ÖDEMESİ)
+
+Haftalık ödeme günü akışı:
+    1) olustur : vade kesim tarihine kadar vadesi gelen açık kalemlerden tedarikçi başına önerilen tutar
+    2) tutarlari_guncelle : finans tutarları düzeltir (0 = bu hafta ödenmez)
+    3) isle    : tek transaction'da tüm ödemeler + hakediş mahsupları + fatura dağıtımları (toplu yazım)
+    4) banka dosyası : aynı talimat satırlarından akışlı CSV / ISO 20022 pain.001 XML
+
+- Açık kalemler yaşlandırma raporuyla aynı CTE'den gelir (tek sorgu); vade = belge tarihi
+  (+ faturalarda tedarikçinin odeme_vadesi_gun değeri). Hakedişler belge tarihinde vadelidir.
+- Ödeme, odeme_yap ekranıyla aynı şekilde kaydedilir: tedarikçi başına tek Odeme (havale, TRY),
+  tutar en erken vadeli kalemden başlayarak dağıtılır; artan kısım avans olarak kalır.
+- bulk_create/bulk_update sinyal çalıştırmaz: cari defter, ekran cache sürümü ve maliyet ayı
+  işlem sonunda bir kez açıkça yenilenir.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterator
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from core.models import Hakedis, Odeme, OdemeTalimati, OdemeTalimatiSatiri, Tedarikci
+from core.services import dashboard_cache, payables
+from core.services.cari_bakiye import BalanceService
+from core.services.donem_kapanisi import acik_donem_kontrol
+from core.services.ekstre_export import PARCA_SATIR, tablo_csv_parcalari
+from core.services.revaluation import ay_kirlendi
+from core.services.yaslandirma import acik_kalemler_sql
+
+
+Q2 = Decimal("0.01")
+SIFIR = Decimal("0.00")
+
+BANKA_CSV_BASLIKLAR = ("IBAN", "Alıcı", "Tutar", "Para Birimi", "Açıklama", "Referans")
+
+
+@dataclass
+class VadeliKalem:
+    tedarikci_id: int
+    tip: str  # 'fatura' | 'hakedis'
+    kayit_id: int
+    vade: date
+    kalan: Decimal
+
+
+def _tarih(v) -> date:
+    return v if isinstance(v, date) else date.fromisoformat(str(v)[:10])
+
+
+def _referans(talimat_id: int, satir_id: int) -> str:
+    return f"OT{talimat_id}-{satir_id}"
+
+
+class PaymentRunService:
+
+    @staticmethod
+    def kalemler() -> dict[int, list[VadeliKalem]]:
+        """Tüm tedarikçilerin açık kalemleri (tek sorgu), tedarikçi bazında vade sıralı."""
+        qn = connection.ops.quote_name
+        ted_tablo = qn(Tedarikci._meta.db_table)
+        ted_pk = qn(Tedarikci._meta.pk.column)
+        ted_vade = qn(Tedarikci._meta.get_field("odeme_vadesi_gun").column)
+
+        sql = f"""
+            WITH {acik_kalemler_sql()}
+            SELECT a.ted, a.tip, a.kayit_id, a.tarih, a.kalan, t.{ted_vade}
+            FROM acik a
+            JOIN {ted_tablo} t ON t.{ted_pk} = a.ted
+            WHERE a.kalan > 0
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {"onay": True})
+            rows = cursor.fetchall()
+
+        out: dict[int, list[VadeliKalem]] = defaultdict(list)
+        for ted, tip, kayit_id, tarih, kalan, vade_gun in rows:
+            vade = _tarih(tarih)
+            if tip == "fatura" and vade_gun:
+                vade += timedelta(days=int(vade_gun))
+            out[ted].append(VadeliKalem(ted, tip, kayit_id, vade, (Decimal(int(kalan)) / 100).quantize(Q2)))
+        for liste in out.values():
+            liste.sort(key=lambda k: (k.vade, k.tip, k.kayit_id))
+        return out
+
+    @staticmethod
+    def oneriler(kesim_tarihi: date) -> dict[int, Decimal]:
+        """Tedarikçi başına kesim tarihine kadar vadesi gelen açık tutar."""
+        out: dict[int, Decimal] = {}
+        for ted_id, liste in PaymentRunService.kalemler().items():
+            toplam = sum((k.kalan for k in liste if k.vade <= kesim_tarihi), SIFIR)
+            if toplam > SIFIR:
+                out[ted_id] = toplam
+        return out
+
+    @staticmethod
+    def olustur(kesim_tarihi: date, tarih: date | None = None, kullanici=None, aciklama: str = "") -> OdemeTalimati:
+        """Önerilen tutarlarla taslak talimat (satırlar tek bulk_create)."""
+        oneriler = PaymentRunService.oneriler(kesim_tarihi)
+        if not oneriler:
+            raise ValidationError("Kesim tarihine kadar vadesi gelen açık kalem yok.")
+
+        ibanlar = dict(Tedarikci.objects.filter(id__in=oneriler.keys()).values_list("id", "iban"))
+        with transaction.atomic():
+            talimat = OdemeTalimati.objects.create(
+                tarih=tarih or timezone.localdate(),
+                kesim_tarihi=kesim_tarihi,
+                aciklama=aciklama[:200],
+                olusturan=kullanici if getattr(kullanici, "is_authenticated", False) else None,
+            )
+            OdemeTalimatiSatiri.objects.bulk_create([
+                OdemeTalimatiSatiri(
+                    talimat=talimat, tedarikci_id=ted_id,
+                    onerilen_tutar=tutar, tutar=tutar, iban=ibanlar.get(ted_id) or "",
+                )
+                for ted_id, tutar in oneriler.items()
+            ])
+        return talimat
+
+    @staticmethod
+    def tutarlari_guncelle(talimat: OdemeTalimati, tutarlar: dict[int, Decimal]) -> int:
+        """Finans düzeltmesi: {satir_id: tutar}. Tek bulk_update; işlenmiş talimat değişmez."""
+        if talimat.durum != "taslak":
+            raise ValidationError("İşlenmiş talimatın tutarları değiştirilemez.")
+
+        satirlar = talimat.satirlar.in_bulk(list(tutarlar.keys()))
+        degisen = []
+        for satir_id, tutar in tutarlar.items():
+            satir = satirlar.get(satir_id)
+            if satir is None:
+                continue
+            tutar = Decimal(tutar).quantize(Q2)
+            if tutar < SIFIR:
+                raise ValidationError("Ödeme tutarı negatif olamaz.")
+            if tutar != satir.tutar:
+                satir.tutar = tutar
+                degisen.append(satir)
+        if degisen:
+            OdemeTalimatiSatiri.objects.bulk_update(degisen, ["tutar"])
+        return len(degisen)
+
+    @staticmethod
+    def isle(talimat_id: int) -> OdemeTalimati:
+        """
+        Talimatı tek transaction'da işler: Odeme'ler (bulk_create), hakediş ödenenleri (bulk_update),
+        fatura dağıtımları (payables.dagitimlari_yaz), satır -> ödeme bağlantıları (bulk_update).
+        Sorgu sayısı tedarikçi sayısından bağımsızdır.
+        """
+        with transaction.atomic():
+            talimat = OdemeTalimati.objects.select_for_update().get(pk=talimat_id)
+            if talimat.durum != "taslak":
+                raise ValidationError("Bu talimat zaten işlenmiş.")
+            acik_donem_kontrol(talimat.tarih)  # bulk_create dönem kilidi sinyalini çalıştırmaz
+
+            satirlar = list(talimat.satirlar.filter(tutar__gt=0).select_related("tedarikci"))
+            if not satirlar:
+                raise ValidationError("Ödenecek tutarı olan satır yok.")
+            eksik = [s.tedarikci.firma_unvani for s in satirlar if not s.iban]
+            if eksik:
+                raise ValidationError(f"IBAN bilgisi eksik: {', '.join(eksik)}")
+
+            ted_ids = [s.tedarikci_id for s in satirlar]
+            hakedis_map = Hakedis.objects.select_for_update().filter(
+                satinalma__teklif__tedarikci_id__in=ted_ids, onay_durumu=True
+            ).in_bulk()
+            kalemler = PaymentRunService.kalemler()
+
+            odemeler, paylar, guncel_hakedisler = [], [], {}
+            aciklama = f"Ödeme Talimatı #{talimat.id}"
+            for satir in satirlar:
+                odeme = Odeme(
+                    tedarikci_id=satir.tedarikci_id, tarih=talimat.tarih, odeme_turu="havale",
+                    tutar=satir.tutar, para_birimi="TRY", aciklama=aciklama,
+                )
+                fatura_paylari = []
+                dagitilacak = satir.tutar
+                for k in kalemler.get(satir.tedarikci_id, ()):
+                    if dagitilacak <= SIFIR:
+                        break
+                    if k.tip == "hakedis":
+                        hk = hakedis_map.get(k.kayit_id)
+                        if hk is None:
+                            continue
+                        pay = min(dagitilacak, (hk.odenecek_net_tutar - hk.fiili_odenen_tutar).quantize(Q2))
+                        if pay <= SIFIR:
+                            continue
+                        hk.fiili_odenen_tutar = (hk.fiili_odenen_tutar + pay).quantize(Q2)
+                        guncel_hakedisler[hk.id] = hk
+                        if not odeme.bagli_hakedis_id:
+                            odeme.bagli_hakedis_id = hk.id
+                    else:
+                        pay = min(dagitilacak, k.kalan)
+                        fatura_paylari.append((k.kayit_id, pay))
+                        if not odeme.fatura_id:
+                            odeme.fatura_id = k.kayit_id
+                    dagitilacak -= pay
+                odemeler.append(odeme)
+                paylar.append(fatura_paylari)
+
+            if guncel_hakedisler:
+                Hakedis.objects.bulk_update(guncel_hakedisler.values(), ["fiili_odenen_tutar"])
+            Odeme.objects.bulk_create(odemeler)
+
+            payables.dagitimlari_yaz(
+                [
+                    payables.Eslesme(odeme.id, fatura_id, odeme.tedarikci_id, pay)
+                    for odeme, fatura_paylari in zip(odemeler, paylar)
+                    for fatura_id, pay in fatura_paylari
+                ],
+                tarih=talimat.tarih, aciklama=aciklama, defter_yenile=False,
+            )
+
+            for satir, odeme in zip(satirlar, odemeler):
+                satir.odeme = odeme
+            OdemeTalimatiSatiri.objects.bulk_update(satirlar, ["odeme"])
+
+            BalanceService.tedarikci_yenile(*ted_ids)
+            dashboard_cache.surum_artir()
+            ay_kirlendi(talimat.tarih)
+
+            talimat.durum = "islendi"
+            talimat.islendi_at = timezone.now()
+            talimat.save(update_fields=["durum", "islendi_at"])
+        return talimat
+
+    # ---------------------------------------------------------
+    # Banka toplu EFT dosyası (akışlı)
+    # ---------------------------------------------------------
+    @staticmethod
+    def _banka_satirlari(talimat: OdemeTalimati):
+        return (
+            talimat.satirlar.filter(tutar__gt=0)
+            .order_by("tedarikci__firma_unvani", "id")
+            .values_list("id", "iban", "tedarikci__firma_unvani", "tutar")
+            .iterator(chunk_size=PARCA_SATIR)
+        )
+
+    @staticmethod
+    def csv_parcalari(talimat: OdemeTalimati) -> Iterator[bytes]:
+        aciklama = f"Ödeme Talimatı #{talimat.id}"
+        return tablo_csv_parcalari(BANKA_CSV_BASLIKLAR, (
+            (iban, unvan, tutar, "TRY", aciklama, _referans(talimat.id, satir_id))
+            for satir_id, iban, unvan, tutar in PaymentRunService._banka_satirlari(talimat)
+        ))
+
+    @staticmethod
+    def xml_parcalari(talimat: OdemeTalimati) -> Iterator[bytes]:
+        """ISO 20022 pain.001.001.03 (Customer Credit Transfer Initiation); başlık toplamları tek aggregate sorgusu."""
+        ozet = talimat.satirlar.filter(tutar__gt=0).aggregate(adet=Count("id"), toplam=Sum("tutar"))
+        adet, toplam = ozet["adet"], (ozet["toplam"] or SIFIR).quantize(Q2)
+        borclu_unvan = escape(settings.ODEME_TALIMATI_BORCLU_UNVAN)
+        borclu_iban = escape(settings.ODEME_TALIMATI_BORCLU_IBAN)
+        aciklama = escape(f"Odeme Talimati #{talimat.id}")
+
+        yield (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<Document xmlns="urn:iso:std:iso:20022:tech:xsd:pain.001.001.03">\n'
+            "<CstmrCdtTrfInitn>\n"
+            "<GrpHdr>"
+            f"<MsgId>OT{talimat.id}</MsgId>"
+            f"<CreDtTm>{timezone.localtime().strftime('%Y-%m-%dT%H:%M:%S')}</CreDtTm>"
+            f"<NbOfTxs>{adet}</NbOfTxs><CtrlSum>{toplam}</CtrlSum>"
+            f"<InitgPty><Nm>{borclu_unvan}</Nm></InitgPty>"
+            "</GrpHdr>\n"
+            "<PmtInf>"
+            f"<PmtInfId>OT{talimat.id}</PmtInfId><PmtMtd>TRF</PmtMtd>"
+            f"<NbOfTxs>{adet}</NbOfTxs><CtrlSum>{toplam}</CtrlSum>"
+            f"<ReqdExctnDt>{talimat.tarih.isoformat()}</ReqdExctnDt>"
+            f"<Dbtr><Nm>{borclu_unvan}</Nm></Dbtr>"
+            f"<DbtrAcct><Id><IBAN>{borclu_iban}</IBAN></Id></DbtrAcct>"
+            "<DbtrAgt><FinInstnId><Othr><Id>NOTPROVIDED</Id></Othr></FinInstnId></DbtrAgt>\n"
+        ).encode("utf-8")
+
+        tampon = []
+        for satir_id, iban, unvan, tutar in PaymentRunService._banka_satirlari(talimat):
+            tampon.append(
+                "<CdtTrfTxInf>"
+                f"<PmtId><EndToEndId>{_referans(talimat.id, satir_id)}</EndToEndId></PmtId>"
+                f'<Amt><InstdAmt Ccy="TRY">{Decimal(tutar).quantize(Q2)}</InstdAmt></Amt>'
+                f"<Cdtr><Nm>{escape(unvan[:140])}</Nm></Cdtr>"
+                f"<CdtrAcct><Id><IBAN>{escape(iban)}</IBAN></Id></CdtrAcct>"
+                f"<RmtInf><Ustrd>{aciklama}</Ustrd></RmtInf>"
+                "</CdtTrfTxInf>\n"
+            )
+            if len(tampon) >= PARCA_SATIR:
+                yield "".join(tampon).encode("utf-8")
+                tampon = []
+        tampon.append("</PmtInf>\n</CstmrCdtTrfInitn>\n</Document>\n")
+        yield "".join(tampon).encode("utf-8")
@@ -1,38 +1,247 @@
+# core/services/payables.py
+"""
+OTOMATİK ÖDEME → FATURA DAĞITIMI (MAHSUP MOTORU)
+
+Dağıtılmamış ödeme bakiyelerini (avans) aynı tedarikçinin açık faturalarıyla eşleştirir.
+
+- Açık ödemeler ve açık faturalar iki küme sorgusuyla gelir (kalanlar veritabanında hesaplanır);
+  eşleştirme tamamen bellekte yapılır, sonuç tek bulk_create ile yazılır.
+- Strateji:
+    fifo      : en eski ödeme en eski faturayı kapatır (tarih, id sırası)
+    tam_tutar : önce kalanı birebir eşit olan ödeme/fatura çiftleri, kalanlar FIFO
+- Ödeme tanımları ödeme ekranlarıyla aynıdır:
+    * Fatura kalan = genel_toplam - (dağıtımlar + dağıtımı olmayan eski tip Odeme.fatura)
+    * Eski tip doğrudan fatura ödemesi (Odeme.fatura dolu, dağıtımı yok) avans sayılmaz
+    * Hakedişe bağlı ödemeler faturaya dağıtılmaz
+- bulk_create model save()/sinyallerini çalıştırmaz: faturalar açıkça "kirli" işaretlenir,
+  cari bakiye defteri ve ekran cache sürümü açıkça yenilenir.
+- Fatura.odenen_tutar (kanonik tanım: cari_bakiye.fatura_odenen_ifadesi) kayıt başına değil,
+  transaction commit olunca değişen faturalar için tek UPDATE ile yeniden yazılır (fatura_kirlendi).
+"""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from datetime import date
 from decimal import Decimal
+from typing import Iterable
+
 from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.models import Fatura, Odeme, OdemeDagitim
+from core.services import dashboard_cache
+from core.services.cari_bakiye import BalanceService, fatura_odenen_ifadesi
+from core.services.commit_sonrasi import commit_sonrasi_topla
+
+
+logger = logging.getLogger(__name__)
+
+Q2 = Decimal("0.01")
+ESIK = Decimal("0.01")
+STRATEJILER = ("fifo", "tam_tutar")
+
+_DEC = DecimalField(max_digits=18, decimal_places=2)
+_SIFIR = Value(Decimal("0.00"), output_field=_DEC)
+
+
+def _toplam(qs, alan: str, grup: str) -> Coalesce:
+    return Coalesce(
+        Subquery(qs.values(grup).annotate(s=Sum(alan)).values("s")[:1], output_field=_DEC),
+        _SIFIR,
+    )
+
+
+@dataclass
+class AcikKalem:
+    id: int
+    tedarikci_id: int
+    tarih: date
+    kalan: Decimal
+
+
+@dataclass
+class Eslesme:
+    odeme_id: int
+    fatura_id: int
+    tedarikci_id: int
+    tutar: Decimal
+
+
+def acik_odeme_qs(tedarikci_id: int | None = None, odeme_ids: Iterable[int] | None = None):
+    """Dağıtılmamış bakiyesi olan ödemeler; `dagitilan_tl` ve `kalan_tl` anotasyonlu, tarih/id sıralı."""
+    qs = Odeme.objects.filter(bagli_hakedis__isnull=True)
+    if tedarikci_id:
+        qs = qs.filter(tedarikci_id=tedarikci_id)
+    if odeme_ids is not None:
+        qs = qs.filter(id__in=list(odeme_ids))
+    return (
+        qs.annotate(dagitilan_tl=_toplam(OdemeDagitim.objects.filter(odeme=OuterRef("pk")), "tutar", "odeme"))
+        .exclude(Q(fatura__isnull=False) & Q(dagitilan_tl=0))
+        .annotate(kalan_tl=F("tutar") - F("dagitilan_tl"))
+        .filter(kalan_tl__gte=ESIK)
+        .order_by("tarih", "id")
+    )
+
+
+def acik_fatura_qs(tedarikci_id: int | None = None, fatura_ids: Iterable[int] | None = None):
+    """Kalanı olan faturalar; `odenen_tl` ve `kalan_tl` anotasyonlu, tarih/id sıralı."""
+    qs = Fatura.objects.all()
+    if tedarikci_id:
+        qs = qs.filter(tedarikci_id=tedarikci_id)
+    if fatura_ids is not None:
+        qs = qs.filter(id__in=list(fatura_ids))
+    return (
+        qs.annotate(odenen_tl=fatura_odenen_ifadesi())
+        .annotate(kalan_tl=F("genel_toplam") - F("odenen_tl"))
+        .filter(kalan_tl__gte=ESIK)
+        .order_by("tarih", "id")
+    )
+
+
+def _kalemler(qs) -> list[AcikKalem]:
+    return [
+        AcikKalem(i, t, d, Decimal(str(k)).quantize(Q2))
+        for i, t, d, k in qs.values_list("id", "tedarikci_id", "tarih", "kalan_tl")
+    ]
+
 
-from core.models import FaturaOdeme
+def acik_odemeler(tedarikci_id: int | None = None, odeme_ids: Iterable[int] | None = None) -> list[AcikKalem]:
+    """Eşleştirme girdisi: açık ödemeler (tek sorgu)."""
+    return _kalemler(acik_odeme_qs(tedarikci_id, odeme_ids))
 
-@transaction.atomic
-def dagit_odeme_faturalara(odeme, faturalar_qs):
+
+def acik_faturalar(tedarikci_id: int | None = None, fatura_ids: Iterable[int] | None = None) -> list[AcikKalem]:
+    """Eşleştirme girdisi: açık faturalar (tek sorgu)."""
+    return _kalemler(acik_fatura_qs(tedarikci_id, fatura_ids))
+
+
+def eslestir(odemeler: list[AcikKalem], faturalar: list[AcikKalem], strateji: str = "fifo") -> list[Eslesme]:
+    """Bellekte eşleştirme; girdiler tarih/id sıralı olmalı. Girdi nesnelerinin kalanı düşülür."""
+    if strateji not in STRATEJILER:
+        raise ValueError(f"Geçersiz strateji: {strateji}")
+
+    odeme_grup, fatura_grup = defaultdict(list), defaultdict(list)
+    for o in odemeler:
+        odeme_grup[o.tedarikci_id].append(o)
+    for f in faturalar:
+        fatura_grup[f.tedarikci_id].append(f)
+
+    sonuc: list[Eslesme] = []
+
+    def bagla(o: AcikKalem, f: AcikKalem, tutar: Decimal) -> None:
+        sonuc.append(Eslesme(o.id, f.id, o.tedarikci_id, tutar))
+        o.kalan -= tutar
+        f.kalan -= tutar
+
+    for ted_id, ted_odemeler in odeme_grup.items():
+        ted_faturalar = fatura_grup.get(ted_id)
+        if not ted_faturalar:
+            continue
+
+        if strateji == "tam_tutar":
+            tutar_sirasi = defaultdict(deque)
+            for f in ted_faturalar:
+                tutar_sirasi[f.kalan].append(f)
+            for o in ted_odemeler:
+                aday = tutar_sirasi.get(o.kalan)
+                if aday:
+                    bagla(o, aday.popleft(), o.kalan)
+
+        # FIFO (tam_tutar'da artakalanlar için de)
+        fi = 0
+        for o in ted_odemeler:
+            while o.kalan >= ESIK and fi < len(ted_faturalar):
+                f = ted_faturalar[fi]
+                if f.kalan < ESIK:
+                    fi += 1
+                    continue
+                bagla(o, f, min(o.kalan, f.kalan))
+
+    return sonuc
+
+
+def odenen_tutar_yenile(fatura_ids: Iterable[int]) -> int:
+    """Fatura.odenen_tutar = kanonik ödenen (TL), verilen faturalar için tek UPDATE."""
+    ids = list({int(i) for i in fatura_ids})
+    if not ids:
+        return 0
+    return Fatura.objects.filter(id__in=ids).update(odenen_tutar=fatura_odenen_ifadesi())
+
+
+# ---------------------------------------------------------
+# Değişen faturaları commit sonrası tek seferde yenile (signals.py ve toplu yazımlar kullanır)
+# ---------------------------------------------------------
+def fatura_kirlendi(*fatura_ids) -> None:
     """
-    UI değişmeden çalışma mantığı:
-    - Kullanıcı faturaları seçer
-    - Tek bir ödeme tutarı girer
-    - Sistem seçilen faturaları sırayla kapatır (FIFO)
+    Ödeme / dağıtım değişince faturayı işaretler; odenen_tutar commit olunca
+    tek UPDATE ile yazılır (aynı işlemde fatura kaç kez etkilenirse etkilensin bir kez).
+    Kirli faturalar transaction başınadır (commit_sonrasi): başka transaction'ın faturaları erken işlenmez.
     """
+    commit_sonrasi_topla("odenen_faturalar", (int(i) for i in fatura_ids if i), _bekleyenleri_isle)
 
-    kalan = Decimal(str(odeme.tutar))
 
-    for fatura in faturalar_qs:
-        if kalan <= 0:
-            break
+def _bekleyenleri_isle(fatura_ids: set[int]) -> None:
+    ids = sorted(fatura_ids)
+    try:
+        if odenen_tutar_yenile(ids):
+            dashboard_cache.surum_artir()
+    except Exception:
+        logger.exception("Fatura ödenen tutarları yenilenemedi (faturalar=%s)", ids)
 
-        f_kalan = Decimal(str(fatura.kalan_borc))
-        if f_kalan <= 0:
-            continue
 
-        pay = f_kalan if kalan >= f_kalan else kalan
+def dagitimlari_yaz(eslesmeler: list[Eslesme], tarih: date | None = None, aciklama: str | None = None,
+                    defter_yenile: bool = True) -> list[Eslesme]:
+    """
+    Eşleşmeleri tek bulk_create ile yazar; faturalar, defter ve ekran cache'i toplu yenilenir.
+    Aynı gün aynı ödeme/fatura çifti zaten dağıtılmışsa (uniq_odeme_fatura_tarih) o çift yazılmaz:
+    payı dağıtılmamış kalır (fazla dağıtım oluşmaz). Yazılan eşleşmeler döner.
+    defter_yenile=False: cari defteri çağıran (daha geniş tedarikçi kümesiyle) kendisi yeniler.
+    """
+    if not eslesmeler:
+        return []
 
-        FaturaOdeme.objects.create(
-            fatura=fatura,
-            odeme=odeme,
-            tutar=pay,
-            para_birimi=odeme.para_birimi,
-            kur=getattr(odeme, 'kur', Decimal('1.0')),
-            tarih=getattr(odeme, 'tarih', None),
+    tarih = tarih or timezone.localdate()
+    with transaction.atomic():
+        mevcut = set(
+            OdemeDagitim.objects.filter(
+                tarih=tarih,
+                odeme_id__in={e.odeme_id for e in eslesmeler},
+                fatura_id__in={e.fatura_id for e in eslesmeler},
+            ).values_list("odeme_id", "fatura_id")
         )
+        eslesmeler = [e for e in eslesmeler if (e.odeme_id, e.fatura_id) not in mevcut]
+        if not eslesmeler:
+            return []
+
+        OdemeDagitim.objects.bulk_create([
+            OdemeDagitim(
+                odeme_id=e.odeme_id, fatura_id=e.fatura_id, tutar=e.tutar.quantize(Q2), tarih=tarih,
+                aciklama=(f"Otomatik Mahsup (Ödeme #{e.odeme_id})" if aciklama is None else aciklama)[:200],
+            )
+            for e in eslesmeler
+        ])
+        fatura_kirlendi(*{e.fatura_id for e in eslesmeler})
+        if defter_yenile:
+            BalanceService.tedarikci_yenile(*{e.tedarikci_id for e in eslesmeler})
+        dashboard_cache.surum_artir()
+    return eslesmeler
+
+
+class AllocationService:
 
-        kalan -= pay
+    @staticmethod
+    def planla(tedarikci_id: int | None = None, strateji: str = "fifo") -> list[Eslesme]:
+        """Yazmadan eşleşme önerisi (iki sorgu)."""
+        return eslestir(acik_odemeler(tedarikci_id), acik_faturalar(tedarikci_id), strateji)
 
-    return kalan  # eğer >0 kalırsa fazla ödeme var demektir
+    @staticmethod
+    def otomatik_dagit(tedarikci_id: int | None = None, strateji: str = "fifo",
+                       tarih: date | None = None) -> list[Eslesme]:
+        """Tek tedarikçi (veya None: tümü) için açık ödemeleri açık faturalara dağıtır ve yazar."""
+        with transaction.atomic():
+            eslesmeler = eslestir(acik_odemeler(tedarikci_id), acik_faturalar(tedarikci_id), strateji)
+            return dagitimlari_yaz(eslesmeler, tarih)
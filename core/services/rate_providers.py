@@ -0,0 +1,177 @@
+# core/services/rate_providers.py
+"""
+KUR SAĞLAYICILARI (settings.RATE_PROVIDER ile seçilir)
+
+- "tcmb"      : TCMB HTTP (TCMB_BASE_URL). Dış çağrılar tcmb_client'tan geçer (devre kesici).
+                Yerel stand-in sunucu için TCMB_BASE_URL=http://127.0.0.1:8765/kurlar yeterli.
+- "xml_dizin" : TCMB formatındaki XML'leri diskten okur (RATE_XML_DIR).
+                Dizin yapısı TCMB ile aynı: today.xml ve YYYYMM/DDMMYYYY.xml
+- "sabit"     : settings.RATE_FIXED_TABLE içindeki sabit kurlar (test / yük testi).
+
+Tüm sağlayıcılar aynı şeyi döner: ProviderRates(rates={pb: kur}, source, stale).
+"""
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from core.services import tcmb_client
+
+
+Q4 = Decimal("0.0001")
+
+
+@dataclass
+class ProviderRates:
+    rates: dict[str, Decimal] = field(default_factory=dict)
+    source: str = ""
+    stale: bool = False  # True: son bilinen iyi cevap (kaynak o an ulaşılamadı)
+
+
+def _d(s: str) -> Decimal:
+    s = (s or "").strip().replace(",", ".")
+    return Decimal(s)
+
+
+def parse_tcmb_xml(xml_data: bytes, *, banknote_first: bool = False) -> dict[str, Decimal]:
+    """
+    TCMB XML'inden tüm dövizleri okur (XML bir kez parse edilir): {pb: kur}
+    Varsayılan öncelik ForexSelling, banknote_first=True ise BanknoteSelling.
+    Boş olan dövizler sonuçta yer almaz.
+    """
+    root = ET.fromstring(xml_data)
+
+    out = {}
+    for cur in root.findall("Currency"):
+        code = (cur.attrib.get("CurrencyCode") or cur.attrib.get("Kod") or "").upper().strip()
+        if not code or code in out:
+            continue
+        fs = (cur.findtext("ForexSelling") or "").strip()
+        bs = (cur.findtext("BanknoteSelling") or "").strip()
+        val = (bs or fs) if banknote_first else (fs or bs)
+        if val:
+            out[code] = _d(val).quantize(Q4)
+    return out
+
+
+def build_tcmb_xml(dt: date, rates: dict[str, Decimal]) -> bytes:
+    """Verilen kurlarla TCMB formatında XML üretir (stand-in sunucu ve testler için)."""
+    root = ET.Element("Tarih_Date", {"Tarih": dt.strftime("%d.%m.%Y"), "Date": dt.strftime("%m/%d/%Y")})
+    for code, kur in rates.items():
+        cur = ET.SubElement(root, "Currency", {"Kod": code, "CurrencyCode": code})
+        ET.SubElement(cur, "Unit").text = "1"
+        ET.SubElement(cur, "ForexSelling").text = str(kur)
+        ET.SubElement(cur, "BanknoteSelling").text = str(kur)
+    return ET.tostring(root, encoding="utf-8", xml_declaration=True)
+
+
+def xml_relative_path(dt: date | None) -> str:
+    """TCMB dizin yapısı: today.xml veya YYYYMM/DDMMYYYY.xml"""
+    if dt is None:
+        return "today.xml"
+    return f"{dt.strftime('%Y%m')}/{dt.strftime('%d%m%Y')}.xml"
+
+
+class RateProvider:
+    """Sağlayıcı arayüzü. dt=None: bugünün (yayınlanan son) kurları."""
+
+    name = ""
+    # False ise geçmiş tarihli sonuçlar yerel kur deposuna (DovizKuru) yazılmaz
+    persistent = True
+
+    def rates(self, dt: date | None, *, banknote_first: bool = False) -> ProviderRates:
+        raise NotImplementedError
+
+    def _label(self, dt: date | None) -> str:
+        return f"{self.name} {dt.isoformat()}" if dt else f"{self.name} today.xml"
+
+
+class XMLRateProvider(RateProvider):
+    """TCMB formatında XML üreten kaynaklar için ortak parse mantığı."""
+
+    def _xml(self, dt: date | None) -> tuple[bytes, bool]:
+        raise NotImplementedError
+
+    def rates(self, dt: date | None, *, banknote_first: bool = False) -> ProviderRates:
+        xml_data, stale = self._xml(dt)
+        source = self._label(dt)
+        if stale:
+            source = f"{source} (son bilinen)"
+        return ProviderRates(rates=parse_tcmb_xml(xml_data, banknote_first=banknote_first), source=source, stale=stale)
+
+
+class TCMBHTTPProvider(XMLRateProvider):
+    name = "TCMB"
+
+    def __init__(self, base_url: str | None = None):
+        # ✅ tcmb1 hostname mismatch yaşattığı için www kullanıyoruz
+        self.base_url = (base_url or getattr(settings, "TCMB_BASE_URL", "https://www.tcmb.gov.tr/kurlar")).rstrip("/")
+
+    def url(self, dt: date | None) -> str:
+        return f"{self.base_url}/{xml_relative_path(dt)}"
+
+    def _xml(self, dt: date | None) -> tuple[bytes, bool]:
+        # Sadece today.xml kısa süre cache'lenir; geçmiş tarihler zaten yerel depoya yazılıyor
+        max_age = getattr(settings, "TCMB_TODAY_CACHE_TTL", 600) if dt is None else 0
+        res = tcmb_client.fetch(self.url(dt), max_age=max_age)
+        if res.not_found:
+            raise FileNotFoundError(f"TCMB bu tarih için kur yayımlamamış: {self._label(dt)}")
+        return res.content, res.stale
+
+
+class LocalXMLDirProvider(XMLRateProvider):
+    name = "XML"
+
+    def __init__(self, directory: str | Path | None = None):
+        self.directory = Path(directory or getattr(settings, "RATE_XML_DIR"))
+
+    def _xml(self, dt: date | None) -> tuple[bytes, bool]:
+        path = self.directory / xml_relative_path(dt)
+        if not path.is_file():
+            raise FileNotFoundError(f"Kur dosyası yok: {path}")
+        return path.read_bytes(), False
+
+
+class FixedRateProvider(RateProvider):
+    """
+    settings.RATE_FIXED_TABLE:
+        {"USD": "32.50", "EUR": "35.10", ...}                    -> her tarih için aynı
+        {"2024-01-05": {"USD": "30.00"}, "default": {...}}        -> tarihe özel + varsayılan
+    """
+    name = "Sabit"
+    persistent = False
+
+    def __init__(self, table: dict | None = None):
+        self.table = table if table is not None else getattr(settings, "RATE_FIXED_TABLE", {})
+
+    def rates(self, dt: date | None, *, banknote_first: bool = False) -> ProviderRates:
+        table = self.table
+        if any(isinstance(v, dict) for v in table.values()):
+            table = table.get(dt.isoformat() if dt else "today") or table.get("default") or {}
+        return ProviderRates(
+            rates={pb.upper(): _d(str(kur)).quantize(Q4) for pb, kur in table.items()},
+            source=self._label(dt),
+        )
+
+
+PROVIDERS = {
+    "tcmb": TCMBHTTPProvider,
+    "xml_dizin": LocalXMLDirProvider,
+    "sabit": FixedRateProvider,
+}
+
+
+def get_provider(name: str | None = None) -> RateProvider:
+    """
+    Aktif kur sağlayıcısı. settings.RATE_PROVIDER kısa ad ("tcmb", "xml_dizin", "sabit")
+    veya RateProvider alt sınıfının dotted path'i olabilir.
+    """
+    name = name or getattr(settings, "RATE_PROVIDER", "tcmb")
+    cls = PROVIDERS.get(name) or import_string(name)
+    return cls()
@@ -0,0 +1,229 @@
+# core/services/revaluation.py
+"""
+İŞLEM TARİHİ KURUYLA YENİDEN DEĞERLEME
+
+Her fatura / hakediş / ödeme / gider kendi tarihindeki kurla USD/EUR/GBP'ye çevrilir.
+- Kur, DovizKuru tablosundan "işlem tarihinde veya öncesindeki en son kur" olarak
+  SQL içinde (correlated subquery) bağlanır: satır başına Python'dan kur sorgusu yok.
+  (Hafta sonu / tatil günlerinde bir önceki iş gününün kuru kullanılır.)
+- Sonuç MaliyetDonemOzeti tablosuna AY x KALEM_TİPİ bazında yazılır.
+- Kuru bulunamayan kayıtlar döviz toplamına girmez, kursuz_kayit sayacında görünür.
+"""
+from __future__ import annotations
+
+import datetime
+import logging
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import (
+    Case, Count, DecimalField, ExpressionWrapper, F, FloatField, IntegerField, OuterRef, Q,
+    Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, TruncMonth
+
+from core.models import DovizKuru, Fatura, Hakedis, Harcama, MaliyetDonemOzeti, Odeme
+from core.services.commit_sonrasi import commit_sonrasi_topla
+
+
+logger = logging.getLogger(__name__)
+
+DOVIZLER = ("USD", "EUR", "GBP")
+MALIYET_KALEMLERI = ("fatura", "hakedis", "gider")  # Dashboard "toplam yatırım maliyeti"
+
+Q2 = Decimal("0.01")
+_DEC = DecimalField(max_digits=24, decimal_places=6)
+_FLOAT = FloatField()
+
+
+def _ay_basi(dt: datetime.date) -> datetime.date:
+    return dt.replace(day=1)
+
+
+def _ay_sonu(ay: datetime.date) -> datetime.date:
+    sonraki = (ay.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return sonraki - datetime.timedelta(days=1)
+
+
+def _kur_subquery(pb: str, tarih_alani: str = "tarih") -> Subquery:
+    """İşlem tarihinde veya öncesindeki en son kur (1 pb = X TL)."""
+    return Subquery(
+        DovizKuru.objects
+        .filter(para_birimi=pb, tarih__lte=OuterRef(tarih_alani))
+        .order_by("-tarih")
+        .values("kur")[:1],
+        output_field=_DEC,
+    )
+
+
+def _kur_subquery_kendi_pb() -> Subquery:
+    """Kaydın kendi para biriminin işlem tarihindeki kuru (Odeme TL karşılığı için)."""
+    return Subquery(
+        DovizKuru.objects
+        .filter(para_birimi=OuterRef("para_birimi"), tarih__lte=OuterRef("tarih"))
+        .order_by("-tarih")
+        .values("kur")[:1],
+        output_field=_DEC,
+    )
+
+
+def _kaynaklar():
+    """
+    kalem_tipi -> (queryset, TL ifadesi, orijinal para birimi alanı | None, orijinal tutar alanı | None)
+
+    Orijinal para birimi hedef dövizle aynıysa çeviri yapılmaz, orijinal tutar kullanılır
+    (ör. USD gider -> USD toplamına kur farkı olmadan girer).
+    """
+    return {
+        "fatura": (Fatura.objects.all(), F("genel_toplam"), None, None),
+        "hakedis": (
+            Hakedis.objects.filter(onay_durumu=True),
+            F("brut_tutar") + F("kdv_tutari"),
+            None, None,
+        ),
+        "odeme": (
+            Odeme.objects.all(),
+            Case(
+                When(para_birimi="TRY", then=F("tutar")),
+                default=F("tutar") * _kur_subquery_kendi_pb(),
+                output_field=_DEC,
+            ),
+            "para_birimi", "tutar",
+        ),
+        "gider": (Harcama.objects.all(), F("tutar") * F("kur_degeri"), "para_birimi", "tutar"),
+    }
+
+
+class RevaluationService:
+
+    @staticmethod
+    def aylik_toplamlar(kalem_tipi: str, aylar: Iterable[datetime.date] | None = None) -> list[dict]:
+        """
+        Tek kalem tipi için AY bazında TL + döviz toplamları (tek GROUP BY sorgusu).
+        aylar verilirse sadece o ayların kayıtları hesaplanır.
+        """
+        qs, tl_expr, pb_alani, orj_alani = _kaynaklar()[kalem_tipi]
+
+        if aylar:
+            kosul = Q()
+            for ay in aylar:
+                kosul |= Q(tarih__gte=ay, tarih__lte=_ay_sonu(ay))
+            qs = qs.filter(kosul)
+
+        annotations = {"_ay": TruncMonth("tarih"), "_tl": ExpressionWrapper(tl_expr, output_field=_DEC)}
+        for pb in DOVIZLER:
+            annotations[f"_kur_{pb.lower()}"] = _kur_subquery(pb)
+        qs = qs.annotate(**annotations)
+
+        toplamlar = {
+            "tutar_try": Coalesce(Sum("_tl"), Value(Decimal("0")), output_field=_DEC),
+            "kayit_sayisi": Count("id"),
+        }
+        kursuz = Q(_tl__isnull=True)
+        for pb in DOVIZLER:
+            kur = F(f"_kur_{pb.lower()}")
+            # Bölme float yapılır: SQLite NUMERIC cast'i 3000/33 gibi değerlerde tam sayı bölmesine düşüyor.
+            # Sonuç 2 haneye yuvarlanarak yazıldığı için kuruş düzeyinde fark oluşmaz.
+            cevrim = ExpressionWrapper(F("_tl") * Value(1.0) / kur, output_field=_FLOAT)
+            if pb_alani:
+                cevrim = Case(When(**{pb_alani: pb}, then=F(orj_alani) * Value(1.0)), default=cevrim, output_field=_FLOAT)
+                kursuz |= Q(**{f"_kur_{pb.lower()}__isnull": True}) & ~Q(**{pb_alani: pb})
+            else:
+                kursuz |= Q(**{f"_kur_{pb.lower()}__isnull": True})
+            toplamlar[f"tutar_{pb.lower()}"] = Coalesce(Sum(cevrim), Value(0.0), output_field=_FLOAT)
+
+        toplamlar["kursuz_kayit"] = Coalesce(
+            Sum(Case(When(kursuz, then=Value(1)), default=Value(0), output_field=IntegerField())),
+            Value(0),
+        )
+
+        return list(qs.values("_ay").annotate(**toplamlar).order_by("_ay"))
+
+    @staticmethod
+    @transaction.atomic
+    def ozet_yenile(aylar: Iterable[datetime.date] | None = None) -> int:
+        """
+        MaliyetDonemOzeti'ni yeniden üretir.
+        - aylar=None: tüm tablo baştan kurulur.
+        - aylar verilirse sadece o aylar silinip yeniden yazılır.
+        Dönüş: yazılan satır sayısı.
+        """
+        aylar = sorted({_ay_basi(a) for a in aylar}) if aylar is not None else None
+        if aylar == []:
+            return 0
+
+        silinecek = MaliyetDonemOzeti.objects.all()
+        if aylar:
+            silinecek = silinecek.filter(ay__in=aylar)
+        silinecek.delete()
+
+        satirlar = []
+        for kalem_tipi, _label in MaliyetDonemOzeti.KALEM_TIPLERI:
+            for r in RevaluationService.aylik_toplamlar(kalem_tipi, aylar):
+                ay = r["_ay"]
+                if isinstance(ay, datetime.datetime):
+                    ay = ay.date()
+                satirlar.append(MaliyetDonemOzeti(
+                    ay=ay,
+                    kalem_tipi=kalem_tipi,
+                    kayit_sayisi=r["kayit_sayisi"],
+                    kursuz_kayit=r["kursuz_kayit"] or 0,
+                    **{
+                        alan: Decimal(str(r[alan] or 0)).quantize(Q2, rounding=ROUND_HALF_UP)
+                        for alan in ("tutar_try", "tutar_usd", "tutar_eur", "tutar_gbp")
+                    },
+                ))
+
+        MaliyetDonemOzeti.objects.bulk_create(satirlar)
+        return len(satirlar)
+
+    @staticmethod
+    def maliyet_toplami(kalem_tipleri: Iterable[str] = MALIYET_KALEMLERI) -> dict | None:
+        """
+        Özet tablosundan tüm zamanlar toplamı (tek sorgu).
+        Tablo hiç kurulmamışsa None döner (çağıran güncel kura geri düşer).
+        """
+        sonuc = MaliyetDonemOzeti.objects.filter(kalem_tipi__in=list(kalem_tipleri)).aggregate(
+            satir=Count("id"),
+            try_=Sum("tutar_try"),
+            usd=Sum("tutar_usd"),
+            eur=Sum("tutar_eur"),
+            gbp=Sum("tutar_gbp"),
+            kursuz=Sum("kursuz_kayit"),
+        )
+        if not sonuc["satir"]:
+            return None
+        return {
+            "try": sonuc["try_"] or Decimal("0.00"),
+            "usd": sonuc["usd"] or Decimal("0.00"),
+            "eur": sonuc["eur"] or Decimal("0.00"),
+            "gbp": sonuc["gbp"] or Decimal("0.00"),
+            "kursuz_kayit": sonuc["kursuz"] or 0,
+        }
+
+
+# ---------------------------------------------------------
+# Değişen ayları commit sonrası yenile (signals.py kullanır)
+# ---------------------------------------------------------
+def ay_kirlendi(*tarihler) -> None:
+    """
+    Kayıt değiştiğinde ilgili ayı işaretler; yenileme transaction commit olunca
+    tek seferde yapılır (aynı işlemde onlarca kalem kaydı olsa bile).
+    Kirli aylar transaction başınadır (commit_sonrasi): başka transaction'ın ayları erken işlenmez.
+    """
+    aylar = set()
+    for dt in tarihler:
+        if isinstance(dt, datetime.datetime):
+            dt = dt.date()
+        if isinstance(dt, datetime.date):
+            aylar.add(_ay_basi(dt))
+    commit_sonrasi_topla("maliyet_aylari", aylar, _bekleyenleri_isle)
+
+
+def _bekleyenleri_isle(aylar: set[datetime.date]) -> None:
+    aylar = sorted(aylar)
+    try:
+        RevaluationService.ozet_yenile(aylar)
+    except Exception:
+        logger.exception("Maliyet dönem özeti yenilenemedi (aylar=%s)", aylar)
@@ -0,0 +1,206 @@
+# core/services/tcmb_client.py
+"""
+TCMB'ye giden TÜM dış çağrıların ortak kapısı.
+
+- Gecikme bütçesi: her çağrı TCMB_TIMEOUT saniyeyi geçemez (bağlantı + okumanın TOPLAMI;
+  her okumadan önce sokete kalan süre verilir, damla damla veri gönderen sunucu bütçeyi uzatamaz).
+- Devre kesici: art arda TCMB_CB_FAILURE_THRESHOLD hata olursa devre açılır,
+  TCMB_CB_COOLDOWN saniye boyunca ağa hiç çıkılmaz; son bilinen iyi cevap döner.
+- Kısa süreli cache: aynı URL max_age içinde tekrar istenirse ağa çıkılmaz
+  (bir sayfa kuru birden fazla kez isteyebiliyor).
+- 404 (hafta sonu / tatil: o gün kur yayımlanmaz) hata DEĞİLDİR: devreyi beslemez,
+  "veri yok" sonucu döner ve URL başına TCMB_NOT_FOUND_TTL saniye hatırlanır.
+  Devreyi sadece bağlantı, zaman aşımı ve 5xx hataları besler.
+- Sayaçlar: durum (closed/open), çağrı/hata sayıları ve gecikme metrikleri.
+
+Durum Django cache'inde tutulur: file/redis backend ile tüm worker'lar aynı devreyi görür,
+locmem ile her süreç kendi devresini yönetir.
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+KEY_PREFIX = "tcmb_client"
+METRIC_COUNTERS = ("calls", "successes", "failures", "short_circuits", "stale_served", "cache_hits", "not_found")
+
+
+class TCMBUnavailable(Exception):
+    """TCMB'ye ulaşılamadı ve elde son bilinen iyi cevap da yok."""
+
+
+@dataclass
+class FetchResult:
+    content: bytes
+    stale: bool = False   # True: son bilinen iyi cevap (devre açık / çağrı başarısız)
+    cached: bool = False  # True: max_age içindeki taze cache'ten geldi
+    not_found: bool = False  # True: TCMB o URL için veri yayımlamamış (404); content boş
+
+
+def _cfg(name: str, default):
+    return getattr(settings, name, default)
+
+
+def _key(*parts: str) -> str:
+    return ":".join((KEY_PREFIX,) + parts)
+
+
+def _url_key(kind: str, url: str) -> str:
+    return _key(kind, hashlib.md5(url.encode("utf-8")).hexdigest())
+
+
+def _incr(name: str, delta: int = 1) -> None:
+    key = _key("m", name)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.set(key, delta, None)
+
+
+def _record_latency(ms: float) -> None:
+    _incr("latency_total_ms", int(ms))
+    cache.set(_key("m", "latency_last_ms"), int(ms), None)
+    if ms > (cache.get(_key("m", "latency_max_ms")) or 0):
+        cache.set(_key("m", "latency_max_ms"), int(ms), None)
+
+
+def is_open() -> bool:
+    open_until = cache.get(_key("open_until"))
+    return bool(open_until and time.time() < open_until)
+
+
+def _on_success() -> None:
+    _incr("successes")
+    cache.set(_key("consecutive_failures"), 0, None)
+    cache.delete(_key("open_until"))
+
+
+def _on_failure() -> None:
+    _incr("failures")
+    fails = (cache.get(_key("consecutive_failures")) or 0) + 1
+    cache.set(_key("consecutive_failures"), fails, None)
+
+    # Soğuma süresi dolduktan sonraki ilk deneme de başarısızsa devre hemen tekrar açılır
+    if fails >= int(_cfg("TCMB_CB_FAILURE_THRESHOLD", 3)):
+        cache.set(_key("open_until"), time.time() + int(_cfg("TCMB_CB_COOLDOWN", 300)), None)
+
+
+def _socket(resp):
+    raw = getattr(getattr(resp, "fp", None), "raw", None)
+    return getattr(raw, "_sock", None)
+
+
+def _download(url: str, budget: float) -> bytes:
+    deadline = time.monotonic() + budget
+    chunks = []
+    with urllib.request.urlopen(url, timeout=budget) as resp:
+        sock = _socket(resp)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"TCMB gecikme bütçesi aşıldı ({budget:.1f} sn)")
+            # Soket zaman aşımı tek okuma içindir; toplamı bütçeye bağlamak için her seferinde kalanı ver
+            if sock is not None:
+                sock.settimeout(remaining)
+            # read1 en fazla bir recv yapar; read(n) n bayt dolana kadar beklerdi
+            chunk = resp.read1(65536) if hasattr(resp, "read1") else resp.read(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def fetch(url: str, *, max_age: int = 0) -> FetchResult:
+    """
+    URL içeriğini devre kesici + gecikme bütçesi altında getirir.
+
+    - max_age > 0 ise son başarılı cevap o kadar saniye taze kabul edilir.
+    - Devre açıksa veya çağrı başarısızsa son bilinen iyi cevap (stale=True) döner.
+    - TCMB 404 dönerse (o gün kur yok) not_found=True döner; devre kesiciye hata sayılmaz.
+    - Hiç iyi cevap yoksa TCMBUnavailable fırlatır.
+    """
+    if max_age > 0:
+        fresh = cache.get(_url_key("fresh", url))
+        if fresh is not None:
+            _incr("cache_hits")
+            return FetchResult(content=fresh, cached=True)
+
+    if cache.get(_url_key("not_found", url)):
+        _incr("cache_hits")
+        return FetchResult(content=b"", cached=True, not_found=True)
+
+    if is_open():
+        _incr("short_circuits")
+        return _last_good_or_raise(url, "TCMB devresi açık (soğuma süresi dolmadı)")
+
+    _incr("calls")
+    budget = float(_cfg("TCMB_TIMEOUT", 3))
+    t0 = time.monotonic()
+    try:
+        content = _download(url, budget)
+    except urllib.error.HTTPError as e:
+        _record_latency((time.monotonic() - t0) * 1000)
+        if e.code == 404:
+            # TCMB ayakta, sadece o gün yayın yok: devre durumuna dokunma
+            _incr("not_found")
+            cache.set(_url_key("not_found", url), True, int(_cfg("TCMB_NOT_FOUND_TTL", 3600)))
+            return FetchResult(content=b"", not_found=True)
+        if e.code >= 500:
+            _on_failure()
+        return _last_good_or_raise(url, str(e))
+    except Exception as e:
+        _record_latency((time.monotonic() - t0) * 1000)
+        _on_failure()
+        return _last_good_or_raise(url, str(e))
+
+    _record_latency((time.monotonic() - t0) * 1000)
+    _on_success()
+
+    cache.set(_url_key("last_good", url), content, None)
+    if max_age > 0:
+        cache.set(_url_key("fresh", url), content, max_age)
+    return FetchResult(content=content)
+
+
+def _last_good_or_raise(url: str, message: str) -> FetchResult:
+    content = cache.get(_url_key("last_good", url))
+    if content is None:
+        raise TCMBUnavailable(message)
+    _incr("stale_served")
+    return FetchResult(content=content, stale=True)
+
+
+def metrics() -> dict:
+    """Devre durumu ve gecikme metrikleri (izleme ekranı / API için)."""
+    counters = {name: cache.get(_key("m", name)) or 0 for name in METRIC_COUNTERS}
+    measured = counters["successes"] + counters["failures"]
+    total_ms = cache.get(_key("m", "latency_total_ms")) or 0
+    open_until = cache.get(_key("open_until"))
+
+    return {
+        "state": "open" if is_open() else "closed",
+        "open_until": int(open_until) if open_until and is_open() else None,
+        "consecutive_failures": cache.get(_key("consecutive_failures")) or 0,
+        **counters,
+        "latency_last_ms": cache.get(_key("m", "latency_last_ms")),
+        "latency_avg_ms": round(total_ms / measured, 1) if measured else None,
+        "latency_max_ms": cache.get(_key("m", "latency_max_ms")),
+        "budget_s": float(_cfg("TCMB_TIMEOUT", 3)),
+        "failure_threshold": int(_cfg("TCMB_CB_FAILURE_THRESHOLD", 3)),
+        "cooldown_s": int(_cfg("TCMB_CB_COOLDOWN", 300)),
+    }
+
+
+def reset() -> None:
+    """Devreyi kapatır ve sayaçları sıfırlar (son bilinen iyi cevaplar korunur)."""
+    cache.delete_many(
+        [_key("open_until"), _key("consecutive_failures")]
+        + [_key("m", n) for n in METRIC_COUNTERS + ("latency_total_ms", "latency_last_ms", "latency_max_ms")]
+    )
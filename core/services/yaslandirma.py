@@ -0,0 +1,183 @@
+# core/services/yaslandirma.py
+"""
+BORÇ YAŞLANDIRMA (AGING) RAPORU
+
+Açık faturalar ve onaylı hakedişler, belge tarihine göre 0-30 / 31-60 / 61-90 / 90+ gün
+dilimlerine tek SQL'de (koşullu toplama) dağıtılır.
+
+- Fatura kalan = genel_toplam - (OdemeDagitim toplamı + dağıtımı olmayan eski tip Odeme.fatura)
+  (kanonik tanımın SQL karşılığı; bkz. cari_bakiye.fatura_odenen_ifadesi)
+- Hakediş kalan = odenecek_net_tutar - fiili_odenen_tutar
+- Gün farkı SQL'de hesaplanmaz: dilim sınır tarihleri parametre olarak verilir
+  (SQLite / PostgreSQL aynı sorgu). Tutarlar kuruş (tamsayı) olarak toplanır.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.utils import timezone
+
+from core.models import Fatura, Hakedis, Odeme, OdemeDagitim, SatinAlma, Tedarikci, Teklif
+
+
+DILIMLER = (
+    ("d0_30", "0-30 Gün"),
+    ("d31_60", "31-60 Gün"),
+    ("d61_90", "61-90 Gün"),
+    ("d90_ustu", "90+ Gün"),
+)
+
+
+def _kurus(cents) -> Decimal:
+    return (Decimal(int(cents or 0)) / 100).quantize(Decimal("0.01"))
+
+
+def acik_kalemler_sql() -> str:
+    """`acik` CTE'si: (ted, tip, kayit_id, evrak_no, tarih, kalan[kuruş]). Parametre: %(onay)s."""
+    qn = connection.ops.quote_name
+
+    def t(model):
+        return qn(model._meta.db_table)
+
+    def c(model, name):
+        return qn(model._meta.get_field(name).column)
+
+    return f"""
+        acik AS (
+            SELECT f.{c(Fatura, 'tedarikci')} AS ted, 'fatura' AS tip, f.{c(Fatura, 'id')} AS kayit_id,
+                   f.{c(Fatura, 'fatura_no')} AS evrak_no, f.{c(Fatura, 'tarih')} AS tarih,
+                   CAST(ROUND(f.{c(Fatura, 'genel_toplam')} * 100) AS BIGINT)
+                   - COALESCE((
+                         SELECT CAST(ROUND(SUM(d.{c(OdemeDagitim, 'tutar')}) * 100) AS BIGINT)
+                         FROM {t(OdemeDagitim)} d
+                         WHERE d.{c(OdemeDagitim, 'fatura')} = f.{c(Fatura, 'id')}
+                     ), 0)
+                   - COALESCE((
+                         SELECT CAST(ROUND(SUM(o.{c(Odeme, 'tutar')}) * 100) AS BIGINT)
+                         FROM {t(Odeme)} o
+                         WHERE o.{c(Odeme, 'fatura')} = f.{c(Fatura, 'id')}
+                           AND NOT EXISTS (
+                               SELECT 1 FROM {t(OdemeDagitim)} d2
+                               WHERE d2.{c(OdemeDagitim, 'odeme')} = o.{c(Odeme, 'id')}
+                           )
+                     ), 0) AS kalan
+            FROM {t(Fatura)} f
+
+            UNION ALL
+
+            SELECT tk.{c(Teklif, 'tedarikci')}, 'hakedis', h.{c(Hakedis, 'id')},
+                   CAST(h.{c(Hakedis, 'hakedis_no')} AS VARCHAR(20)), h.{c(Hakedis, 'tarih')},
+                   CAST(ROUND((h.{c(Hakedis, 'odenecek_net_tutar')} - h.{c(Hakedis, 'fiili_odenen_tutar')}) * 100) AS BIGINT)
+            FROM {t(Hakedis)} h
+            JOIN {t(SatinAlma)} sa ON sa.{c(SatinAlma, 'id')} = h.{c(Hakedis, 'satinalma')}
+            JOIN {t(Teklif)} tk ON tk.{c(Teklif, 'id')} = sa.{c(SatinAlma, 'teklif')}
+            WHERE h.{c(Hakedis, 'onay_durumu')} = %(onay)s
+        )
+    """
+
+
+def _dilim_case() -> str:
+    return """
+        CASE WHEN a.tarih >= %(s30)s THEN 'd0_30'
+             WHEN a.tarih >= %(s60)s THEN 'd31_60'
+             WHEN a.tarih >= %(s90)s THEN 'd61_90'
+             ELSE 'd90_ustu' END
+    """
+
+
+def _params(bugun: date, **ekstra) -> dict:
+    return {
+        "onay": True,
+        "s30": bugun - timedelta(days=30),
+        "s60": bugun - timedelta(days=60),
+        "s90": bugun - timedelta(days=90),
+        **ekstra,
+    }
+
+
+@dataclass
+class YaslandirmaSatiri:
+    tedarikci_id: int
+    firma: str
+    d0_30: Decimal
+    d31_60: Decimal
+    d61_90: Decimal
+    d90_ustu: Decimal
+    toplam: Decimal
+    kalem_sayisi: int
+
+
+class AgingService:
+
+    @staticmethod
+    def rapor(bugun: date | None = None) -> tuple[list[YaslandirmaSatiri], dict]:
+        """Tüm tedarikçiler için dilim toplamları (tek sorgu) ve genel toplam satırı."""
+        bugun = bugun or timezone.localdate()
+        qn = connection.ops.quote_name
+        ted_tablo = qn(Tedarikci._meta.db_table)
+        ted_ad = qn(Tedarikci._meta.get_field("firma_unvani").column)
+        ted_pk = qn(Tedarikci._meta.pk.column)
+
+        sql = f"""
+            WITH {acik_kalemler_sql()}
+            SELECT a.ted, t.{ted_ad},
+                   SUM(CASE WHEN a.tarih >= %(s30)s THEN a.kalan ELSE 0 END) AS d0_30,
+                   SUM(CASE WHEN a.tarih < %(s30)s AND a.tarih >= %(s60)s THEN a.kalan ELSE 0 END) AS d31_60,
+                   SUM(CASE WHEN a.tarih < %(s60)s AND a.tarih >= %(s90)s THEN a.kalan ELSE 0 END) AS d61_90,
+                   SUM(CASE WHEN a.tarih < %(s90)s THEN a.kalan ELSE 0 END) AS d90_ustu,
+                   SUM(a.kalan) AS toplam, COUNT(*) AS adet
+            FROM acik a
+            JOIN {ted_tablo} t ON t.{ted_pk} = a.ted
+            WHERE a.kalan > 0
+            GROUP BY a.ted, t.{ted_ad}
+            ORDER BY toplam DESC, a.ted
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, _params(bugun))
+            rows = cursor.fetchall()
+
+        satirlar = [
+            YaslandirmaSatiri(
+                tedarikci_id=r[0], firma=r[1],
+                d0_30=_kurus(r[2]), d31_60=_kurus(r[3]), d61_90=_kurus(r[4]), d90_ustu=_kurus(r[5]),
+                toplam=_kurus(r[6]), kalem_sayisi=int(r[7]),
+            )
+            for r in rows
+        ]
+        genel = {kod: sum((getattr(s, kod) for s in satirlar), Decimal("0.00")) for kod, _ in DILIMLER}
+        genel["toplam"] = sum((s.toplam for s in satirlar), Decimal("0.00"))
+        return satirlar, genel
+
+    @staticmethod
+    def kalemler(tedarikci_id: int, bugun: date | None = None) -> list[dict]:
+        """Drill-down: bir tedarikçinin açık kalemleri, en eskiden yeniye."""
+        bugun = bugun or timezone.localdate()
+        sql = f"""
+            WITH {acik_kalemler_sql()}
+            SELECT a.tip, a.kayit_id, a.evrak_no, a.tarih, a.kalan, {_dilim_case()} AS dilim
+            FROM acik a
+            WHERE a.ted = %(ted)s AND a.kalan > 0
+            ORDER BY a.tarih, a.tip, a.kayit_id
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, _params(bugun, ted=tedarikci_id))
+            rows = cursor.fetchall()
+
+        etiket = dict(DILIMLER)
+        out = []
+        for tip, kayit_id, evrak_no, tarih, kalan, dilim in rows:
+            tarih = tarih if isinstance(tarih, date) else date.fromisoformat(str(tarih)[:10])
+            out.append({
+                "tip": tip,
+                "id": kayit_id,
+                "evrak_no": f"Fatura #{evrak_no}" if tip == "fatura" else f"Hakediş #{evrak_no}",
+                "tarih": tarih,
+                "gun": (bugun - tarih).days,
+                "kalan": _kurus(kalan),
+                "dilim": dilim,
+                "dilim_adi": etiket[dilim],
+            })
+        return out
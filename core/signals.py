@@ -1,11 +1,16 @@
 # core/signals.py
 import logging
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
 from django.dispatch import receiver
 from django.db import transaction
 
-from .models import DepoTransfer, SatinAlma
+from .models import DepoTransfer, SatinAlma, Fatura, FaturaKalem, Hakedis, Odeme, OdemeDagitim, Harcama, Tedarikci
 from core.services.stock import StockService
+from core.services.revaluation import ay_kirlendi
+from core.services.cari_bakiye import BalanceService
+from core.services.payables import fatura_kirlendi
+from core.services.donem_kapanisi import KILITLI_ALANLAR, kilit_kontrol
+from core.services import dashboard_cache
 
 logger = logging.getLogger(__name__)
 
@@ -67,3 +72,105 @@ def depo_transfer_post_save(sender, instance: DepoTransfer, created: bool, **kwa
         # 4) Sipariş durum güncelle (teslimat durumu vs)
         if siparis_obj:
             siparis_obj.save()
+
+
+# ---------------------------------------------------------
+# Dönem kapanışı kilidi: kapalı döneme yazım / silme yok (diğer sinyallerden ÖNCE bağlanır)
+# ---------------------------------------------------------
+def _donem_kilidi_kayit(sender, instance, **kwargs):
+    kilit_kontrol(sender, instance)
+
+
+def _donem_kilidi_silme(sender, instance, **kwargs):
+    kilit_kontrol(sender, instance, silme=True)
+
+
+for _model in KILITLI_ALANLAR:
+    pre_save.connect(_donem_kilidi_kayit, sender=_model, dispatch_uid=f"donem_kilidi_pre_save_{_model.__name__}")
+    pre_delete.connect(_donem_kilidi_silme, sender=_model, dispatch_uid=f"donem_kilidi_pre_delete_{_model.__name__}")
+
+
+# ---------------------------------------------------------
+# Maliyet dönem özeti: değişen ayı commit sonrası yeniden hesapla
+# ---------------------------------------------------------
+MALIYET_MODELLERI = (Fatura, Hakedis, Odeme, Harcama)
+# Değişince eski değeri de bilinmesi gereken alanlar (eski ay / eski tedarikçi de yenilensin)
+IZLENEN_ALANLAR = ("tarih", "tedarikci", "fatura")
+
+
+def _eski_degerleri_al(sender, instance, update_fields=None, **kwargs):
+    # update_fields izlenen alanlardan birini içermiyorsa sorguya gerek yok
+    alanlar = [a for a in IZLENEN_ALANLAR if hasattr(sender, a)]
+    if update_fields is not None:
+        alanlar = [a for a in alanlar if a in update_fields]
+    instance._eski = {}
+    if instance.pk and alanlar:
+        instance._eski = sender.objects.filter(pk=instance.pk).values(*alanlar).first() or {}
+
+
+def _maliyet_degisti(sender, instance, **kwargs):
+    ay_kirlendi(instance.tarih, getattr(instance, "_eski", {}).get("tarih"))
+
+
+for _model in MALIYET_MODELLERI:
+    pre_save.connect(_eski_degerleri_al, sender=_model, dispatch_uid=f"eski_degerler_{_model.__name__}")
+    post_save.connect(_maliyet_degisti, sender=_model, dispatch_uid=f"maliyet_post_save_{_model.__name__}")
+    post_delete.connect(_maliyet_degisti, sender=_model, dispatch_uid=f"maliyet_post_delete_{_model.__name__}")
+
+
+# ---------------------------------------------------------
+# Fatura.odenen_tutar: ödeme / dağıtım değişince fatura (eskisi de) commit sonrası tek seferde yenilenir
+# ---------------------------------------------------------
+def _fatura_odenen_kirlendi(sender, instance, **kwargs):
+    fatura_kirlendi(instance.fatura_id, getattr(instance, "_eski", {}).get("fatura"))
+
+
+pre_save.connect(_eski_degerleri_al, sender=OdemeDagitim, dispatch_uid="eski_degerler_OdemeDagitim")
+for _model in (Odeme, OdemeDagitim):
+    post_save.connect(_fatura_odenen_kirlendi, sender=_model, dispatch_uid=f"fatura_odenen_post_save_{_model.__name__}")
+    post_delete.connect(_fatura_odenen_kirlendi, sender=_model, dispatch_uid=f"fatura_odenen_post_delete_{_model.__name__}")
+
+
+# ---------------------------------------------------------
+# Tedarikçi cari bakiye defteri: yazan işlemle AYNI transaction içinde güncellenir
+# ---------------------------------------------------------
+# post_delete'te satır açılmaz: tedarikçi silinirken cascade sırasına takılmasın
+def _cari_fatura_odeme(sender, instance, **kwargs):
+    BalanceService.tedarikci_yenile(
+        instance.tedarikci_id, getattr(instance, "_eski", {}).get("tedarikci"), olustur="created" in kwargs
+    )
+
+
+def _cari_hakedis(sender, instance, **kwargs):
+    ted_id = (
+        SatinAlma.objects.filter(pk=instance.satinalma_id)
+        .values_list("teklif__tedarikci_id", flat=True)
+        .first()
+    )
+    BalanceService.tedarikci_yenile(ted_id, olustur="created" in kwargs)
+
+
+def _cari_dagitim(sender, instance, **kwargs):
+    ted_id = Odeme.objects.filter(pk=instance.odeme_id).values_list("tedarikci_id", flat=True).first()
+    if ted_id is None:
+        # Ödeme ile birlikte silindi: faturanın tedarikçisi aynıdır (OdemeDagitim.clean kuralı)
+        ted_id = Fatura.objects.filter(pk=instance.fatura_id).values_list("tedarikci_id", flat=True).first()
+    BalanceService.tedarikci_yenile(ted_id, olustur="created" in kwargs)
+
+
+for _model, _handler in ((Fatura, _cari_fatura_odeme), (Odeme, _cari_fatura_odeme),
+                         (Hakedis, _cari_hakedis), (OdemeDagitim, _cari_dagitim)):
+    post_save.connect(_handler, sender=_model, dispatch_uid=f"cari_post_save_{_model.__name__}")
+    post_delete.connect(_handler, sender=_model, dispatch_uid=f"cari_post_delete_{_model.__name__}")
+
+
+# ---------------------------------------------------------
+# Ekran cache'i: finans verisi değişince veri sürümü artar (commit sonrası)
+# ---------------------------------------------------------
+def _ekran_cache_gecersiz(sender, **kwargs):
+    dashboard_cache.surum_artir()
+
+
+for _model in (Fatura, FaturaKalem, Odeme, OdemeDagitim, Hakedis, Tedarikci):
+    post_save.connect(_ekran_cache_gecersiz, sender=_model, dispatch_uid=f"ekran_cache_post_save_{_model.__name__}")
+    post_delete.connect(_ekran_cache_gecersiz, sender=_model, dispatch_uid=f"ekran_cache_post_delete_{_model.__name__}")
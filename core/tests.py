@@ -1,5 +1,5 @@
 from decimal import Decimal
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
@@ -7,9 +7,12 @@ from django.utils import timezone
 from core.models import (
     Tedarikci, Malzeme, Depo, DepoHareket, 
     SatinAlma, Teklif, Hakedis, Fatura, FaturaKalem, 
-    Odeme, Kategori, IsKalemi
+    Odeme, Kategori, IsKalemi, DovizKuru,
+    GiderKategorisi, Harcama, MaliyetDonemOzeti, MalzemeTalep, TedarikciBakiye
 )
 
+# Testler internete çıkmasın: kurlar sabit tablodan gelir
+@override_settings(RATE_PROVIDER="sabit")
 class FabrikaSistemTesti(TestCase):
     def setUp(self):
         """Test ortamı için temel verilerin kurulumu (Setup)"""
@@ -137,6 +140,930 @@ class FabrikaSistemTesti(TestCase):
         # Matematiksel toplam kontrolü (5 * 100 = 500 Ara, +%20 KDV = 600 Genel)
         self.assertEqual(fatura.genel_toplam, Decimal('600.00'))
 
+    def test_teklif_toplu_onay(self):
+        """Toplu onay: kur kilitlenir, siparişler açılır, aynı talebin ikinci teklifi atlanır"""
+        talep = MalzemeTalep.objects.create(malzeme=self.malzeme, miktar=10, durum='islemde')
+        usd = Teklif.objects.create(talep=talep, tedarikci=self.tedarikci, malzeme=self.malzeme, miktar=10,
+                                    birim_fiyat=100, para_birimi='USD', kur_degeri=Decimal('30.0000'), kdv_orani=20)
+        rakip = Teklif.objects.create(talep=talep, tedarikci=self.tedarikci, malzeme=self.malzeme, miktar=10,
+                                      birim_fiyat=90, para_birimi='TRY', kur_degeri=1, kdv_orani=20)
+        hizmet = Teklif.objects.create(tedarikci=self.tedarikci, is_kalemi=self.is_kalemi, miktar=1,
+                                       birim_fiyat=5000, para_birimi='TRY', kur_degeri=1, kdv_orani=20)
+
+        response = self.client.post(reverse('teklif_toplu_onayla'), {'teklif_ids': [usd.id, rakip.id, hizmet.id]})
+        self.assertEqual(response.status_code, 302)
+
+        usd.refresh_from_db()
+        rakip.refresh_from_db()
+        self.assertEqual(usd.durum, 'onaylandi')
+        self.assertEqual(usd.locked_total_try, Decimal('36000.00'))  # 10 x 100 USD x 1.20 x 30
+        self.assertEqual(rakip.durum, 'beklemede')
+        self.assertEqual(SatinAlma.objects.filter(teklif__in=[usd, hizmet]).count(), 2)
+        talep.refresh_from_db()
+        self.assertEqual(talep.durum, 'onaylandi')
+
+    def test_cari_bakiye_defteri(self):
+        """Fatura/ödeme yazıldığı transaction içinde cari bakiye defteri güncellenir"""
+        fatura = Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="CB-1", tarih=timezone.now().date(),
+                                       genel_toplam=Decimal('1000.00'))
+        odeme = Odeme.objects.create(tedarikci=self.tedarikci, fatura=fatura, tutar=Decimal('400.00'),
+                                     para_birimi='TRY', odeme_turu='nakit')
+        Odeme.objects.create(tedarikci=self.tedarikci, tutar=Decimal('700.00'), para_birimi='TRY', odeme_turu='nakit')
+
+        bakiye = TedarikciBakiye.objects.get(tedarikci=self.tedarikci)
+        self.assertEqual(bakiye.fatura_odenen, Decimal('400.00'))
+        self.assertEqual(bakiye.kalan_borc, Decimal('600.00'))
+        self.assertEqual(bakiye.avans_bakiye, Decimal('700.00'))
+        self.assertEqual(bakiye.cari_bakiye, Decimal('-100.00'))
+
+        response = self.client.get(reverse('api_tedarikci_bakiye', args=[self.tedarikci.id]))
+        self.assertEqual(response.json()['kalan_bakiye'], 600.0)
+
+        odeme.delete()
+        bakiye.refresh_from_db()
+        self.assertEqual(bakiye.kalan_borc, Decimal('1000.00'))
+
+    def test_fatura_odenen_toplu_harita(self):
+        """Ödenen TL haritası: dağıtımlar + dağıtımsız eski ödemeler, fatura sayısından bağımsız tek sorgu"""
+        from core.models import OdemeDagitim
+        from core.views.finans_payments import _paid_tl_map
+
+        bugun = timezone.now().date()
+        f1 = Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="PM-1", tarih=bugun, genel_toplam=Decimal('1000.00'))
+        f2 = Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="PM-2", tarih=bugun, genel_toplam=Decimal('500.00'))
+        f3 = Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="PM-3", tarih=bugun, genel_toplam=Decimal('200.00'))
+
+        # Eski tip doğrudan ödeme
+        Odeme.objects.create(tedarikci=self.tedarikci, fatura=f1, tutar=Decimal('300.00'), para_birimi='TRY')
+        # Dağıtımlı ödeme: fatura alanı da dolu ama sadece dağıtımlar sayılır
+        od = Odeme.objects.create(tedarikci=self.tedarikci, fatura=f1, tutar=Decimal('600.00'), para_birimi='TRY')
+        OdemeDagitim.objects.create(odeme=od, fatura=f1, tutar=Decimal('100.00'), tarih=bugun)
+        OdemeDagitim.objects.create(odeme=od, fatura=f2, tutar=Decimal('500.00'), tarih=bugun)
+
+        with self.assertNumQueries(1):
+            harita = _paid_tl_map([f1.id, f2.id, f3.id])
+        self.assertEqual(harita, {f1.id: Decimal('400.00'), f2.id: Decimal('500.00'), f3.id: Decimal('0.00')})
+
+    def test_finans_dashboard_borc_avans_ve_gider(self):
+        """Patron ekranı: borç/avans ayrımı ve gider toplamı tedarikçi/gider sayısından bağımsız sorgularla"""
+        bugun = timezone.now().date()
+        avansli = Tedarikci.objects.create(firma_unvani="Avanslı Ltd.")
+        Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="FD-1", tarih=bugun, genel_toplam=Decimal('1500.00'))
+        Odeme.objects.create(tedarikci=avansli, tutar=Decimal('250.00'), para_birimi='TRY')
+        kategori = GiderKategorisi.objects.create(isim="Ofis")
+        Harcama.objects.create(kategori=kategori, aciklama="Kira", tutar=Decimal('100.00'),
+                               para_birimi='USD', kur_degeri=Decimal('32.5000'), tarih=bugun)
+        Harcama.objects.create(kategori=kategori, aciklama="Çay", tutar=Decimal('50.00'), tarih=bugun)
+
+        response = self.client.get(reverse('finans_dashboard'))
+        self.assertEqual(response.context['piyasa_borc'], Decimal('1500.00'))
+        self.assertEqual(response.context['verilen_avans'], Decimal('250.00'))
+        self.assertEqual(response.context['toplam_gider'], Decimal('3300.00'))
+        self.assertEqual(response.context['top_5_borc'], [{'isim': "Test Tedarik A.Ş.", 'bakiye': Decimal('1500.00')}])
+
+    def test_odeme_dashboard_cache_surum_anahtari(self):
+        """Ödeme merkezi cache'ten gelir; fatura kaydı commit olunca sürüm artar ve yeniden hesaplanır"""
+        from django.core.cache import cache
+        from core.services import dashboard_cache
+
+        cache.clear()
+        url = reverse('odeme_dashboard')
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.context['odenmemis_fatura_toplam'], Decimal('0.00'))
+        self.assertEqual(dashboard_cache.metrics('odeme_dashboard')['hit'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="DC-1", tarih=timezone.now().date(),
+                                  genel_toplam=Decimal('750.00'))
+
+        response = self.client.get(url)
+        self.assertEqual(response.context['odenmemis_fatura_toplam'], Decimal('750.00'))
+        sayac = self.client.get(reverse('ekran_cache_durumu')).json()['odeme_dashboard']
+        self.assertEqual((sayac['hit'], sayac['miss']), (1, 2))
+
+    def test_cari_ekstre_devir_ve_yuruyen_bakiye(self):
+        """Ekstre tek sorgu: devir satırı, aynı gün için kararlı sıra (fatura < ödeme), yürüyen bakiye"""
+        from datetime import date
+        from core.services.cari_ekstre import StatementService
+
+        Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="EK-1", tarih=date(2024, 1, 1), genel_toplam=Decimal('1000.00'))
+        Odeme.objects.create(tedarikci=self.tedarikci, tutar=Decimal('300.00'), para_birimi='TRY', tarih=date(2024, 1, 5))
+        Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="EK-2", tarih=date(2024, 1, 5), genel_toplam=Decimal('200.10'))
+        Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="EK-3", tarih=date(2024, 2, 1), genel_toplam=Decimal('50.00'))
+
+        with self.assertNumQueries(1):
+            ekstre = StatementService.cari_ekstre(self.tedarikci.id, date(2024, 1, 5), date(2024, 1, 31))
+
+        self.assertEqual([h['tip'] for h in ekstre.satirlar], ['devir', 'fatura', 'odeme'])
+        self.assertEqual([h['bakiye'] for h in ekstre.satirlar],
+                         [Decimal('1000.00'), Decimal('1200.10'), Decimal('900.10')])
+        self.assertEqual(ekstre.son_bakiye, Decimal('900.10'))
+
+        response = self.client.get(reverse('cari_ekstresi'), {'tedarikci': self.tedarikci.id})
+        self.assertEqual(response.context['son_bakiye'], Decimal('950.10'))
+
+    def test_cari_ekstre_disa_aktarim(self):
+        """Ekstre CSV/XLSX/PDF olarak akar; toplu arşiv komutu bakiyeli tedarikçileri zip'e yazar"""
+        import io
+        import os
+        import tempfile
+        import zipfile
+        from datetime import date
+        from django.core.management import call_command
+
+        Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="EX-1", tarih=date(2024, 3, 1),
+                              genel_toplam=Decimal('1234.50'), aciklama="Çelik; ğüşıİ")
+        Odeme.objects.create(tedarikci=self.tedarikci, tutar=Decimal('234.50'), para_birimi='TRY', tarih=date(2024, 3, 2))
+
+        def indir(bicim):
+            response = self.client.get(reverse('cari_ekstre_indir', args=[self.tedarikci.id, bicim]))
+            self.assertTrue(response.streaming)
+            return b"".join(response.streaming_content)
+
+        csv_satirlar = indir('csv').decode('utf-8-sig').splitlines()
+        self.assertEqual(csv_satirlar[0], "Tarih;Açıklama;Borç;Alacak;Bakiye")
+        self.assertEqual(csv_satirlar[-1], "02.03.2024;Ödeme: Nakit;0.00;234.50;1000.00")
+
+        with zipfile.ZipFile(io.BytesIO(indir('xlsx'))) as xlsx:
+            sayfa = xlsx.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        self.assertIn("<v>1000.00</v>", sayfa)
+        self.assertIn("Çelik; ğüşıİ", sayfa)
+
+        pdf = indir('pdf')
+        self.assertTrue(pdf.startswith(b"%PDF-1.4") and pdf.rstrip().endswith(b"%%EOF"))
+        xref = int(pdf.rsplit(b"startxref", 1)[1].split()[0])
+        self.assertTrue(pdf[xref:].startswith(b"xref"))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            yol = os.path.join(tmp, "ekstreler.zip")
+            call_command("cari_ekstre_arsivi", yol, bicim="csv", stdout=io.StringIO())
+            with zipfile.ZipFile(yol) as arsiv:
+                self.assertEqual(arsiv.namelist(), [f"cari_ekstre_{self.tedarikci.id:04d}.csv"])
+
+    def test_borc_yaslandirma_dilimleri(self):
+        """Açık fatura kalanları belge tarihine göre dilimlere dağılır; drill-down ve CSV aynı veriyi verir"""
+        from datetime import timedelta
+        from core.models import OdemeDagitim
+        from core.services.yaslandirma import AgingService
+
+        bugun = timezone.localdate()
+        f1 = Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="Y-1", tarih=bugun - timedelta(days=10),
+                                   genel_toplam=Decimal('100.00'))
+        Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="Y-2", tarih=bugun - timedelta(days=45),
+                              genel_toplam=Decimal('200.00'))
+        Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="Y-3", tarih=bugun - timedelta(days=100),
+                              genel_toplam=Decimal('300.00'))
+        odeme = Odeme.objects.create(tedarikci=self.tedarikci, tutar=Decimal('40.00'), para_birimi='TRY')
+        OdemeDagitim.objects.create(odeme=odeme, fatura=f1, tutar=Decimal('40.00'))
+
+        with self.assertNumQueries(1):
+            rapor, genel = AgingService.rapor(bugun)
+        self.assertEqual(len(rapor), 1)
+        s = rapor[0]
+        self.assertEqual((s.d0_30, s.d31_60, s.d61_90, s.d90_ustu), (
+            Decimal('60.00'), Decimal('200.00'), Decimal('0.00'), Decimal('300.00')))
+        self.assertEqual(genel["toplam"], Decimal('560.00'))
+
+        kalemler = AgingService.kalemler(self.tedarikci.id, bugun)
+        self.assertEqual([k["dilim"] for k in kalemler], ["d90_ustu", "d31_60", "d0_30"])
+        self.assertEqual(kalemler[0]["gun"], 100)
+
+        response = self.client.get(reverse('yaslandirma_raporu'), {"tedarikci": self.tedarikci.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["kalemler"]), 3)
+
+        response = self.client.get(reverse('yaslandirma_raporu'), {"format": "csv"})
+        satirlar = b"".join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(satirlar[1], f"{self.tedarikci.firma_unvani};60.00;200.00;0.00;300.00;560.00;3")
+
+    def test_nakit_akis_projeksiyonu(self):
+        """Çek vadeleri, vadeli fatura kalanları ve gecikmiş tutarlar gün dizilerine doğru kovaya düşer"""
+        from datetime import timedelta
+        from core.services.nakit_akis import CashFlowService
+
+        bugun = timezone.localdate()
+        self.tedarikci.odeme_vadesi_gun = 30
+        self.tedarikci.save()
+
+        Odeme.objects.create(tedarikci=self.tedarikci, tutar=Decimal('500.00'), para_birimi='TRY',
+                             odeme_turu='cek', vade_tarihi=bugun + timedelta(days=3))
+        Odeme.objects.create(tedarikci=self.tedarikci, tutar=Decimal('250.00'), para_birimi='TRY',
+                             odeme_turu='cek', vade_tarihi=bugun + timedelta(days=3))
+        Odeme.objects.create(tedarikci=self.tedarikci, tutar=Decimal('999.00'), para_birimi='TRY',
+                             odeme_turu='cek', vade_tarihi=bugun + timedelta(days=5), is_cek_odendi=True)
+        # Vade: 10 gün önce + 30 = 20 gün sonra
+        Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="NA-1", tarih=bugun - timedelta(days=10),
+                              genel_toplam=Decimal('1000.00'))
+        # Vade: 60 gün önce + 30 = 30 gün önce -> gecikmiş
+        Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="NA-2", tarih=bugun - timedelta(days=60),
+                              genel_toplam=Decimal('400.00'))
+        # Vade: 160 gün sonra -> 90 günlük ufkun dışında, 180 günlüğün içinde
+        Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="NA-3", tarih=bugun + timedelta(days=130),
+                              genel_toplam=Decimal('80.00'))
+
+        with self.assertNumQueries(2):
+            p = CashFlowService.projeksiyon(bugun, 90)
+        self.assertEqual(len(p.cek), 90)
+        self.assertEqual(p.cek[3], Decimal('750.00'))
+        self.assertEqual(p.fatura[20], Decimal('1000.00'))
+        self.assertEqual(p.gecikmis["fatura"], Decimal('400.00'))
+        self.assertEqual(p.ufuk_disi["fatura"], Decimal('80.00'))
+        self.assertEqual(p.genel_toplam, Decimal('1750.00'))
+        self.assertEqual(p.haftalik()[0]["cek"], Decimal('750.00'))
+        self.assertEqual(p.gunluk()[-1]["kumulatif"], Decimal('2150.00'))
+
+        response = self.client.get(reverse('nakit_akis_projeksiyonu'), {"gun": 180, "format": "json"})
+        veri = response.json()
+        self.assertEqual(len(veri["tarihler"]), 180)
+        self.assertEqual(veri["ufuk_disi"]["fatura"], "0.00")
+        self.assertEqual(veri["fatura"][160], "80.00")
+        self.assertEqual(self.client.get(reverse('nakit_akis_projeksiyonu')).status_code, 200)
+
+    def test_cek_takibi_tek_geciste_kategori(self):
+        """Çek kovaları ve toplamları Case/When ile belirlenir; vade takvimi gün/hafta toplar"""
+        from datetime import timedelta
+        from core.services.cekler import ChequeService
+
+        bugun = timezone.localdate()
+
+        def cek(gun, tutar, odendi=False):
+            return Odeme.objects.create(tedarikci=self.tedarikci, tutar=Decimal(tutar), para_birimi='TRY',
+                                        odeme_turu='cek', vade_tarihi=bugun + timedelta(days=gun), is_cek_odendi=odendi)
+
+        cek(-5, '100.00')
+        cek(10, '200.00')
+        cek(45, '300.00')
+        cek(-40, '400.00', odendi=True)
+        Odeme.objects.create(tedarikci=self.tedarikci, tutar=Decimal('999.00'), para_birimi='TRY', odeme_turu='nakit')
+
+        with self.assertNumQueries(1):
+            ozet = ChequeService.ozet(bugun)
+        self.assertEqual({k: ozet[k]["toplam"] for k in ("gecikmis", "yaklasan", "ileri", "odendi")}, {
+            "gecikmis": Decimal('100.00'), "yaklasan": Decimal('200.00'),
+            "ileri": Decimal('300.00'), "odendi": Decimal('400.00')})
+        self.assertEqual(ozet["toplam_risk"], Decimal('600.00'))
+
+        response = self.client.get(reverse('cek_takibi'))
+        self.assertEqual([c.tutar for c in response.context["yaklasanlar"]], [Decimal('200.00')])
+        self.assertEqual(response.context["toplam_risk"], Decimal('600.00'))
+
+        veri = self.client.get(reverse('api_cek_takvimi'), {"d1": bugun.isoformat()}).json()
+        self.assertEqual([d["toplam"] for d in veri["donemler"]], [200.0, 300.0])
+        veri = self.client.get(reverse('api_cek_takvimi'), {"gruplama": "hafta"}).json()
+        self.assertEqual(veri["toplam"], 600.0)
+        gecikmis_vade = bugun - timedelta(days=5)
+        self.assertEqual(veri["donemler"][0]["tarih"],
+                         (gecikmis_vade - timedelta(days=gecikmis_vade.weekday())).isoformat())
+        self.assertEqual(self.client.get(reverse('api_cek_takvimi'), {"gruplama": "ay"}).status_code, 400)
+
+    def test_otomatik_mahsup_motoru(self):
+        """Avanslar iki sorguyla planlanır; FIFO ve önce-tam-tutar stratejileri, toplu yazım ve defter"""
+        from datetime import date
+        from core.models import OdemeDagitim
+        from core.services.payables import AllocationService
+
+        f1 = Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="AM-1", tarih=date(2024, 1, 1),
+                                   genel_toplam=Decimal('1000.00'))
+        f2 = Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="AM-2", tarih=date(2024, 1, 3),
+                                   genel_toplam=Decimal('500.00'))
+        # Eski tip doğrudan ödeme: avans sayılmaz, F1 kalanını 600'e düşürür
+        Odeme.objects.create(tedarikci=self.tedarikci, fatura=f1, tutar=Decimal('400.00'), para_birimi='TRY',
+                             tarih=date(2024, 1, 1))
+        p1 = Odeme.objects.create(tedarikci=self.tedarikci, tutar=Decimal('300.00'), para_birimi='TRY',
+                                  tarih=date(2024, 1, 1))
+        p2 = Odeme.objects.create(tedarikci=self.tedarikci, tutar=Decimal('500.00'), para_birimi='TRY',
+                                  tarih=date(2024, 1, 2))
+
+        with self.assertNumQueries(2):
+            fifo = AllocationService.planla(self.tedarikci.id, "fifo")
+        self.assertEqual([(e.odeme_id, e.fatura_id, e.tutar) for e in fifo], [
+            (p1.id, f1.id, Decimal('300.00')), (p2.id, f1.id, Decimal('300.00')), (p2.id, f2.id, Decimal('200.00'))])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            eslesmeler = AllocationService.otomatik_dagit(self.tedarikci.id, "tam_tutar")
+        self.assertEqual([(e.odeme_id, e.fatura_id, e.tutar) for e in eslesmeler], [
+            (p2.id, f2.id, Decimal('500.00')), (p1.id, f1.id, Decimal('300.00'))])
+        self.assertEqual(OdemeDagitim.objects.count(), 2)
+
+        f2.refresh_from_db()
+        self.assertEqual(f2.odenen_tutar, Decimal('500.00'))
+        bakiye = TedarikciBakiye.objects.get(tedarikci=self.tedarikci)
+        self.assertEqual((bakiye.fatura_kalan, bakiye.avans_bakiye), (Decimal('300.00'), Decimal('0.00')))
+
+        # Tekrar çalıştırmak bir şey yazmaz
+        response = self.client.post(reverse('otomatik_mahsup', args=[self.tedarikci.id]), {"strateji": "fifo"})
+        self.assertRedirects(response, reverse('avans_mahsup', args=[self.tedarikci.id]), fetch_redirect_response=False)
+        self.assertEqual(OdemeDagitim.objects.count(), 2)
+
+    def test_avans_mahsup_toplu_kayit(self):
+        """Avans mahsup ekranı fatura/ödeme sayısından bağımsız sorguyla kurulur; POST payları tek seferde yazar"""
+        from datetime import date
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from core.models import OdemeDagitim
+
+        faturalar = [
+            Fatura.objects.create(tedarikci=self.tedarikci, fatura_no=f"AV-{i}", tarih=date(2024, 2, i),
+                                  genel_toplam=Decimal('400.00'))
+            for i in range(1, 6)
+        ]
+        avans = Odeme.objects.create(tedarikci=self.tedarikci, tutar=Decimal('1000.00'), para_birimi='TRY')
+        Odeme.objects.create(tedarikci=self.tedarikci, tutar=Decimal('50.00'), para_birimi='TRY')
+
+        url = reverse('avans_mahsup', args=[self.tedarikci.id])
+        with CaptureQueriesContext(connection) as once:
+            self.client.get(url)
+        for i in range(6, 16):
+            Fatura.objects.create(tedarikci=self.tedarikci, fatura_no=f"AV-{i}", tarih=date(2024, 3, i),
+                                  genel_toplam=Decimal('10.00'))
+        with CaptureQueriesContext(connection) as sonra:
+            response = self.client.get(url)
+        self.assertEqual(len(sonra), len(once))
+        self.assertEqual([a.kalan_tl for a in response.context["avanslar"]], [Decimal('1000.00'), Decimal('50.00')])
+        self.assertEqual(len(response.context["faturalar"]), 15)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {"odeme_id": avans.id, "fatura_id": [f.id for f in faturalar[:3]]})
+
+        self.assertEqual(
+            list(OdemeDagitim.objects.order_by("fatura__tarih").values_list("fatura_id", "tutar")),
+            [(faturalar[0].id, Decimal('400.00')), (faturalar[1].id, Decimal('400.00')), (faturalar[2].id, Decimal('200.00'))],
+        )
+        faturalar[2].refresh_from_db()
+        self.assertEqual(faturalar[2].odenen_tutar, Decimal('200.00'))
+        self.assertEqual(TedarikciBakiye.objects.get(tedarikci=self.tedarikci).fatura_kalan, Decimal('1100.00'))
+
+    def test_odeme_yap_coklu_belge_toplu_kayit(self):
+        """Çoklu hakediş/fatura seçimli ödeme: belgeler toplu yüklenir, sorgu sayısı seçim sayısıyla artmaz"""
+        from datetime import date
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from core.models import OdemeDagitim
+
+        teklif = Teklif.objects.create(tedarikci=self.tedarikci, is_kalemi=self.is_kalemi, miktar=10,
+                                       birim_fiyat=1000, para_birimi='TRY', kur_degeri=1, kdv_orani=20, kdv_dahil_mi=False)
+        siparis = SatinAlma.objects.create(teklif=teklif, toplam_miktar=10)
+        hk1 = Hakedis.objects.create(satinalma=siparis, tamamlanma_orani=50, onay_durumu=True)  # net 6000
+        hk = Hakedis.objects.create(satinalma=siparis, hakedis_no=2, tamamlanma_orani=50, onay_durumu=True)
+        faturalar = [
+            Fatura.objects.create(tedarikci=self.tedarikci, fatura_no=f"OY-{i}", tarih=date(2024, 4, i),
+                                  genel_toplam=Decimal('100.00'))
+            for i in range(1, 9)
+        ]
+        url = reverse('odeme_yap')
+
+        def ode(tutar, secilenler):
+            with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+                self.client.post(url, {
+                    "tedarikci": self.tedarikci.id, "tarih": "2024-05-01", "odeme_turu": "havale",
+                    "tutar": tutar, "para_birimi": "TRY", "secilen_kalem": secilenler,
+                })
+            return len(ctx)
+
+        az = ode("6100", [f"Hakedis_{hk1.id}", f"Fatura_{faturalar[0].id}"])
+        cok = ode("6550", [f"Hakedis_{hk.id}"] + [f"Fatura_{f.id}" for f in faturalar[1:]])
+        self.assertEqual(cok, az)
+
+        hk.refresh_from_db()
+        self.assertEqual(hk.fiili_odenen_tutar, Decimal('6000.00'))
+        odeme = Odeme.objects.get(tutar=Decimal('6550.00'))
+        self.assertEqual((odeme.bagli_hakedis_id, odeme.fatura_id), (hk.id, faturalar[1].id))
+        self.assertEqual(
+            list(odeme.dagitimlar.order_by("fatura__tarih").values_list("tutar", flat=True)),
+            [Decimal('100.00')] * 5 + [Decimal('50.00')],
+        )
+        self.assertEqual(OdemeDagitim.objects.count(), 7)
+        bakiye = TedarikciBakiye.objects.get(tedarikci=self.tedarikci)
+        self.assertEqual((bakiye.hakedis_kalan, bakiye.fatura_kalan), (Decimal('0.00'), Decimal('150.00')))
+
+    def test_odeme_talimati_toplu_odeme_ve_banka_dosyasi(self):
+        """Ödeme talimatı: vadeye göre öneri, düzeltme, tek seferde işleme ve banka CSV/XML dosyası"""
+        from datetime import date
+        from core.models import OdemeDagitim, OdemeTalimati
+        from core.services.odeme_talimati import PaymentRunService
+
+        self.tedarikci.iban = "TR330006100519786457841326"
+        self.tedarikci.save()
+        ted_b = Tedarikci.objects.create(firma_unvani="B Yapı Ltd.", iban="TR460001000000000000012345", odeme_vadesi_gun=30)
+        ted_c = Tedarikci.objects.create(firma_unvani="C IBAN'sız")
+
+        teklif = Teklif.objects.create(tedarikci=self.tedarikci, is_kalemi=self.is_kalemi, miktar=10,
+                                       birim_fiyat=1000, para_birimi='TRY', kur_degeri=1, kdv_orani=20, kdv_dahil_mi=False)
+        siparis = SatinAlma.objects.create(teklif=teklif, toplam_miktar=10)
+        hk = Hakedis.objects.create(satinalma=siparis, tarih=date(2024, 4, 1), tamamlanma_orani=50, onay_durumu=True)  # net 6000
+        a1 = Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="OT-A1", tarih=date(2024, 5, 10), genel_toplam=Decimal('100.00'))
+        a2 = Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="OT-A2", tarih=date(2024, 6, 10), genel_toplam=Decimal('200.00'))
+        b1 = Fatura.objects.create(tedarikci=ted_b, fatura_no="OT-B1", tarih=date(2024, 4, 15), genel_toplam=Decimal('500.00'))
+        Fatura.objects.create(tedarikci=ted_b, fatura_no="OT-B2", tarih=date(2024, 5, 15), genel_toplam=Decimal('300.00'))  # vade 14.06
+        Fatura.objects.create(tedarikci=ted_c, fatura_no="OT-C1", tarih=date(2024, 5, 1), genel_toplam=Decimal('80.00'))
+
+        self.client.post(reverse('odeme_talimatlari'), {"kesim_tarihi": "2024-05-31", "tarih": "2024-05-31"})
+        talimat = OdemeTalimati.objects.get()
+        satir = {s.tedarikci_id: s for s in talimat.satirlar.all()}
+        self.assertEqual(
+            {t: s.onerilen_tutar for t, s in satir.items()},
+            {self.tedarikci.id: Decimal('6100.00'), ted_b.id: Decimal('500.00'), ted_c.id: Decimal('80.00')},
+        )
+        with self.assertRaises(ValidationError):
+            PaymentRunService.isle(talimat.id)  # C'nin IBAN'ı yok
+
+        url = reverse('odeme_talimati_detay', args=[talimat.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {
+                "action": "isle",
+                f"tutar_{satir[self.tedarikci.id].id}": "6.150,00",
+                f"tutar_{satir[ted_b.id].id}": "500,00",
+                f"tutar_{satir[ted_c.id].id}": "0",
+            })
+
+        talimat.refresh_from_db()
+        self.assertEqual(talimat.durum, "islendi")
+        self.assertEqual(Odeme.objects.count(), 2)
+        odeme_a = Odeme.objects.get(tedarikci=self.tedarikci)
+        self.assertEqual((odeme_a.tutar, odeme_a.odeme_turu, odeme_a.bagli_hakedis_id, odeme_a.fatura_id),
+                         (Decimal('6150.00'), "havale", hk.id, a1.id))
+        self.assertEqual(talimat.satirlar.get(tedarikci=self.tedarikci).odeme_id, odeme_a.id)
+        self.assertEqual(
+            set(OdemeDagitim.objects.values_list("fatura_id", "tutar")),
+            {(a1.id, Decimal('100.00')), (a2.id, Decimal('50.00')), (b1.id, Decimal('500.00'))},
+        )
+        hk.refresh_from_db()
+        self.assertEqual(hk.fiili_odenen_tutar, Decimal('6000.00'))
+        bakiye_a = TedarikciBakiye.objects.get(tedarikci=self.tedarikci)
+        self.assertEqual((bakiye_a.hakedis_kalan, bakiye_a.fatura_kalan), (Decimal('0.00'), Decimal('150.00')))
+        self.assertEqual(TedarikciBakiye.objects.get(tedarikci=ted_b).fatura_kalan, Decimal('300.00'))
+
+        csv_metin = b"".join(self.client.get(reverse('odeme_talimati_indir', args=[talimat.id, 'csv'])).streaming_content).decode("utf-8")
+        self.assertIn("TR330006100519786457841326;Test Tedarik A.Ş.;6150.00;TRY", csv_metin)
+        self.assertIn("TR460001000000000000012345", csv_metin)
+        self.assertNotIn("C IBAN", csv_metin)
+        xml = b"".join(self.client.get(reverse('odeme_talimati_indir', args=[talimat.id, 'xml'])).streaming_content).decode("utf-8")
+        self.assertIn("<NbOfTxs>2</NbOfTxs><CtrlSum>6650.00</CtrlSum>", xml)
+        self.assertEqual(xml.count("<CdtTrfTxInf>"), 2)
+
+    def test_fatura_odenen_commit_sonrasi_tek_guncelleme(self):
+        """Fatura.odenen_tutar: işlem içinde kirli işaretlenir, commit sonrası tek UPDATE ile kanonik tanıma göre yazılır"""
+        from datetime import date
+        from django.db import connection, transaction
+        from django.test.utils import CaptureQueriesContext
+        from core.models import OdemeDagitim
+
+        f1 = Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="KF-1", tarih=date(2024, 7, 1), genel_toplam=Decimal('1000.00'))
+        f2 = Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="KF-2", tarih=date(2024, 7, 2), genel_toplam=Decimal('800.00'))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                Odeme.objects.create(tedarikci=self.tedarikci, fatura=f2, tutar=Decimal('50.00'), para_birimi='TRY')
+                od = Odeme.objects.create(tedarikci=self.tedarikci, tutar=Decimal('900.00'), para_birimi='TRY')
+                for i, tutar in enumerate(('100.00', '200.00', '300.00'), start=1):
+                    OdemeDagitim.objects.create(odeme=od, fatura=f1, tutar=Decimal(tutar), tarih=date(2024, 7, i))
+                OdemeDagitim.objects.create(odeme=od, fatura=f2, tutar=Decimal('150.00'), tarih=date(2024, 7, 1))
+        f1.refresh_from_db()
+        self.assertEqual(f1.odenen_tutar, Decimal('0.00'))  # henüz commit edilmedi
+
+        with CaptureQueriesContext(connection) as ctx:
+            for callback in callbacks:
+                callback()
+        self.assertEqual(sum(1 for q in ctx.captured_queries if q["sql"].startswith('UPDATE "core_fatura"')), 1)
+        f1.refresh_from_db()
+        f2.refresh_from_db()
+        # f2: eski tip doğrudan ödeme (dağıtımı yok) + dağıtım
+        self.assertEqual((f1.odenen_tutar, f2.odenen_tutar), (Decimal('600.00'), Decimal('200.00')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            od.delete()  # dağıtımlar cascade ile silinir
+        f1.refresh_from_db()
+        f2.refresh_from_db()
+        self.assertEqual((f1.odenen_tutar, f2.odenen_tutar), (Decimal('0.00'), Decimal('50.00')))
+
+    def test_banka_ekstresi_ice_aktarma_ve_eslestirme(self):
+        """Banka ekstresi: CSV/MT940 akışlı okuma, referans ve tutar+tarih penceresiyle tek geçişte eşleştirme"""
+        import io
+        from datetime import date
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from core.models import BankaEkstresi
+        from core.services.banka_ekstresi import BankStatementService
+
+        def odeme(tutar, tarih, tur='havale', **kw):
+            return Odeme.objects.create(tedarikci=self.tedarikci, tutar=Decimal(tutar), para_birimi='TRY',
+                                        tarih=tarih, odeme_turu=tur, **kw)
+
+        o1 = odeme('1250.50', date(2024, 8, 1), cek_no="DK-123456")
+        o2 = odeme('1250.50', date(2024, 8, 2))
+        o3 = odeme('3000.00', date(2024, 7, 1), tur='cek', vade_tarihi=date(2024, 8, 10))
+        odeme('100.00', date(2024, 8, 1), tur='nakit')
+
+        csv_metin = (
+            "Tarih;Açıklama;Referans;Tutar\n"
+            "02.08.2024;EFT ödeme DK123456;;-1.250,50\n"
+            "02.08.2024;EFT;;-1.250,50\n"
+            "11.08.2024;Çek tahsil;;-3.000,00\n"
+            "01.08.2024;Nakit?;;-100,00\n"
+            "05.08.2024;Gelen havale;;2.000,00\n"
+        )
+        self.client.post(reverse('banka_ekstreleri'), {
+            "dosya": SimpleUploadedFile("ekstre.csv", csv_metin.encode("utf-8")), "banka_adi": "",
+        })
+        ekstre = BankaEkstresi.objects.get()
+        self.assertEqual((ekstre.bicim, ekstre.satir_sayisi, ekstre.eslesen_sayisi), ("csv", 5, 3))
+        self.assertEqual(
+            list(ekstre.hareketler.order_by("id").values_list("yon", "tutar", "odeme_id")),
+            [("borc", Decimal('1250.50'), o1.id), ("borc", Decimal('1250.50'), o2.id), ("borc", Decimal('3000.00'), o3.id),
+             ("borc", Decimal('100.00'), None), ("alacak", Decimal('2000.00'), None)],
+        )
+        response = self.client.get(reverse('banka_ekstresi_detay', args=[ekstre.id]))
+        self.assertEqual(len(response.context["hareketler"]), 2)  # inceleme bekleyenler
+
+        # MT940: :61: + çok satırlı :86:, ödeme sonradan girilince yeniden eşleştirme
+        mt940 = (
+            ":20:STMT\n:25:TR330006100519786457841326\n:28C:1/1\n:60F:C240819TRY10000,00\n"
+            ":61:2408200820D750,25NTRFNONREF//B123\n:86:Tedarikci odemesi\n devam\n"
+            ":61:2408210821C50,00NTRFREF1\n:86:Faiz\n:62F:C240821TRY9299,75\n-\n"
+        )
+        ekstre2 = BankStatementService.ice_aktar(io.BytesIO(mt940.encode("utf-8")), "hesap.sta")
+        self.assertEqual((ekstre2.bicim, ekstre2.satir_sayisi, ekstre2.eslesen_sayisi), ("mt940", 2, 0))
+        self.assertEqual(ekstre2.hareketler.first().aciklama, "Tedarikci odemesi devam")
+        o5 = odeme('750.25', date(2024, 8, 19))
+        self.assertEqual(BankStatementService.yeniden_eslestir(ekstre2), 1)
+        self.assertEqual(ekstre2.hareketler.get(yon="borc").odeme_id, o5.id)
+
+        # Sorgu sayısı satır sayısından bağımsız
+        def aktar(adet):
+            metin = "Tarih;Tutar\n" + "".join(f"01.09.2024;{i},00\n" for i in range(1, adet + 1))
+            with CaptureQueriesContext(connection) as ctx:
+                BankStatementService.ice_aktar(io.BytesIO(metin.encode("utf-8")), "x.csv")
+            return len(ctx)
+        self.assertEqual(aktar(100), aktar(3))
+
+    def test_finans_kpi_gunluk_ozet_ve_trend(self):
+        """KPI özeti: günlük satır (tekrar çalışınca güncellenir), trend tek aralık sorgusu, geçmiş gün sorgusu"""
+        from datetime import timedelta
+        from io import StringIO
+        from unittest import mock
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        from core.models import FinansKpiOzeti
+        from core.services.kpi_ozeti import KpiSnapshotService
+
+        bugun = timezone.localdate()
+        kategori = GiderKategorisi.objects.create(isim="Enerji")
+        Harcama.objects.create(kategori=kategori, aciklama="Elektrik", tutar=Decimal('10.00'),
+                               para_birimi='USD', kur_degeri=Decimal('30.0000'), tarih=bugun)
+        Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="KPI-1", tarih=bugun, genel_toplam=Decimal('1000.00'))
+        Odeme.objects.create(tedarikci=self.tedarikci, tutar=Decimal('400.00'), para_birimi='TRY', odeme_turu='cek',
+                             vade_tarihi=bugun + timedelta(days=10))
+
+        # Dünün özeti dün alınmış gibi
+        with mock.patch('core.services.kpi_ozeti.timezone.localdate', return_value=bugun - timedelta(days=1)):
+            KpiSnapshotService.kaydet()
+        dunku = FinansKpiOzeti.objects.get(tarih=bugun - timedelta(days=1))
+
+        # Geçmiş güne bugünün rakamları yazılamaz (gerçek geçmiş satır ezilmez)
+        with self.assertRaises(ValidationError):
+            KpiSnapshotService.kaydet(bugun - timedelta(days=1))
+        with self.assertRaises(CommandError):
+            call_command("kpi_ozeti_al", "--tarih", (bugun - timedelta(days=1)).isoformat(), stdout=StringIO())
+        self.assertEqual(FinansKpiOzeti.objects.get(pk=dunku.pk).acik_fatura, dunku.acik_fatura)
+
+        Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="KPI-2", tarih=bugun, genel_toplam=Decimal('500.00'))
+        call_command("kpi_ozeti_al", stdout=StringIO())
+        call_command("kpi_ozeti_al", stdout=StringIO())  # aynı gün ikinci çalışma satır eklemez
+
+        self.assertEqual(FinansKpiOzeti.objects.count(), 2)
+        ozet = FinansKpiOzeti.objects.get(tarih=bugun)
+        self.assertEqual(
+            (ozet.yatirim_maliyeti, ozet.acik_fatura, ozet.piyasa_borc, ozet.cek_riski, ozet.yaklasan_cek),
+            (Decimal('1800.00'), Decimal('1500.00'), Decimal('1100.00'), Decimal('400.00'), Decimal('400.00')),
+        )
+        self.assertEqual(ozet.gider_kategorileri, {"Enerji": "300.00"})
+
+        with self.assertNumQueries(1):
+            seri = KpiSnapshotService.seri(bugun - timedelta(days=90), bugun, ["acik_fatura"])
+        self.assertEqual(seri["acik_fatura"], [Decimal('1000.00'), Decimal('1500.00')])
+
+        response = self.client.get(reverse('api_kpi_trend'), {"alan": "piyasa_borc"})
+        self.assertEqual(response.json()["piyasa_borc"], [600.0, 1100.0])
+        response = self.client.get(reverse('api_kpi_trend'), {"tarih": (bugun - timedelta(days=1)).isoformat()})
+        self.assertEqual(response.json()["acik_fatura"], 1000.0)
+        self.assertEqual(self.client.get(reverse('api_kpi_trend'), {"tarih": "2000-01-01"}).status_code, 404)
+
+    def test_donem_kapanisi_kilit_ve_ozetten_acilis(self):
+        """Dönem kapanışı: kapalı aya yazım kilitli; ekstre / maliyet / stok kapalı dönemi özetten okur, sonuç aynı kalır"""
+        from datetime import date
+        from django.db import transaction
+        from core.models import DonemCariOzeti, DonemStokOzeti
+        from core.services.cari_ekstre import StatementService
+        from core.services.donem_kapanisi import PeriodCloseService
+        from core.services.kpi_ozeti import yatirim_maliyeti
+
+        kategori = GiderKategorisi.objects.create(isim="Kira")
+        Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="DK-1", tarih=date(2024, 1, 10), genel_toplam=Decimal('1000.00'))
+        odeme = Odeme.objects.create(tedarikci=self.tedarikci, tarih=date(2024, 1, 20), tutar=Decimal('400.00'), odeme_turu='nakit')
+        Harcama.objects.create(kategori=kategori, aciklama="Ocak kirası", tutar=Decimal('250.00'), tarih=date(2024, 1, 5))
+        DepoHareket.objects.create(malzeme=self.malzeme, depo=self.depo, islem_turu='giris', miktar=Decimal('50'), tarih=date(2024, 1, 3))
+        Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="DK-2", tarih=date(2024, 2, 5), genel_toplam=Decimal('200.00'))
+        DepoHareket.objects.create(malzeme=self.malzeme, depo=self.depo, islem_turu='cikis', miktar=Decimal('10'), tarih=date(2024, 2, 6))
+
+        ekstre_once = StatementService.cari_ekstre(self.tedarikci.id, date(2024, 2, 1))
+        maliyet_once = yatirim_maliyeti()
+
+        donem = PeriodCloseService.kapat(date(2024, 1, 15), kullanici=self.user)
+        self.assertEqual((donem.baslangic, donem.bitis), (None, date(2024, 1, 31)))
+        cari = DonemCariOzeti.objects.get(donem=donem, tedarikci=self.tedarikci)
+        self.assertEqual((cari.fatura_toplam, cari.odeme_toplam), (Decimal('1000.00'), Decimal('400.00')))
+        self.assertEqual(DonemStokOzeti.objects.get(donem=donem, malzeme=self.malzeme).giris, Decimal('50.00'))
+
+        # Kilit: kapalı aya yeni kayıt, tutar değişikliği, silme yok; özete girmeyen alan serbest
+        with self.assertRaises(ValidationError):
+            Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="DK-3", tarih=date(2024, 1, 25), genel_toplam=Decimal('5.00'))
+        odeme.tutar = Decimal('450.00')
+        with self.assertRaises(ValidationError):
+            odeme.save()
+        with self.assertRaises(ValidationError), transaction.atomic():
+            Odeme.objects.get(pk=odeme.pk).delete()
+        odeme = Odeme.objects.get(pk=odeme.pk)
+        odeme.aciklama = "Kasa"
+        odeme.save()
+        with self.assertRaises(ValidationError):
+            PeriodCloseService.kapat(date(2024, 1, 1))
+        with self.assertRaises(ValidationError):
+            PeriodCloseService.kapat(timezone.localdate())
+
+        # Açılış bakiyesi dönem özetinden: tek sorgu, aynı sonuç
+        with self.assertNumQueries(1):
+            ekstre = StatementService.cari_ekstre(self.tedarikci.id, date(2024, 2, 1))
+        self.assertEqual(
+            (ekstre.acilis_bakiye, ekstre.son_bakiye, len(ekstre.satirlar)),
+            (ekstre_once.acilis_bakiye, ekstre_once.son_bakiye, len(ekstre_once.satirlar)),
+        )
+        self.assertEqual(ekstre.acilis_bakiye, Decimal('600.00'))
+        self.assertEqual(yatirim_maliyeti(), maliyet_once)
+        self.assertEqual(
+            PeriodCloseService.stok_bakiyeleri(depo__is_kullanim_yeri=False)[(self.malzeme.id, self.depo.id)],
+            Decimal('40.00'),
+        )
+
+        # Ekran + geri açma
+        response = self.client.post(reverse('donem_kapanisi'), {"action": "geri_ac"})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(DonemCariOzeti.objects.exists())
+        Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="DK-3", tarih=date(2024, 1, 25), genel_toplam=Decimal('5.00'))
+
+    def test_fatura_doviz_bilgisi_kolonlarda(self):
+        """Fatura döviz bilgisi oluşturulurken tekliften kopyalanır; kur okuması sorgusuz, backfill migration aynı sonucu yazar"""
+        import importlib
+        from django.apps import apps
+        from core.views.finans_payments import get_smart_exchange_rate
+
+        teklif = Teklif.objects.create(tedarikci=self.tedarikci, malzeme=self.malzeme, miktar=10, birim_fiyat=100,
+                                       para_birimi='USD', kur_degeri=Decimal('30.0000'), locked_rate=Decimal('32.500000'))
+        siparis = SatinAlma.objects.create(teklif=teklif, toplam_miktar=10)
+        fatura = Fatura.objects.create(tedarikci=self.tedarikci, satinalma=siparis, fatura_no="USD-1")
+        FaturaKalem.objects.create(fatura=fatura, malzeme=self.malzeme, miktar=10, fiyat=Decimal('325.00'), kdv_oran=0)
+
+        fatura = Fatura.objects.get(pk=fatura.pk)
+        self.assertEqual((fatura.para_birimi, fatura.kur_degeri), ('USD', Decimal('32.500000')))
+        self.assertEqual((fatura.genel_toplam, fatura.orj_genel_toplam), (Decimal('3250.00'), Decimal('100.00')))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_smart_exchange_rate(fatura, {}), ('USD', Decimal('32.500000')))
+
+        serbest = Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="TL-1", genel_toplam=Decimal('50.00'))
+        self.assertEqual((serbest.para_birimi, serbest.orj_genel_toplam), ('TRY', Decimal('50.00')))
+
+        # Backfill: kolonlar sıfırlanıp migration fonksiyonu çalışınca aynı değerler
+        Fatura.objects.update(para_birimi='TRY', kur_degeri=1, orj_genel_toplam=0)
+        migration = importlib.import_module('core.migrations.0013_fatura_doviz_bilgisi')
+        migration.doviz_bilgisini_doldur(apps, None)
+        self.assertEqual(
+            list(Fatura.objects.order_by('id').values_list('para_birimi', 'kur_degeri', 'orj_genel_toplam')),
+            [('USD', Decimal('32.500000'), Decimal('100.00')), ('TRY', Decimal('1.000000'), Decimal('50.00'))],
+        )
+
+    def test_serbest_fatura_kalemleri_toplu_yazilir(self):
+        """Serbest fatura: kalem + stok hareketi toplu yazılır, başlık bir kez hesaplanır; sorgu sayısı kalem sayısından bağımsız"""
+        from django.db import connection
+        from django.db.models import Sum
+        from django.test.utils import CaptureQueriesContext
+        from core.forms import FaturaKalemFormSet
+        from core.services.finans_invoices import InvoiceService
+
+        def kaydet(fatura_no, adet):
+            veri = {"kalemler-TOTAL_FORMS": str(adet), "kalemler-INITIAL_FORMS": "0"}
+            for i in range(adet):
+                veri.update({
+                    f"kalemler-{i}-malzeme": str(self.malzeme.id), f"kalemler-{i}-miktar": "2",
+                    f"kalemler-{i}-fiyat": "118.00", f"kalemler-{i}-kdv_oran": "20",
+                    f"kalemler-{i}-kdv_dahil_mi": "on", f"kalemler-{i}-aciklama": f"Satır {i}",
+                })
+            formset = FaturaKalemFormSet(veri)
+            self.assertTrue(formset.is_valid(), formset.errors)
+            fatura = Fatura(tedarikci=self.tedarikci, fatura_no=fatura_no, tarih=timezone.localdate())
+            with CaptureQueriesContext(connection) as ctx:
+                InvoiceService.fatura_kaydet_manuel(fatura, formset, depo_id=self.depo.id)
+            return fatura, len(ctx.captured_queries)
+
+        kaydet("TOPLU-1", 1)  # tedarikçi defter satırı vb. ilk kayıt maliyeti
+        az, az_sorgu = kaydet("TOPLU-3", 3)
+        cok, cok_sorgu = kaydet("TOPLU-30", 30)
+        self.assertEqual(az_sorgu, cok_sorgu)
+
+        cok.refresh_from_db()
+        self.assertEqual((cok.ara_toplam, cok.kdv_toplam, cok.genel_toplam), (Decimal('5900.10'), Decimal('1179.90'), Decimal('7080.00')))
+        self.assertEqual(cok.kalemler.count(), 30)
+        hareketler = DepoHareket.objects.filter(ref_type="FATURA_KALEM", ref_id__in=cok.kalemler.values("id"), depo=self.depo)
+        self.assertEqual(hareketler.aggregate(t=Sum("miktar"))["t"], Decimal('60.00'))
+        self.assertEqual(TedarikciBakiye.objects.get(tedarikci=self.tedarikci).fatura_toplam, Decimal('8024.00'))  # 1 + 3 + 30 satır
+
+    def test_efatura_xml_zip_aktarimi(self):
+        """e-Fatura: zip içindeki UBL faturaları tedarikçi/malzeme eşleşmesiyle yazılır; tekrar yükleme mükerrer sayılır"""
+        import io
+        import zipfile
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from core.services.efatura import EInvoiceImportService
+
+        def ubl(no, vkn, unvan, satirlar):
+            kalemler = "".join(
+                f"""<cac:InvoiceLine><cbc:ID>{i}</cbc:ID>
+                    <cbc:InvoicedQuantity unitCode="KGM">{miktar}</cbc:InvoicedQuantity>
+                    <cbc:LineExtensionAmount currencyID="TRY">{tutar}</cbc:LineExtensionAmount>
+                    <cac:TaxTotal><cac:TaxSubtotal><cbc:Percent>20</cbc:Percent>
+                        <cac:TaxCategory><cac:TaxScheme><cbc:TaxTypeCode>0015</cbc:TaxTypeCode></cac:TaxScheme></cac:TaxCategory>
+                    </cac:TaxSubtotal></cac:TaxTotal>
+                    <cac:Item><cbc:Name>{ad}</cbc:Name></cac:Item>
+                    <cac:Price><cbc:PriceAmount currencyID="TRY">{fiyat}</cbc:PriceAmount></cac:Price>
+                </cac:InvoiceLine>"""
+                for i, (ad, miktar, fiyat, tutar) in enumerate(satirlar, 1)
+            )
+            return f"""<?xml version="1.0" encoding="UTF-8"?>
+            <Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2"
+                     xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"
+                     xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">
+                <cbc:ID>{no}</cbc:ID><cbc:IssueDate>{timezone.localdate().isoformat()}</cbc:IssueDate>
+                <cbc:InvoiceTypeCode>SATIS</cbc:InvoiceTypeCode><cbc:DocumentCurrencyCode>TRY</cbc:DocumentCurrencyCode>
+                <cac:AccountingSupplierParty><cac:Party>
+                    <cac:PartyIdentification><cbc:ID schemeID="VKN">{vkn}</cbc:ID></cac:PartyIdentification>
+                    <cac:PartyName><cbc:Name>{unvan}</cbc:Name></cac:PartyName>
+                </cac:Party></cac:AccountingSupplierParty>
+                <cac:AccountingCustomerParty><cac:Party>
+                    <cac:PartyIdentification><cbc:ID schemeID="VKN">9999999999</cbc:ID></cac:PartyIdentification>
+                    <cac:PartyName><cbc:Name>Alıcı Fabrika</cbc:Name></cac:PartyName>
+                </cac:Party></cac:AccountingCustomerParty>
+                {kalemler}
+            </Invoice>""".encode("utf-8")
+
+        paket = io.BytesIO()
+        with zipfile.ZipFile(paket, "w") as z:
+            # Mevcut tedarikçi ünvanla bulunur (VKN'si yazılır); malzeme adı büyük/küçük harf farkıyla eşleşir
+            z.writestr("a.xml", ubl("EFA2026000000001", "1234567890", "TEST TEDARİK A.Ş.", [
+                ("test demir", "10", "50.00", "500.00"),
+                ("Yeni Profil", "4", "25.00", "90.00"),  # iskontolu satır: birim fiyat matrahtan
+            ]))
+            z.writestr("b.xml", ubl("EFB2026000000001", "1111111111", "Yeni Çimento Ltd.", [
+                ("Çimento", "2", "100.00", "200.00"),
+            ]))
+        icerik = paket.getvalue()
+
+        rapor = EInvoiceImportService.ice_aktar(SimpleUploadedFile("paket.zip", icerik), depo=self.depo)
+        self.assertEqual((rapor.eklenen, rapor.kalem, rapor.mukerrer, rapor.hatali), (2, 3, 0, 0), rapor.mesajlar)
+        self.assertEqual((rapor.yeni_tedarikci, rapor.yeni_malzeme), (1, 2))
+
+        self.tedarikci.refresh_from_db()
+        self.assertEqual(self.tedarikci.vergi_no, "1234567890")
+        fatura = Fatura.objects.get(tedarikci=self.tedarikci, fatura_no="EFA2026000000001")
+        self.assertEqual((fatura.ara_toplam, fatura.kdv_toplam, fatura.genel_toplam), (Decimal('590.00'), Decimal('118.00'), Decimal('708.00')))
+        self.assertEqual(fatura.kalemler.get(malzeme=self.malzeme).miktar, Decimal('10.000'))
+        self.assertEqual(
+            DepoHareket.objects.filter(ref_type="FATURA_KALEM", ref_id__in=fatura.kalemler.values("id"), depo=self.depo).count(), 2
+        )
+        self.assertEqual(TedarikciBakiye.objects.get(tedarikci=self.tedarikci).fatura_toplam, Decimal('708.00'))  # defter parti sonunda
+        self.assertEqual(Malzeme.objects.get(isim="Yeni Profil").birim, "kg")
+        self.assertTrue(Fatura.objects.filter(tedarikci__vergi_no="1111111111", genel_toplam=Decimal('240.00')).exists())
+
+        # Aynı paket tekrar: kısıt mükerreri yakalar, hiçbir şey iki kez yazılmaz
+        tekrar = EInvoiceImportService.ice_aktar(SimpleUploadedFile("paket.zip", icerik), depo=self.depo)
+        self.assertEqual((tekrar.eklenen, tekrar.mukerrer), (0, 2))
+        self.assertEqual(Fatura.objects.filter(aciklama__startswith="e-Fatura").count(), 2)
+
+        # Ekran: tek XML yüklenir
+        yanit = self.client.post(reverse("efatura_yukle"), {
+            "dosya": SimpleUploadedFile("c.xml", ubl("EFC2026000000001", "1234567890", "Farklı Ünvan", [("Test Demir", "1", "10", "10")])),
+            "tedarikci_ac": "1",
+        })
+        self.assertEqual(yanit.status_code, 200)
+        self.assertEqual(yanit.context["rapor"].eklenen, 1)
+        self.assertTrue(Fatura.objects.filter(tedarikci=self.tedarikci, fatura_no="EFC2026000000001").exists())
+
+    def test_maliyet_kirli_aylari_transaction_basina(self):
+        """Geri alınan transaction'ın kirli ayı sonraki commit'e sızmaz; commit sadece kendi aylarını yeniler"""
+        import threading
+        from datetime import date
+        from unittest import mock
+        from django.db import connection, transaction
+        from core.services import revaluation
+
+        def calis():
+            # TestCase transaction'ı dışında gerçek commit / rollback için ayrı thread (ayrı bağlantı)
+            try:
+                try:
+                    with transaction.atomic():
+                        revaluation.ay_kirlendi(date(2026, 1, 15))
+                        raise RuntimeError("geri al")
+                except RuntimeError:
+                    pass
+                with transaction.atomic():
+                    revaluation.ay_kirlendi(date(2026, 2, 3), date(2026, 2, 20))
+            finally:
+                connection.close()
+
+        with mock.patch.object(revaluation.RevaluationService, "ozet_yenile") as yenile:
+            t = threading.Thread(target=calis)
+            t.start()
+            t.join()
+        yenile.assert_called_once_with([date(2026, 2, 1)])
+
+    def test_fatura_odenen_kirli_kumesi_ic_ice_transactionlar(self):
+        """Üst üste binen iki transaction: önce commit olan, diğerinin henüz commit olmamış faturalarını yenilemez"""
+        import threading
+        from unittest import mock
+        from django.db import connection, transaction
+        from core.services import payables
+
+        b_isaretledi, a_bitti = threading.Event(), threading.Event()
+
+        def islem_b():
+            try:
+                with transaction.atomic():
+                    payables.fatura_kirlendi(202)
+                    b_isaretledi.set()
+                    a_bitti.wait(5)  # A commit olurken B hâlâ açık
+            finally:
+                connection.close()
+
+        def islem_a():
+            try:
+                b_isaretledi.wait(5)
+                with transaction.atomic():
+                    payables.fatura_kirlendi(101, 102)
+            finally:
+                a_bitti.set()
+                connection.close()
+
+        with mock.patch.object(payables, "odenen_tutar_yenile", return_value=0) as yenile:
+            esler = [threading.Thread(target=islem_b), threading.Thread(target=islem_a)]
+            for t in esler:
+                t.start()
+            for t in esler:
+                t.join()
+        self.assertEqual([c.args[0] for c in yenile.call_args_list], [[101, 102], [202]])
+
+    def test_taslak_odeme_talimati_dosyasi_indirilemez(self):
+        """Taslak talimatın banka dosyası (CSV / XML) indirilemez, butonlar görünmez; işlenince açılır"""
+        from core.models import OdemeTalimati
+
+        talimat = OdemeTalimati.objects.create(tarih=timezone.localdate(), kesim_tarihi=timezone.localdate())
+        detay = reverse('odeme_talimati_detay', args=[talimat.id])
+        for bicim in ("csv", "xml"):
+            response = self.client.get(reverse('odeme_talimati_indir', args=[talimat.id, bicim]))
+            self.assertRedirects(response, detay, fetch_redirect_response=False)
+        self.assertNotContains(self.client.get(detay), reverse('odeme_talimati_indir', args=[talimat.id, 'csv']))
+
+        OdemeTalimati.objects.filter(pk=talimat.pk).update(durum="islendi")
+        response = self.client.get(reverse('odeme_talimati_indir', args=[talimat.id, 'csv']))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(self.client.get(detay), reverse('odeme_talimati_indir', args=[talimat.id, 'csv']))
+
+    def test_kurlari_tamamla_hafta_sonunu_atlar(self):
+        """Hafta sonu tarihli işlemler için TCMB'ye gidilmez (o gün kur yayımlanmaz)"""
+        import io
+        from datetime import date
+        from unittest import mock
+        from django.core.management import call_command
+        from core.management.commands import maliyet_ozeti_olustur
+
+        Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="HS-1", tarih=date(2024, 1, 6), genel_toplam=Decimal('100.00'))
+        Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="HS-2", tarih=date(2024, 1, 8), genel_toplam=Decimal('100.00'))
+
+        with mock.patch.object(maliyet_ozeti_olustur, 'get_rates_bulk', return_value={}) as kur:
+            call_command('maliyet_ozeti_olustur', '--kurlari-tamamla', stdout=io.StringIO())
+        tarihler = kur.call_args[0][1]
+        self.assertIn(date(2024, 1, 8), tarihler)
+        self.assertNotIn(date(2024, 1, 6), tarihler)
+
+    def test_cari_bakiye_yenileme_son_hesaplama_zamani(self):
+        """Defter yenilenince 'Son Hesaplama' zamanı da güncellenir (bulk_update auto_now çalıştırmaz)"""
+        from datetime import timedelta
+        from core.services.cari_bakiye import BalanceService
+
+        BalanceService.tedarikci_yenile(self.tedarikci.id)
+        eski = timezone.now() - timedelta(days=3)
+        TedarikciBakiye.objects.filter(tedarikci=self.tedarikci).update(guncellendi=eski)
+
+        BalanceService.tedarikci_yenile(self.tedarikci.id)
+        self.assertGreater(TedarikciBakiye.objects.get(tedarikci=self.tedarikci).guncellendi, eski)
+
     # --- 4. ENTEGRASYON VE ARAYÜZ ERİŞİM TESTLERİ ---
 
     def test_sayfa_yükleme_ve_erisim(self):
@@ -161,4 +1088,192 @@ class FabrikaSistemTesti(TestCase):
         )
         self.assertEqual(odeme.odeme_turu, 'cek')
         # Yeni ödeme çek ise varsayılan olarak tahsil edilmemiş olmalı
-        self.assertFalse(odeme.is_cek_odendi)
\ No newline at end of file
+        self.assertFalse(odeme.is_cek_odendi)
+
+    # --- 5. KUR API ---
+
+    def test_kur_api_toplu_gecmis_tarih_cache(self):
+        """Toplu kur isteği yerel depodan cevaplanır; geçmiş tarihler ETag + uzun cache alır"""
+        from datetime import date
+        for pb, kur in [('USD', '30.1000'), ('EUR', '33.2000')]:
+            DovizKuru.objects.create(para_birimi=pb, tarih=date(2024, 1, 2), kur=Decimal(kur), kaynak='TCMB 2024-01-02')
+            DovizKuru.objects.create(para_birimi=pb, tarih=date(2024, 1, 3), kur=Decimal(kur) + 1, kaynak='TCMB 2024-01-03')
+
+        url = reverse('kur_getir') + '?pb=USD,EUR&date=2024-01-02&date=2024-01-03'
+        response = self.client.get(url)
+        data = response.json()
+
+        self.assertTrue(data['ok'])
+        self.assertEqual(data['rates']['2024-01-02']['USD'], '30.1000')
+        self.assertEqual(data['rates']['2024-01-03']['EUR'], '34.2000')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertTrue(response.has_header('ETag'))
+
+        # Aynı ETag ile tekrar soran tarayıcıya 304 dönülür
+        response2 = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response2.status_code, 304)
+
+    def test_tcmb_devre_kesici_son_bilinen_kur(self):
+        """Art arda hatalardan sonra devre açılır; ağa çıkılmadan son bilinen iyi kur döner"""
+        from unittest import mock
+        from django.core.cache import cache
+        from core.services import tcmb_client
+        from core.utils import tcmb_kur_getir
+
+        cache.clear()
+        xml = (b'<Tarih_Date><Currency Kod="USD" CurrencyCode="USD">'
+               b'<ForexSelling>32.5000</ForexSelling><BanknoteSelling>32.6000</BanknoteSelling>'
+               b'</Currency></Tarih_Date>')
+
+        with override_settings(RATE_PROVIDER="tcmb", TCMB_CB_FAILURE_THRESHOLD=2, TCMB_CB_COOLDOWN=60, TCMB_TODAY_CACHE_TTL=0):
+            with mock.patch.object(tcmb_client, '_download', return_value=xml):
+                self.assertEqual(tcmb_kur_getir()['USD'], Decimal('32.6000'))
+
+            with mock.patch.object(tcmb_client, '_download', side_effect=TimeoutError('yavaş')) as dl:
+                tcmb_kur_getir()
+                tcmb_kur_getir()
+                self.assertEqual(tcmb_client.metrics()['state'], 'open')
+
+                # Devre açıkken TCMB'ye hiç gidilmez, son bilinen iyi kur kullanılır
+                kurlar = tcmb_kur_getir()
+                self.assertEqual(dl.call_count, 2)
+                self.assertEqual(kurlar['USD'], Decimal('32.6000'))
+                self.assertEqual(tcmb_client.metrics()['short_circuits'], 1)
+        cache.clear()
+
+    def test_tcmb_404_devreyi_acmaz(self):
+        """Hafta sonu/tatil 404'ü hata değildir: art arda gelse de devre kapalı kalır, sonuç 'veri yok' olur"""
+        import io
+        import urllib.error
+        from unittest import mock
+        from django.core.cache import cache
+        from core.services import tcmb_client
+
+        cache.clear()
+        url = 'https://www.tcmb.gov.tr/kurlar/202401/06012024.xml'
+
+        def yok(u, budget):
+            raise urllib.error.HTTPError(u, 404, 'Not Found', {}, io.BytesIO(b''))
+
+        with override_settings(TCMB_CB_FAILURE_THRESHOLD=2, TCMB_CB_COOLDOWN=60):
+            with mock.patch.object(tcmb_client, '_download', side_effect=yok) as dl:
+                for i in range(3):
+                    res = tcmb_client.fetch(url.replace('06', f'0{6 + i}', 1))
+                    self.assertTrue(res.not_found)
+                self.assertFalse(tcmb_client.is_open())
+                self.assertEqual(tcmb_client.metrics()['failures'], 0)
+                self.assertEqual(tcmb_client.metrics()['not_found'], 3)
+
+                # Aynı URL tekrar sorulursa 404 hatırlanır, ağa çıkılmaz
+                self.assertTrue(tcmb_client.fetch(url).not_found)
+                self.assertEqual(dl.call_count, 3)
+
+            # 5xx ise devreyi besler
+            def bozuk(u, budget):
+                raise urllib.error.HTTPError(u, 503, 'Service Unavailable', {}, io.BytesIO(b''))
+
+            with mock.patch.object(tcmb_client, '_download', side_effect=bozuk):
+                for _ in range(2):
+                    with self.assertRaises(tcmb_client.TCMBUnavailable):
+                        tcmb_client.fetch(url + '?x')
+                self.assertTrue(tcmb_client.is_open())
+        cache.clear()
+
+    def test_tcmb_gecikme_butcesi_toplam_sure(self):
+        """Damla damla veri gönderen sunucu bütçeyi uzatamaz: her okuma kısa sürse de toplam süre sınırlıdır"""
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from django.core.cache import cache
+        from core.services import tcmb_client
+
+        class Yavas(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header('Content-Length', '100')
+                self.end_headers()
+                try:
+                    for _ in range(100):  # ~5 sn; her bayt soket zaman aşımından çok önce gelir
+                        self.wfile.write(b'x')
+                        self.wfile.flush()
+                        time.sleep(0.05)
+                except OSError:
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        sunucu = ThreadingHTTPServer(('127.0.0.1', 0), Yavas)
+        sunucu.daemon_threads = True
+        threading.Thread(target=sunucu.serve_forever, daemon=True).start()
+        cache.clear()
+        try:
+            with override_settings(TCMB_TIMEOUT=0.5, TCMB_CB_FAILURE_THRESHOLD=3):
+                t0 = time.monotonic()
+                with self.assertRaises(tcmb_client.TCMBUnavailable):
+                    tcmb_client.fetch(f'http://127.0.0.1:{sunucu.server_port}/today.xml')
+                self.assertLess(time.monotonic() - t0, 1.5)
+                self.assertEqual(tcmb_client.metrics()['failures'], 1)
+        finally:
+            sunucu.shutdown()
+            sunucu.server_close()
+            cache.clear()
+
+    def test_kur_saglayici_xml_dizini_ve_sabit_tablo(self):
+        """Sağlayıcı ayardan seçilir: XML dizini yerel depoya yazılır, sabit tablo yazılmaz"""
+        import tempfile
+        from datetime import date
+        from pathlib import Path
+        from core.services.exchange_rates import get_try_per_currency
+        from core.services.rate_providers import build_tcmb_xml, xml_relative_path
+
+        with tempfile.TemporaryDirectory() as dizin:
+            dt = date(2024, 3, 4)
+            yol = Path(dizin) / xml_relative_path(dt)
+            yol.parent.mkdir(parents=True)
+            yol.write_bytes(build_tcmb_xml(dt, {'USD': Decimal('31.9000'), 'EUR': Decimal('34.6000')}))
+
+            with override_settings(RATE_PROVIDER="xml_dizin", RATE_XML_DIR=dizin):
+                res = get_try_per_currency('EUR', dt)
+            self.assertTrue(res.ok)
+            self.assertEqual(res.rate, Decimal('34.6000'))
+            self.assertEqual(DovizKuru.objects.get(para_birimi='USD', tarih=dt).kur, Decimal('31.9000'))
+
+        with override_settings(RATE_FIXED_TABLE={'USD': '40.0000'}):
+            res = get_try_per_currency('USD', date(2024, 3, 5))
+        self.assertEqual(res.rate, Decimal('40.0000'))
+        self.assertFalse(DovizKuru.objects.filter(tarih=date(2024, 3, 5)).exists())
+
+    # --- 6. İŞLEM TARİHİ KURUYLA MALİYET ---
+
+    def test_maliyet_ozeti_islem_tarihi_kuru(self):
+        """Her kayıt kendi tarihindeki (veya öncesindeki en son) kurla çevrilir; özet commit sonrası güncellenir"""
+        from datetime import date
+        from core.services.revaluation import RevaluationService
+
+        DovizKuru.objects.bulk_create([
+            DovizKuru(para_birimi='USD', tarih=date(2024, 1, 5), kur=Decimal('30.0000')),
+            DovizKuru(para_birimi='EUR', tarih=date(2024, 1, 5), kur=Decimal('33.0000')),
+            DovizKuru(para_birimi='USD', tarih=date(2024, 6, 3), kur=Decimal('32.0000')),
+        ])
+        kategori = GiderKategorisi.objects.create(isim="Enerji")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            # Cumartesi faturası -> Cuma (5 Ocak) kuru
+            Fatura.objects.create(tedarikci=self.tedarikci, fatura_no="RV-1", tarih=date(2024, 1, 6), genel_toplam=Decimal('3000.00'))
+            # USD gider: USD toplamına orijinal tutar olarak girer
+            Harcama.objects.create(kategori=kategori, aciklama="Elektrik", tutar=Decimal('100.00'),
+                                   para_birimi='USD', kur_degeri=Decimal('32.0000'), tarih=date(2024, 6, 3))
+
+        fatura_ozet = MaliyetDonemOzeti.objects.get(ay=date(2024, 1, 1), kalem_tipi='fatura')
+        self.assertEqual(fatura_ozet.tutar_usd, Decimal('100.00'))
+        self.assertEqual(fatura_ozet.tutar_eur, Decimal('90.91'))
+        self.assertEqual(fatura_ozet.kursuz_kayit, 1)  # GBP kuru yok
+
+        gider_ozet = MaliyetDonemOzeti.objects.get(ay=date(2024, 6, 1), kalem_tipi='gider')
+        self.assertEqual(gider_ozet.tutar_try, Decimal('3200.00'))
+        self.assertEqual(gider_ozet.tutar_usd, Decimal('100.00'))
+
+        toplam = RevaluationService.maliyet_toplami()
+        self.assertEqual(toplam['usd'], Decimal('200.00'))
+        self.assertEqual(toplam['try'], Decimal('6200.00'))
@@ -1,14 +1,14 @@
-import requests
-import xml.etree.ElementTree as ET
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 
 def tcmb_kur_getir():
     """
-    TCMB'den güncel USD, EUR ve GBP kurlarını çeker.
-    Hata durumunda varsayılan olarak 1.0 döner.
+    Güncel USD, EUR ve GBP kurlarını aktif kur sağlayıcısından çeker (settings.RATE_PROVIDER).
+    - TCMB sağlayıcısında dış çağrı ortak istemciden geçer (devre kesici + gecikme bütçesi + kısa cache).
+    - TCMB yavaş/kapalıysa son bilinen iyi kurlar döner.
+    Hiçbir kur bilinmiyorsa varsayılan olarak 1.0 döner.
     """
-    url = "https://www.tcmb.gov.tr/kurlar/today.xml"
-    
+    from core.services.rate_providers import get_provider
+
     kurlar = {
         'USD': Decimal('1.0'),
         'EUR': Decimal('1.0'),
@@ -16,23 +16,11 @@ def tcmb_kur_getir():
     }
     
     try:
-        response = requests.get(url, timeout=5)
-        
-        if response.status_code == 200:
-            root = ET.fromstring(response.content)
-            
-            for currency in root.findall('Currency'):
-                kod = currency.get('Kod')
-                
-                # Banknot Satış yoksa Forex Satış (Piyasa)
-                satis = currency.find('BanknoteSelling').text
-                if not satis:
-                    satis = currency.find('ForexSelling').text
-                    
-                if satis and kod in ['USD', 'EUR', 'GBP']:
-                    # Nokta/Virgül karmaşasını önlemek için güvenli dönüşüm
-                    deger = Decimal(satis)
-                    kurlar[kod] = deger
+        # Banknot Satış yoksa Forex Satış (Piyasa)
+        guncel = get_provider().rates(None, banknote_first=True).rates
+        for kod in kurlar:
+            if kod in guncel:
+                kurlar[kod] = guncel[kod]
 
     except Exception as e:
         print(f"Kur çekme hatası: {e}")
@@ -57,4 +45,69 @@ def to_decimal(value, precision=2):
             rounding=ROUND_HALF_UP
         )
     except:
-        return Decimal('0.00')
\ No newline at end of file
+        return Decimal('0.00')
+
+
+def clean_currency_input(value_str):
+    """
+    Frontend'den gelen '1.250,50' (TR) veya '1250.50' (US) formatlarını
+    doğru şekilde Python Decimal formatına çevirir.
+    """
+    if not value_str:
+        return Decimal("0.00")
+
+    if isinstance(value_str, (int, float, Decimal)):
+        return to_decimal(value_str)
+
+    value_str = str(value_str).strip()
+
+    if "." in value_str and "," in value_str:
+        last_dot = value_str.rfind(".")
+        last_comma = value_str.rfind(",")
+
+        if last_comma > last_dot:
+            value_str = value_str.replace(".", "").replace(",", ".")
+        else:
+            value_str = value_str.replace(",", "")
+    elif "," in value_str:
+        value_str = value_str.replace(",", ".")
+
+    try:
+        return Decimal(value_str)
+    except (InvalidOperation, ValueError):
+        return Decimal("0.00")
+
+
+def iban_normalize(value):
+    """Boşlukları atar, büyük harfe çevirir ('TR12 0006 ...' -> 'TR120006...')."""
+    return "".join(str(value or "").split()).upper()
+
+
+def iban_dogrula(value):
+    """
+    IBAN doğrulaması (ISO 13616, mod-97). TR IBAN'ları 26 karakterdir.
+    Boş değer geçerlidir (alan opsiyonel).
+    """
+    from django.core.exceptions import ValidationError
+
+    iban = iban_normalize(value)
+    if not iban:
+        return
+    if not (15 <= len(iban) <= 34) or not iban[:2].isalpha() or not iban[2:].isalnum():
+        raise ValidationError("Geçersiz IBAN biçimi.")
+    if iban.startswith("TR") and len(iban) != 26:
+        raise ValidationError("TR IBAN 26 karakter olmalıdır.")
+    sayisal = "".join(str(int(c, 36)) for c in iban[4:] + iban[:4])
+    if int(sayisal) % 97 != 1:
+        raise ValidationError("IBAN kontrol hanesi hatalı.")
+
+
+def vergi_no_dogrula(value):
+    """Vergi kimlik no (VKN, 10 hane) veya T.C. kimlik no (TCKN, 11 hane). Boş değer geçerlidir."""
+    from django.core.exceptions import ValidationError
+
+    no = str(value or "").strip()
+    if not no:
+        return
+    if not no.isdigit() or len(no) not in (10, 11):
+        raise ValidationError("Vergi no 10 (VKN) veya 11 (TCKN) haneli rakam olmalıdır.")
@@ -9,7 +9,7 @@ from .satin_alma import (
 )
 
 from .talep_teklif import (
-    icmal_raporu, teklif_ekle, teklif_durum_guncelle,
+    icmal_raporu, teklif_ekle, teklif_durum_guncelle, teklif_toplu_onayla,
     talep_olustur, talep_onayla, talep_tamamla, talep_sil,
     arsiv_raporu, talep_arsivden_cikar
 )
@@ -35,7 +35,13 @@ try:
 except ImportError:
     pass
 
-from .ekstre import stok_ekstresi, cari_ekstresi
+from .ekstre import stok_ekstresi, cari_ekstresi, cari_ekstre_indir
+from .yaslandirma import yaslandirma_raporu
+from .nakit_akis import nakit_akis_projeksiyonu
+from .odeme_talimati import odeme_talimatlari, odeme_talimati_detay, odeme_talimati_indir
+from .banka_ekstresi import banka_ekstreleri, banka_ekstresi_detay
+from .donem_kapanisi import donem_kapanisi
+from .efatura import efatura_yukle
 
 from .guvenlik import yetki_kontrol
 from .giderler import gider_listesi, gider_ekle, gider_duzenle
@@ -47,4 +53,4 @@ from .gider_tanimlari import (
     gider_tanim_toggle_active,
 )
 
-from .kur_api import kur_getir
+from .kur_api import kur_getir, kur_servis_durumu
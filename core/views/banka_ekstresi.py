@@ -0,0 +1,93 @@
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
+from django.shortcuts import get_object_or_404, redirect, render
+
+from core.models import BankaEkstresi, BankaHareketi
+from core.services.banka_ekstresi import BICIMLER, TARIH_PENCERESI, BankStatementService
+from .guvenlik import yetki_kontrol
+
+
+@login_required
+def banka_ekstreleri(request):
+    """
+    BANKA EKSTRESİ MUTABAKATI
+    - Liste: yüklenen ekstreler ve eşleşme oranları.
+    - POST: CSV / MT940 dosyası yüklenir, satırlar kayıtlı ödemelerle otomatik eşleştirilir.
+    """
+    if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
+        return redirect("erisim_engellendi")
+
+    if request.method == "POST":
+        dosya = request.FILES.get("dosya")
+        if not dosya:
+            messages.error(request, "Lütfen bir ekstre dosyası seçin.")
+            return redirect("banka_ekstreleri")
+
+        bicim = request.POST.get("bicim") or None
+        try:
+            pencere = max(0, min(int(request.POST.get("pencere") or TARIH_PENCERESI), 15))
+        except ValueError:
+            pencere = TARIH_PENCERESI
+        try:
+            ekstre = BankStatementService.ice_aktar(
+                dosya, dosya.name, bicim if bicim in BICIMLER else None,
+                banka_adi=request.POST.get("banka_adi", "").strip(), kullanici=request.user, pencere=pencere,
+            )
+        except ValidationError as e:
+            messages.error(request, " ".join(e.messages))
+            return redirect("banka_ekstreleri")
+
+        messages.success(
+            request,
+            f"✅ {ekstre.satir_sayisi} hareket okundu, {ekstre.eslesen_sayisi} tanesi ödemelerle eşleşti.",
+        )
+        return redirect("banka_ekstresi_detay", pk=ekstre.id)
+
+    return render(request, "banka_ekstreleri.html", {
+        "ekstreler": BankaEkstresi.objects.select_related("yukleyen")[:50],
+        "bicimler": BankaEkstresi.BICIMLER,
+        "pencere": TARIH_PENCERESI,
+    })
+
+
+@login_required
+def banka_ekstresi_detay(request, pk):
+    """
+    Ekstre satırları. ?durum=bekleyen (varsayılan) | eslesen | tum
+    POST action=yeniden: eşleşmeyenleri tekrar dener; action=eslestir / kaldir: elle eşleştirme.
+    """
+    if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
+        return redirect("erisim_engellendi")
+
+    ekstre = get_object_or_404(BankaEkstresi, pk=pk)
+    durum = request.GET.get("durum", "bekleyen")
+
+    if request.method == "POST":
+        action = request.POST.get("action")
+        try:
+            if action == "yeniden":
+                adet = BankStatementService.yeniden_eslestir(ekstre)
+                messages.success(request, f"{adet} yeni eşleşme bulundu.")
+            elif action in ("eslestir", "kaldir"):
+                hareket = get_object_or_404(BankaHareketi, pk=request.POST.get("hareket_id"), ekstre=ekstre)
+                odeme_id = request.POST.get("odeme_id", "").strip() if action == "eslestir" else ""
+                if action == "eslestir" and not odeme_id.isdigit():
+                    raise ValidationError("Geçerli bir ödeme numarası girin.")
+                BankStatementService.elle_eslestir(hareket, int(odeme_id) if odeme_id else None)
+                messages.success(request, "Eşleşme güncellendi.")
+        except ValidationError as e:
+            messages.error(request, " ".join(e.messages))
+        return redirect(f"{request.path}?durum={durum}")
+
+    hareketler = ekstre.hareketler.select_related("odeme__tedarikci")
+    if durum == "bekleyen":
+        hareketler = hareketler.filter(odeme__isnull=True)
+    elif durum == "eslesen":
+        hareketler = hareketler.filter(odeme__isnull=False)
+
+    return render(request, "banka_ekstresi_detay.html", {
+        "ekstre": ekstre,
+        "hareketler": hareketler,
+        "durum": durum,
+    })
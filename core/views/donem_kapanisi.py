@@ -0,0 +1,63 @@
+from datetime import date, timedelta
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Sum
+from django.shortcuts import redirect, render
+from django.utils import timezone
+
+from core.models import DonemKapanisi
+from core.services.donem_kapanisi import PeriodCloseService
+from .guvenlik import yetki_kontrol
+
+
+@login_required
+def donem_kapanisi(request):
+    """
+    DÖNEM KAPANIŞI
+    - Liste: kapalı dönemler ve özet toplamları (tek sorgu).
+    - POST action=kapat: seçilen ay (ve önceki açık aylar) kilitlenir, dönem özetleri yazılır.
+    - POST action=geri_ac: son kapanış geri açılır (sadece YÖNETİCİ).
+    """
+    if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
+        return redirect("erisim_engellendi")
+
+    bugun = timezone.localdate()
+
+    if request.method == "POST":
+        try:
+            if request.POST.get("action") == "geri_ac":
+                if not yetki_kontrol(request.user, ["YONETICI"]):
+                    return redirect("erisim_engellendi")
+                donem = PeriodCloseService.geri_ac()
+                messages.warning(request, f"{donem.ay:%m.%Y} dönemi geri açıldı; kayıtlar yeniden düzenlenebilir.")
+            else:
+                try:
+                    ay = date.fromisoformat(f"{request.POST.get('ay') or ''}-01")
+                except ValueError:
+                    messages.error(request, "Geçersiz ay.")
+                    return redirect("donem_kapanisi")
+                donem = PeriodCloseService.kapat(
+                    ay, kullanici=request.user, aciklama=request.POST.get("aciklama", "").strip()
+                )
+                messages.success(request, f"✅ {donem.ay:%m.%Y} dönemi kapatıldı; {donem.bitis:%d.%m.%Y} ve öncesi kilitlendi.")
+        except ValidationError as e:
+            messages.error(request, " ".join(e.messages))
+        return redirect("donem_kapanisi")
+
+    donemler = DonemKapanisi.objects.select_related("kapatan").annotate(
+        tedarikci_sayisi=Count("cari_ozetleri"),
+        fatura=Sum("cari_ozetleri__fatura_toplam"),
+        hakedis=Sum("cari_ozetleri__hakedis_toplam"),
+        odeme=Sum("cari_ozetleri__odeme_toplam"),
+    )[:36]
+    # Önerilen: bir önceki ay
+    gecen_ay = (bugun.replace(day=1) - timedelta(days=1)).replace(day=1)
+
+    return render(request, "donem_kapanisi.html", {
+        "donemler": donemler,
+        "son": donemler[0] if donemler else None,
+        "varsayilan_ay": gecen_ay.strftime("%Y-%m"),
+        "yonetici": yetki_kontrol(request.user, ["YONETICI"]),
+    })
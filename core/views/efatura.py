@@ -0,0 +1,42 @@
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import redirect, render
+
+from core.models import Depo
+from core.services.efatura import EInvoiceImportService
+from .guvenlik import yetki_kontrol
+
+
+@login_required
+def efatura_yukle(request):
+    """
+    E-FATURA İÇE AKTARMA
+    - POST: UBL-TR .xml veya çok faturalı .zip yüklenir; faturalar, kalemler ve stok girişleri yazılır.
+    - Sonuç raporu aynı sayfada gösterilir (eklenen / mükerrer / atlanan / hatalı).
+    """
+    if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
+        return redirect("erisim_engellendi")
+
+    rapor = None
+    if request.method == "POST":
+        dosya = request.FILES.get("dosya")
+        if not dosya:
+            messages.error(request, "Lütfen bir e-Fatura dosyası (.xml / .zip) seçin.")
+            return redirect("efatura_yukle")
+
+        depo_id = request.POST.get("depo_id") or ""
+        depo = Depo.objects.filter(pk=depo_id).first() if depo_id.isdigit() else None
+        rapor = EInvoiceImportService.ice_aktar(
+            dosya, depo=depo,
+            tedarikci_ac=bool(request.POST.get("tedarikci_ac")),
+            malzeme_ac=bool(request.POST.get("malzeme_ac")),
+        )
+        if rapor.eklenen:
+            messages.success(request, f"✅ {rapor.eklenen} fatura ({rapor.kalem} kalem) aktarıldı.")
+        elif not rapor.okunan:
+            messages.warning(request, "Dosyada e-Fatura (Invoice) bulunamadı.")
+
+    return render(request, "efatura_yukle.html", {
+        "rapor": rapor,
+        "depolar": Depo.objects.filter(is_active=True).order_by("isim"),
+    })
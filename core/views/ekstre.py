@@ -1,165 +1,41 @@
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum
+from django.http import Http404, StreamingHttpResponse
+from django.utils.dateparse import parse_date
 from decimal import Decimal
-from core.models import Tedarikci, Fatura, Hakedis, Odeme, Malzeme, DepoHareket
-from core.utils import to_decimal, tcmb_kur_getir
-
-# ⚠️ Döviz/kur mantığı zaten sende finans_payments.py içinde var
-# Bu dosyadan import ederek aynı mantığı kullanıyoruz.
-from core.views.finans_payments import get_smart_exchange_rate
+from core.models import Tedarikci, Malzeme, DepoHareket
+from core.utils import to_decimal
+from core.services.cari_ekstre import StatementService
+from core.services import ekstre_export
+from .guvenlik import yetki_kontrol
 
 
 @login_required
 def cari_ekstresi(request):
     """
     Tedarikçi Cari Ekstresi (TL)
-    - Dövizli faturaları doğru kur ile TL'ye çevirir.
-    - Faturanın para birimi/kur bilgisi yoksa, faturaya bağlı TL ödemelerden kur türetir (güvenli koşullarda).
+    - Fatura / onaylı hakediş / ödeme hareketleri tek SQL'de (UNION ALL) birleşir,
+      yürüyen bakiye veritabanında (window function) hesaplanır.
+    - Başlangıç tarihi seçilirse ilk satır devir (açılış bakiyesi) satırıdır.
+    - Tutarlar TL tutulur, kur tekrar uygulanmaz; dövizli tekliflerde orj bilgisi gösterilir.
     - Template uyumu: son_bakiye gönderir.
     """
     tedarikciler = Tedarikci.objects.all().order_by("firma_unvani")
     secilen_tedarikci = None
     hareketler = []
+    son_bakiye = Decimal("0.00")
 
     tedarikci_id = request.GET.get("tedarikci")
     tarih1 = request.GET.get("d1")
     tarih2 = request.GET.get("d2")
 
-    guncel_kurlar = tcmb_kur_getir()
-
     if tedarikci_id:
         secilen_tedarikci = get_object_or_404(Tedarikci, id=tedarikci_id)
-
-        faturalar = Fatura.objects.filter(tedarikci=secilen_tedarikci)
-        hakedisler = Hakedis.objects.filter(
-            satinalma__teklif__tedarikci=secilen_tedarikci, onay_durumu=True
+        ekstre = StatementService.cari_ekstre(
+            secilen_tedarikci.id, _parse_tarih(tarih1), _parse_tarih(tarih2)
         )
-        odemeler = Odeme.objects.filter(tedarikci=secilen_tedarikci)
-
-        # Tarih Filtresi
-        if tarih1:
-            faturalar = faturalar.filter(tarih__gte=tarih1)
-            hakedisler = hakedisler.filter(tarih__gte=tarih1)
-            odemeler = odemeler.filter(tarih__gte=tarih1)
-        if tarih2:
-            faturalar = faturalar.filter(tarih__lte=tarih2)
-            hakedisler = hakedisler.filter(tarih__lte=tarih2)
-            odemeler = odemeler.filter(tarih__lte=tarih2)
-
-        faturalar = faturalar.order_by("tarih", "id")
-
-        # --------------------
-        # 1) FATURALAR (TL'ye çevrilmiş borç)
-        # --------------------
-        for fat in faturalar:
-            # ✅ KRİTİK: Fatura.genel_toplam zaten TL tutulur => ASLA kur uygulanmaz
-            tl_borc = to_decimal(getattr(fat, "genel_toplam", 0)).quantize(Decimal("0.01"))
-
-            aciklama = f"Fatura: {fat.aciklama or ''}".strip()
-
-            # Bilgi amaçlı: bağlı teklif dövizliyse TL'den geriye doğru "orj" göster (TL / kur)
-            try:
-                teklif = fat.satinalma.teklif if getattr(fat, "satinalma_id", None) else None
-                if teklif:
-                    pb = (getattr(teklif, "para_birimi", "TRY") or "TRY").upper().strip()
-                    if pb in ("TL", "", None):
-                        pb = "TRY"
-
-                    # öncelik: locked_rate, sonra kur_degeri
-                    kur = to_decimal(
-                        getattr(teklif, "locked_rate", None) or getattr(teklif, "kur_degeri", None) or 0,
-                        precision=6
-                    )
-
-                    if pb != "TRY" and kur and kur > 0:
-                        orj_hint = (to_decimal(tl_borc) / to_decimal(kur)).quantize(Decimal("0.01"))
-                        aciklama += (
-                            f"<br><span class='badge bg-light text-dark border'>"
-                            f"Orj: {orj_hint:,.2f} {pb} | Kur: {kur}</span>"
-                        )
-            except Exception:
-                pass
-
-            hareketler.append(
-                {
-                    "tarih": fat.tarih,
-                    "aciklama": aciklama,
-                    "borc": tl_borc,          # ✅ TL
-                    "alacak": Decimal("0"),
-                    "tip": "Fatura",
-                }
-            )
-
-        # --------------------
-        # 2) HAKEDİŞLER (TL'ye çevrilmiş borç)
-        # --------------------
-        # HAKEDİŞLER (TL borç) - KRİTİK: Hakediş TL tutulur => ASLA kur uygulanmaz
-        for hk in hakedisler:
-            hk_tutar = to_decimal(getattr(hk, "odenecek_net_tutar", 0)).quantize(Decimal("0.01"))
-            tl_borc = hk_tutar  # ✅ TL
-
-            aciklama = f"Hakediş: {getattr(hk, 'aciklama', '') or ''}".strip()
-
-            # Bilgi amaçlı: teklif dövizliyse TL'den orj'a geri hesap (TL / kur)
-            try:
-                teklif = hk.satinalma.teklif if getattr(hk, "satinalma_id", None) else None
-                if teklif:
-                    pb = (getattr(teklif, "para_birimi", "TRY") or "TRY").upper().strip()
-                    if pb in ("TL", "", None):
-                        pb = "TRY"
-
-                    kur = to_decimal(
-                        getattr(teklif, "locked_rate", None) or getattr(teklif, "kur_degeri", None) or 0,
-                        precision=6
-                    )
-
-                    if pb != "TRY" and kur and kur > 0:
-                        orj_hint = (to_decimal(tl_borc) / to_decimal(kur)).quantize(Decimal("0.01"))
-                        aciklama += (
-                            f"<br><span class='badge bg-light text-dark border'>"
-                            f"Orj: {orj_hint:,.2f} {pb} | Kur: {kur}</span>"
-                        )
-            except Exception:
-                pass
-
-            hareketler.append({
-                "tarih": hk.tarih,
-                "aciklama": aciklama,
-                "borc": tl_borc,            # ✅ TL
-                "alacak": Decimal("0"),
-                "tip": "Hakedis",
-            })
-
-        # --------------------
-        # 3) ÖDEMELER (TL alacak)
-        # --------------------
-        for odeme in odemeler:
-            hareketler.append(
-                {
-                    "tarih": odeme.tarih,
-                    "aciklama": f"Ödeme: {odeme.get_odeme_turu_display()}",
-                    "borc": Decimal("0"),
-                    "alacak": to_decimal(getattr(odeme, "tutar", 0)),
-                    "tip": "Ödeme",
-                }
-            )
-
-        # --------------------
-        # 4) Sırala & Bakiye Hesapla
-        # --------------------
-        hareketler.sort(key=lambda x: x["tarih"])
-
-        bakiye = Decimal("0.00")
-        for h in hareketler:
-            h["borc"] = to_decimal(h.get("borc", 0))
-            h["alacak"] = to_decimal(h.get("alacak", 0))
-            bakiye += (h["borc"] - h["alacak"])
-            h["bakiye"] = bakiye
-
-        son_bakiye = bakiye
-    else:
-        son_bakiye = Decimal("0.00")
+        hareketler = ekstre.satirlar
+        son_bakiye = ekstre.son_bakiye
 
     context = {
         "tedarikciler": tedarikciler,
@@ -173,6 +49,36 @@ def cari_ekstresi(request):
     return render(request, "cari_ekstre.html", context)
 
 
+@login_required
+def cari_ekstre_indir(request, tedarikci_id, bicim):
+    """
+    Cari ekstreyi CSV / XLSX / PDF olarak indirir (d1, d2 filtreleri ekranla aynı).
+    Dosya satır satır akar: çok yıllık ekstrelerde de bellek kullanımı sabit.
+    """
+    if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
+        return redirect("erisim_engellendi")
+    if bicim not in ekstre_export.BICIMLER:
+        raise Http404("Geçersiz biçim")
+
+    tedarikci = get_object_or_404(Tedarikci, id=tedarikci_id)
+    d1, d2 = _parse_tarih(request.GET.get("d1")), _parse_tarih(request.GET.get("d2"))
+
+    response = StreamingHttpResponse(
+        ekstre_export.parcalar(bicim, tedarikci, d1, d2),
+        content_type=ekstre_export.BICIMLER[bicim][0],
+    )
+    response["Content-Disposition"] = f'attachment; filename="{ekstre_export.dosya_adi(tedarikci, bicim, d1, d2)}"'
+    return response
+
+
+def _parse_tarih(value):
+    """GET'ten gelen YYYY-MM-DD; boş/geçersizse None (filtre uygulanmaz)."""
+    try:
+        return parse_date(value) if value else None
+    except ValueError:
+        return None
+
+
 @login_required
 def stok_ekstresi(request):
     """
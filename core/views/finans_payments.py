@@ -1,18 +1,19 @@
-from decimal import Decimal, InvalidOperation
+from decimal import Decimal
 from datetime import timedelta
 
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
-from django.db.models import Sum, F, DecimalField, Value
+from django.db.models import Sum, F, Value, Q
 from django.http import JsonResponse
 from django.db import transaction
 from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_date
 import json
 
 # Modeller
-from core.models import Fatura, Hakedis, Harcama, Odeme, Tedarikci
+from core.models import Fatura, Hakedis, Harcama, Odeme, Tedarikci, TedarikciBakiye
 from core.views.guvenlik import yetki_kontrol
 
 
@@ -29,53 +30,20 @@ except Exception:
 
 from core.forms import HakedisForm, OdemeForm
 from core.views.guvenlik import yetki_kontrol
-from core.utils import to_decimal, tcmb_kur_getir
+from core.utils import clean_currency_input, to_decimal, tcmb_kur_getir
 from core.services.finans_payments import PaymentService
+from core.services.revaluation import RevaluationService
+from core.services.cari_bakiye import BalanceService, fatura_odenen_ifadesi
+from core.services import dashboard_cache
+from core.services.cekler import KATEGORILER as CEK_KATEGORILERI, ChequeService
+from core.services import payables
+from core.services.payables import STRATEJILER as ALLOCATION_STRATEJILERI, AllocationService
+from core.services.kpi_ozeti import SERI_ALANLARI as KPI_SERI_ALANLARI, KpiSnapshotService, cari_ayrisim, yatirim_maliyeti
 
 
 # =========================================================
 # YARDIMCI FONKSİYONLAR
 # =========================================================
-def clean_currency_input(value_str):
-    """
-    Frontend'den gelen '1.250,50' (TR) veya '1250.50' (US) formatlarını
-    doğru şekilde Python Decimal formatına çevirir.
-    """
-    if not value_str:
-        return Decimal("0.00")
-
-    if isinstance(value_str, (int, float, Decimal)):
-        return to_decimal(value_str)
-
-    value_str = str(value_str).strip()
-
-    if "." in value_str and "," in value_str:
-        last_dot = value_str.rfind(".")
-        last_comma = value_str.rfind(",")
-
-        if last_comma > last_dot:
-            value_str = value_str.replace(".", "").replace(",", ".")
-        else:
-            value_str = value_str.replace(",", "")
-    elif "," in value_str:
-        value_str = value_str.replace(",", ".")
-
-    try:
-        return Decimal(value_str)
-    except (InvalidOperation, ValueError):
-        return Decimal("0.00")
-
-
-def _pick_attr(obj, names):
-    """Objede listelenen alan adlarından ilk bulunanı döndürür (yoksa None)."""
-    for n in names:
-        if hasattr(obj, n):
-            val = getattr(obj, n)
-            if val not in [None, ""]:
-                return val
-    return None
-
-
 def _normalize_currency(pb):
     if not pb:
         return "TRY"
@@ -93,65 +61,25 @@ def get_smart_exchange_rate(obj, guncel_kurlar):
       - Hakediş sistemimizde TL tutulur. Hakediş için asla kur uygulanmaz.
         -> Dönüş her zaman ("TRY", 1.0)
 
-    Fatura için öncelik sırası:
-      1) Objede direkt para_birimi ve kur alanları (varsa)
-      2) Satınalma -> teklif üzerinden para birimi/kur
-      3) En son TCMB güncel kuru
+    Fatura için:
+      1) Faturadaki para_birimi / kur_degeri kolonları (oluşturulurken tekliften kopyalanır; sorgu yok)
+      2) Kur geçersizse en son TCMB güncel kuru
 
     Dönüş: (para_birimi, kur_degeri)
     """
-    # ✅ 0) Hakediş her zaman TL (kur yok)
-    try:
-        # import içeride: circular import riskini azaltır
-        from core.models import Hakedis
-        if isinstance(obj, Hakedis):
-            return "TRY", Decimal("1.0")
-    except Exception:
-        pass
-
-    pb = "TRY"
-    kur = Decimal("1.0")
-
-    # 1) Objede direkt para birimi (varsa)
-    direct_pb = _pick_attr(obj, ["para_birimi", "currency", "doviz_cinsi", "doviz"])
-    if direct_pb:
-        pb = _normalize_currency(direct_pb)
-
-    # 2) Objede para birimi yoksa / TRY ise, satinalma.teklif para birimine bak
-    if pb == "TRY":
-        if hasattr(obj, "satinalma") and obj.satinalma and getattr(obj.satinalma, "teklif", None):
-            pb = _normalize_currency(getattr(obj.satinalma.teklif, "para_birimi", "TRY"))
+    if isinstance(obj, Hakedis):
+        return "TRY", Decimal("1.0")
 
-    # Para birimi TRY ise kur 1.0
+    pb = _normalize_currency(getattr(obj, "para_birimi", None))
     if pb == "TRY":
         return "TRY", Decimal("1.0")
 
-    # 3) Objede direkt kur (varsa)
-    direct_kur = _pick_attr(obj, ["kur_degeri", "kur", "fx_rate", "doviz_kuru"])
-    if direct_kur:
-        try:
-            k = to_decimal(direct_kur)
-            if k > Decimal("0.1"):
-                return pb, k
-        except Exception:
-            pass
-
-    # 4) Satınalma -> teklif kuru
-    if hasattr(obj, "satinalma") and obj.satinalma and getattr(obj.satinalma, "teklif", None):
-        teklif = obj.satinalma.teklif
-        teklif_kur = _pick_attr(teklif, ["kur_degeri", "kur", "fx_rate"])
-        if teklif_kur:
-            try:
-                k = to_decimal(teklif_kur)
-                if k > Decimal("0.1"):
-                    return pb, k
-            except Exception:
-                pass
+    kur = to_decimal(getattr(obj, "kur_degeri", None), precision=6)
+    if kur > Decimal("0.1"):
+        return pb, kur
 
-    # 5) TCMB güncel kuru
     try:
-        k = guncel_kurlar.get(pb, Decimal("1.0"))
-        k = to_decimal(k)
+        k = to_decimal(guncel_kurlar.get(pb, Decimal("1.0")))
         if k > Decimal("0.1"):
             return pb, k
     except Exception:
@@ -183,67 +111,30 @@ def _odeme_dagitim_supported():
     return OdemeDagitim is not None
 
 
-def _odeme_allocated_ids():
-    """
-    Allocation bulunan odeme id'lerini döndürür.
-    (Çifte saymayı engellemek için kullanıyoruz)
-    """
-    if not _odeme_dagitim_supported():
-        return []
-    try:
-        return list(OdemeDagitim.objects.values_list("odeme_id", flat=True).distinct())
-    except Exception:
-        return []
-
-
-def _paid_tl_for_invoice(fat: Fatura) -> Decimal:
+def _paid_tl_map(fatura_ids) -> dict:
     """
-    Bir faturaya yapılan toplam TL ödemeyi döndürür.
-    Öncelik: OdemeDagitim varsa onun üzerinden hesaplar.
-    Eski sistem: Odeme.fatura üzerinden bağlanan (allocation'sız) ödemeler de dahil edilir.
+    {fatura_id: ödenen TL} döndürür; fatura sayısından bağımsız tek sorgu.
+    Tanım kanoniktir (cari_bakiye.fatura_odenen_ifadesi): dağıtımlar + dağıtımı olmayan eski tip Odeme.fatura.
+    Listede olup ödemesi olmayan faturalar 0.00 ile döner.
     """
-    toplam = Decimal("0.00")
-    allocated_ids = _odeme_allocated_ids()
-
-    # 1) Allocation üzerinden
-    if _odeme_dagitim_supported():
-        try:
-            t = OdemeDagitim.objects.filter(fatura=fat).aggregate(s=Sum("tutar"))["s"] or Decimal("0")
-            toplam += to_decimal(t)
-        except Exception:
-            pass
-
-    # 2) Eski sistem direct ödeme (allocation yoksa)
-    try:
-        qs = Odeme.objects.filter(fatura=fat)
-        if allocated_ids:
-            qs = qs.exclude(id__in=allocated_ids)
-        t2 = qs.aggregate(s=Sum("tutar"))["s"] or Decimal("0")
-        toplam += to_decimal(t2)
-    except Exception:
-        pass
+    ids = {int(i) for i in fatura_ids if i}
+    paid = {i: Decimal("0.00") for i in ids}
+    if not ids:
+        return paid
 
-    return to_decimal(toplam)
+    for fid, odenen in Fatura.objects.filter(id__in=ids).annotate(
+        _odenen=fatura_odenen_ifadesi()
+    ).values_list("id", "_odenen"):
+        paid[fid] = to_decimal(odenen)
+    return paid
 
 
-def _recalc_invoice_odenen_tutar_orj(fat: Fatura, guncel_kurlar: dict):
+def _paid_tl_for_invoice(fat: Fatura) -> Decimal:
     """
-    fat.odenen_tutar alanını (ORJ gibi kullanılıyorsa) günceller:
-    - Bizim sistem TL ödeme tutuyor
-    - Fatura döviz ise: TL / kur ile orj karşılık yazılır (sadece fatura ekranındaki "odenen_tutar" için).
+    Bir faturaya yapılan toplam TL ödemeyi döndürür (tek fatura için _paid_tl_map).
+    Birden fazla fatura işlenecekse döngü yerine _paid_tl_map kullanın.
     """
-    try:
-        pb, kur = get_smart_exchange_rate(fat, guncel_kurlar)
-        if pb != "TRY" and kur and to_decimal(kur) > 0:
-            paid_tl = _paid_tl_for_invoice(fat)
-            fat.odenen_tutar = (to_decimal(paid_tl) / to_decimal(kur)).quantize(Decimal("0.01"))
-        else:
-            # TL fatura ise, odenen_tutar'ı TL toplam gibi düşünüyorsan burayı paid_tl yapabilirsin.
-            # Şimdiki mimaride odenen_tutar zaten fatura tarafında ayrı yönetilebilir.
-            fat.odenen_tutar = fat.odenen_tutar or Decimal("0.00")
-        fat.save(update_fields=["odenen_tutar"])
-    except Exception:
-        pass
+    return _paid_tl_map([fat.id])[fat.id]
 
 
 def _invoice_total_tl(fat: Fatura, guncel_kurlar: dict) -> Decimal:
@@ -256,13 +147,14 @@ def _invoice_total_tl(fat: Fatura, guncel_kurlar: dict) -> Decimal:
     return to_decimal(fat.genel_toplam).quantize(Decimal("0.01"))
 
 
-def _invoice_remaining_tl(fat: Fatura, guncel_kurlar: dict) -> Decimal:
+def _invoice_remaining_tl(fat: Fatura, guncel_kurlar: dict, paid_tl=None) -> Decimal:
     """
     Kalan TL = toplam TL - ödenen TL.
-    Kur uygulanmaz.
+    Kur uygulanmaz. paid_tl verilirse (_paid_tl_map'ten) tekrar sorgulanmaz.
     """
     total_tl = _invoice_total_tl(fat, guncel_kurlar)
-    paid_tl = _paid_tl_for_invoice(fat)
+    if paid_tl is None:
+        paid_tl = _paid_tl_for_invoice(fat)
     return max(to_decimal(total_tl) - to_decimal(paid_tl), Decimal("0.00"))
 
 
@@ -355,7 +247,7 @@ def odeme_yap(request):
             hakedisler = Hakedis.objects.filter(
                 satinalma__teklif__tedarikci=secilen_tedarikci,
                 onay_durumu=True
-            )
+            ).select_related("satinalma__teklif__is_kalemi")
 
             for hk in hakedisler:
                 kalan_tl = _hakedis_remaining_tl(hk)
@@ -395,9 +287,10 @@ def odeme_yap(request):
                     toplam_guncel_borc_tl += kalan_tl
 
             # --- 2) FATURALAR (TL karşılığı) ---
-            faturalar = Fatura.objects.filter(tedarikci=secilen_tedarikci).order_by("tarih", "id")
+            faturalar = list(Fatura.objects.filter(tedarikci=secilen_tedarikci).order_by("tarih", "id"))
+            odenen_map = _paid_tl_map(f.id for f in faturalar)
             for fat in faturalar:
-                kalan_tl = _invoice_remaining_tl(fat, guncel_kurlar)
+                kalan_tl = _invoice_remaining_tl(fat, guncel_kurlar, odenen_map[fat.id])
                 if kalan_tl > Decimal("0.00"):
                     pb, kur = get_smart_exchange_rate(fat, guncel_kurlar)
 
@@ -443,34 +336,48 @@ def odeme_yap(request):
                     raw_tutar = request.POST.get("tutar", "0")
                     odeme.tutar = clean_currency_input(raw_tutar)
                     odeme.para_birimi = "TRY"
-                    odeme.save()
-
-                    # Eski davranış: direkt fatura_id geldiyse odeme.fatura bağla (geri uyum)
-                    if fatura_id and not odeme.fatura:
-                        try:
-                            odeme.fatura = Fatura.objects.get(id=int(fatura_id))
-                            odeme.save(update_fields=["fatura"])
-                        except Exception:
-                            pass
 
-                    dagitilacak_tl = to_decimal(odeme.tutar)
                     secilenler = request.POST.getlist("secilen_kalem")
-
                     if not secilenler and fatura_id:
                         secilenler = [f"Fatura_{fatura_id}"]
 
+                    secimler = []
                     for secim in secilenler:
+                        tip, _, id_str = secim.partition("_")
+                        if tip in ("Hakedis", "Fatura") and id_str.isdigit():
+                            secimler.append((tip, int(id_str)))
+
+                    # Seçilen belgeler tek seferde ve kilitli yüklenir (sadece bu tedarikçinin belgeleri)
+                    hk_ids = [i for t, i in secimler if t == "Hakedis"]
+                    fat_ids = [i for t, i in secimler if t == "Fatura"]
+                    if fatura_id and str(fatura_id).isdigit():
+                        fat_ids.append(int(fatura_id))
+
+                    hakedis_map = Hakedis.objects.select_for_update().filter(
+                        satinalma__teklif__tedarikci_id=odeme.tedarikci_id
+                    ).in_bulk(hk_ids) if hk_ids else {}
+                    fatura_map = Fatura.objects.select_for_update().filter(
+                        tedarikci_id=odeme.tedarikci_id
+                    ).in_bulk(fat_ids) if fat_ids else {}
+                    odenen_map = _paid_tl_map(fatura_map.keys())
+
+                    # Eski davranış: direkt fatura_id geldiyse odeme.fatura bağla (geri uyum)
+                    if fatura_id and str(fatura_id).isdigit() and not odeme.fatura_id:
+                        odeme.fatura = fatura_map.get(int(fatura_id))
+
+                    # Dağıtım bellekte hesaplanır
+                    dagitilacak_tl = to_decimal(odeme.tutar)
+                    guncel_hakedisler = {}
+                    fatura_paylari = []
+
+                    for tip, obj_id in secimler:
                         if dagitilacak_tl <= Decimal("0.00"):
                             break
 
-                        try:
-                            tip, id_str = secim.split("_")
-                            obj_id = int(id_str)
-                        except ValueError:
-                            continue
-
                         if tip == "Hakedis":
-                            hk = Hakedis.objects.get(id=obj_id)
+                            hk = hakedis_map.get(obj_id)
+                            if hk is None:
+                                continue
 
                             # ✅ Hakediş TL tutuluyor => TL olarak mahsup et
                             kalan_hk_tl = _hakedis_remaining_tl(hk)
@@ -478,42 +385,46 @@ def odeme_yap(request):
                                 continue
 
                             pay_tl = min(dagitilacak_tl, kalan_hk_tl).quantize(Decimal("0.01"))
-
                             hk.fiili_odenen_tutar = (to_decimal(hk.fiili_odenen_tutar) + pay_tl).quantize(Decimal("0.01"))
-                            hk.save(update_fields=["fiili_odenen_tutar"])
+                            guncel_hakedisler[hk.id] = hk
 
-                            if not odeme.bagli_hakedis:
+                            if not odeme.bagli_hakedis_id:
                                 odeme.bagli_hakedis = hk
-                                odeme.save(update_fields=["bagli_hakedis"])
 
                             dagitilacak_tl -= pay_tl
 
-                        elif tip == "Fatura":
-                            fat = Fatura.objects.get(id=obj_id)
+                        else:
+                            fat = fatura_map.get(obj_id)
+                            if fat is None:
+                                continue
 
-                            kalan_tl = _invoice_remaining_tl(fat, guncel_kurlar)
+                            kalan_tl = _invoice_remaining_tl(fat, guncel_kurlar, odenen_map.get(fat.id))
                             if kalan_tl <= Decimal("0.00"):
                                 continue
 
                             pay_tl = min(dagitilacak_tl, kalan_tl).quantize(Decimal("0.01"))
+                            fatura_paylari.append((fat, pay_tl))
+                            odenen_map[fat.id] = odenen_map.get(fat.id, Decimal("0.00")) + pay_tl
 
-                            if _odeme_dagitim_supported():
-                                OdemeDagitim.objects.create(
-                                    odeme=odeme,
-                                    fatura=fat,
-                                    tutar=to_decimal(pay_tl),
-                                    tarih=odeme.tarih,
-                                    aciklama=(odeme.aciklama or ""),
-                                )
-
-                            _recalc_invoice_odenen_tutar_orj(fat, guncel_kurlar)
-
-                            if not odeme.fatura:
+                            if not odeme.fatura_id:
                                 odeme.fatura = fat
-                                odeme.save(update_fields=["fatura"])
 
                             dagitilacak_tl -= pay_tl
 
+                    # Toplu yazım: hakedişler bulk_update, ödeme (bağlantılarıyla) bir kez, dağıtımlar bulk_create.
+                    # bulk_update sinyal çalıştırmaz; defter ve ekran cache'i ödemenin post_save'inde yenilenir.
+                    if guncel_hakedisler:
+                        Hakedis.objects.bulk_update(guncel_hakedisler.values(), ["fiili_odenen_tutar"])
+
+                    odeme.save()
+
+                    if fatura_paylari and _odeme_dagitim_supported():
+                        payables.dagitimlari_yaz(
+                            [payables.Eslesme(odeme.id, fat.id, odeme.tedarikci_id, pay) for fat, pay in fatura_paylari],
+                            tarih=odeme.tarih,
+                            aciklama=(odeme.aciklama or ""),
+                        )
+
                     messages.success(request, f"✅ {odeme.tutar} TL tutarında ödeme işlendi.")
                     
                     # DEĞİŞEN KISIM: Dashboard yerine Yazdırma Onayına git
@@ -557,6 +468,13 @@ def odeme_yap(request):
 
 @login_required
 def avans_mahsup(request, tedarikci_id):
+    """
+    AVANS MAHSUP
+    - Ekran iki sorguyla kurulur: dağıtılan toplamı anotasyonlu ödemeler, ödenen toplamı anotasyonlu faturalar
+      (core.services.payables; tanımlar otomatik mahsup motoruyla aynı).
+    - POST: seçilen ödeme ve faturalar bir kez kilitlenir, paylar bellekte (tarih sırasıyla) hesaplanır,
+      tek bulk_create + tek fatura UPDATE ile yazılır.
+    """
     if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
         return redirect("erisim_engellendi")
 
@@ -565,35 +483,6 @@ def avans_mahsup(request, tedarikci_id):
         return redirect("odeme_dashboard")
 
     tedarikci = get_object_or_404(Tedarikci, id=tedarikci_id)
-    guncel_kurlar = tcmb_kur_getir()
-
-    avanslar = []
-    odemeler_qs = Odeme.objects.filter(tedarikci=tedarikci).order_by("tarih", "id")
-
-    for o in odemeler_qs:
-        dagitilan = OdemeDagitim.objects.filter(odeme=o).aggregate(s=Sum("tutar"))["s"] or Decimal("0.00")
-        dagitilan = to_decimal(dagitilan)
-
-        # fatura bağlı ama hiç dağıtım yoksa avans sayma
-        if o.fatura_id and dagitilan <= Decimal("0.00"):
-            continue
-
-        kalan = to_decimal(o.tutar) - dagitilan
-        if kalan > Decimal("0.01"):
-            o.tutar_tl = kalan
-            avanslar.append(o)
-
-    faturalar = []
-    for fat in Fatura.objects.filter(tedarikci=tedarikci).order_by("tarih", "id"):
-        kalan_tl = _invoice_remaining_tl(fat, guncel_kurlar)
-        if kalan_tl > Decimal("0.01"):
-            faturalar.append({
-                "id": fat.id,
-                "no": fat.fatura_no,
-                "tarih": fat.tarih,
-                "aciklama": fat.aciklama or "",
-                "kalan_tl": to_decimal(kalan_tl),
-            })
 
     if request.method == "POST":
         try:
@@ -603,44 +492,24 @@ def avans_mahsup(request, tedarikci_id):
                     messages.error(request, "Mahsup hatası: Avans (ödeme) seçilmedi.")
                     return redirect("avans_mahsup", tedarikci_id=tedarikci.id)
 
-                odeme_id = int(odeme_id_raw)
-                sec_fatura_ids = request.POST.getlist("fatura_id")
-
-                odeme = get_object_or_404(Odeme, id=odeme_id, tedarikci=tedarikci)
-
-                dagitilan = OdemeDagitim.objects.filter(odeme=odeme).aggregate(s=Sum("tutar"))["s"] or Decimal("0.00")
-                kalan_avans = to_decimal(odeme.tutar) - to_decimal(dagitilan)
-
-                if kalan_avans <= Decimal("0.01"):
+                odeme = get_object_or_404(
+                    Odeme.objects.select_for_update(), id=int(odeme_id_raw), tedarikci=tedarikci
+                )
+                sec_fatura_ids = list(
+                    Fatura.objects.select_for_update()
+                    .filter(id__in=request.POST.getlist("fatura_id"), tedarikci=tedarikci)
+                    .values_list("id", flat=True)
+                )
+
+                avans = payables.acik_odemeler(tedarikci.id, odeme_ids=[odeme.id])
+                if not avans:
                     messages.error(request, "Bu ödeme için kullanılabilir avans kalmamış.")
                     return redirect("avans_mahsup", tedarikci_id=tedarikci.id)
 
-                sec_faturalar = Fatura.objects.filter(
-                    id__in=sec_fatura_ids,
-                    tedarikci=tedarikci
-                ).order_by("tarih", "id")
-
-                for fat in sec_faturalar:
-                    if kalan_avans <= Decimal("0.01"):
-                        break
-
-                    kalan_fatura_tl = _invoice_remaining_tl(fat, guncel_kurlar)
-                    if kalan_fatura_tl <= Decimal("0.01"):
-                        continue
-
-                    pay = min(kalan_avans, kalan_fatura_tl).quantize(Decimal("0.01"))
-
-                    OdemeDagitim.objects.create(
-                        odeme=odeme,
-                        fatura=fat,
-                        tutar=to_decimal(pay),
-                        tarih=timezone.now().date(),
-                        aciklama=f"Avans Mahsup (Ödeme #{odeme.id})"
-                    )
-
-                    _recalc_invoice_odenen_tutar_orj(fat, guncel_kurlar)
-                    kalan_avans -= to_decimal(pay)
+                eslesmeler = payables.eslestir(avans, payables.acik_faturalar(tedarikci.id, fatura_ids=sec_fatura_ids))
+                payables.dagitimlari_yaz(eslesmeler, aciklama=f"Avans Mahsup (Ödeme #{odeme.id})")
 
+                kalan_avans = avans[0].kalan
                 if kalan_avans > Decimal("0.01"):
                     messages.success(request, f"✅ Mahsup tamamlandı. Kalan avans: {kalan_avans:,.2f} TL")
                 else:
@@ -654,11 +523,37 @@ def avans_mahsup(request, tedarikci_id):
 
     return render(request, "avans_mahsup.html", {
         "tedarikci": tedarikci,
-        "avanslar": avanslar,
-        "faturalar": faturalar,
+        "avanslar": list(payables.acik_odeme_qs(tedarikci.id)),
+        "faturalar": list(payables.acik_fatura_qs(tedarikci.id)),
     })
 
 
+@login_required
+def otomatik_mahsup(request, tedarikci_id):
+    """
+    Avans Mahsup ekranındaki "Otomatik Mahsup" butonu (POST).
+    Tedarikçinin dağıtılmamış ödemelerini açık faturalara FIFO / önce tam tutar ile dağıtır.
+    """
+    if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
+        return redirect("erisim_engellendi")
+    if request.method != "POST":
+        return redirect("avans_mahsup", tedarikci_id=tedarikci_id)
+
+    tedarikci = get_object_or_404(Tedarikci, id=tedarikci_id)
+    strateji = request.POST.get("strateji", "fifo")
+    if strateji not in ALLOCATION_STRATEJILERI:
+        messages.error(request, "Geçersiz mahsup stratejisi.")
+        return redirect("avans_mahsup", tedarikci_id=tedarikci.id)
+
+    eslesmeler = AllocationService.otomatik_dagit(tedarikci.id, strateji)
+    if eslesmeler:
+        toplam = sum((e.tutar for e in eslesmeler), Decimal("0.00"))
+        messages.success(request, f"✅ Otomatik mahsup: {len(eslesmeler)} dağıtım, toplam {toplam:,.2f} TL")
+    else:
+        messages.info(request, "Eşleştirilecek avans / açık fatura bulunamadı.")
+    return redirect("avans_mahsup", tedarikci_id=tedarikci.id)
+
+
 @login_required
 def finans_dashboard(request):
     """
@@ -674,87 +569,31 @@ def finans_dashboard(request):
 
     bugun = timezone.now().date()
     ufuk = bugun + timedelta(days=30)
-    
-    # Kur bilgisini al (Yoksa varsayılan ata)
-    try:
-        kurlar = tcmb_kur_getir()
-    except:
-        kurlar = {'USD': 35.50, 'EUR': 38.20, 'GBP': 44.10}
 
     # ---------------------------------------------------------
     # 1. TOPLAM YATIRIM MALİYETİ (TÜM ZAMANLAR)
     # ---------------------------------------------------------
-    
-    # A) Faturalar (KDV Dahil)
-    toplam_fatura = Fatura.objects.aggregate(
-        t=Coalesce(Sum('genel_toplam'), Decimal('0.00'))
-    )['t']
-
-    # B) Hakedişler (Brüt + KDV)
-    # Not: Hakedis modelinizde 'toplam_tutar' alanı varsa onu kullanın, 
-    # yoksa (brut_tutar + kdv_tutari) formülünü açın.
-    hakedis_qs = Hakedis.objects.filter(onay_durumu=True).aggregate(
-        t=Coalesce(Sum(F('brut_tutar') + F('kdv_tutari')), Decimal('0.00'))
-    )
-    toplam_hakedis = hakedis_qs['t']
-
-    # C) Giderler (OPEX)
-    # Model adınız 'Harcama' ise burayı koruyun, 'Gider' ise değiştirin.
-    # Eğer modelinizde 'tl_tutar' alanı yoksa 'tutar' kullanın.
-    try:
-        # Eğer 'Gider' modeli kullanıyorsanız:
-        toplam_gider = Gider.objects.aggregate(t=Coalesce(Sum('tutar'), Decimal('0.00')))['t']
-    except NameError:
-        # Eğer 'Harcama' modeli kullanıyorsanız (eski kodunuzdaki gibi):
-        giderler_listesi = Harcama.objects.all()
-        toplam_gider = sum([g.tl_tutar for g in giderler_listesi]) if giderler_listesi else Decimal('0.00')
-
-    # GRAND TOTAL
-    fabrika_maliyeti = toplam_fatura + toplam_hakedis + toplam_gider
+    # Fatura (KDV dahil) + onaylı hakediş (brüt + KDV) + gider (TL, işlem kuruyla); günlük KPI özetiyle aynı hesap
+    maliyet = yatirim_maliyeti()
+    toplam_gider = maliyet['gider']
+    fabrika_maliyeti = maliyet['toplam']
 
 
     # ---------------------------------------------------------
     # 2. CARİ BORÇ ve AVANS AYRIŞTIRMASI (KRİTİK DÜZELTME)
     # ---------------------------------------------------------
-    # Eski koddaki global çıkarma işlemi yerine tedarikçi bazlı geziyoruz.
-    
-    piyasa_borc = Decimal("0.00")    # Kırmızı Kart
-    verilen_avans = Decimal("0.00")  # Yeşil Kart
-    borclu_listesi = []
-
-    tedarikciler = Tedarikci.objects.filter(is_active=True)
-
-    for ted in tedarikciler:
-        # 1. Tedarikçiden Gelen Faturalar (Borç)
-        t_fat = Fatura.objects.filter(tedarikci=ted).aggregate(
-            t=Coalesce(Sum('genel_toplam'), Decimal('0.00'))
-        )['t']
-        
-        # 2. Tedarikçiye Onaylanan Hakedişler (Borç)
-        t_hak = Hakedis.objects.filter(satinalma__teklif__tedarikci=ted, onay_durumu=True).aggregate(
-             t=Coalesce(Sum(F('brut_tutar') + F('kdv_tutari')), Decimal('0.00'))
-        )['t']
-        
-        # 3. Tedarikçiye Yapılan Ödemeler (Alacak)
-        t_ode = Odeme.objects.filter(tedarikci=ted).aggregate(
-            t=Coalesce(Sum('tutar'), Decimal('0.00'))
-        )['t']
-        
-        # Bakiye Hesapla (Pozitif = Borç, Negatif = Avans)
-        bakiye = (t_fat + t_hak) - t_ode
-        
-        if bakiye > 0:
-            # Borçlu olduğumuz tedarikçi
-            piyasa_borc += bakiye
-            if bakiye > 100: # 100 TL altı küsuratları listeye almayabiliriz
-                borclu_listesi.append({'isim': ted.firma_unvani, 'bakiye': bakiye})
-        elif bakiye < 0:
-            # Avans verdiğimiz tedarikçi
-            verilen_avans += abs(bakiye) # Mutlak değerini ekle
+    # Tedarikçi bazlı bakiye (Pozitif = Borç, Negatif = Avans) materyalize defterden okunur:
+    # tedarikçi sayısından bağımsız, sabit sayıda sorgu.
+    bakiyeler = TedarikciBakiye.objects.filter(tedarikci__is_active=True)
+    piyasa_borc, verilen_avans = cari_ayrisim()  # Kırmızı / Yeşil Kart
 
-    # En borçlu 5 tedarikçiyi sırala
-    borclu_listesi.sort(key=lambda x: x['bakiye'], reverse=True)
-    top_5_borc = borclu_listesi[:5]
+    # En borçlu 5 tedarikçi (100 TL altı küsuratlar listeye alınmaz)
+    top_5_borc = [
+        {'isim': isim, 'bakiye': bakiye}
+        for isim, bakiye in bakiyeler.filter(cari_bakiye__gt=100)
+        .order_by('-cari_bakiye')
+        .values_list('tedarikci__firma_unvani', 'cari_bakiye')[:5]
+    ]
 
 
     # ---------------------------------------------------------
@@ -776,15 +615,35 @@ def finans_dashboard(request):
     # ---------------------------------------------------------
     # 4. DÖVİZ ÇEVİRİSİ (INFO)
     # ---------------------------------------------------------
-    usd_kur = Decimal(str(kurlar.get('USD', 1)))
-    eur_kur = Decimal(str(kurlar.get('EUR', 1)))
-    gbp_kur = Decimal(str(kurlar.get('GBP', 1)))
-
-    maliyet_doviz = {
-        'usd': fabrika_maliyeti / usd_kur,
-        'eur': fabrika_maliyeti / eur_kur,
-        'gbp': fabrika_maliyeti / gbp_kur,
-    }
+    # Öncelik: her kaydın kendi işlem tarihindeki kurla hesaplanmış aylık özet (tek sorgu).
+    # Özet henüz kurulmadıysa eski davranış: toplam TL / bugünün kuru.
+    ozet = RevaluationService.maliyet_toplami()
+    if ozet is not None:
+        maliyet_doviz = {
+            'usd': ozet['usd'],
+            'eur': ozet['eur'],
+            'gbp': ozet['gbp'],
+            'islem_tarihi_kuru': True,
+            'kursuz_kayit': ozet['kursuz_kayit'],
+        }
+    else:
+        # Kur bilgisini al (Yoksa varsayılan ata)
+        try:
+            kurlar = tcmb_kur_getir()
+        except:
+            kurlar = {'USD': 35.50, 'EUR': 38.20, 'GBP': 44.10}
+
+        usd_kur = Decimal(str(kurlar.get('USD', 1)))
+        eur_kur = Decimal(str(kurlar.get('EUR', 1)))
+        gbp_kur = Decimal(str(kurlar.get('GBP', 1)))
+
+        maliyet_doviz = {
+            'usd': fabrika_maliyeti / usd_kur,
+            'eur': fabrika_maliyeti / eur_kur,
+            'gbp': fabrika_maliyeti / gbp_kur,
+            'islem_tarihi_kuru': False,
+            'kursuz_kayit': 0,
+        }
 
     context = {
         # Üst Mavi Kart
@@ -921,72 +780,57 @@ def odeme_dashboard(request):
     - Kartların boş gelme sorunu giderildi (Fatura ve Hakediş toplamları eklendi).
     - Negatif bakiyeler AVANS, Pozitif bakiyeler BORÇ olarak ayrılır.
     - Yaklaşan çeklerde ödenmişler gizlenir.
+    - Hesaplanan context veri sürümü anahtarıyla cache'lenir (finans verisi değişince düşer).
     """
     if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
         return redirect("erisim_engellendi")
 
     bugun = timezone.now().date()
-    ufuk = bugun + timedelta(days=30)
-    guncel_kurlar = tcmb_kur_getir()
+    context = dashboard_cache.getir("odeme_dashboard", bugun, lambda: _odeme_dashboard_context(bugun))
+    return render(request, "odeme_dashboard.html", context)
 
-    # --- 1. ADIM: Hakediş ve Fatura Bakiyelerini Hafızaya (Map) Al ---
-    
-    # Hakediş Bakiyeleri
-    h_map = {}
-    hakedisler = Hakedis.objects.filter(onay_durumu=True).select_related("satinalma__teklif__tedarikci")
-    for hk in hakedisler:
-        try:
-            ted_id = hk.satinalma.teklif.tedarikci.id
-            kalan_tl = _hakedis_remaining_tl(hk)
-            if kalan_tl != 0:
-                h_map[ted_id] = (h_map.get(ted_id, Decimal("0.00")) + kalan_tl).quantize(Decimal("0.01"))
-        except:
-            continue
 
-    # Fatura Bakiyeleri
-    f_map = {}
-    faturalar = Fatura.objects.select_related("tedarikci").all()
-    for fat in faturalar:
-        if not fat.tedarikci:
-            continue
-        kalan_tl = _invoice_remaining_tl(fat, guncel_kurlar)
-        if kalan_tl != 0:
-            f_map[fat.tedarikci.id] = (f_map.get(fat.tedarikci.id, Decimal("0.00")) + kalan_tl).quantize(Decimal("0.01"))
+def _odeme_dashboard_context(bugun):
+    ufuk = bugun + timedelta(days=30)
 
+    # --- 1. ADIM: Tedarikçi bakiyeleri materyalize defterden (tek sorgu) ---
+    bakiyeler = (
+        TedarikciBakiye.objects
+        .exclude(kalan_borc=0)
+        .select_related("tedarikci")
+        .order_by("tedarikci__firma_unvani")
+    )
 
-    # --- 2. ADIM: Kartlar İçin Özel Toplamları Hesapla (EKSİK OLAN KISIM BURASIYDI) ---
-    # Sadece pozitif (borç) bakiyeleri topluyoruz.
-    odenmemis_fatura_toplam = sum(amount for amount in f_map.values() if amount > 0)
-    odenmemis_hakedis_toplam = sum(amount for amount in h_map.values() if amount > 0)
+    # --- 2. ADIM: Kartlar İçin Özel Toplamlar (sadece pozitif bakiyeler) ---
+    kart = TedarikciBakiye.objects.aggregate(
+        fatura=Coalesce(Sum("fatura_kalan", filter=Q(fatura_kalan__gt=0)), Decimal("0.00")),
+        hakedis=Coalesce(Sum("hakedis_kalan", filter=Q(hakedis_kalan__gt=0)), Decimal("0.00")),
+    )
+    odenmemis_fatura_toplam = kart["fatura"]
+    odenmemis_hakedis_toplam = kart["hakedis"]
 
 
-    # --- 3. ADIM: Tedarikçileri Gez ve Cari Listesini Oluştur ---
+    # --- 3. ADIM: Cari Listesini Oluştur ---
     cari_listesi = []
     toplam_piyasa_borcu = Decimal("0.00")   # Bizim ödeyeceğimiz (+)
     toplam_verilen_avans = Decimal("0.00")  # Bizim alacağımız (-)
 
-    for ted in Tedarikci.objects.all().order_by("firma_unvani"):
-        f_kalan = f_map.get(ted.id, Decimal("0.00"))
-        h_kalan = h_map.get(ted.id, Decimal("0.00"))
-        
-        # Net Bakiye
-        bakiye = (f_kalan + h_kalan).quantize(Decimal("0.01"))
-
-        if bakiye != Decimal("0.00"):
-            cari_listesi.append({
-                "id": ted.id,
-                "firma": ted.firma_unvani,
-                "fatura_kalan": f_kalan,
-                "hakedis_kalan": h_kalan,
-                "toplam_kalan": bakiye,
-                "is_avans": bakiye < 0  # Eksi ise Avanstır
-            })
-
-            # Dashboard Genel Toplamlarını Güncelle
-            if bakiye > 0:
-                toplam_piyasa_borcu += bakiye
-            else:
-                toplam_verilen_avans += abs(bakiye)
+    for b in bakiyeler:
+        bakiye = b.kalan_borc
+        cari_listesi.append({
+            "id": b.tedarikci_id,
+            "firma": b.tedarikci.firma_unvani,
+            "fatura_kalan": b.fatura_kalan,
+            "hakedis_kalan": b.hakedis_kalan,
+            "toplam_kalan": bakiye,
+            "is_avans": bakiye < 0  # Eksi ise Avanstır
+        })
+
+        # Dashboard Genel Toplamlarını Güncelle
+        if bakiye > 0:
+            toplam_piyasa_borcu += bakiye
+        else:
+            toplam_verilen_avans += abs(bakiye)
 
     # Listeyi sırala
     cari_listesi.sort(key=lambda x: abs(x["toplam_kalan"]), reverse=True)
@@ -1017,61 +861,122 @@ def odeme_dashboard(request):
         "cari_borc_toplam": toplam_piyasa_borcu,
         "verilen_avans_toplam": toplam_verilen_avans,
         "cari_listesi": cari_listesi,
-        "yaklasan_cekler": yaklasan_cekler,
+        "yaklasan_cekler": list(yaklasan_cekler),
         "yaklasan_cek_toplam": yaklasan_cek_toplam,
         "bugun": bugun,
         "ufuk": ufuk,
     }
 
-    return render(request, "odeme_dashboard.html", context)
+    return context
+
+
+@login_required
+def ekran_cache_durumu(request):
+    """Ödeme merkezi cache isabet/ıska sayaçları (izleme için)."""
+    if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
+        return JsonResponse({"ok": False, "message": "Yetkisiz"}, status=403)
+    return JsonResponse({"ok": True, "odeme_dashboard": dashboard_cache.metrics("odeme_dashboard")})
 
 
 @login_required
 def cek_takibi(request):
     """
     ÇEK TAKİP MERKEZİ
-    - Çekler vade tarihine göre ve ödenme durumuna göre kategorize edilir.
+    - Çekler tek sorguda çekilir, kategori (gecikmiş / yaklaşan / ileri / ödenmiş) veritabanında
+      Case/When ile belirlenir; kova toplamları tek GROUP BY sorgusuyla gelir.
     """
     if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
         return redirect("erisim_engellendi")
 
     bugun = timezone.now().date()
-    otuz_gun_sonra = bugun + timedelta(days=30)
-
-    # Sadece ÇEK olan ödemeleri çek
-    cekler = Odeme.objects.filter(odeme_turu='cek').select_related('tedarikci').order_by('vade_tarihi')
-
-    # 1. Gecikmişler: Vadesi bugünden küçük VE henüz ödenmemiş
-    gecikmisler = cekler.filter(vade_tarihi__lt=bugun, is_cek_odendi=False)
-
-    # 2. Yaklaşanlar: Bugün ile 30 gün arası VE henüz ödenmemiş
-    yaklasanlar = cekler.filter(
-        vade_tarihi__gte=bugun, 
-        vade_tarihi__lte=otuz_gun_sonra, 
-        is_cek_odendi=False
-    )
-
-    # 3. İleri Tarihliler: 30 günden sonrası VE henüz ödenmemiş
-    ileri_tarihliler = cekler.filter(vade_tarihi__gt=otuz_gun_sonra, is_cek_odendi=False)
 
-    # 4. Ödenmişler (Arşiv): is_cek_odendi=True olanlar
-    odenmisler = cekler.filter(is_cek_odendi=True).order_by('-vade_tarihi')
+    kovalar = {k: [] for k in CEK_KATEGORILERI}
+    for cek in ChequeService.cekler(bugun):
+        kovalar[cek.kategori].append(cek)
 
-    # Toplam Bekleyen Risk Hesabı (Gecikmiş + Yaklaşan + İleri)
-    risk_qs = cekler.filter(is_cek_odendi=False)
-    toplam_risk = sum([to_decimal(c.tutar) for c in risk_qs])
+    ozet = ChequeService.ozet(bugun)
 
     context = {
-        'gecikmisler': gecikmisler,
-        'yaklasanlar': yaklasanlar,
-        'ileri_tarihliler': ileri_tarihliler,
-        'odenmisler': odenmisler,
-        'toplam_risk': toplam_risk,
+        'gecikmisler': kovalar["gecikmis"],
+        'yaklasanlar': kovalar["yaklasan"],
+        'ileri_tarihliler': kovalar["ileri"],
+        'odenmisler': kovalar["odendi"][::-1],  # Arşiv: en yeni vade üstte
+        'ozet': ozet,
+        'toplam_risk': ozet["toplam_risk"],
         'bugun': bugun,
     }
 
     return render(request, 'cek_takibi.html', context)
 
+
+@login_required
+def api_cek_takvimi(request):
+    """
+    AJAX: ödenmemiş çeklerin vade takvimi.
+    ?gruplama=gun|hafta (varsayılan gun), ?d1=YYYY-MM-DD, ?d2=YYYY-MM-DD
+    """
+    if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
+        return JsonResponse({"success": False, "message": "Yetkisiz"}, status=403)
+
+    gruplama = request.GET.get("gruplama", "gun")
+    if gruplama not in ("gun", "hafta"):
+        return JsonResponse({"success": False, "message": "gruplama: gun | hafta"}, status=400)
+
+    try:
+        d1 = parse_date(request.GET.get("d1") or "") or None
+        d2 = parse_date(request.GET.get("d2") or "") or None
+    except ValueError:
+        return JsonResponse({"success": False, "message": "Geçersiz tarih"}, status=400)
+
+    donemler = ChequeService.takvim(d1, d2, gruplama)
+    return JsonResponse({
+        "success": True,
+        "gruplama": gruplama,
+        "donemler": [
+            {"tarih": d["tarih"].isoformat(), "toplam": float(d["toplam"]), "adet": d["adet"]}
+            for d in donemler
+        ],
+        "toplam": float(sum((d["toplam"] for d in donemler), Decimal("0.00"))),
+    })
+
+
+@login_required
+def api_kpi_trend(request):
+    """
+    AJAX: günlük finans KPI özetinden trend dizileri (tek aralık sorgusu).
+    ?d1=YYYY-MM-DD&d2=YYYY-MM-DD (varsayılan son 180 gün), ?alan=piyasa_borc&alan=cek_riski (varsayılan tümü)
+    ?tarih=YYYY-MM-DD: o gün (yoksa önceki son gün) ekranın gösterdiği değerler.
+    """
+    if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
+        return JsonResponse({"success": False, "message": "Yetkisiz"}, status=403)
+
+    try:
+        tarih = parse_date(request.GET.get("tarih") or "")
+        d2 = parse_date(request.GET.get("d2") or "") or timezone.localdate()
+        d1 = parse_date(request.GET.get("d1") or "") or d2 - timedelta(days=180)
+    except ValueError:
+        return JsonResponse({"success": False, "message": "Geçersiz tarih"}, status=400)
+
+    if tarih:
+        ozet = KpiSnapshotService.tarihteki(tarih)
+        if ozet is None:
+            return JsonResponse({"success": False, "message": "Bu tarihten önce özet yok"}, status=404)
+        return JsonResponse({
+            "success": True,
+            "tarih": ozet.tarih.isoformat(),
+            **{a: float(getattr(ozet, a)) for a in KPI_SERI_ALANLARI},
+            "gider_kategorileri": {k: float(v) for k, v in ozet.gider_kategorileri.items()},
+        })
+
+    alanlar = request.GET.getlist("alan") or KPI_SERI_ALANLARI
+    seri = KpiSnapshotService.seri(d1, d2, alanlar)
+    return JsonResponse({
+        "success": True,
+        "tarihler": [t.isoformat() for t in seri.pop("tarihler")],
+        **{a: [float(v) for v in degerler] for a, degerler in seri.items()},
+    })
+
+
 @login_required
 def cek_durum_degistir(request, odeme_id):
     """
@@ -1104,24 +1009,14 @@ def finans_ozeti(request):
 def get_tedarikci_bakiye(request, tedarikci_id):
     """
     AJAX: seçilen tedarikçinin güncel kalan borcunu TL döndürür.
-    (Fatura kalan TL + Hakediş kalan TL)
+    (Fatura kalan TL + Hakediş kalan TL; cari bakiye defterinden tek satır)
     """
     if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
         return JsonResponse({"success": False, "message": "Yetkisiz"}, status=403)
 
     try:
         tedarikci = get_object_or_404(Tedarikci, id=tedarikci_id)
-        guncel_kurlar = tcmb_kur_getir()
-
-        f_kalan = Decimal("0.00")
-        for fat in Fatura.objects.filter(tedarikci=tedarikci):
-            f_kalan += _invoice_remaining_tl(fat, guncel_kurlar)
-
-        h_kalan = Decimal("0.00")
-        for hk in Hakedis.objects.filter(satinalma__teklif__tedarikci=tedarikci, onay_durumu=True):
-            h_kalan += _hakedis_remaining_tl(hk)
-
-        toplam = (to_decimal(f_kalan) + to_decimal(h_kalan)).quantize(Decimal("0.01"))
+        toplam = BalanceService.bakiye(tedarikci.id).kalan_borc
         return JsonResponse({"success": True, "kalan_bakiye": float(toplam)})
 
     except Exception as e:
@@ -1132,42 +1027,20 @@ def get_tedarikci_bakiye(request, tedarikci_id):
 def odeme_sil(request, odeme_id):
     """
     ÖDEME SİLME
-    - Allocation varsa önce dağıtımları siler, ilgili faturaları yeniden hesaplar.
-    - Sonra ödemeyi siler.
+    - Allocation varsa önce dağıtımları siler, sonra ödemeyi siler.
+    - Etkilenen faturaların odenen_tutar'ı commit sonrası tek seferde yenilenir (signals).
     """
     if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
         return redirect("erisim_engellendi")
 
-    guncel_kurlar = tcmb_kur_getir()
     odeme = get_object_or_404(Odeme, id=odeme_id)
 
     try:
         with transaction.atomic():
-            affected_faturas = []
-
             if _odeme_dagitim_supported():
-                try:
-                    affected_faturas = list(Fatura.objects.filter(dagitimlar__odeme=odeme).distinct())
-                except Exception:
-                    affected_faturas = []
-
-                try:
-                    OdemeDagitim.objects.filter(odeme=odeme).delete()
-                except Exception:
-                    pass
-
-            if odeme.fatura:
-                try:
-                    if odeme.fatura not in affected_faturas:
-                        affected_faturas.append(odeme.fatura)
-                except Exception:
-                    pass
-
+                OdemeDagitim.objects.filter(odeme=odeme).delete()
             odeme.delete()
 
-            for fat in affected_faturas:
-                _recalc_invoice_odenen_tutar_orj(fat, guncel_kurlar)
-
         messages.warning(request, "🗑️ Ödeme kaydı silindi.")
     except Exception as e:
         messages.error(request, f"Silme hatası: {str(e)}")
@@ -14,6 +14,7 @@ from core.models import (
 )
 from .guvenlik import yetki_kontrol
 from core.utils import to_decimal, tcmb_kur_getir
+from core.services.cari_bakiye import BalanceService
 
 def erisim_engellendi(request):
     return render(request, 'erisim_engellendi.html')
@@ -165,24 +166,16 @@ def belge_yazdir(request, model_name, pk):
         # Cari Mutabakat Formu (Snapshot)
         obj = get_object_or_404(Tedarikci, pk=pk)
         
-        # Basit Bakiye Hesabı (Fatura+Hakediş - Ödeme)
-        t_fat = obj.faturalar.aggregate(t=Sum('genel_toplam'))['t'] or 0
-        t_ode = obj.odemeler.aggregate(t=Sum('tutar'))['t'] or 0
-        
-        # Hakediş toplama (biraz dolaylı)
-        t_hak = 0
-        for teklif in obj.teklifler.all():
-            if hasattr(teklif, 'satinalma_donusumu'):
-                for h in teklif.satinalma_donusumu.hakedisler.filter(onay_durumu=True):
-                    t_hak += (h.brut_tutar + h.kdv_tutari)
-        
-        bakiye = (float(t_fat) + float(t_hak)) - float(t_ode)
+        # Bakiye (Fatura+Hakediş - Ödeme) cari bakiye defterinden
+        cari = BalanceService.bakiye(obj.id)
+        borc = float(cari.fatura_toplam) + float(cari.hakedis_toplam)
+        bakiye = float(cari.cari_bakiye)
 
         context = {
             'belge': obj, 'model_name': 'tedarikci',
             'baslik': "CARİ HESAP MUTABAKAT MEKTUBU",
             'kod': f"MUT-{obj.id:04d}", 'tarih': timezone.now(),
-            'ekstra': {'bakiye': bakiye, 'borc': float(t_fat)+float(t_hak), 'alacak': float(t_ode)}
+            'ekstra': {'bakiye': bakiye, 'borc': borc, 'alacak': float(cari.odeme_toplam)}
         }
 
     else:
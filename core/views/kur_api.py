@@ -1,28 +1,142 @@
-from django.http import JsonResponse
+import hashlib
+
+from django.http import JsonResponse, HttpResponseNotModified
 from django.views.decorators.http import require_GET
 from django.contrib.auth.decorators import login_required
+from django.utils.cache import patch_cache_control, add_never_cache_headers, quote_etag
+
+from core.services.exchange_rates import get_rates_bulk, is_historical, _as_date
+from core.services import tcmb_client
+from core.views.guvenlik import yetki_kontrol
+
+
+# Geçmiş tarihli kurlar değişmez: tarayıcı 1 yıl boyunca tekrar sormasın
+HISTORICAL_MAX_AGE = 365 * 24 * 60 * 60
+# Bugünün kuru TCMB yayınına kadar değişebilir: kısa süreli cache
+TODAY_MAX_AGE = 5 * 60
+
+
+def _split_param(values):
+    """?pb=USD,EUR&pb=GBP -> ['USD', 'EUR', 'GBP'] (sıra korunur, tekrarlar atılır)"""
+    out = []
+    for raw in values:
+        for part in (raw or "").split(","):
+            part = part.strip()
+            if part and part not in out:
+                out.append(part)
+    return out
 
-from core.services.exchange_rates import get_try_per_currency
+
+def _params_etag(pbs, dates):
+    raw = "|".join(pbs) + "@" + "|".join(d.isoformat() for d in dates)
+    return quote_etag(hashlib.md5(raw.encode("utf-8")).hexdigest())
 
 
 @require_GET
 @login_required
 def kur_getir(request):
-    pb = (request.GET.get("pb") or "").upper().strip()
-    d = (request.GET.get("date") or "").strip()  # YYYY-MM-DD (opsiyonel)
-
-    res = get_try_per_currency(pb, for_date=d if d else None)
-
-    if not res.ok or res.rate is None:
-        return JsonResponse(
-            {"ok": False, "pb": pb, "date": d or None, "message": res.message or "Kur alınamadı"},
-            status=200
-        )
-
-    return JsonResponse({
-        "ok": True,
-        "pb": pb,
-        "date": d or None,
-        "rate": str(res.rate),
-        "source": res.source,
-    })
+    """
+    Tekli kullanım (geriye uyumlu):
+        /api/kur/?pb=USD&date=YYYY-MM-DD
+    Toplu kullanım:
+        /api/kur/?pb=USD,EUR,GBP&date=2024-01-02&date=2024-01-03
+        -> {"ok": true, "rates": {"2024-01-02": {"USD": "...", ...}, ...}}
+
+    Tarihi verilmeyen istek "bugün" (today.xml) kabul edilir.
+    Sadece geçmiş tarihleri içeren başarılı cevaplar uzun süreli Cache-Control + ETag alır.
+    """
+    pbs = [p.upper() for p in _split_param(request.GET.getlist("pb"))]
+    raw_dates = _split_param(request.GET.getlist("date"))
+
+    dates = []
+    for d in raw_dates:
+        dt = _as_date(d)
+        if dt is None:
+            return JsonResponse({"ok": False, "date": d, "message": "Geçersiz tarih (YYYY-MM-DD)"}, status=400)
+        if dt not in dates:
+            dates.append(dt)
+
+    batch = len(pbs) > 1 or len(dates) > 1
+    if not dates:
+        dates = [None]
+
+    all_historical = all(is_historical(dt) for dt in dates)
+
+    # Geçmiş kurlar değişmediği için ETag parametrelerden türetilir:
+    # tarayıcı elindeki kopyayı doğrularken veritabanına hiç gidilmez.
+    etag = _params_etag(pbs, dates) if (pbs and all_historical) else None
+    if etag and etag in [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]:
+        resp = HttpResponseNotModified()
+        resp["ETag"] = etag
+        patch_cache_control(resp, private=True, max_age=HISTORICAL_MAX_AGE, immutable=True)
+        return resp
+
+    results = get_rates_bulk(pbs, dates) if pbs else {}
+
+    if not batch:
+        pb = pbs[0] if pbs else ""
+        dt = dates[0]
+        d = dt.isoformat() if dt else None
+        res = results.get((pb, dt))
+
+        if res is None or not res.ok or res.rate is None:
+            resp = JsonResponse(
+                {"ok": False, "pb": pb, "date": d, "message": (res.message if res else None) or "Kur alınamadı"},
+                status=200
+            )
+            add_never_cache_headers(resp)
+            return resp
+
+        resp = JsonResponse({
+            "ok": True,
+            "pb": pb,
+            "date": d,
+            "rate": str(res.rate),
+            "source": res.source,
+        })
+        all_ok = True
+    else:
+        rates, missing = {}, []
+        for dt in dates:
+            key = dt.isoformat() if dt else "today"
+            rates[key] = {}
+            for pb in pbs:
+                res = results[(pb, dt)]
+                if res.ok and res.rate is not None:
+                    rates[key][pb] = str(res.rate)
+                else:
+                    rates[key][pb] = None
+                    missing.append({"pb": pb, "date": dt.isoformat() if dt else None, "message": res.message or "Kur alınamadı"})
+
+        all_ok = not missing
+        resp = JsonResponse({
+            "ok": all_ok,
+            "pb": pbs,
+            "dates": [dt.isoformat() if dt else None for dt in dates],
+            "rates": rates,
+            "missing": missing,
+        })
+
+    if all_ok and etag:
+        resp["ETag"] = etag
+        patch_cache_control(resp, private=True, max_age=HISTORICAL_MAX_AGE, immutable=True)
+    elif all_ok:
+        patch_cache_control(resp, private=True, max_age=TODAY_MAX_AGE)
+    else:
+        add_never_cache_headers(resp)
+
+    return resp
+
+
+@require_GET
+@login_required
+def kur_servis_durumu(request):
+    """
+    TCMB dış çağrı metrikleri: devre durumu (open/closed), hata sayaçları, gecikme.
+    """
+    if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
+        return JsonResponse({"ok": False, "message": "Yetkisiz"}, status=403)
+
+    resp = JsonResponse({"ok": True, "tcmb": tcmb_client.metrics()})
+    add_never_cache_headers(resp)
+    return resp
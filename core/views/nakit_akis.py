@@ -0,0 +1,51 @@
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import redirect, render
+from django.utils import timezone
+
+from core.services.nakit_akis import CashFlowService
+from .guvenlik import yetki_kontrol
+
+
+UFUKLAR = (30, 60, 90, 180)
+
+
+@login_required
+def nakit_akis_projeksiyonu(request):
+    """
+    NAKİT AKIŞ PROJEKSİYONU
+    - Çek vadeleri + açık faturalar (tedarikçi ödeme vadesiyle) + onaylı hakedişler.
+    - ?gun=30|60|90|180 ufuk (varsayılan 90), ?format=json grafik/entegrasyon için diziler.
+    """
+    if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
+        return redirect("erisim_engellendi")
+
+    try:
+        gun = int(request.GET.get("gun", 90))
+    except (TypeError, ValueError):
+        gun = 90
+    if gun not in UFUKLAR:
+        gun = 90
+
+    p = CashFlowService.projeksiyon(timezone.localdate(), gun)
+
+    if request.GET.get("format") == "json":
+        return JsonResponse({
+            "bugun": p.bugun.isoformat(),
+            "gun": p.gun,
+            "tarihler": [t.isoformat() for t in p.tarihler],
+            "cek": [str(v) for v in p.cek],
+            "fatura": [str(v) for v in p.fatura],
+            "hakedis": [str(v) for v in p.hakedis],
+            "toplam": [str(v) for v in p.toplam],
+            "gecikmis": {k: str(v) for k, v in p.gecikmis.items()},
+            "ufuk_disi": {k: str(v) for k, v in p.ufuk_disi.items()},
+        })
+
+    return render(request, "nakit_akis.html", {
+        "p": p,
+        "gunluk": p.gunluk(),
+        "haftalik": p.haftalik(),
+        "gecikmis_toplam": sum(p.gecikmis.values()),
+        "ufuklar": UFUKLAR,
+    })
@@ -0,0 +1,122 @@
+from datetime import date, timedelta
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Sum
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
+
+from core.models import OdemeTalimati
+from core.services.odeme_talimati import PaymentRunService
+from core.utils import clean_currency_input
+from .guvenlik import yetki_kontrol
+
+
+def _hata_metni(e: ValidationError) -> str:
+    return " ".join(e.messages)
+
+
+@login_required
+def odeme_talimatlari(request):
+    """
+    ÖDEME TALİMATLARI (TOPLU ÖDEME)
+    - Liste: geçmiş talimatlar (satır sayısı / toplam tek sorguda).
+    - POST: vade kesim tarihine göre önerilen tutarlarla yeni taslak talimat.
+    """
+    if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
+        return redirect("erisim_engellendi")
+
+    bugun = timezone.localdate()
+
+    if request.method == "POST":
+        try:
+            kesim = date.fromisoformat(request.POST.get("kesim_tarihi") or "")
+            tarih = date.fromisoformat(request.POST.get("tarih") or bugun.isoformat())
+        except ValueError:
+            messages.error(request, "Geçersiz tarih.")
+            return redirect("odeme_talimatlari")
+        try:
+            talimat = PaymentRunService.olustur(
+                kesim, tarih=tarih, kullanici=request.user, aciklama=request.POST.get("aciklama", "")
+            )
+        except ValidationError as e:
+            messages.warning(request, _hata_metni(e))
+            return redirect("odeme_talimatlari")
+        messages.success(request, f"Ödeme talimatı #{talimat.id} oluşturuldu; tutarları kontrol edip işleyin.")
+        return redirect("odeme_talimati_detay", pk=talimat.id)
+
+    talimatlar = OdemeTalimati.objects.annotate(
+        satir_sayisi=Count("satirlar"), toplam=Sum("satirlar__tutar")
+    )[:50]
+
+    return render(request, "odeme_talimatlari.html", {
+        "talimatlar": talimatlar,
+        "bugun": bugun,
+        # Varsayılan kesim: gelecek cuma
+        "varsayilan_kesim": bugun + timedelta(days=(4 - bugun.weekday()) % 7),
+    })
+
+
+@login_required
+def odeme_talimati_detay(request, pk):
+    """
+    Talimat satırları: önerilen / ödenecek tutar, IBAN.
+    POST action=kaydet: tutar düzeltmeleri; action=isle: tüm ödemeleri tek transaction'da yazar.
+    """
+    if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
+        return redirect("erisim_engellendi")
+
+    talimat = get_object_or_404(OdemeTalimati, pk=pk)
+
+    if request.method == "POST":
+        try:
+            if talimat.durum == "taslak":
+                tutarlar = {}
+                for key, value in request.POST.items():
+                    if key.startswith("tutar_") and key[6:].isdigit():
+                        tutarlar[int(key[6:])] = clean_currency_input(value)
+                PaymentRunService.tutarlari_guncelle(talimat, tutarlar)
+
+            if request.POST.get("action") == "isle":
+                PaymentRunService.isle(talimat.id)
+                messages.success(request, f"✅ Ödeme talimatı #{talimat.id} işlendi; banka dosyasını indirebilirsiniz.")
+            else:
+                messages.success(request, "Tutarlar kaydedildi.")
+        except ValidationError as e:
+            messages.error(request, _hata_metni(e))
+        return redirect("odeme_talimati_detay", pk=talimat.id)
+
+    satirlar = talimat.satirlar.select_related("tedarikci", "odeme")
+    ozet = talimat.satirlar.aggregate(onerilen=Sum("onerilen_tutar"), toplam=Sum("tutar"))
+
+    return render(request, "odeme_talimati_detay.html", {
+        "talimat": talimat,
+        "satirlar": satirlar,
+        "ozet": ozet,
+    })
+
+
+@login_required
+def odeme_talimati_indir(request, pk, bicim):
+    """
+    Banka toplu EFT dosyası (akışlı): bicim = csv | xml (ISO 20022 pain.001).
+    Sadece işlenmiş talimat: dosya, ödemeleri yazılmış satırlardan üretilir (taslakta tutarlar henüz değişebilir).
+    """
+    if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
+        return redirect("erisim_engellendi")
+
+    talimat = get_object_or_404(OdemeTalimati, pk=pk)
+    if talimat.durum != "islendi":
+        messages.error(request, "Banka dosyası sadece işlenmiş talimat için indirilebilir. Önce talimatı işleyin.")
+        return redirect("odeme_talimati_detay", pk=talimat.id)
+    if bicim == "csv":
+        response = StreamingHttpResponse(PaymentRunService.csv_parcalari(talimat), content_type="text/csv; charset=utf-8")
+    elif bicim == "xml":
+        response = StreamingHttpResponse(PaymentRunService.xml_parcalari(talimat), content_type="application/xml")
+    else:
+        raise Http404
+
+    response["Content-Disposition"] = f'attachment; filename="odeme_talimati_{talimat.id}_{talimat.tarih}.{bicim}"'
+    return response
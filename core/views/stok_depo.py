@@ -10,6 +10,7 @@ from django.http import JsonResponse, HttpResponse
 from core.models import Malzeme, DepoHareket, MalzemeTalep, SatinAlma, Depo, DepoTransfer
 from core.forms import DepoTransferForm
 from core.services.stock import StockService
+from core.services.donem_kapanisi import PeriodCloseService
 from .guvenlik import yetki_kontrol
 
 @login_required
@@ -204,13 +205,12 @@ def envanter_raporu(request):
     
     # 1. KRİTİK FİLTRE: Sadece kullanım yeri OLMAYAN (is_kullanim_yeri=False) depoların stoklarını getir
     # Böylece Şantiye'ye (Kullanım yeri) giden 180 adet otomatik olarak 'yok' sayılır.
-    stok_verileri = DepoHareket.objects.filter(
-        depo__is_kullanim_yeri=False
-    ).values('depo_id', 'malzeme_id').annotate(
-        toplam_stok=Coalesce(Sum('miktar', filter=Q(islem_turu='giris')), Value(0, output_field=DecimalField())) - 
-                    Coalesce(Sum('miktar', filter=Q(islem_turu='cikis')), Value(0, output_field=DecimalField())) -
-                    Coalesce(Sum('miktar', filter=Q(islem_turu='iade')), Value(0, output_field=DecimalField()))
-    ).filter(toplam_stok__gt=0) # Sadece gerçek stoğu kalanları listele
+    # Kapalı dönemler dönem stok özetinden, açık dönem hareketleri tek GROUP BY ile gelir.
+    stok_verileri = [
+        {'malzeme_id': m_id, 'depo_id': d_id, 'toplam_stok': miktar}
+        for (m_id, d_id), miktar in PeriodCloseService.stok_bakiyeleri(depo__is_kullanim_yeri=False).items()
+        if miktar > 0  # Sadece gerçek stoğu kalanları listele
+    ]
 
     # 2. Modelleri tek seferde hafızaya al (N+1 Query problemini önlemek için)
     depo_map = {d.id: d for d in Depo.objects.all()}
@@ -6,6 +6,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
 from django.db import transaction
+from django.views.decorators.http import require_POST
 
 from core.models import MalzemeTalep, Teklif, Malzeme, IsKalemi, SatinAlma
 from core.forms import TalepForm, TeklifForm
@@ -228,6 +229,31 @@ def teklif_durum_guncelle(request, teklif_id, yeni_durum):
     return redirect(referer) if referer else redirect('icmal_raporu')
 
 
+@login_required
+@require_POST
+def teklif_toplu_onayla(request):
+    """
+    İcmal ekranında seçilen teklifleri tek seferde onaylar.
+    Kur bir kez çözülür, teklifler ve siparişler toplu yazılır (PaymentService.teklifleri_toplu_onayla).
+    """
+    if not yetki_kontrol(request.user, ['OFIS_VE_SATINALMA', 'YONETICI']):
+        return redirect('erisim_engellendi')
+
+    secilenler = request.POST.getlist('teklif_ids')
+    if not secilenler:
+        messages.warning(request, "Onaylanacak teklif seçilmedi.")
+        return redirect('icmal_raporu')
+
+    sonuc = PaymentService.teklifleri_toplu_onayla(secilenler)
+
+    if sonuc["onaylanan"]:
+        messages.success(request, f"✅ {len(sonuc['onaylanan'])} teklif onaylandı, siparişleri oluşturuldu.")
+    for teklif_id, sebep in sonuc["atlanan"]:
+        messages.error(request, f"❌ Teklif #{teklif_id} onaylanmadı: {sebep}")
+
+    return redirect('icmal_raporu')
+
+
 @login_required
 def talep_onayla(request, talep_id):
     if not yetki_kontrol(request.user, ['OFIS_VE_SATINALMA', 'MUHASEBE_FINANS', 'YONETICI']):
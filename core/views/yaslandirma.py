@@ -0,0 +1,62 @@
+from django.contrib.auth.decorators import login_required
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
+
+from core.models import Tedarikci
+from core.services.ekstre_export import tablo_csv_parcalari
+from core.services.yaslandirma import DILIMLER, AgingService
+from .guvenlik import yetki_kontrol
+
+
+@login_required
+def yaslandirma_raporu(request):
+    """
+    BORÇ YAŞLANDIRMA RAPORU
+    - Tüm tedarikçilerin açık fatura + hakediş bakiyeleri 0-30 / 31-60 / 61-90 / 90+ gün dilimlerinde.
+    - ?tedarikci=<id>: o tedarikçinin açık kalemleri (drill-down).
+    - ?format=csv: ekrandaki tablo CSV olarak iner.
+    """
+    if not yetki_kontrol(request.user, ["MUHASEBE_FINANS", "YONETICI"]):
+        return redirect("erisim_engellendi")
+
+    bugun = timezone.localdate()
+    secilen_tedarikci = None
+    kalemler = []
+
+    tedarikci_id = request.GET.get("tedarikci")
+    if tedarikci_id:
+        secilen_tedarikci = get_object_or_404(Tedarikci, id=tedarikci_id)
+        kalemler = AgingService.kalemler(secilen_tedarikci.id, bugun)
+
+    if request.GET.get("format") == "csv":
+        if secilen_tedarikci:
+            basliklar = ("Evrak", "Tarih", "Gün", "Dilim", "Kalan (TL)")
+            satirlar = (
+                (k["evrak_no"], k["tarih"].strftime("%d.%m.%Y"), k["gun"], k["dilim_adi"], k["kalan"])
+                for k in kalemler
+            )
+            dosya = f"yaslandirma_{secilen_tedarikci.id:04d}_{bugun}.csv"
+        else:
+            rapor, _genel = AgingService.rapor(bugun)
+            basliklar = ("Tedarikçi",) + tuple(ad for _, ad in DILIMLER) + ("Toplam (TL)", "Kalem")
+            satirlar = (
+                (s.firma, s.d0_30, s.d31_60, s.d61_90, s.d90_ustu, s.toplam, s.kalem_sayisi)
+                for s in rapor
+            )
+            dosya = f"yaslandirma_{bugun}.csv"
+
+        response = StreamingHttpResponse(tablo_csv_parcalari(basliklar, satirlar), content_type="text/csv; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="{dosya}"'
+        return response
+
+    rapor, genel = AgingService.rapor(bugun)
+
+    return render(request, "yaslandirma_raporu.html", {
+        "rapor": rapor,
+        "genel": genel,
+        "dilimler": DILIMLER,
+        "secilen_tedarikci": secilen_tedarikci,
+        "kalemler": kalemler,
+        "bugun": bugun,
+    })
@@ -223,6 +223,64 @@ JAZZMIN_UI_TWEAKS = {
 }
 
 
+# ------------------------------------------------------------
+# TCMB kur servisi (gecikme bütçesi / devre kesici)
+# ------------------------------------------------------------
+# Tek çağrı için toplam süre (sn). Aşılırsa çağrı hata sayılır.
+TCMB_TIMEOUT = float(os.getenv("DJANGO_TCMB_TIMEOUT", "3"))
+# Art arda bu kadar hata olursa devre açılır...
+TCMB_CB_FAILURE_THRESHOLD = int(os.getenv("DJANGO_TCMB_CB_FAILURE_THRESHOLD", "3"))
+# ...ve bu süre (sn) boyunca TCMB'ye gidilmez, son bilinen iyi kur kullanılır.
+TCMB_CB_COOLDOWN = int(os.getenv("DJANGO_TCMB_CB_COOLDOWN", "300"))
+# today.xml kaç saniye taze kabul edilsin (aynı sayfada/peş peşe isteklerde ağa çıkmamak için)
+TCMB_TODAY_CACHE_TTL = int(os.getenv("DJANGO_TCMB_TODAY_CACHE_TTL", "600"))
+# 404 (hafta sonu/tatil, o gün kur yok) kaç saniye hatırlansın; 404 devre kesiciye hata sayılmaz
+TCMB_NOT_FOUND_TTL = int(os.getenv("DJANGO_TCMB_NOT_FOUND_TTL", "3600"))
+
+# ------------------------------------------------------------
+# Kur sağlayıcısı: "tcmb" | "xml_dizin" | "sabit" (veya RateProvider dotted path)
+# ------------------------------------------------------------
+RATE_PROVIDER = os.getenv("DJANGO_RATE_PROVIDER", "tcmb")
+# Yerel stand-in için: python manage.py kur_sunucusu -> http://127.0.0.1:8765/kurlar
+TCMB_BASE_URL = os.getenv("DJANGO_TCMB_BASE_URL", "https://www.tcmb.gov.tr/kurlar")
+# xml_dizin: TCMB ile aynı yapı (today.xml, YYYYMM/DDMMYYYY.xml)
+RATE_XML_DIR = os.getenv("DJANGO_RATE_XML_DIR", str(BASE_DIR / "kur_xml"))
+# sabit: {"USD": "..."} veya {"YYYY-MM-DD": {...}, "default": {...}}
+RATE_FIXED_TABLE = {
+    "USD": os.getenv("DJANGO_RATE_FIXED_USD", "32.5000"),
+    "EUR": os.getenv("DJANGO_RATE_FIXED_EUR", "35.2000"),
+    "GBP": os.getenv("DJANGO_RATE_FIXED_GBP", "41.1000"),
+}
+
+
+# ------------------------------------------------------------
+# Cache: "locmem" (süreç içi, varsayılan) | "file" (worker'lar arası ortak)
+# ------------------------------------------------------------
+_CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+}
+_cache_backend = os.getenv("DJANGO_CACHE_BACKEND", "locmem").strip().lower()
+CACHES = {
+    "default": {
+        "BACKEND": _CACHE_BACKENDS.get(_cache_backend, _cache_backend),
+        "LOCATION": os.getenv(
+            "DJANGO_CACHE_LOCATION",
+            str(BASE_DIR / "cache") if _cache_backend == "file" else "fabrika",
+        ),
+    }
+}
+# Ödeme merkezi gibi ekranların hesaplanmış context'i (sn). Veri değişince sürüm anahtarıyla düşer.
+DASHBOARD_CACHE_TTL = int(os.getenv("DJANGO_DASHBOARD_CACHE_TTL", "900"))
+
+
+# ------------------------------------------------------------
+# Ödeme talimatı (banka toplu EFT dosyası) - borçlu (ödeyen) hesap bilgileri
+# ------------------------------------------------------------
+ODEME_TALIMATI_BORCLU_UNVAN = os.getenv("DJANGO_ODEME_TALIMATI_BORCLU_UNVAN", "AECO")
+ODEME_TALIMATI_BORCLU_IBAN = os.getenv("DJANGO_ODEME_TALIMATI_BORCLU_IBAN", "")
+
+
 # ------------------------------------------------------------
 # Login/Logout redirects
 # ------------------------------------------------------------
@@ -8,7 +8,7 @@ from core import views
 
 # Parçalanmış Finans Modülleri
 from core.views import finans_invoices, finans_payments
-from core.views.ekstre import stok_ekstresi, cari_ekstresi
+from core.views.ekstre import stok_ekstresi, cari_ekstresi, cari_ekstre_indir
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -39,8 +39,20 @@ urlpatterns = [
     path('odeme/yap/', finans_payments.odeme_yap, name='odeme_yap'),
     path('cek-takibi/', finans_payments.cek_takibi, name='cek_takibi'),
     path('cek-durum/<int:odeme_id>/', finans_payments.cek_durum_degistir, name='cek_durum_degistir'),
+    path('api/cek-takvimi/', finans_payments.api_cek_takvimi, name='api_cek_takvimi'),
+    path('api/kpi-trend/', finans_payments.api_kpi_trend, name='api_kpi_trend'),
     path("finans/avans-mahsup/<int:tedarikci_id>/", finans_payments.avans_mahsup, name="avans_mahsup"),
+    path("finans/avans-mahsup/<int:tedarikci_id>/otomatik/", finans_payments.otomatik_mahsup, name="otomatik_mahsup"),
     path('finans/detay-ozet/', finans_payments.finans_ozeti, name='finans_ozeti'),
+    path('finans/yaslandirma/', views.yaslandirma_raporu, name='yaslandirma_raporu'),
+    path('finans/nakit-akis/', views.nakit_akis_projeksiyonu, name='nakit_akis_projeksiyonu'),
+    path('finans/odeme-talimati/', views.odeme_talimatlari, name='odeme_talimatlari'),
+    path('finans/odeme-talimati/<int:pk>/', views.odeme_talimati_detay, name='odeme_talimati_detay'),
+    path('finans/odeme-talimati/<int:pk>/indir/<str:bicim>/', views.odeme_talimati_indir, name='odeme_talimati_indir'),
+    path('finans/banka-ekstresi/', views.banka_ekstreleri, name='banka_ekstreleri'),
+    path('finans/banka-ekstresi/<int:pk>/', views.banka_ekstresi_detay, name='banka_ekstresi_detay'),
+    path('finans/donem-kapanisi/', views.donem_kapanisi, name='donem_kapanisi'),
+    path('finans/efatura/', views.efatura_yukle, name='efatura_yukle'),
 
     # 6. Talep & Teklif Yönetimi
     path('talep/yeni/', views.talep_olustur, name='talep_olustur'),
@@ -50,6 +62,7 @@ urlpatterns = [
     path('talep/geri-al/<int:talep_id>/', views.talep_arsivden_cikar, name='talep_arsivden_cikar'),
     path('teklif/ekle/', views.teklif_ekle, name='teklif_ekle'),
     path('teklif/durum/<int:teklif_id>/<str:yeni_durum>/', views.teklif_durum_guncelle, name='teklif_durum_guncelle'),
+    path('teklif/toplu-onay/', views.teklif_toplu_onayla, name='teklif_toplu_onayla'),
 
     # 7. Sipariş & Mal Kabul
     path('siparisler/', views.siparis_listesi, name='siparis_listesi'),
@@ -101,7 +114,10 @@ urlpatterns = [
     # 11. Ekstreler & API
     path("ekstre/stok/", stok_ekstresi, name="stok_ekstresi"),
     path("ekstre/cari/", cari_ekstresi, name="cari_ekstresi"),
+    path("ekstre/cari/<int:tedarikci_id>/indir/<str:bicim>/", cari_ekstre_indir, name="cari_ekstre_indir"),
     path('api/kur/', views.kur_getir, name='kur_getir'),
+    path('api/kur/durum/', views.kur_servis_durumu, name='kur_servis_durumu'),
+    path('api/ekran-cache/durum/', finans_payments.ekran_cache_durumu, name='ekran_cache_durumu'),
     path('api/tedarikci-bakiye/<int:tedarikci_id>/', views.get_tedarikci_bakiye, name='api_tedarikci_bakiye'),
     path('api/depo-stok/', views.get_depo_stok, name='get_depo_stok'),
 